@@ -0,0 +1,32 @@
+"""
+공통 모듈
+=========
+
+여러 lab이 함께 사용하는 인프라 코드를 모아둔 패키지입니다.
+
+- db: 스레드 안전한 커넥션 풀과 get_connection(), 템플릿 DB 복제
+- reset: 템플릿 교체 / COPY BINARY 스냅샷으로 빠른 리셋, 실험용 복제본 (scratch_database)
+- display: print_result / execute_and_show (서버 사이드 커서 스트리밍 모드)
+- timing: 실행/가져오기/출력 단계별 ns 타이밍과 서버 측 계획/실행 시간 기록
+- histogram: HdrHistogram 방식의 log-linear 지연 시간 히스토그램 (p50/p99/p99.9)
+- sessions: psycopg2 비동기 연결 기반 asyncio 세션 엔진 (스레드 하나로 수백 세션)
+- waits: pg_blocking_pids() / wait_event로 락 대기를 확인하고 다음 단계로 (sleep 대신)
+- plans: EXPLAIN (ANALYZE, BUFFERS, WAL, SETTINGS, FORMAT JSON) → PlanNode 트리
+- stats: 워밍업/적응형 표본 수/이상값 제외로 반복 측정하고 부트스트랩 신뢰구간으로 비교
+- cache: 측정 전 캐시 상태 고정 (warm: pg_prewarm, cold: 서버 재시작 또는 filler로 밀어내기)
+- tsdb: SQLite 기반 델타 시계열 저장소 (보존 기간, 1분/1시간 다운샘플링)
+- pgss: pg_stat_statements 스냅샷과 queryid별 델타 (calls, 실행 시간, 블록, WAL)
+- monitor: 통계 뷰 4종을 쿼리 한 번으로 샘플링, 롤링 윈도우 비율/히트율
+- activity: pg_stat_activity 대기 이벤트 표본 집계 (CPU/Lock/IO 분류, folded stack)
+- lockgraph: pg_blocking_pids() 대기 그래프 (root blocker, 연쇄 깊이, cycle, 경합 구간)
+- heappage: get_raw_page() 바이트를 struct/memoryview로 복사 없이 해석 (페이지/라인 포인터/튜플 헤더)
+- bloat: 워커 프로세스로 모든 페이지를 스캔해 라인 포인터 분류 (live/dead/redirect/unused)
+- btree: B-tree raw 페이지 해석과 레벨 단위 병렬 탐색 (BTreeWalk)
+- brin: BRIN 범위 요약 (overlap, 조건별 읽는 블록 비율)과 pages_per_range 스윕
+- gin: GIN pending list 크기 (gin_metapage_info)와 fastupdate 저장 옵션
+- advisor: pg_stat_statements 워크로드의 계획에서 후보 인덱스 추출, 복제본에서 읽기 이득/쓰기 비용 측정
+- redundant: pg_index 정의 비교로 다른 인덱스가 대신할 수 있는 인덱스 찾기, DROP 전후 쓰기 증폭 측정
+- hot: fillfactor별 테이블 복사, HOT 가능한 기본 SET 절, 트랜잭션 단위 HOT 행 수, fillfactor 추천
+- clients: 클라이언트 프로세스를 같은 시각에 시작시키고 끝날 때까지 서버 상태 샘플링
+- charts: Agg 백엔드 pyplot과 labs/graphs/ PNG 저장
+"""
@@ -0,0 +1,148 @@
+"""
+대기 이벤트 샘플링
+==================
+
+pg_stat_activity를 짧은 간격으로 반복해서 읽으면, 각 백엔드가 그 순간 무엇을
+하고 있었는지(CPU에서 실행 중 / 락 대기 / I/O 대기 ...)의 표본이 쌓입니다.
+표본 수 × 간격이 곧 그 상태로 보낸 시간의 추정치입니다 (pg_wait_sampling과 같은 방식).
+
+- wait_event_type이 NULL인 active 백엔드는 CPU에서 실행 중으로 분류
+- idle 세션(클라이언트 입력 대기)은 기본적으로 제외
+  idle in transaction은 락을 쥐고 있을 수 있으므로 포함
+- query_id는 compute_query_id가 켜져 있어야 채워짐
+  (pg_stat_statements가 로드되어 있으면 auto로 켜짐)
+
+WaitProfile은 (backend_type, query_id, wait_event_type, wait_event)별 표본 수를 모으고
+flamegraph.pl 입력 형식(folded stack)과 요약 표를 만듭니다.
+
+사용 예:
+    profile = WaitProfile(interval=0.01)
+    while ...:
+        profile.add(sample_activity(cur))
+    print(profile.by_wait_type())
+"""
+
+import re
+from collections import Counter, defaultdict
+
+CPU = 'CPU'
+TEXT_LENGTH = 120
+
+SAMPLE_QUERY = f"""
+    SELECT backend_type, state, wait_event_type, wait_event, query_id, left(query, {TEXT_LENGTH})
+    FROM pg_stat_activity
+    WHERE pid <> pg_backend_pid()
+      AND (%(all_databases)s OR datname = current_database() OR datname IS NULL)
+      AND (%(include_idle)s OR state IS DISTINCT FROM 'idle')
+"""
+
+
+def sample_activity(cur, all_databases=False, include_idle=False):
+    """현재 백엔드 상태 목록 [(backend_type, state, wait_type, wait_event, query_id, query)]"""
+    cur.execute(SAMPLE_QUERY, {'all_databases': all_databases, 'include_idle': include_idle})
+    return cur.fetchall()
+
+
+def classify(state, wait_event_type, wait_event):
+    """(대기 유형, 대기 이벤트) - 대기 중이 아닌 active 백엔드는 ('CPU', 'CPU')"""
+    if wait_event_type is not None:
+        return wait_event_type, wait_event
+    # 백그라운드 프로세스는 state가 NULL
+    if state in ('active', None):
+        return CPU, CPU
+    return 'Idle', state
+
+
+def _frame(text):
+    """folded stack의 한 프레임: ';'는 구분자, 공백 하나만 허용"""
+    return re.sub(r'\s+', ' ', (text or '').replace(';', ',')).strip()
+
+
+class WaitProfile:
+    """대기 이벤트 표본 집계"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.ticks = 0
+        self.skipped = 0            # 조회가 늦어 건너뛴 tick 수
+        self.elapsed = 0.0
+        self.counts = Counter()     # (backend_type, query_id, wait_type, wait_event) → 표본 수
+        self.texts = {}             # query_id → 쿼리 앞부분
+
+    def add(self, rows):
+        """sample_activity() 한 번의 결과를 더함"""
+        self.ticks += 1
+        for backend_type, state, wait_type, wait_event, query_id, query in rows:
+            wait_type, wait_event = classify(state, wait_type, wait_event)
+            if query_id is None and backend_type != 'client backend':
+                query_key = None     # autovacuum, checkpointer 등은 backend_type으로 구분
+            else:
+                query_key = query_id
+                if query_id not in self.texts and query:
+                    self.texts[query_id] = _frame(query)
+            self.counts[backend_type, query_key, wait_type, wait_event] += 1
+
+    @property
+    def samples(self):
+        return sum(self.counts.values())
+
+    @property
+    def average_active_sessions(self):
+        """tick당 평균 (idle 제외) 백엔드 수"""
+        return self.samples / self.ticks if self.ticks else 0.0
+
+    @property
+    def tick_seconds(self):
+        """표본 하나가 대표하는 시간 (tick을 건너뛰었으면 설정한 간격보다 김)"""
+        if self.elapsed and self.ticks:
+            return self.elapsed / self.ticks
+        return self.interval
+
+    def query_label(self, backend_type, query_id):
+        if query_id is None:
+            return backend_type
+        return f"{query_id} {self.texts.get(query_id, '')}".strip()
+
+    # 요약 --------------------------------------------------------------
+
+    def by_wait_type(self):
+        """[(대기 유형, 표본 수, 비율 %, 추정 시간 초)] 많은 순"""
+        totals = Counter()
+        for (_, _, wait_type, _), n in self.counts.items():
+            totals[wait_type] += n
+        return self._rows(totals)
+
+    def by_wait_event(self):
+        totals = Counter()
+        for (_, _, wait_type, wait_event), n in self.counts.items():
+            totals[f"{wait_type}:{wait_event}"] += n
+        return self._rows(totals)
+
+    def by_query(self):
+        """[(쿼리 라벨, 표본 수, 비율 %, 추정 시간 초, {대기 유형: 표본 수})] 많은 순"""
+        totals = Counter()
+        breakdown = defaultdict(Counter)
+        for (backend_type, query_id, wait_type, _), n in self.counts.items():
+            label = self.query_label(backend_type, query_id)
+            totals[label] += n
+            breakdown[label][wait_type] += n
+        return [row + (dict(breakdown[row[0]].most_common()),) for row in self._rows(totals)]
+
+    def _rows(self, totals):
+        total = sum(totals.values()) or 1
+        return [(key, n, 100.0 * n / total, n * self.tick_seconds)
+                for key, n in totals.most_common()]
+
+    def verdict(self):
+        """표본이 가장 많은 대기 유형 (예: 'Lock', 'IO', 'CPU')"""
+        rows = self.by_wait_type()
+        return rows[0][0] if rows else None
+
+    def folded(self):
+        """flamegraph.pl / speedscope 입력: 'backend;query;wait_type;wait_event 표본수' 줄 목록"""
+        lines = []
+        for (backend_type, query_id, wait_type, wait_event), n in sorted(self.counts.items(),
+                                                                          key=str):
+            frames = [backend_type, self.query_label(backend_type, query_id), wait_type, wait_event]
+            lines.append(';'.join(_frame(str(f)) for f in frames) + f" {n}")
+        return lines
@@ -0,0 +1,383 @@
+"""
+워크로드 기반 인덱스 추천
+=========================
+
+lab10 시나리오 2는 pg_stat_user_indexes로 쓰이는/안 쓰이는 인덱스만 보여줍니다.
+새 인덱스가 필요한지는 실제 쿼리로 재 봐야 알 수 있으므로, 이 모듈은
+
+1. pg_stat_statements에서 실행 시간 합계가 큰 SELECT를 고르고 (load_workload)
+   - 상수가 $n으로 정규화된 쿼리는 그대로 실행할 수 없으므로
+     known(이름 → SQL)에서 queryid가 같은 실행 가능한 쿼리를 찾음
+     (EXPLAIN (VERBOSE)의 Query Identifier로 비교)
+2. 각 쿼리의 JSON 계획에서 Seq Scan의 Filter와 Sort Key로 후보 인덱스를 만들고
+   (등호 컬럼 → 범위 컬럼 1개, 또는 등호 컬럼 → 정렬 컬럼 순서, 이미 있는 인덱스의 앞부분이면 제외)
+3. 후보마다 인덱스를 만들어 그 테이블을 쓰는 쿼리를 다시 측정하고 (evaluate)
+4. INSERT 탐침(트랜잭션 안에서 probe_rows행 INSERT 후 ROLLBACK)으로 행당 쓰기 비용을 잽니다.
+
+순이득 = Σ 호출 수 × 줄어든 중앙값 (신뢰구간이 1을 넘는 쿼리만)
+       - 테이블에 쓰인 행 수 (n_tup_ins + non-HOT UPDATE) × 늘어난 행당 쓰기 시간
+
+호출 수와 쓰인 행 수는 원본 DB의 누적 통계이므로 같은 관찰 구간의 비용/이득을 비교합니다.
+evaluate()는 인덱스를 실제로 만들고 지우므로 reset.scratch_database() 복제본 안에서 실행합니다.
+
+사용 예:
+    workload, skipped = load_workload(cur, known=bench.CATALOGUE)
+    with reset.scratch_database('mvcc_lab_advisor'):
+        results = evaluate(workload)
+"""
+
+import re
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+from common import stats
+from common.db import get_connection
+from common.plans import explain
+
+TOP = 10
+PROBE_ROWS = 200
+MAX_COLUMNS = 3
+CANDIDATE_PREFIX = 'advisor_'
+
+WORKLOAD_QUERY = """
+    SELECT queryid, sum(calls)::bigint, sum(total_exec_time)::float8, min(query)
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+      AND queryid IS NOT NULL AND toplevel
+      AND query ~* '^\\s*(select|with)\\s'
+      AND query !~* '\\mpg_|information_schema'
+    GROUP BY queryid
+    ORDER BY sum(total_exec_time) DESC
+"""
+COLUMNS_QUERY = """
+    SELECT attname, atthasdef OR attidentity <> '' OR attgenerated <> ''
+    FROM pg_attribute
+    WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+    ORDER BY attnum
+"""
+INDEX_COLUMNS_QUERY = """
+    SELECT array_agg(a.attname ORDER BY k.n)
+    FROM pg_index i
+    CROSS JOIN LATERAL unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, n)
+    LEFT JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+    WHERE i.indrelid = %s::regclass
+    GROUP BY i.indexrelid
+"""
+WRITES_QUERY = """
+    SELECT n_tup_ins + n_tup_upd - n_tup_hot_upd
+    FROM pg_stat_user_tables WHERE relid = %s::regclass
+"""
+
+SCAN_NODES = ('Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+# '(status)::text = ' / 'customer_id >= ' 처럼 컬럼이 왼쪽에 오는 비교
+COMPARISON = re.compile(r"\(*([a-z_][a-z0-9_]*)\)*(?:::[a-z ]+?(?:\[\])?)?\s*(=|<=|>=|<|>)\s")
+SORT_KEY = re.compile(r"^(?:[a-z_][a-z0-9_]*\.)?\(*([a-z_][a-z0-9_]*)\)*(?:::[a-z ]+)?(?: (DESC|ASC))?")
+
+
+class Statement:
+    """워크로드의 쿼리 하나 (실행 가능한 SQL + pg_stat_statements 누적값)"""
+
+    def __init__(self, label, query, calls, total_ms, queryid=None):
+        self.label = label
+        self.query = query
+        self.calls = calls
+        self.total_ms = total_ms
+        self.queryid = queryid
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+def query_id(cur, query):
+    """쿼리의 queryid (compute_query_id가 켜져 있어야 함, pg_stat_statements가 있으면 auto로 켜짐)"""
+    cur.execute(f"EXPLAIN (VERBOSE, FORMAT JSON) {query}")
+    return cur.fetchone()[0][0].get('Query Identifier')
+
+
+def load_workload(cur, known=None, top=TOP):
+    """
+    pg_stat_statements 상위 top개 SELECT → ([Statement], [건너뛴 쿼리 텍스트])
+
+    $n이 없는 쿼리는 그대로, 있는 쿼리는 known에서 queryid가 같은 SQL로 실행합니다.
+    pg_stat_statements에 기록이 없으면 known 전체를 호출 1번씩으로 씁니다.
+    """
+    known = known or {}
+    by_id = {}
+    for label, query in known.items():
+        try:
+            by_id[query_id(cur, query)] = (label, query)
+        except psycopg2.Error:
+            cur.connection.rollback()
+
+    cur.execute(WORKLOAD_QUERY)
+    workload, skipped = [], []
+    for queryid, calls, total_ms, text in cur.fetchall():
+        if len(workload) >= top:
+            break
+        if queryid in by_id:
+            label, query = by_id[queryid]
+        elif not re.search(r"\$\d", text):
+            label, query = ' '.join(text.split())[:40], text
+        else:
+            skipped.append(' '.join(text.split()))
+            continue
+        workload.append(Statement(label, query, calls, total_ms, queryid))
+
+    if not workload:
+        workload = [Statement(label, query, 1, 0.0) for label, query in known.items()]
+    return workload, skipped
+
+
+# ----------------------------------------------------------------------
+# 후보 추출
+# ----------------------------------------------------------------------
+
+class Candidate:
+    """B-tree 후보 인덱스 하나 (table, columns)와 이 후보를 만든 쿼리들"""
+
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = tuple(columns)
+        self.statements = []
+
+    @property
+    def name(self):
+        return f"{CANDIDATE_PREFIX}{self.table}_{'_'.join(self.columns)}"[:63]
+
+    def ddl(self):
+        return sql.SQL("CREATE INDEX {} ON {} ({})").format(
+            sql.Identifier(self.name), sql.Identifier(self.table),
+            sql.SQL(', ').join(map(sql.Identifier, self.columns)))
+
+    def __repr__(self):
+        return f"{self.table}({', '.join(self.columns)})"
+
+
+def split_filter(text, columns):
+    """Filter 식 → (등호 컬럼, 범위 컬럼) (테이블에 없는 이름과 <>는 무시, 나온 순서 유지)"""
+    equal, ranged = [], []
+    for name, op in COMPARISON.findall(text or ''):
+        if name not in columns:
+            continue
+        target = equal if op == '=' else ranged
+        if name not in equal and name not in ranged:
+            target.append(name)
+    return equal, ranged
+
+
+def sort_columns(keys, columns):
+    """Sort Key 목록 → 컬럼 이름 (하나라도 테이블 컬럼이 아니면 None)"""
+    result = []
+    for key in keys:
+        match = SORT_KEY.match(key)
+        if not match or match.group(1) not in columns:
+            return None
+        result.append(match.group(1))
+    return result
+
+
+def _scans(node):
+    """node 아래 스캔 노드들"""
+    return [n for n in node.walk() if n.node_type in SCAN_NODES and n.relation]
+
+
+def extract_candidates(plan, table_columns):
+    """
+    계획 하나에서 후보 [(테이블, 컬럼 튜플)]
+
+    table_columns(테이블) → 컬럼 이름 집합
+    - Seq Scan / Bitmap Heap Scan의 Filter, 인덱스 스캔의 잔여 Filter: 등호 컬럼 + 첫 범위 컬럼
+    - 스캔 하나 위의 Sort: 그 스캔의 등호 컬럼 + 정렬 컬럼
+    """
+    found = []
+    for node in plan.nodes():
+        if node.node_type in SCAN_NODES and node.relation and 'Filter' in node.extra:
+            equal, ranged = split_filter(node.extra['Filter'], table_columns(node.relation))
+            columns = (equal + ranged[:1])[:MAX_COLUMNS]
+            if columns:
+                found.append((node.relation, tuple(columns)))
+        elif node.node_type in ('Sort', 'Incremental Sort') and node.extra.get('Sort Key'):
+            scans = _scans(node)
+            if len(scans) != 1:
+                continue
+            scan = scans[0]
+            columns = table_columns(scan.relation)
+            keys = sort_columns(node.extra['Sort Key'], columns)
+            if keys:
+                equal, _ = split_filter(scan.extra.get('Filter'), columns)
+                combined = equal + [k for k in keys if k not in equal]
+                found.append((scan.relation, tuple(combined[:MAX_COLUMNS])))
+    return found
+
+
+def covered(columns, existing):
+    """이미 있는 인덱스 중 앞부분이 columns로 시작하는 것이 있으면 True"""
+    return any(tuple(index[:len(columns)]) == columns for index in existing)
+
+
+# ----------------------------------------------------------------------
+# 측정 (복제본 안에서)
+# ----------------------------------------------------------------------
+
+class Catalog:
+    """테이블 컬럼 / 기존 인덱스 / 쓰기 통계 캐시"""
+
+    def __init__(self, cur):
+        self.cur = cur
+        self._columns = {}
+
+    def columns(self, table):
+        """컬럼 이름 → 기본값 유무 (serial/identity/generated 포함)"""
+        if table not in self._columns:
+            self.cur.execute(COLUMNS_QUERY, (table,))
+            self._columns[table] = dict(self.cur.fetchall())
+        return self._columns[table]
+
+    def column_names(self, table):
+        return set(self.columns(table))
+
+    def indexes(self, table):
+        self.cur.execute(INDEX_COLUMNS_QUERY, (table,))
+        return [row[0] for row in self.cur.fetchall()]
+
+
+def table_writes(cur, table):
+    """원본 DB 통계의 인덱스를 갱신한 쓰기 행 수 (INSERT + HOT가 아닌 UPDATE)"""
+    cur.execute(WRITES_QUERY, (table,))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def insert_probe(cur, catalog, table, rows=PROBE_ROWS):
+    """
+    INSERT ... SELECT (기본값이 없는 컬럼) FROM table LIMIT rows (넣을 컬럼이 없으면 None)
+
+    serial/identity 컬럼은 기본값으로 새로 채워지므로 PK가 겹치지 않습니다.
+    """
+    names = [name for name, has_default in catalog.columns(table).items() if not has_default]
+    if not names:
+        return None
+    column_list = sql.SQL(', ').join(map(sql.Identifier, names))
+    return sql.SQL("INSERT INTO {t} ({c}) SELECT {c} FROM {t} LIMIT {n}").format(
+        t=sql.Identifier(table), c=column_list, n=sql.Literal(rows)).as_string(cur)
+
+
+def measure_insert(cur, catalog, table, rows=PROBE_ROWS, savepoint=False, **options):
+    """
+    insert_probe()를 실행하고 되돌리기를 반복한 실행 시간
+
+    기본은 BEGIN ... ROLLBACK (autocommit 연결), savepoint=True면 이미 열린 트랜잭션 안에서
+    SAVEPOINT ... ROLLBACK TO로 되돌립니다.
+    다른 UNIQUE 제약 등으로 실패하면 None (쓰기 비용 측정 불가).
+    """
+    query = insert_probe(cur, catalog, table, rows)
+    if query is None:
+        return None
+    begin, end = (("SAVEPOINT insert_probe", "ROLLBACK TO SAVEPOINT insert_probe") if savepoint
+                  else ("BEGIN", "ROLLBACK"))
+
+    def probe():
+        cur.execute(begin)
+        try:
+            return explain(cur, query, timing=False, wal=False, settings=False).execution_ms
+        finally:
+            cur.execute(end)
+
+    try:
+        return stats.measure(probe, label=f"INSERT {table} ×{rows}", **options)
+    except psycopg2.Error:
+        return None
+
+
+def _gain(base, current):
+    """(줄어든 중앙값 ms, Comparison) - 유의하지 않으면 0"""
+    comparison = stats.compare(base, current)
+    saved = base.median - current.median if comparison.significant else 0.0
+    return saved, comparison
+
+
+def evaluate(workload, source_cur=None, probe_rows=PROBE_ROWS, on_progress=None, **options):
+    """
+    후보마다 인덱스를 만들어 워크로드를 다시 측정한 결과 목록 (순이득 큰 순서)
+
+    source_cur: 원본 DB 연결의 커서 (쓰인 행 수를 읽음, None이면 현재 DB 통계)
+    on_progress(메시지)가 단계마다 호출됩니다. options는 stats.measure()로 전달합니다.
+    """
+    report = on_progress or (lambda message: None)
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        catalog = Catalog(cur)
+        cur.execute("ANALYZE")
+
+        baseline, plans = {}, {}
+        for stmt in workload:
+            plans[stmt.label] = explain(cur, stmt.query, timing=False, wal=False, settings=False)
+            baseline[stmt.label] = stats.measure_query(cur, stmt.query, label=stmt.label, **options)
+            report(f"기준 {baseline[stmt.label].summary()}")
+
+        candidates = {}
+        for stmt in workload:
+            for table, columns in extract_candidates(plans[stmt.label], catalog.column_names):
+                if covered(columns, catalog.indexes(table)):
+                    continue
+                candidate = candidates.setdefault((table, columns), Candidate(table, columns))
+                candidate.statements.append(stmt.label)
+        report(f"후보 {len(candidates)}개: {', '.join(map(repr, candidates.values())) or '-'}")
+
+        tables = {c.table for c in candidates.values()}
+        write_base = {t: measure_insert(cur, catalog, t, probe_rows, **options) for t in tables}
+        writes = {t: table_writes(source_cur or cur, t) for t in tables}
+
+        results = []
+        for candidate in candidates.values():
+            started = time.perf_counter()
+            cur.execute(candidate.ddl())
+            build_ms = (time.perf_counter() - started) * 1000
+            cur.execute("SELECT pg_relation_size(%s::regclass)", (candidate.name,))
+            size_bytes = cur.fetchone()[0]
+
+            queries = []
+            for stmt in workload:
+                if candidate.table not in {n.relation for n in plans[stmt.label].nodes()}:
+                    continue
+                plan = explain(cur, stmt.query, timing=False, wal=False, settings=False)
+                used = any(n.index_name == candidate.name for n in plan.nodes())
+                current = stats.measure_query(cur, stmt.query, label=f"{stmt.label} +{candidate.name}",
+                                              **options)
+                saved, comparison = _gain(baseline[stmt.label], current)
+                queries.append({'statement': stmt, 'used': used, 'base': baseline[stmt.label],
+                                'current': current, 'comparison': comparison, 'saved_ms': saved})
+
+            base_write = write_base[candidate.table]
+            write = measure_insert(cur, catalog, candidate.table, probe_rows, **options) if base_write else None
+            write_us = (max(0.0, write.median - base_write.median) * 1000 / probe_rows
+                        if write and base_write else None)
+            cur.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(candidate.name)))
+
+            read_ms = sum(q['saved_ms'] * q['statement'].calls for q in queries)
+            write_ms = (write_us or 0.0) * writes[candidate.table] / 1000
+            result = {
+                'candidate': candidate, 'size_bytes': size_bytes, 'build_ms': build_ms,
+                'queries': queries, 'read_gain_ms': read_ms,
+                'write_us_per_row': write_us, 'rows_written': writes[candidate.table],
+                'write_cost_ms': write_ms, 'net_ms': read_ms - write_ms,
+            }
+            results.append(result)
+            report(f"{candidate!r}: 읽기 -{read_ms:,.1f}ms, 쓰기 +{write_ms:,.1f}ms")
+    finally:
+        cur.close()
+        conn.close()
+    return sorted(results, key=lambda r: r['net_ms'], reverse=True)
+
+
+def verdict(result):
+    """'추천' / '손해' / '효과 없음'"""
+    if not any(q['used'] for q in result['queries']):
+        return '효과 없음'
+    if result['read_gain_ms'] <= 0:
+        return '효과 없음'
+    return '추천' if result['net_ms'] > 0 else '손해'
@@ -0,0 +1,233 @@
+"""
+테이블 전체 dead tuple / bloat 스캔
+===================================
+
+n_dead_tup은 테이블 전체의 추정치 하나라서, 수 GB 테이블에서 dead tuple이
+어느 구간에 몰려 있는지(최근 갱신된 끝부분인지, 오래된 앞부분인지) 알 수 없습니다.
+
+이 모듈은 모든 페이지를 batch 단위로 나눠 워커 프로세스들이 get_raw_page()로 가져오고
+common.heappage로 해석해서 페이지별 요약만 돌려받습니다.
+
+라인 포인터 분류:
+- live:     LP_NORMAL이고 삭제가 확정되지 않은 튜플 (진행 중인 트랜잭션의 삭제 포함)
+- dead:     LP_DEAD, 또는 LP_NORMAL이지만 xmin이 중단됐거나 xmax(삭제/갱신)가 커밋된 튜플
+- redirect: LP_REDIRECT (HOT 체인 정리 후 남은 포인터)
+- unused:   LP_UNUSED (VACUUM이 회수해 재사용 가능한 슬롯)
+
+힌트 비트가 아직 찍히지 않은 xmin/xmax는 스캔이 끝난 뒤 pg_xact_status()로
+한꺼번에 확인합니다 (서로 다른 xid 수만큼만 조회). 튜플에는 32비트 xid만 있으므로
+현재 epoch를 붙여 xid8로 바꿉니다 (wraparound 전 xid는 이전 epoch로 봄).
+
+사용 예:
+    result = scan('orders', workers=4, on_progress=lambda done, total: ...)
+    print(result.totals(), result.heatmap(64, 32), result.free_space_histogram())
+"""
+
+from collections import Counter
+from multiprocessing import Pool
+
+from common import heappage
+from common.db import get_connection
+
+BATCH_PAGES = 512                   # 워커 작업 하나의 페이지 수 (4MB)
+WORKERS = 4
+FREE_SPACE_BIN = 512                # 빈 공간 히스토그램 구간 (바이트)
+CLASSES = ('live', 'dead', 'redirect', 'unused')
+
+XACT_STATUS_QUERY = """
+    WITH cur AS (SELECT pg_snapshot_xmax(pg_current_snapshot())::text::bigint AS full_xid)
+    SELECT x.xid,
+           pg_xact_status((
+               ((cur.full_xid >> 32) - CASE WHEN x.xid > (cur.full_xid & 4294967295) THEN 1 ELSE 0 END) << 32
+               | x.xid)::text::xid8)
+    FROM unnest(%s::bigint[]) AS x(xid), cur
+"""
+
+
+class PageSummary:
+    """페이지 하나의 분류 결과 (워커 → 부모로 pickle되므로 작게 유지)"""
+
+    __slots__ = ('blkno', 'live', 'dead', 'redirect', 'unused', 'free_bytes', 'tuple_bytes',
+                 'pending', 'new')
+
+    def __init__(self, blkno):
+        self.blkno = blkno
+        self.live = self.dead = self.redirect = self.unused = 0
+        self.free_bytes = self.tuple_bytes = 0
+        self.pending = []       # 힌트 비트가 없는 튜플의 (xmin 또는 0, xmax 또는 0)
+        self.new = False
+
+    @property
+    def line_pointers(self):
+        return self.live + self.dead + self.redirect + self.unused
+
+    @property
+    def dead_ratio(self):
+        used = self.live + self.dead
+        return self.dead / used if used else 0.0
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+def summarize_page(page):
+    """HeapPage → PageSummary (힌트 비트로 판단할 수 없는 튜플은 pending에 남김)"""
+    s = PageSummary(page.blkno)
+    if page.header.is_new:
+        s.new = True
+        s.free_bytes = heappage.BLOCK_SIZE - heappage.PAGE_HEADER_SIZE
+        return s
+    s.free_bytes = page.header.free_space
+    for t in page.tuples():
+        if t.lp_flags == heappage.LP_UNUSED:
+            s.unused += 1
+        elif t.lp_flags == heappage.LP_REDIRECT:
+            s.redirect += 1
+        elif t.lp_flags == heappage.LP_DEAD or not t.has_tuple:
+            s.dead += 1
+        else:
+            s.tuple_bytes += t.lp_len
+            if t.xmin_aborted or (t.xmax_valid and t.xmax_committed):
+                s.dead += 1
+                continue
+            xmin = 0 if t.xmin_committed or t.xmin_frozen else t.t_xmin
+            xmax = t.t_xmax if t.xmax_valid and not t.t_infomask & heappage.HEAP_XMAX_IS_MULTI else 0
+            if xmin or xmax:
+                s.pending.append((xmin, xmax))
+            else:
+                s.live += 1
+    return s
+
+
+def _scan_batch(task):
+    """워커: 페이지 범위 하나를 가져와 PageSummary 목록 반환"""
+    relation, first, count = task
+    conn = get_connection(autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            return [summarize_page(heappage.HeapPage(raw, blkno))
+                    for blkno, raw in heappage.fetch_pages(cur, relation, first, count, count)]
+    finally:
+        conn.close()
+
+
+def resolve_xids(cur, xids):
+    """xid(32비트) → 'committed' | 'aborted' | 'in progress' | None(너무 오래돼 알 수 없음)"""
+    xids = sorted(set(xids))
+    if not xids:
+        return {}
+    cur.execute(XACT_STATUS_QUERY, (xids,))
+    return dict(cur.fetchall())
+
+
+class ScanResult:
+    """페이지별 요약과 집계"""
+
+    def __init__(self, relation, pages):
+        self.relation = relation
+        self.pages = sorted(pages, key=lambda p: p.blkno)
+
+    def resolve(self, cur):
+        """pending 튜플을 pg_xact_status()로 live/dead로 확정"""
+        xids = [x for p in self.pages for pair in p.pending for x in pair if x]
+        status = resolve_xids(cur, xids)
+        for p in self.pages:
+            for xmin, xmax in p.pending:
+                if xmin and status.get(xmin) == 'aborted':
+                    p.dead += 1
+                elif xmax and status.get(xmax) == 'committed':
+                    p.dead += 1
+                else:
+                    p.live += 1
+            p.pending = []
+        return status
+
+    def totals(self):
+        counts = Counter()
+        for p in self.pages:
+            for name in CLASSES:
+                counts[name] += getattr(p, name)
+            counts['free_bytes'] += p.free_bytes
+            counts['tuple_bytes'] += p.tuple_bytes
+            counts['new_pages'] += p.new
+        counts['pages'] = len(self.pages)
+        return counts
+
+    def heatmap(self, cols=64, rows=32, value='dead_ratio'):
+        """
+        페이지를 rows × cols 칸에 순서대로 나눠 담은 2차원 목록
+
+        칸 하나가 여러 페이지를 맡으면 그 구간 전체의 비율을 씁니다.
+        value: 'dead_ratio' (dead / (live + dead)) 또는 'free_ratio' (빈 공간 / 페이지 크기)
+        빈 칸(페이지 없음)은 None입니다.
+        """
+        cells = cols * rows
+        n = len(self.pages)
+        per_cell = max(1, -(-n // cells))
+        grid = []
+        for r in range(rows):
+            row = []
+            for c in range(cols):
+                chunk = self.pages[(r * cols + c) * per_cell:(r * cols + c + 1) * per_cell]
+                if not chunk:
+                    row.append(None)
+                elif value == 'free_ratio':
+                    row.append(sum(p.free_bytes for p in chunk) / (heappage.BLOCK_SIZE * len(chunk)))
+                else:
+                    used = sum(p.live + p.dead for p in chunk)
+                    row.append(sum(p.dead for p in chunk) / used if used else 0.0)
+            if all(cell is None for cell in row):
+                break
+            grid.append(row)
+        return grid, per_cell
+
+    def free_space_histogram(self, bin_size=FREE_SPACE_BIN):
+        """[(구간 시작 바이트, 페이지 수)] - 0 ~ 블록 크기"""
+        counts = Counter(min(p.free_bytes, heappage.BLOCK_SIZE - 1) // bin_size for p in self.pages)
+        return [(b * bin_size, counts.get(b, 0)) for b in range(heappage.BLOCK_SIZE // bin_size)]
+
+    def hottest_ranges(self, span=1024, limit=5):
+        """dead 비율이 높은 연속 페이지 구간 [(시작 blkno, 끝 blkno, dead 수, dead 비율)]"""
+        ranges = []
+        for start in range(0, len(self.pages), span):
+            chunk = self.pages[start:start + span]
+            dead = sum(p.dead for p in chunk)
+            used = sum(p.live + p.dead for p in chunk)
+            if dead:
+                ranges.append((chunk[0].blkno, chunk[-1].blkno, dead, dead / used))
+        return sorted(ranges, key=lambda r: (r[3], r[2]), reverse=True)[:limit]
+
+
+def scan(relation, workers=WORKERS, batch=BATCH_PAGES, on_progress=None):
+    """
+    relation의 모든 페이지를 workers개 프로세스로 나눠 스캔하고 ScanResult 반환
+
+    on_progress(끝난 페이지 수, 전체 페이지 수)가 batch마다 호출됩니다.
+    """
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        total = heappage.block_count(cur, relation)
+        tasks = [(relation, first, min(batch, total - first)) for first in range(0, total, batch)]
+        pages = []
+        if workers > 1 and len(tasks) > 1:
+            with Pool(processes=min(workers, len(tasks))) as pool:
+                for summaries in pool.imap_unordered(_scan_batch, tasks):
+                    pages.extend(summaries)
+                    if on_progress:
+                        on_progress(len(pages), total)
+        else:
+            for task in tasks:
+                pages.extend(_scan_batch(task))
+                if on_progress:
+                    on_progress(len(pages), total)
+        result = ScanResult(relation, pages)
+        result.resolve(cur)
+        return result
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,291 @@
+"""
+BRIN 효율 분석
+==============
+
+lab08 시나리오 4는 BRIN이 B-tree보다 훨씬 작다는 것만 보여주고,
+조건 하나가 실제로 몇 개의 블록을 읽게 되는지는 재지 않습니다.
+BRIN은 범위마다 min/max만 저장하므로, 범위끼리 값이 겹칠수록
+(물리 순서와 값 순서가 어긋날수록) 조건 하나가 더 많은 범위를 읽습니다.
+
+이 모듈은 brin_metapage_info()/brin_page_items()로 범위 요약을 모두 읽어서
+
+- 범위마다 값 구간이 겹치는 다른 범위 수 (overlap)
+- 조건 [lo, hi]가 읽게 될 범위/블록 비율 (요약되지 않은 범위는 항상 읽음)
+- 폭이 정해진 임의 구간들의 평균 블록 비율
+
+을 계산하고, sweep()으로 pages_per_range 값마다 인덱스를 다시 만들어
+크기 / 예상 블록 비율 / 실제 읽은 블록(Lossy Heap Blocks) / 실행 시간을 비교합니다.
+
+minmax 연산자 클래스(기본값)의 첫 번째 컬럼만 해석합니다.
+pageinspect 함수는 superuser 권한이 필요합니다.
+
+사용 예:
+    idx = BrinIndex.load(cur, 'idx_sensor_recorded_brin')
+    lo, hi = idx.coerce(cur, '2024-01-01', '2024-01-10')
+    print(idx.overlap(), idx.blocks_for(lo, hi))
+"""
+
+import bisect
+import random
+from decimal import Decimal
+
+from psycopg2 import sql
+
+from common import stats
+from common.db import get_connection
+from common.plans import explain
+
+PAGES_PER_RANGE = (8, 16, 32, 64, 128, 256)
+WINDOWS = (0.001, 0.01, 0.1)        # 기본 조건: 값 범위 대비 폭
+SAMPLE_WINDOWS = 200
+SWEEP_INDEX = 'brin_sweep_tmp'
+
+INDEX_INFO_QUERY = """
+    SELECT i.indrelid::regclass::text, a.attname, format_type(a.atttypid, a.atttypmod), am.amname,
+           pg_relation_size(i.indexrelid), pg_relation_size(i.indrelid) / current_setting('block_size')::int,
+           pg_relation_size(i.indexrelid) / current_setting('block_size')::int
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_am am ON am.oid = c.relam
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+    WHERE i.indexrelid = %s::regclass
+"""
+META_QUERY = "SELECT pagesperrange, lastrevmappage FROM brin_metapage_info(get_raw_page(%s, 0))"
+ITEMS_QUERY = """
+    SELECT it.blknum, it.allnulls, it.hasnulls, it.placeholder,
+           CASE WHEN NOT it.allnulls AND NOT it.placeholder
+                THEN split_part(btrim(it.value, '{{}}'), ' .. ', 1)::{type} END,
+           CASE WHEN NOT it.allnulls AND NOT it.placeholder
+                THEN split_part(btrim(it.value, '{{}}'), ' .. ', 2)::{type} END
+    FROM generate_series({first}, {last}) AS b(blkno)
+    CROSS JOIN LATERAL (SELECT get_raw_page({index}, b.blkno::int) AS page) p
+    CROSS JOIN LATERAL brin_page_items(p.page, {index}::regclass) it
+    WHERE brin_page_type(p.page) = 'regular' AND it.attnum = 1
+    ORDER BY it.blknum
+"""
+COLUMN_TYPE_QUERY = """
+    SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+    WHERE attrelid = %s::regclass AND attname = %s AND NOT attisdropped
+"""
+COLUMN_INDEXES_QUERY = """
+    SELECT i.indexrelid::regclass::text, con.conname
+    FROM pg_index i
+    LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid
+    WHERE i.indrelid = %s::regclass
+      AND i.indkey[0] = (SELECT attnum FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s)
+"""
+
+
+class BrinRange:
+    __slots__ = ('blkno', 'allnulls', 'hasnulls', 'placeholder', 'min', 'max')
+
+    def __init__(self, blkno, allnulls, hasnulls, placeholder, lo, hi):
+        self.blkno = blkno
+        self.allnulls = allnulls
+        self.hasnulls = hasnulls
+        self.placeholder = placeholder
+        self.min = lo
+        self.max = hi
+
+    @property
+    def has_values(self):
+        return self.min is not None
+
+
+def coerce(cur, column_type, *values):
+    """값을 컬럼 타입으로 캐스팅한 Python 값으로 (예: '2024-01-01' → datetime)"""
+    casts = sql.SQL(', ').join(sql.SQL("{}::{}").format(sql.Literal(v), sql.SQL(column_type))
+                               for v in values)
+    cur.execute(sql.SQL("SELECT {}").format(casts))
+    return cur.fetchone()
+
+
+def _scale(span, fraction):
+    """값 범위 × 비율 (timedelta, int, float, Decimal 모두)"""
+    if isinstance(span, Decimal):
+        return span * Decimal(str(fraction))
+    return span * fraction
+
+
+class BrinIndex:
+    """BRIN 인덱스 하나의 범위 요약"""
+
+    def __init__(self, index, table, column, column_type, size_bytes, table_blocks,
+                 pages_per_range, ranges):
+        self.index = index
+        self.table = table
+        self.column = column
+        self.column_type = column_type
+        self.size_bytes = size_bytes
+        self.table_blocks = table_blocks
+        self.pages_per_range = pages_per_range
+        self.ranges = ranges
+        valued = [r for r in ranges if r.has_values]
+        self._mins = sorted(r.min for r in valued)
+        self._maxs = sorted(r.max for r in valued)
+
+    @classmethod
+    def load(cls, cur, index):
+        cur.execute(INDEX_INFO_QUERY, (index,))
+        row = cur.fetchone()
+        if row is None:
+            raise ValueError(f"인덱스 {index}를 찾을 수 없습니다")
+        table, column, column_type, am, size_bytes, table_blocks, index_blocks = row
+        if am != 'brin':
+            raise ValueError(f"{index}는 BRIN이 아닙니다 ({am})")
+        cur.execute(META_QUERY, (index,))
+        pages_per_range, last_revmap = cur.fetchone()
+        query = sql.SQL(ITEMS_QUERY).format(
+            type=sql.SQL(column_type), first=sql.Literal(last_revmap + 1),
+            last=sql.Literal(index_blocks - 1), index=sql.Literal(index))
+        cur.execute(query)
+        ranges = [BrinRange(*r) for r in cur.fetchall()]
+        return cls(index, table, column, column_type, size_bytes, table_blocks, pages_per_range, ranges)
+
+    def coerce(self, cur, *values):
+        return coerce(cur, self.column_type, *values)
+
+    # 범위 통계 ------------------------------------------------------
+
+    @property
+    def range_count(self):
+        """테이블을 덮는 데 필요한 범위 수"""
+        return -(-self.table_blocks // self.pages_per_range)
+
+    @property
+    def summarized(self):
+        return sum(1 for r in self.ranges if not r.placeholder)
+
+    @property
+    def unsummarized(self):
+        """아직 요약되지 않은 범위 (마지막 INSERT 이후 brin_summarize_new_values 전) - 항상 읽음"""
+        return max(0, self.range_count - self.summarized)
+
+    @property
+    def value_span(self):
+        if not self._mins:
+            return None
+        return self._mins[0], self._maxs[-1]
+
+    def _matching(self, lo, hi):
+        """[lo, hi]와 겹치는 값 범위 수 = (min ≤ hi인 수) - (max < lo인 수)"""
+        return bisect.bisect_right(self._mins, hi) - bisect.bisect_left(self._maxs, lo)
+
+    def overlap(self):
+        """범위마다 값 구간이 겹치는 다른 범위 수의 (평균, 중앙값, 최댓값)"""
+        counts = [self._matching(r.min, r.max) - 1 for r in self.ranges if r.has_values]
+        if not counts:
+            return 0.0, 0.0, 0
+        return sum(counts) / len(counts), stats.median(counts), max(counts)
+
+    def blocks_for(self, lo, hi):
+        """
+        조건 col BETWEEN lo AND hi가 읽게 될 (범위 수, 블록 수, 전체 블록 대비 비율)
+
+        NULL이 섞인 범위는 값이 맞을 때만, 요약되지 않은 범위는 항상 포함합니다.
+        """
+        ranges = self._matching(lo, hi) + self.unsummarized
+        blocks = min(self.table_blocks, ranges * self.pages_per_range)
+        return ranges, blocks, blocks / self.table_blocks if self.table_blocks else 0.0
+
+    def window_fraction(self, width, samples=SAMPLE_WINDOWS, seed=0):
+        """값 범위의 width 비율만큼 폭을 가진 임의 구간들이 읽는 블록 비율의 평균"""
+        span = self.value_span
+        if span is None:
+            return None
+        low, high = span
+        window = _scale(high - low, width)
+        rng = random.Random(seed)
+        total = 0.0
+        for _ in range(samples):
+            start = low + _scale(high - low - window, rng.random())
+            total += self.blocks_for(start, start + window)[2]
+        return total / samples
+
+
+# pages_per_range 스윕 ----------------------------------------------
+
+def default_predicates(cur, table, column, widths=WINDOWS):
+    """값 범위 가운데에 폭 width인 구간 [(라벨, lo, hi)]"""
+    cur.execute(sql.SQL("SELECT min({c}), max({c}) FROM {t}").format(
+        c=sql.Identifier(column), t=sql.Identifier(table)))
+    low, high = cur.fetchone()
+    span = high - low
+    predicates = []
+    for width in widths:
+        lo = low + _scale(span, 0.5 - width / 2)
+        predicates.append((f"{width:.1%}", lo, lo + _scale(span, width)))
+    return predicates
+
+
+def _bitmap_blocks(plan):
+    node = plan.find('Bitmap Heap Scan')
+    if not node:
+        return None
+    extra = node[0].extra
+    return extra.get('Lossy Heap Blocks', 0) + extra.get('Exact Heap Blocks', 0)
+
+
+def sweep(table, column, values=PAGES_PER_RANGE, predicates=None, on_result=None, **options):
+    """
+    pages_per_range 값마다 BRIN을 다시 만들어 조건별로 측정한 결과 목록
+
+    predicates: [(라벨, lo, hi)] - 문자열이면 컬럼 타입으로 캐스팅 (기본: default_predicates)
+
+    비교가 섞이지 않도록 같은 컬럼의 다른 인덱스는 트랜잭션 안에서 DROP하고,
+    끝나면 전부 ROLLBACK합니다. 그 인덱스가 PK/UNIQUE 등 제약에 쓰이면 DROP할 수 없으므로
+    ValueError를 냅니다. 그동안 테이블에 ACCESS EXCLUSIVE 락이 걸리므로
+    다른 세션의 접근이 막힙니다 (실습 DB에서만 사용).
+    options는 stats.measure()로 전달합니다.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    results = []
+    try:
+        cur.execute(COLUMN_INDEXES_QUERY, (table, table, column))
+        indexes = cur.fetchall()
+        constrained = [f"{name} ({constraint})" for name, constraint in indexes if constraint]
+        if constrained:
+            raise ValueError(f"{table}.{column}의 인덱스 {', '.join(constrained)}는 제약에 쓰여 "
+                             "DROP할 수 없으므로 BRIN만 비교할 수 없습니다")
+        for name, _ in indexes:
+            cur.execute(sql.SQL("DROP INDEX {}").format(sql.SQL(name)))
+        if predicates is None:
+            predicates = default_predicates(cur, table, column)
+        cur.execute(COLUMN_TYPE_QUERY, (table, column))
+        column_type = cur.fetchone()[0]
+        predicates = [(label, *coerce(cur, column_type, lo, hi)) for label, lo, hi in predicates]
+        cur.execute("SET LOCAL enable_seqscan = off")
+        query = sql.SQL("SELECT count(*) FROM {t} WHERE {c} BETWEEN %s AND %s").format(
+            t=sql.Identifier(table), c=sql.Identifier(column)).as_string(conn)
+        cur.execute(sql.SQL("SELECT count(*) FROM {}").format(sql.Identifier(table)))
+        total_rows = cur.fetchone()[0] or 1
+
+        for ppr in values:
+            cur.execute(sql.SQL("CREATE INDEX {i} ON {t} USING brin ({c}) WITH (pages_per_range = {p})").format(
+                i=sql.Identifier(SWEEP_INDEX), t=sql.Identifier(table), c=sql.Identifier(column),
+                p=sql.Literal(ppr)))
+            idx = BrinIndex.load(cur, SWEEP_INDEX)
+            avg_overlap = idx.overlap()[0]
+            for label, lo, hi in predicates:
+                _, blocks, fraction = idx.blocks_for(lo, hi)
+                plan = explain(cur, query, (lo, hi), timing=False, wal=False, settings=False)
+                cur.execute(query, (lo, hi))
+                rows = cur.fetchone()[0]
+                m = stats.measure_query(cur, query, (lo, hi), label=f"ppr={ppr} {label}", **options)
+                result = {
+                    'pages_per_range': ppr, 'size_bytes': idx.size_bytes, 'ranges': len(idx.ranges),
+                    'overlap': avg_overlap, 'predicate': label, 'predicted_blocks': blocks,
+                    'predicted_pct': 100 * fraction, 'heap_blocks': _bitmap_blocks(plan),
+                    'rows_pct': 100 * rows / total_rows, 'table_blocks': idx.table_blocks,
+                    'measurement': m,
+                }
+                results.append(result)
+                if on_result:
+                    on_result(result)
+            cur.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(SWEEP_INDEX)))
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+    return results
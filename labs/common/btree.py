@@ -0,0 +1,288 @@
+"""
+B-tree 구조 탐색
+================
+
+lab07 시나리오 5는 bt_metap()과 페이지 1 하나만 봅니다. 인덱스 전체의 상태
+(레벨별 fanout, 리프 채움률, 중복 제거 효과, dead 항목, 페이지 분할이 몰린 구간)를
+보려면 모든 페이지를 봐야 하는데, 페이지마다 bt_page_items()를 부르면 큰 인덱스에서 수 분이 걸립니다.
+
+이 모듈은 메타 페이지에서 root를 찾은 뒤 레벨 단위로 내려가며
+한 레벨의 페이지를 batch로 나눠 워커 프로세스들이 get_raw_page()로 가져오고 직접 해석합니다.
+내부 페이지의 downlink 순서대로 다음 레벨을 읽으므로 리프 목록은 키 순서입니다.
+
+레이아웃 (src/include/access/nbtree.h, itup.h):
+
+    BTMetaPageData (페이지 헤더 뒤)  magic version root level fastroot fastlevel (uint32 ×6)
+    BTPageOpaqueData (pd_special, 16B)  btpo_prev btpo_next btpo_level (uint32) btpo_flags btpo_cycleid (uint16)
+    IndexTupleData (8B)   t_tid(6) t_info(2): 크기 & 0x1FFF, 0x2000 = alt TID (pivot/posting)
+    posting list 튜플      t_tid.ip_posid & 0x0FFF = heap TID 수, t_tid 블록 번호 = posting list 오프셋
+
+- 오른쪽 끝이 아닌 페이지의 첫 항목은 high key라서 항목 수에서 뺌
+- 내부 페이지 항목의 t_tid 블록 번호가 자식 페이지 (downlink)
+- LP_DEAD 라인 포인터 = 인덱스 스캔이 죽었다고 표시한 항목 (다음 분할 전에 정리 가능)
+
+탐색은 스냅샷이 아니므로 쓰기가 많은 중에 돌리면 오른쪽 링크 불일치가 조금 생길 수 있습니다
+(link_mismatches로 보고).
+
+사용 예:
+    walk = walk_index('idx_mvcc_indexed', workers=4)
+    for row in walk.level_stats():
+        print(row)
+    print(walk.dedup(), walk.hotspots())
+"""
+
+import struct
+from collections import Counter
+from multiprocessing import Pool
+
+from common import heappage
+from common.db import get_connection
+
+WORKERS = 4
+BATCH_PAGES = 512
+HOTSPOT_BUCKETS = 20
+HALF_FULL = 0.6                 # 이보다 덜 찬 리프는 분할 직후 페이지로 봄
+
+META = struct.Struct('<IIIIII')
+BT_SPECIAL = struct.Struct('<IIIHH')
+INDEX_TUPLE = struct.Struct('<HHHH')
+BTREE_MAGIC = 0x053162
+
+# btpo_flags
+BTP_LEAF = 1 << 0
+BTP_ROOT = 1 << 1
+BTP_DELETED = 1 << 2
+BTP_META = 1 << 3
+BTP_HALF_DEAD = 1 << 4
+BTP_SPLIT_END = 1 << 5
+BTP_HAS_GARBAGE = 1 << 6
+BTP_INCOMPLETE_SPLIT = 1 << 7
+
+INDEX_SIZE_MASK = 0x1FFF
+INDEX_ALT_TID_MASK = 0x2000
+BT_OFFSET_MASK = 0x0FFF
+BT_IS_POSTING = 0x2000
+ITEM_ID_SIZE = 4
+
+
+def maxalign(n):
+    return (n + 7) & ~7
+
+
+class Meta:
+    __slots__ = ('magic', 'version', 'root', 'level', 'fastroot', 'fastlevel')
+
+    def __init__(self, page):
+        (self.magic, self.version, self.root, self.level,
+         self.fastroot, self.fastlevel) = META.unpack_from(page, heappage.PAGE_HEADER_SIZE)
+
+
+class BTPageSummary:
+    """B-tree 페이지 하나의 요약 (워커 → 부모로 pickle되므로 작게 유지)"""
+
+    __slots__ = ('blkno', 'level', 'flags', 'prev', 'next', 'cycleid', 'items', 'dead',
+                 'free_bytes', 'usable_bytes', 'heap_tids', 'posting_tuples', 'posting_saved',
+                 'children')
+
+    def __init__(self, page, blkno):
+        header = heappage.PageHeader(page)
+        (self.prev, self.next, self.level, self.flags,
+         self.cycleid) = BT_SPECIAL.unpack_from(page, header.special)
+        self.blkno = blkno
+        self.free_bytes = header.free_space
+        self.usable_bytes = header.special - heappage.PAGE_HEADER_SIZE
+        self.items = self.dead = self.heap_tids = 0
+        self.posting_tuples = self.posting_saved = 0
+        self.children = []
+        if self.flags & (BTP_DELETED | BTP_HALF_DEAD):
+            return
+
+        count = header.line_pointer_count
+        pointers = page[heappage.PAGE_HEADER_SIZE:heappage.PAGE_HEADER_SIZE + ITEM_ID_SIZE * count].cast('I')
+        first = 0 if self.rightmost else 1         # high key 건너뜀
+        leaf = self.is_leaf
+        for item in pointers[first:]:
+            offset = item & 0x7FFF
+            self.items += 1
+            if (item >> 15) & 0x3 == heappage.LP_DEAD:
+                self.dead += 1
+            bi_hi, bi_lo, posid, t_info = INDEX_TUPLE.unpack_from(page, offset)
+            block = (bi_hi << 16) | bi_lo
+            if not leaf:
+                self.children.append(block)
+            elif t_info & INDEX_ALT_TID_MASK and posid & BT_IS_POSTING:
+                tids = posid & BT_OFFSET_MASK
+                self.heap_tids += tids
+                self.posting_tuples += 1
+                # 중복 제거 전: (키 튜플 + 라인 포인터) × TID 수
+                self.posting_saved += (tids * (maxalign(block) + ITEM_ID_SIZE)
+                                       - ((t_info & INDEX_SIZE_MASK) + ITEM_ID_SIZE))
+            else:
+                self.heap_tids += 1
+
+    @property
+    def is_leaf(self):
+        return bool(self.flags & BTP_LEAF)
+
+    @property
+    def rightmost(self):
+        return self.next == 0
+
+    @property
+    def fill(self):
+        return 1 - self.free_bytes / self.usable_bytes if self.usable_bytes else 0.0
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+def _fetch_summaries(task):
+    """워커: 블록 목록을 가져와 BTPageSummary 목록 반환 (순서 유지)"""
+    index, blocks = task
+    conn = get_connection(autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            return [BTPageSummary(raw, blkno) for blkno, raw in heappage.fetch_blocks(cur, index, blocks)]
+    finally:
+        conn.close()
+
+
+class BTreeWalk:
+    """레벨별 페이지 요약 (levels[0]이 root, levels[-1]이 리프)"""
+
+    def __init__(self, index, meta, levels, total_pages):
+        self.index = index
+        self.meta = meta
+        self.levels = levels
+        self.total_pages = total_pages
+
+    @property
+    def leaves(self):
+        return self.levels[-1] if self.levels else []
+
+    @property
+    def walked_pages(self):
+        return sum(len(level) for level in self.levels)
+
+    @property
+    def unreachable_pages(self):
+        """메타 페이지와 트리에서 닿지 않는 페이지 (삭제되어 재사용 대기 중인 페이지 등)"""
+        return max(0, self.total_pages - 1 - self.walked_pages)
+
+    def level_stats(self):
+        """[(레벨, 페이지 수, 항목 수, fanout 평균/최소/최대, 평균 채움 %, dead 항목)] - root부터"""
+        rows = []
+        for pages in self.levels:
+            fanouts = [len(p.children) for p in pages if not p.is_leaf]
+            rows.append((
+                pages[0].level, len(pages), sum(p.items for p in pages),
+                sum(fanouts) / len(fanouts) if fanouts else None,
+                min(fanouts, default=None), max(fanouts, default=None),
+                100 * sum(p.fill for p in pages) / len(pages),
+                sum(p.dead for p in pages),
+            ))
+        return rows
+
+    def fill_histogram(self, bins=10):
+        """리프 채움률 분포 [(구간 시작 %, 페이지 수)]"""
+        counts = Counter(min(int(p.fill * bins), bins - 1) for p in self.leaves)
+        return [(100 * b // bins, counts.get(b, 0)) for b in range(bins)]
+
+    def dedup(self):
+        """posting list 중복 제거 효과"""
+        leaves = self.leaves
+        used = sum(p.usable_bytes - p.free_bytes for p in leaves)
+        saved = sum(p.posting_saved for p in leaves)
+        return {
+            'heap_tids': sum(p.heap_tids for p in leaves),
+            'leaf_items': sum(p.items for p in leaves),
+            'posting_tuples': sum(p.posting_tuples for p in leaves),
+            'saved_bytes': saved,
+            'saved_pct': 100 * saved / (used + saved) if used + saved else 0.0,
+        }
+
+    def dead_items(self):
+        leaves = self.leaves
+        return {
+            'dead_items': sum(p.dead for p in leaves),
+            'pages_with_dead': sum(1 for p in leaves if p.dead),
+            'has_garbage': sum(1 for p in leaves if p.flags & BTP_HAS_GARBAGE),
+        }
+
+    @property
+    def link_mismatches(self):
+        """키 순서상 다음 리프와 btpo_next가 다른 곳 (탐색 중 분할, 미완료 분할)"""
+        leaves = self.leaves
+        return sum(1 for a, b in zip(leaves, leaves[1:]) if a.next != b.blkno)
+
+    def hotspots(self, buckets=HOTSPOT_BUCKETS, limit=5):
+        """
+        리프를 키 순서로 buckets개 구간으로 나눠 분할 흔적이 많은 구간
+
+        분할된 페이지는 대략 반만 차고, 새 오른쪽 페이지는 파일 끝에 할당되어
+        키 순서상 다음 리프와 블록 번호가 이어지지 않습니다. 두 비율의 합으로 정렬합니다.
+        [(시작 리프 순번, 끝 리프 순번, 첫 blkno, 평균 채움 %, 반만 찬 %, 순서 어긋남 %)]
+        """
+        leaves = self.leaves
+        if not leaves:
+            return []
+        size = max(1, -(-len(leaves) // buckets))
+        rows = []
+        for start in range(0, len(leaves), size):
+            chunk = leaves[start:start + size]
+            after = leaves[start + 1:start + size + 1]
+            half = sum(1 for p in chunk if p.fill < HALF_FULL) / len(chunk)
+            jumps = sum(1 for a, b in zip(chunk, after) if b.blkno != a.blkno + 1) / len(chunk)
+            fill = sum(p.fill for p in chunk) / len(chunk)
+            rows.append((start, start + len(chunk) - 1, chunk[0].blkno, 100 * fill, 100 * half, 100 * jumps))
+        return sorted(rows, key=lambda r: r[4] + r[5], reverse=True)[:limit]
+
+
+def read_meta(cur, index):
+    (_, raw), = heappage.fetch_blocks(cur, index, [0])
+    meta = Meta(raw)
+    if meta.magic != BTREE_MAGIC:
+        raise ValueError(f"{index}는 B-tree 인덱스가 아닙니다 (magic {meta.magic:#x})")
+    return meta
+
+
+def walk_index(index, workers=WORKERS, batch=BATCH_PAGES, on_level=None):
+    """
+    root에서 리프까지 레벨 단위로 모든 페이지를 읽어 BTreeWalk 반환
+
+    한 레벨의 페이지가 batch보다 많으면 batch씩 나눠 workers개 프로세스가 가져옵니다.
+    on_level(레벨, 페이지 수)가 레벨마다 호출됩니다.
+    """
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        meta = read_meta(cur, index)
+        total = heappage.block_count(cur, index)
+    finally:
+        cur.close()
+        conn.close()
+
+    levels = []
+    blocks = [meta.root] if meta.root else []
+    pool = Pool(processes=workers) if workers > 1 else None
+    try:
+        while blocks:
+            tasks = [(index, blocks[i:i + batch]) for i in range(0, len(blocks), batch)]
+            if pool is not None and len(tasks) > 1:
+                chunks = pool.imap(_fetch_summaries, tasks)      # 순서 유지 (키 순서)
+            else:
+                chunks = map(_fetch_summaries, tasks)
+            pages = [page for chunk in chunks for page in chunk]
+            levels.append(pages)
+            if on_level:
+                on_level(pages[0].level, len(pages))
+            blocks = [child for page in pages if not page.is_leaf for child in page.children]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return BTreeWalk(index, meta, levels, total)
@@ -0,0 +1,272 @@
+"""
+콜드/웜 캐시 측정 모드
+======================
+
+같은 쿼리라도 shared_buffers에 페이지가 있으면 shared hit, 없으면 shared read가
+되고, read는 다시 OS 페이지 캐시에 있느냐 디스크까지 가느냐로 갈립니다.
+측정 직전 캐시 상태를 정해두지 않으면 결과가 "그때 캐시에 뭐가 있었나"에 좌우됩니다.
+
+- asis: 캐시 상태를 건드리지 않음 (기존 동작)
+- warm: pg_prewarm으로 대상 테이블과 인덱스를 shared_buffers에 올린 뒤 측정
+- cold: 매 측정 직전에 대상 페이지를 캐시에서 밀어냄
+    - filler (기본): shared_buffers보다 큰 filler 테이블을 pg_prewarm(..., 'buffer')로 읽어
+              대상 페이지를 밀어냄 (OS 페이지 캐시는 그대로라 "shared_buffers만 콜드")
+    - restart: docker-compose 컨테이너 재시작 (+ 권한이 있으면 OS 페이지 캐시 비우기)
+              같은 서버를 쓰는 다른 세션(runner 워커, 대시보드, 풀의 연결)이 모두 끊기므로
+              명시적으로 고를 때만 씀
+    - auto: restart가 가능하면 restart, 아니면 filler (처음 cold로 비울 때 정함)
+
+측정 결과에는 실제로 적용된 모드가 'warm', 'cold:filler', 'cold:restart+os'처럼
+태그로 붙습니다.
+
+주의: 큰 테이블을 SELECT count(*)로 순차 스캔하면 ring buffer(256kB)만 쓰기 때문에
+shared_buffers가 밀려나지 않습니다. 그래서 filler는 pg_prewarm으로 읽습니다.
+
+사용 예:
+    m = measure_query(query, mode='cold', label="cold")
+    print(m.summary())     # ... [cache=cold:filler]
+"""
+
+import os
+import shutil
+import subprocess
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+from common import db, stats
+from common.plans import explain
+
+MODES = ('asis', 'warm', 'cold')
+EVICT_METHODS = ('auto', 'restart', 'filler')
+
+CONTAINER = 'pg-mvcc-study'     # docker-compose.yml의 container_name
+RESTART_TIMEOUT = 60.0
+DROP_CACHES = '/proc/sys/vm/drop_caches'
+
+FILLER_TABLE = 'cache_filler'
+FILLER_FACTOR = 2               # filler 크기 = shared_buffers × FILLER_FACTOR
+FILLER_MAX_PASSES = 5           # 대상 페이지가 남아 있으면 filler를 다시 읽는 최대 횟수
+
+# 콜드 측정은 매번 캐시를 비우므로 워밍업이 의미 없고 표본 하나가 비쌈
+COLD_OPTIONS = {'warmup': 0, 'min_samples': 5, 'max_samples': 30, 'max_seconds': 300.0}
+
+
+def plan_relations(plan):
+    """계획에서 직접 읽는 테이블/인덱스 이름"""
+    names = set()
+    for node in plan.scans():
+        if node.relation:
+            names.add(node.relation)
+        if node.index_name:
+            names.add(node.index_name)
+    return sorted(names)
+
+
+def with_indexes(cur, relations):
+    """테이블 이름 목록에 그 테이블의 인덱스를 더한 목록"""
+    cur.execute("""
+        SELECT i.indexrelid::regclass::text
+        FROM pg_index i
+        WHERE i.indrelid = ANY(%s::regclass[])
+    """, (list(relations),))
+    return sorted(set(relations) | {row[0] for row in cur.fetchall()})
+
+
+def prewarm(cur, relations):
+    """pg_prewarm으로 relations를 shared_buffers에 올리고 읽은 블록 수를 반환"""
+    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+    blocks = 0
+    for name in relations:
+        cur.execute("SELECT pg_prewarm(%s::regclass)", (name,))
+        blocks += cur.fetchone()[0]
+    return blocks
+
+
+def cached_blocks(cur, relations):
+    """
+    relations 중 shared_buffers에 남아 있는 블록 수
+
+    pg_buffercache가 없으면 None을 반환합니다.
+    """
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_buffercache'")
+    if cur.fetchone() is None:
+        return None
+    cur.execute("""
+        SELECT count(*)
+        FROM pg_buffercache b
+        WHERE b.reldatabase = (SELECT oid FROM pg_database WHERE datname = current_database())
+          AND b.relfilenode = ANY(
+              SELECT pg_relation_filenode(r) FROM unnest(%s::regclass[]) AS r)
+    """, (list(relations),))
+    return cur.fetchone()[0]
+
+
+# ----------------------------------------------------------------------
+# 캐시 비우기
+# ----------------------------------------------------------------------
+
+def can_restart(container=CONTAINER):
+    """로컬 docker 컨테이너로 뜬 서버인지 (재시작해도 되는 임시 클러스터인지)"""
+    if db.DB_CONFIG['host'] not in ('localhost', '127.0.0.1', '::1'):
+        return False
+    if shutil.which('docker') is None:
+        return False
+    result = subprocess.run(['docker', 'inspect', '-f', '{{.State.Running}}', container],
+                            capture_output=True, text=True)
+    return result.returncode == 0 and result.stdout.strip() == 'true'
+
+
+def drop_os_cache():
+    """
+    OS 페이지 캐시 비우기 (리눅스 root에서만 가능)
+
+    서버가 같은 커널 위의 컨테이너일 때만 의미가 있습니다.
+    Docker Desktop(macOS/Windows)은 VM 안의 커널이라 효과가 없습니다.
+    """
+    if not os.access(DROP_CACHES, os.W_OK):
+        return False
+    os.sync()
+    with open(DROP_CACHES, 'w') as f:
+        f.write('3\n')
+    return True
+
+
+def wait_until_ready(timeout=RESTART_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            db.connect_admin().close()
+            return
+        except psycopg2.OperationalError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def restart_server(container=CONTAINER):
+    """
+    컨테이너를 멈추고 (가능하면 OS 캐시를 비운 뒤) 다시 띄움
+
+    풀의 연결은 모두 끊기므로 호출 전에 빌린 연결을 반환해야 합니다.
+    적용된 방법을 'restart' 또는 'restart+os'로 반환합니다.
+    """
+    db.configure()     # 풀을 닫아 끊어질 연결이 재사용되지 않게 함
+    subprocess.run(['docker', 'stop', container], check=True, capture_output=True)
+    dropped = drop_os_cache()
+    subprocess.run(['docker', 'start', container], check=True, capture_output=True)
+    wait_until_ready()
+    return 'restart+os' if dropped else 'restart'
+
+
+def ensure_filler(cur, factor=FILLER_FACTOR):
+    """shared_buffers × factor 크기의 filler 테이블을 준비하고 블록 수를 반환"""
+    cur.execute("SELECT setting::bigint FROM pg_settings WHERE name = 'shared_buffers'")
+    target = cur.fetchone()[0] * factor
+    cur.execute("SELECT to_regclass(%s)", (FILLER_TABLE,))
+    if cur.fetchone()[0] is not None:
+        cur.execute("SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::int",
+                    (FILLER_TABLE,))
+        if cur.fetchone()[0] >= target:
+            return target
+        cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(FILLER_TABLE)))
+
+    # fillfactor 10 → 한 페이지에 한 행 안팎, 행 수 ≈ 블록 수
+    print(f"  filler 테이블 생성: {FILLER_TABLE} ({target}블록)")
+    cur.execute(sql.SQL("""
+        CREATE UNLOGGED TABLE {} (id int, pad text) WITH (fillfactor = 10, autovacuum_enabled = off)
+    """).format(sql.Identifier(FILLER_TABLE)))
+    cur.execute(sql.SQL("""
+        INSERT INTO {} SELECT g, repeat('x', 800) FROM generate_series(1, %s) g
+    """).format(sql.Identifier(FILLER_TABLE)), (target,))
+    return target
+
+
+def evict_with_filler(cur, relations, factor=FILLER_FACTOR):
+    """filler를 shared_buffers로 읽어 relations의 페이지를 밀어냄"""
+    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+    ensure_filler(cur, factor)
+    for _ in range(FILLER_MAX_PASSES):
+        cur.execute("SELECT pg_prewarm(%s::regclass, 'buffer')", (FILLER_TABLE,))
+        remaining = cached_blocks(cur, relations) if relations else None
+        if not remaining:
+            # 0이면 다 밀려남, None이면 확인할 방법이 없으니 한 번으로 끝
+            break
+    return 'filler'
+
+
+class CacheControl:
+    """측정 직전에 relations의 캐시 상태를 mode에 맞춤"""
+
+    def __init__(self, relations=(), method='filler', container=CONTAINER):
+        if method not in EVICT_METHODS:
+            raise ValueError(f"알 수 없는 캐시 비우기 방법: {method}")
+        self.relations = list(relations)
+        self.container = container
+        self.method = method        # 'auto'는 처음 cold로 비울 때 정함 (warm/asis는 docker를 보지 않음)
+        self._expanded = None
+
+    def _targets(self, cur):
+        if self._expanded is None:
+            self._expanded = with_indexes(cur, self.relations) if self.relations else []
+        return self._expanded
+
+    def prepare(self, mode):
+        """
+        캐시 상태를 맞추고 결과에 붙일 태그를 반환
+
+        cold + restart는 서버를 재시작하므로 호출 전에 빌린 연결을 반환해야 합니다.
+        """
+        if mode == 'asis':
+            return 'asis'
+        if mode == 'warm':
+            with db.get_pool().connection(autocommit=True) as conn, conn.cursor() as cur:
+                prewarm(cur, self._targets(cur))
+            return 'warm'
+        if mode == 'cold':
+            if self.method == 'auto':
+                self.method = 'restart' if can_restart(self.container) else 'filler'
+            if self.method == 'restart':
+                return 'cold:' + restart_server(self.container)
+            with db.get_pool().connection(autocommit=True) as conn, conn.cursor() as cur:
+                return 'cold:' + evict_with_filler(cur, self._targets(cur))
+        raise ValueError(f"알 수 없는 캐시 모드: {mode}")
+
+
+def measure_query(query, params=None, mode='warm', relations=None, method='filler',
+                  setup=None, label="", **options):
+    """
+    캐시 모드를 정해서 쿼리의 서버 실행 시간을 반복 측정 (stats.Measurement)
+
+    relations를 생략하면 EXPLAIN 계획에서 읽는 테이블/인덱스를 찾아 씁니다.
+    cold 모드에서는 표본마다 캐시를 비우고 새 연결로 실행하므로
+    setup SQL(예: "SET enable_indexscan = off")도 표본마다 다시 실행합니다.
+    """
+    if mode not in MODES:
+        raise ValueError(f"알 수 없는 캐시 모드: {mode}")
+
+    def run():
+        with db.get_pool().connection(autocommit=True) as conn, conn.cursor() as cur:
+            if setup:
+                cur.execute(setup)
+            return explain(cur, query, params, timing=False, wal=False, settings=False)
+
+    if relations is None:
+        relations = [name for name in plan_relations(run()) if name]
+    control = CacheControl(relations, method=method)
+    tag = control.prepare(mode) if mode != 'cold' else None
+
+    applied = []
+
+    def prepare():
+        applied.append(control.prepare('cold'))
+
+    if mode == 'cold':
+        options = dict(COLD_OPTIONS, **options)
+    result = stats.measure(lambda: run().execution_ms,
+                           label=label or ' '.join(query.split())[:40],
+                           prepare=prepare if mode == 'cold' else None,
+                           **options)
+    result.tags['cache'] = applied[-1] if applied else tag
+    return result
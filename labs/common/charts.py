@@ -0,0 +1,40 @@
+"""
+그래프 저장
+===========
+
+--png 옵션이 있는 도구들이 labs/graphs/에 PNG를 저장할 때 쓰는 공통 코드입니다.
+matplotlib는 그래프를 그릴 때만 필요하므로 함수 안에서 가져오고,
+화면이 없는 환경에서도 동작하도록 Agg 백엔드를 씁니다.
+
+사용 예:
+    plt = pyplot()
+    fig, ax = plt.subplots()
+    ...
+    print(f"[Graph Saved] {save(fig, 'example.png')}")
+"""
+
+import os
+
+GRAPH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'graphs')
+
+
+def pyplot():
+    """Agg 백엔드로 설정한 matplotlib.pyplot"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def save(fig, filename, path=None, dpi=150, close=True):
+    """
+    fig를 path(없으면 GRAPH_DIR/filename)에 저장하고 경로 반환
+
+    close=False면 figure를 닫지 않습니다 (같은 figure를 계속 갱신하며 저장하는 대시보드).
+    """
+    path = path or os.path.join(GRAPH_DIR, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig.savefig(path, dpi=dpi, bbox_inches='tight', facecolor='white')
+    if close:
+        pyplot().close(fig)
+    return path
@@ -0,0 +1,59 @@
+"""
+클라이언트 프로세스 부하 실행
+============================
+
+부하 도구(workload, ginbench 등)는 클라이언트마다 프로세스 하나와 연결 하나를 쓰고,
+모두 연결을 마친 뒤 같은 시각(start_at)에 시작합니다. 먼저 뜬 프로세스가 혼자
+부하를 거는 구간이 생기면 처음 몇 초의 처리량/지연 시간이 왜곡되기 때문입니다.
+
+이 모듈은
+- 시작 시각 정하기 (start_time)와 클라이언트 쪽 대기 (wait_for_start)
+- multiprocessing.Pool로 클라이언트를 돌리면서 부모 프로세스에서 서버 상태 샘플링 (run_clients)
+를 제공합니다. 클라이언트 함수는 pickle할 수 있도록 모듈 최상위에 있어야 합니다.
+
+사용 예:
+    def _client(task):
+        client_no, config, start_at = task
+        ...                             # 연결을 연 뒤
+        wait_for_start(start_at)
+        return {...}
+
+    start_at, results, samples = run_clients(_client, 8, config, 1.0,
+                                             sample=lambda start_at: time.time() - start_at)
+"""
+
+import time
+from multiprocessing import Pool
+
+START_DELAY = 1.0       # 모든 클라이언트가 연결을 마칠 때까지 기다리는 초
+
+
+def start_time(delay=START_DELAY):
+    """모든 클라이언트가 연결을 마친 뒤 동시에 시작할 시각 (time.time())"""
+    return time.time() + delay
+
+
+def wait_for_start(start_at):
+    """클라이언트 프로세스에서 start_at까지 기다림 (연결은 그 전에 열어 둠)"""
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def run_clients(func, clients, config, interval, sample=None):
+    """
+    clients개 프로세스에서 func((client_no, config, start_at))를 실행
+
+    시작 후 끝날 때까지 interval초마다 sample(start_at)을 불러 그 값을 모읍니다.
+    반환값: (start_at, 클라이언트 반환값 리스트 (client_no 순), 샘플 리스트)
+    """
+    start_at = start_time()
+    samples = []
+    with Pool(processes=clients) as pool:
+        pending = pool.map_async(func, [(n, config, start_at) for n in range(clients)])
+        while not pending.ready():
+            if sample is not None and time.time() >= start_at:
+                samples.append(sample(start_at))
+            pending.wait(interval)
+        results = pending.get()
+    return start_at, results, samples
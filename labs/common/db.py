@@ -0,0 +1,385 @@
+"""
+공통 커넥션 풀
+==============
+
+모든 lab이 공유하는 데이터베이스 연결 계층입니다.
+
+- 스레드 안전한 커넥션 풀 (lab04/lab06의 스레드 시나리오에서도 안전)
+- 풀 생성 시 세션을 미리 열어두는 pre-warm (multiprocessing 워커 프로세스에서는 생략)
+- 체크아웃마다 autocommit / isolation level 지정
+- 반환된 연결은 ROLLBACK + DISCARD ALL로 세션 상태를 초기화한 뒤 재사용
+- 템플릿 기반 데이터베이스 복제/삭제 (관리용 연결)
+
+lab 코드는 기존과 똑같이 get_connection()으로 연결을 받고 conn.close()를
+호출하면 됩니다. close()는 실제로 연결을 끊지 않고 풀에 반환합니다.
+
+사용 예:
+    from common.db import get_connection, run_sql
+
+    conn = get_connection(autocommit=True)
+    ...
+    conn.close()  # 풀로 반환
+
+    run_sql("UPDATE accounts SET balance = %s WHERE name = 'Alice'", (1000,))
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, sql
+from psycopg2.pool import PoolError
+
+# 데이터베이스 연결 설정
+DB_CONFIG = {
+    'host': 'localhost',
+    'port': 5432,
+    'database': 'mvcc_lab',
+    'user': 'study',
+    'password': 'study123'
+}
+
+# 풀 기본값: lab 하나가 동시에 쓰는 연결은 많아야 4~5개
+POOL_MIN_SIZE = 4
+# 워커 프로세스(datagen, bloatscan, runner 등)는 연결을 하나씩만 쓰므로 미리 열지 않음
+# (워커 -w/-c개 × POOL_MIN_SIZE만큼 backend가 늘어 max_connections를 넘지 않도록)
+WORKER_POOL_MIN_SIZE = 0
+POOL_MAX_SIZE = 32
+POOL_TIMEOUT = 30.0
+
+
+class PooledConnection(extensions.connection):
+    """close()를 호출하면 연결을 끊는 대신 풀에 반환하는 psycopg2 연결"""
+
+    _pool = None
+
+    def close(self):
+        pool = self._pool
+        if pool is None:
+            super().close()
+        else:
+            pool.putconn(self)
+
+
+class ConnectionPool:
+    """
+    스레드 안전한 psycopg2 커넥션 풀
+
+    - minconn개의 세션을 생성 시점에 미리 열어둠 (pre-warm)
+    - maxconn개를 모두 빌려준 상태면 timeout초까지 반환을 기다림
+    - fork된 자식 프로세스에서는 부모의 연결을 버리고 새로 연결
+    """
+
+    def __init__(self, minconn=POOL_MIN_SIZE, maxconn=POOL_MAX_SIZE,
+                 timeout=POOL_TIMEOUT, **config):
+        if minconn > maxconn:
+            raise ValueError("minconn은 maxconn보다 클 수 없습니다")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.config = dict(DB_CONFIG, **config)
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._used = set()          # 빌려준 연결 (반환 처리 중인 연결 포함)
+        self._returning = set()     # putconn()에서 초기화 중인 연결
+        self._opening = 0
+        self._closed = False
+        self._pid = os.getpid()
+
+        self.prewarm(minconn)
+
+    # ------------------------------------------------------------------
+    # 내부 유틸
+    # ------------------------------------------------------------------
+
+    def _connect(self):
+        conn = psycopg2.connect(connection_factory=PooledConnection, **self.config)
+        conn._pool = self
+        return conn
+
+    def _check_fork(self):
+        """fork 후에는 부모 프로세스의 소켓을 공유하지 않도록 상태를 비움"""
+        if os.getpid() != self._pid:
+            # 부모의 연결은 닫지 않고 참조만 버림 (close하면 부모 세션이 종료됨)
+            for conn in self._idle + list(self._used):
+                conn._pool = None
+            self._idle = []
+            self._used = set()
+            self._returning = set()
+            self._opening = 0
+            self._pid = os.getpid()
+
+    def _reset(self, conn):
+        """반환된 연결의 트랜잭션/세션 상태 초기화"""
+        if conn.closed:
+            return False
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("DISCARD ALL")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        conn._pool = None
+        try:
+            extensions.connection.close(conn)
+        except psycopg2.Error:
+            pass
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+
+    def prewarm(self, count):
+        """count개가 될 때까지 유휴 세션을 미리 연결해둠"""
+        with self._cond:
+            self._check_fork()
+            while (len(self._idle) < count
+                   and len(self._idle) + len(self._used) + self._opening < self.maxconn):
+                conn = self._connect()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                self._idle.append(conn)
+
+    def getconn(self, autocommit=False, isolation_level=None):
+        """
+        풀에서 연결 하나를 빌려옴
+
+        isolation_level에는 'REPEATABLE READ' 같은 문자열이나
+        psycopg2.extensions.ISOLATION_LEVEL_* 상수를 지정할 수 있습니다.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            self._check_fork()
+            while True:
+                if self._closed:
+                    raise PoolError("커넥션 풀이 닫혀 있습니다")
+                if self._idle:
+                    conn = self._idle.pop()
+                    if conn.closed:
+                        continue
+                    # 꺼내는 즉시 사용 중으로 세어야 동시 호출이 maxconn을 넘지 않음
+                    self._used.add(conn)
+                    break
+                if len(self._used) + self._opening < self.maxconn:
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolError(
+                        f"{self.timeout}초 안에 사용 가능한 연결이 없습니다 "
+                        f"(maxconn={self.maxconn})")
+                self._cond.wait(remaining)
+
+            if conn is None:
+                # 연결 생성은 느리므로 자리만 예약하고 락 밖에서 수행
+                self._opening += 1
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            finally:
+                with self._cond:
+                    self._opening -= 1
+                    if conn is not None:
+                        self._used.add(conn)
+                    self._cond.notify()
+
+        try:
+            conn.set_session(
+                isolation_level='DEFAULT' if isolation_level is None else isolation_level,
+                autocommit=autocommit,
+            )
+        except psycopg2.Error:
+            with self._cond:
+                self._used.discard(conn)
+                self._cond.notify()
+            self._discard(conn)
+            raise
+        return conn
+
+    def putconn(self, conn):
+        """빌려간 연결을 풀에 반환 (두 번 반환해도 안전)"""
+        with self._cond:
+            self._check_fork()
+            if conn not in self._used or conn in self._returning:
+                return
+            # 초기화하는 동안에도 사용 중으로 세어 둠
+            self._returning.add(conn)
+
+        reusable = not self._closed and self._reset(conn)
+
+        with self._cond:
+            self._returning.discard(conn)
+            self._used.discard(conn)
+            if reusable and len(self._idle) < self.maxconn:
+                self._idle.append(conn)
+            else:
+                self._discard(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, autocommit=False, isolation_level=None):
+        """with 블록이 끝나면 자동으로 반환되는 연결"""
+        conn = self.getconn(autocommit=autocommit, isolation_level=isolation_level)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        """유휴 연결을 모두 닫고 더 이상 빌려주지 않음"""
+        with self._cond:
+            self._check_fork()
+            self._closed = True
+            for conn in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        """(유휴 연결 수, 사용 중인 연결 수)"""
+        with self._cond:
+            return len(self._idle), len(self._used)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """프로세스 전역 풀 (첫 호출 시 생성)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            worker = multiprocessing.parent_process() is not None
+            _pool = ConnectionPool(minconn=WORKER_POOL_MIN_SIZE if worker else POOL_MIN_SIZE)
+        return _pool
+
+
+def configure(**config):
+    """
+    전역 풀의 접속 설정 변경 (예: configure(database='mvcc_lab_w1'))
+
+    기존 풀은 닫고, 다음 get_connection() 호출 시 새 설정으로 풀을 만듭니다.
+    """
+    global _pool
+    with _pool_lock:
+        DB_CONFIG.update(config)
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def get_connection(autocommit=False, isolation_level=None):
+    """풀에서 데이터베이스 연결을 빌려옴 (conn.close()로 반환)"""
+    return get_pool().getconn(autocommit=autocommit, isolation_level=isolation_level)
+
+
+def run_sql(query, params=None):
+    """autocommit 연결로 쿼리 하나를 실행 (결과가 있으면 fetchall 결과 반환)"""
+    with get_pool().connection(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            if cur.description:
+                return cur.fetchall()
+            return None
+
+
+# ----------------------------------------------------------------------
+# 데이터베이스 관리 (CREATE/DROP DATABASE는 대상 DB 밖에서 실행해야 함)
+# ----------------------------------------------------------------------
+
+def connect_admin(database='postgres'):
+    """풀을 거치지 않는 autocommit 관리용 연결 (maintenance DB에 접속)"""
+    conn = psycopg2.connect(**dict(DB_CONFIG, database=database))
+    conn.autocommit = True
+    return conn
+
+
+def database_exists(name):
+    conn = connect_admin()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+            return cur.fetchone() is not None
+    finally:
+        conn.close()
+
+
+def clone_database(name, template, strategy=None):
+    """
+    CREATE DATABASE name TEMPLATE template
+
+    파일 단위 복사이므로 데이터를 다시 INSERT하는 것보다 훨씬 빠르지만,
+    복제 중에는 template에 다른 세션이 접속해 있으면 안 됩니다.
+    strategy='FILE_COPY'(PG15+)는 WAL을 쓰지 않고 파일을 그대로 복사합니다.
+    """
+    query = "CREATE DATABASE {} TEMPLATE {}"
+    if strategy:
+        query += f" STRATEGY {strategy}"
+    conn = connect_admin()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL(query).format(sql.Identifier(name), sql.Identifier(template)))
+    finally:
+        conn.close()
+
+
+def rename_database(name, new_name):
+    """ALTER DATABASE ... RENAME TO (대상 DB에 접속한 세션이 없어야 함)"""
+    conn = connect_admin()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                sql.Identifier(name), sql.Identifier(new_name)))
+    finally:
+        conn.close()
+
+
+def terminate_sessions(name):
+    """name DB에 접속한 다른 세션을 모두 종료하고 종료한 세션 수를 반환"""
+    conn = connect_admin()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT count(pg_terminate_backend(pid))
+                FROM pg_stat_activity
+                WHERE datname = %s AND pid <> pg_backend_pid()
+            """, (name,))
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def drop_database(name, force=True):
+    """DROP DATABASE IF EXISTS (force=True면 남아 있는 세션을 끊고 삭제, PG13+)"""
+    conn = connect_admin()
+    try:
+        with conn.cursor() as cur:
+            query = "DROP DATABASE IF EXISTS {} WITH (FORCE)" if force else "DROP DATABASE IF EXISTS {}"
+            cur.execute(sql.SQL(query).format(sql.Identifier(name)))
+    finally:
+        conn.close()
+
+
+def list_databases(prefix):
+    """prefix로 시작하는 데이터베이스 이름 목록"""
+    conn = connect_admin()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT datname FROM pg_database WHERE starts_with(datname, %s) ORDER BY 1",
+                (prefix,))
+            return [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
@@ -0,0 +1,229 @@
+"""
+결과 출력 헬퍼
+==============
+
+lab들이 공통으로 쓰는 쿼리 결과 출력 함수입니다.
+
+기본 모드는 기존과 같이 fetchall() 후 tabulate로 한 번에 출력합니다.
+stream=True면 결과를 배치 단위로 가져오면서 바로 출력하므로,
+SELECT * FROM sensor_data 같은 큰 결과도 클라이언트 메모리가 늘어나지 않습니다.
+
+- execute_and_show(stream=True)는 이름 있는 서버 사이드 커서(DECLARE ... CURSOR)를 사용
+  (autocommit 연결이면 트랜잭션 안에서 열고 끝나면 ROLLBACK)
+- 컬럼 너비는 첫 배치에서 정하고, 이후 더 긴 값은 잘라서 정렬을 유지
+- max_rows개까지만 화면에 출력
+
+execute_and_show는 common.timing으로 실행/가져오기/출력 시간을 나눠 기록합니다.
+"""
+
+import itertools
+import sys
+from contextlib import nullcontext
+from decimal import Decimal
+
+from tabulate import tabulate
+
+from common import timing
+
+# 스트리밍 모드 기본값
+STREAM_ITERSIZE = 2000      # 서버에서 한 번에 가져올 행 수 (FETCH FORWARD n)
+STREAM_MAX_ROWS = 50        # 화면에 출력할 최대 행 수
+MAX_COLUMN_WIDTH = 40       # 첫 배치로 정한 컬럼 너비의 상한
+
+_cursor_ids = itertools.count(1)
+
+
+class StreamingTable:
+    """
+    psql 형식 표를 한 줄씩 출력하는 렌더러
+
+    tabulate는 모든 행을 받아야 너비를 계산할 수 있으므로,
+    첫 배치(sample_rows)로 컬럼 너비를 고정하고 이후 행은 바로 출력합니다.
+    """
+
+    def __init__(self, headers, sample_rows, out=None, max_width=MAX_COLUMN_WIDTH):
+        self.headers = list(headers)
+        self.out = out or sys.stdout
+        self.widths = [len(h) for h in self.headers]
+        self.numeric = [bool(sample_rows) for _ in self.headers]
+        for row in sample_rows:
+            for i, value in enumerate(row):
+                self.widths[i] = max(self.widths[i], len(self._text(value)))
+                if value is not None and not isinstance(value, (int, float, Decimal)):
+                    self.numeric[i] = False
+        self.widths = [min(w, max_width) for w in self.widths]
+
+    @staticmethod
+    def _text(value):
+        return '' if value is None else str(value)
+
+    def _cell(self, value, i):
+        text = self._text(value)
+        width = self.widths[i]
+        if len(text) > width:
+            text = text[:width - 1] + '…'
+        return text.rjust(width) if self.numeric[i] else text.ljust(width)
+
+    def _rule(self, left, mid, right):
+        return left + mid.join('-' * (w + 2) for w in self.widths) + right
+
+    def header(self):
+        print(self._rule('+', '+', '+'), file=self.out)
+        print('| ' + ' | '.join(h.ljust(w)[:w] for h, w in zip(self.headers, self.widths)) + ' |',
+              file=self.out)
+        print(self._rule('|', '+', '|'), file=self.out)
+
+    def row(self, row):
+        print('| ' + ' | '.join(self._cell(v, i) for i, v in enumerate(row)) + ' |',
+              file=self.out)
+
+    def footer(self):
+        print(self._rule('+', '+', '+'), file=self.out)
+
+
+def stream_rows(cursor, batch_size=STREAM_ITERSIZE, max_rows=STREAM_MAX_ROWS, timer=None):
+    """
+    실행된 커서의 결과를 fetchmany()로 나눠 가져오며 출력
+
+    max_rows개를 출력하면 나머지는 가져오지 않고 멈춥니다.
+    timer(QueryTimer)를 주면 가져오기/출력 시간을 fetch/render 단계로 나눠 기록합니다.
+    (출력한 행 수, 더 남은 행이 있었는지) 를 반환합니다.
+    """
+    def phase(name):
+        return timer.phase(name) if timer is not None else nullcontext()
+
+    with phase('fetch'):
+        first = cursor.fetchmany(batch_size)
+    if not first:
+        print("(결과 없음)")
+        return 0, False
+
+    with phase('render'):
+        headers = [desc[0] for desc in cursor.description]
+        table = StreamingTable(headers, first[:max_rows] if max_rows else first)
+        table.header()
+
+    shown = 0
+    batch = first
+    truncated = False
+    while batch:
+        with phase('render'):
+            for row in batch:
+                if max_rows is not None and shown >= max_rows:
+                    truncated = True
+                    break
+                table.row(row)
+                shown += 1
+            sys.stdout.flush()
+        if truncated:
+            break
+        with phase('fetch'):
+            batch = cursor.fetchmany(batch_size)
+
+    with phase('render'):
+        table.footer()
+    return shown, truncated
+
+
+def print_result(cursor, description="", stream=False,
+                 batch_size=STREAM_ITERSIZE, max_rows=STREAM_MAX_ROWS):
+    """
+    쿼리 결과를 테이블 형식으로 출력
+
+    기본 모드는 모든 행을 가져와 출력하고 행 목록을 반환합니다.
+    stream=True면 배치 단위로 출력하고 출력한 행 수를 반환합니다.
+    """
+    if description:
+        print(f"\n>> {description}")
+    if stream:
+        shown, truncated = stream_rows(cursor, batch_size=batch_size, max_rows=max_rows)
+        if truncated:
+            print(f"({shown}개 행까지만 표시)")
+        return shown
+
+    rows = cursor.fetchall()
+    if rows:
+        headers = [desc[0] for desc in cursor.description]
+        print(tabulate(rows, headers=headers, tablefmt='psql'))
+    else:
+        print("(결과 없음)")
+    return rows
+
+
+def execute_and_show(cur, query, description="", show_sql=True, stream=False,
+                     itersize=STREAM_ITERSIZE, max_rows=STREAM_MAX_ROWS, server_timing=None):
+    """
+    쿼리 실행 후 결과 출력
+
+    실행/가져오기/출력 시간을 나눠 측정하고 timing.TIMING_LOG에 기록합니다.
+    server_timing='explain' 또는 'statements'면 서버 측 계획/실행 시간도 함께 기록합니다.
+
+    stream=True면 cur와 같은 연결에 이름 있는 서버 사이드 커서를 열어
+    itersize행씩 가져오며 출력하고, 출력한 행 수를 반환합니다.
+    (결과를 반환하는 SELECT 문에만 사용할 수 있습니다.)
+    """
+    if description:
+        print(f"\n>> {description}")
+    if show_sql:
+        print(f"SQL: {query[:100]}..." if len(query) > 100 else f"SQL: {query}")
+
+    timer = timing.QueryTimer(description, query)
+    before = queryid = None
+    if server_timing == 'statements':
+        queryid = timing.query_id(cur, query)
+        before = timing.statements_snapshot(cur)
+
+    if stream:
+        result = _execute_streaming(cur.connection, query, itersize, max_rows, timer)
+    else:
+        with timer.phase('execute'):
+            cur.execute(query)
+        if cur.description:
+            with timer.phase('fetch'):
+                rows = cur.fetchall()
+            with timer.phase('render'):
+                headers = [desc[0] for desc in cur.description]
+                print(tabulate(rows, headers=headers, tablefmt='psql'))
+            timer.rows = len(rows)
+            print(f"({len(rows)}개 행, {timer.summary()})")
+            result = rows
+        else:
+            print(f"완료 ({timer.summary()})")
+            result = None
+
+    if server_timing == 'statements':
+        timer.server = timing.statements_delta(before, timing.statements_snapshot(cur), queryid)
+    elif server_timing == 'explain':
+        timer.server = timing.server_timing_explain(cur, query)
+    if timer.server:
+        print(timer.server_summary())
+
+    timing.record(timer)
+    return result
+
+
+def _execute_streaming(conn, query, itersize, max_rows, timer):
+    # WITH HOLD 커서는 첫 FETCH 전에 결과 전체를 서버에 저장하므로 쓰지 않음.
+    # autocommit 연결이면 잠시 트랜잭션 모드로 바꿔 커서를 열고 끝나면 ROLLBACK (SELECT 전용)
+    own_transaction = conn.autocommit
+    if own_transaction:
+        conn.autocommit = False
+    try:
+        named = conn.cursor(name=f"lab_stream_{next(_cursor_ids)}")
+        named.itersize = itersize
+        try:
+            with timer.phase('execute'):
+                named.execute(query)
+            shown, truncated = stream_rows(named, batch_size=itersize, max_rows=max_rows,
+                                           timer=timer)
+        finally:
+            named.close()
+    finally:
+        if own_transaction:
+            conn.rollback()
+            conn.autocommit = True
+
+    timer.rows = shown
+    more = ", 이후 생략" if truncated else ""
+    print(f"({shown}개 행 표시{more}, {timer.summary()})")
+    return shown
@@ -0,0 +1,81 @@
+"""
+GIN pending list
+================
+
+GIN 인덱스에 행 하나를 넣으면 키(JSONB 키/값, 배열 원소, trigram)마다 엔트리가 생기므로
+B-tree보다 쓰기 비용이 훨씬 큽니다. fastupdate=on(기본값)이면 새 엔트리를 정렬하지 않고
+pending list에 덧붙였다가, 크기가 gin_pending_list_limit(기본 4MB)를 넘으면
+그 INSERT/UPDATE를 실행한 세션이 한꺼번에 본 트리로 옮깁니다 (VACUUM/autovacuum,
+gin_clean_pending_list()도 같은 정리를 함). 그래서 평균 쓰기는 빨라지지만
+정리를 맡은 문장 하나가 수백 ms씩 걸리는 지연 스파이크가 생깁니다.
+
+이 모듈은
+- gin_metapage_info()로 pending list 크기 (페이지/튜플) 읽기
+- 테이블의 GIN 인덱스 정의 읽기 (벤치마크용 테이블에 같은 인덱스를 만들 때)
+- fastupdate / gin_pending_list_limit 저장 옵션 절 만들기
+를 제공합니다. pageinspect 함수는 superuser 권한이 필요합니다.
+
+사용 예:
+    for name, definition in gin_indexes(cur, 'products_json'):
+        print(name, definition, pending(cur, name))
+"""
+
+import time
+
+from psycopg2 import sql
+
+DEFAULT_PENDING_LIST_LIMIT_KB = 4096
+
+GIN_INDEXES_QUERY = """
+    SELECT c.relname, pg_get_indexdef(i.indexrelid)
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_am am ON am.oid = c.relam
+    WHERE i.indrelid = %s::regclass AND am.amname = 'gin'
+    ORDER BY c.relname
+"""
+PENDING_QUERY = """
+    SELECT n_pending_pages, n_pending_tuples, n_total_pages, n_entries
+    FROM gin_metapage_info(get_raw_page(%s, 0))
+"""
+
+
+class Pending:
+    __slots__ = ('pages', 'tuples', 'total_pages', 'entries')
+
+    def __init__(self, pages, tuples, total_pages, entries):
+        self.pages = pages
+        self.tuples = tuples
+        self.total_pages = total_pages
+        self.entries = entries
+
+    def __repr__(self):
+        return f"Pending(pages={self.pages}, tuples={self.tuples})"
+
+
+def gin_indexes(cur, table):
+    """[(인덱스 이름, 'USING gin' 뒤의 컬럼 부분)] 예: ('idx_products_tags', '(tags)')"""
+    cur.execute(GIN_INDEXES_QUERY, (table,))
+    return [(name, definition.split(' USING gin ', 1)[1].split(' WITH (', 1)[0])
+            for name, definition in cur.fetchall()]
+
+
+def pending(cur, index):
+    """인덱스 하나의 pending list 크기"""
+    cur.execute(PENDING_QUERY, (index,))
+    return Pending(*cur.fetchone())
+
+
+def storage_options(fastupdate, pending_list_limit_kb=None):
+    """CREATE INDEX ... WITH (...) 절 (limit이 None이면 서버 설정 gin_pending_list_limit 사용)"""
+    options = [sql.SQL("fastupdate = {}").format(sql.SQL('on' if fastupdate else 'off'))]
+    if fastupdate and pending_list_limit_kb is not None:
+        options.append(sql.SQL("gin_pending_list_limit = {}").format(sql.Literal(pending_list_limit_kb)))
+    return sql.SQL("WITH ({})").format(sql.SQL(', ').join(options))
+
+
+def clean_pending(cur, index):
+    """gin_clean_pending_list()로 남은 pending list를 정리하고 (정리한 페이지 수, ms) 반환"""
+    started = time.perf_counter()
+    cur.execute("SELECT gin_clean_pending_list(%s::regclass)", (index,))
+    return cur.fetchone()[0], (time.perf_counter() - started) * 1000
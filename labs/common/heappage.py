@@ -0,0 +1,363 @@
+"""
+힙 페이지 디코더
+================
+
+lab02/lab05는 heap_page_items(get_raw_page(...))로 페이지를 하나씩 서버에서 해석합니다.
+테이블 전체를 보려면 페이지마다 pageinspect 함수를 호출해야 하고 결과도 행으로 부풀어 옵니다.
+
+이 모듈은 get_raw_page()의 8KB bytea를 여러 페이지씩 한 번에 가져와서
+PageHeaderData, 라인 포인터(ItemIdData), HeapTupleHeaderData를 클라이언트에서 직접 해석합니다.
+
+- psycopg2는 bytea를 memoryview로 돌려주므로 struct.unpack_from()으로 복사 없이 읽음
+- 라인 포인터 배열은 memoryview.cast('I')로 uint32 배열로 봄 (x86/ARM 리틀 엔디언 기준)
+- 튜플 데이터(t_data)도 memoryview 조각으로만 노출
+- dump_relation()으로 페이지를 파일에 저장하면 DB 없이 iter_file_pages()로 다시 분석 가능
+  (데이터 디렉터리의 relation 파일(base/<db>/<relfilenode>)도 같은 형식)
+
+레이아웃 (src/include/storage/bufpage.h, itemid.h, access/htup_details.h):
+
+    PageHeaderData (24B)  pd_lsn(8) pd_checksum(2) pd_flags(2) pd_lower(2) pd_upper(2)
+                          pd_special(2) pd_pagesize_version(2) pd_prune_xid(4)
+    ItemIdData (4B)       lp_off:15 | lp_flags:2 | lp_len:15
+    HeapTupleHeader (23B) t_xmin(4) t_xmax(4) t_cid(4) t_ctid(6) t_infomask2(2)
+                          t_infomask(2) t_hoff(1)
+
+get_raw_page()는 superuser(또는 pg_read_server_files 권한)가 필요합니다.
+
+사용 예:
+    for blkno, raw in fetch_pages(cur, 'vacuum_test'):
+        page = HeapPage(raw, blkno)
+        for t in page.tuples():
+            print(t.lp, t.t_xmin, t.t_xmax, t.t_ctid, t.flag_names())
+
+    print(analyze(HeapPage(raw, blkno) for blkno, raw in fetch_pages(cur, 'vacuum_test')))
+"""
+
+import mmap
+import struct
+from collections import Counter
+
+BLOCK_SIZE = 8192
+BATCH_PAGES = 256           # 쿼리 한 번에 가져올 페이지 수 (2MB)
+
+PAGE_HEADER = struct.Struct('<IIHHHHHHI')
+PAGE_HEADER_SIZE = PAGE_HEADER.size              # 24
+TUPLE_HEADER = struct.Struct('<IIIHHHHHB')
+TUPLE_HEADER_SIZE = TUPLE_HEADER.size            # 23
+
+# lp_flags
+LP_UNUSED, LP_NORMAL, LP_REDIRECT, LP_DEAD = 0, 1, 2, 3
+LP_NAMES = {LP_UNUSED: 'UNUSED', LP_NORMAL: 'NORMAL', LP_REDIRECT: 'REDIRECT', LP_DEAD: 'DEAD'}
+
+# t_infomask
+HEAP_HASNULL = 0x0001
+HEAP_HASVARWIDTH = 0x0002
+HEAP_HASEXTERNAL = 0x0004
+HEAP_XMAX_KEYSHR_LOCK = 0x0010
+HEAP_COMBOCID = 0x0020
+HEAP_XMAX_EXCL_LOCK = 0x0040
+HEAP_XMAX_LOCK_ONLY = 0x0080
+HEAP_XMIN_COMMITTED = 0x0100
+HEAP_XMIN_INVALID = 0x0200
+HEAP_XMIN_FROZEN = HEAP_XMIN_COMMITTED | HEAP_XMIN_INVALID
+HEAP_XMAX_COMMITTED = 0x0400
+HEAP_XMAX_INVALID = 0x0800
+HEAP_XMAX_IS_MULTI = 0x1000
+HEAP_UPDATED = 0x2000
+
+# t_infomask2
+HEAP_NATTS_MASK = 0x07FF
+HEAP_KEYS_UPDATED = 0x2000
+HEAP_HOT_UPDATED = 0x4000
+HEAP_ONLY_TUPLE = 0x8000
+
+INFOMASK_NAMES = (
+    (HEAP_HASNULL, 'HASNULL'), (HEAP_HASVARWIDTH, 'HASVARWIDTH'), (HEAP_HASEXTERNAL, 'HASEXTERNAL'),
+    (HEAP_XMAX_KEYSHR_LOCK, 'XMAX_KEYSHR_LOCK'), (HEAP_COMBOCID, 'COMBOCID'),
+    (HEAP_XMAX_EXCL_LOCK, 'XMAX_EXCL_LOCK'), (HEAP_XMAX_LOCK_ONLY, 'XMAX_LOCK_ONLY'),
+    (HEAP_XMIN_COMMITTED, 'XMIN_COMMITTED'), (HEAP_XMIN_INVALID, 'XMIN_INVALID'),
+    (HEAP_XMAX_COMMITTED, 'XMAX_COMMITTED'), (HEAP_XMAX_INVALID, 'XMAX_INVALID'),
+    (HEAP_XMAX_IS_MULTI, 'XMAX_IS_MULTI'), (HEAP_UPDATED, 'UPDATED'),
+)
+INFOMASK2_NAMES = (
+    (HEAP_KEYS_UPDATED, 'KEYS_UPDATED'), (HEAP_HOT_UPDATED, 'HOT_UPDATED'), (HEAP_ONLY_TUPLE, 'HEAP_ONLY'),
+)
+
+BLOCK_COUNT_QUERY = "SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::int"
+RAW_PAGES_QUERY = """
+    SELECT blkno, get_raw_page(%s, 'main', blkno)
+    FROM generate_series(%s::int, %s::int) AS blkno
+"""
+RAW_BLOCKS_QUERY = """
+    SELECT b.blkno, get_raw_page(%s, 'main', b.blkno)
+    FROM unnest(%s::int[]) WITH ORDINALITY AS b(blkno, n)
+    ORDER BY b.n
+"""
+
+
+class PageHeader:
+    __slots__ = ('lsn', 'checksum', 'flags', 'lower', 'upper', 'special', 'pagesize', 'version',
+                 'prune_xid')
+
+    def __init__(self, page):
+        (lsn_hi, lsn_lo, self.checksum, self.flags, self.lower, self.upper, self.special,
+         pagesize_version, self.prune_xid) = PAGE_HEADER.unpack_from(page, 0)
+        self.lsn = f"{lsn_hi:X}/{lsn_lo:08X}"
+        self.pagesize = pagesize_version & 0xFF00
+        self.version = pagesize_version & 0x00FF
+
+    @property
+    def line_pointer_count(self):
+        return max(0, (self.lower - PAGE_HEADER_SIZE) // 4)
+
+    @property
+    def free_space(self):
+        """pd_lower와 pd_upper 사이 빈 공간 (라인 포인터 추가분은 빼지 않음)"""
+        return max(0, self.upper - self.lower)
+
+    @property
+    def is_new(self):
+        """한 번도 초기화되지 않은 페이지 (확장 직후 all-zero)"""
+        return self.upper == 0
+
+
+class HeapTuple:
+    """라인 포인터 하나와 (NORMAL이면) 그 튜플의 헤더 - heap_page_items() 한 행에 해당"""
+
+    __slots__ = ('blkno', 'lp', 'lp_off', 'lp_flags', 'lp_len', 't_xmin', 't_xmax', 't_field3',
+                 't_ctid', 't_infomask2', 't_infomask', 't_hoff', '_page')
+
+    def __init__(self, page, blkno, lp, item):
+        self.blkno = blkno
+        self.lp = lp
+        self.lp_off = item & 0x7FFF
+        self.lp_flags = (item >> 15) & 0x3
+        self.lp_len = item >> 17
+        self._page = page
+        if self.lp_flags == LP_NORMAL and self.lp_len >= TUPLE_HEADER_SIZE:
+            (self.t_xmin, self.t_xmax, self.t_field3, bi_hi, bi_lo, posid,
+             self.t_infomask2, self.t_infomask, self.t_hoff) = TUPLE_HEADER.unpack_from(page, self.lp_off)
+            self.t_ctid = ((bi_hi << 16) | bi_lo, posid)
+        else:
+            self.t_xmin = self.t_xmax = self.t_field3 = self.t_ctid = None
+            self.t_infomask2 = self.t_infomask = self.t_hoff = None
+
+    @property
+    def has_tuple(self):
+        return self.t_infomask is not None
+
+    @property
+    def t_data(self):
+        """사용자 데이터 부분 (memoryview 조각, 복사 없음)"""
+        if not self.has_tuple:
+            return None
+        return self._page[self.lp_off + self.t_hoff:self.lp_off + self.lp_len]
+
+    @property
+    def natts(self):
+        return self.t_infomask2 & HEAP_NATTS_MASK if self.has_tuple else None
+
+    def _mask(self, bits):
+        return self.has_tuple and self.t_infomask & bits == bits
+
+    @property
+    def xmin_frozen(self):
+        return self._mask(HEAP_XMIN_FROZEN)
+
+    @property
+    def xmin_committed(self):
+        return self._mask(HEAP_XMIN_COMMITTED)
+
+    @property
+    def xmin_aborted(self):
+        return self.has_tuple and self.t_infomask & HEAP_XMIN_FROZEN == HEAP_XMIN_INVALID
+
+    @property
+    def xmax_committed(self):
+        return self._mask(HEAP_XMAX_COMMITTED)
+
+    @property
+    def xmax_lock_only(self):
+        return self._mask(HEAP_XMAX_LOCK_ONLY)
+
+    @property
+    def xmax_valid(self):
+        """t_xmax가 삭제/갱신을 나타낼 수 있는지 (0, XMAX_INVALID 힌트, 행 잠금 전용이 아님)"""
+        return (self.has_tuple and self.t_xmax != 0
+                and not self.t_infomask & HEAP_XMAX_INVALID and not self.xmax_lock_only)
+
+    @property
+    def hot_updated(self):
+        return self.has_tuple and bool(self.t_infomask2 & HEAP_HOT_UPDATED)
+
+    @property
+    def heap_only(self):
+        return self.has_tuple and bool(self.t_infomask2 & HEAP_ONLY_TUPLE)
+
+    @property
+    def redirect_to(self):
+        """LP_REDIRECT면 가리키는 라인 포인터 번호 (HOT 체인 시작점)"""
+        return self.lp_off if self.lp_flags == LP_REDIRECT else None
+
+    def flag_names(self):
+        """t_infomask / t_infomask2 플래그 이름 목록 (heap_tuple_infomask_flags()에서 HEAP_ 접두사를 뺀 이름)"""
+        if not self.has_tuple:
+            return [f"LP_{LP_NAMES[self.lp_flags]}"]
+        names = [name for bit, name in INFOMASK_NAMES if self.t_infomask & bit]
+        names += [name for bit, name in INFOMASK2_NAMES if self.t_infomask2 & bit]
+        if self.xmin_frozen:
+            names.append('XMIN_FROZEN')
+        return names
+
+    def row(self):
+        """heap_page_items()와 같은 순서의 튜플 (출력용)"""
+        ctid = f"({self.t_ctid[0]},{self.t_ctid[1]})" if self.t_ctid else None
+        return (self.lp, self.lp_off, LP_NAMES[self.lp_flags], self.lp_len,
+                self.t_xmin, self.t_xmax, ctid, ' '.join(self.flag_names()))
+
+    def __repr__(self):
+        return f"<HeapTuple ({self.blkno},{self.lp}) xmin={self.t_xmin} xmax={self.t_xmax}>"
+
+
+class HeapPage:
+    """8KB 힙 페이지 하나 (bytes, bytearray, memoryview 모두 가능)"""
+
+    __slots__ = ('page', 'blkno', 'header')
+
+    def __init__(self, page, blkno=None):
+        self.page = page if isinstance(page, memoryview) else memoryview(page)
+        self.blkno = blkno
+        self.header = PageHeader(self.page)
+
+    def line_pointers(self):
+        """라인 포인터 배열 (uint32 memoryview)"""
+        count = self.header.line_pointer_count
+        return self.page[PAGE_HEADER_SIZE:PAGE_HEADER_SIZE + 4 * count].cast('I')
+
+    def tuples(self):
+        """라인 포인터마다 HeapTuple (lp는 1부터)"""
+        if self.header.is_new:
+            return
+        page, blkno = self.page, self.blkno
+        for lp, item in enumerate(self.line_pointers(), start=1):
+            yield HeapTuple(page, blkno, lp, item)
+
+
+# 페이지 가져오기 ----------------------------------------------------
+
+def block_count(cur, relation):
+    cur.execute(BLOCK_COUNT_QUERY, (relation,))
+    return cur.fetchone()[0]
+
+
+def fetch_pages(cur, relation, start=0, count=None, batch=BATCH_PAGES):
+    """
+    (blkno, memoryview) 를 batch 페이지씩 가져와 차례로 반환
+
+    get_raw_page()는 공유 버퍼를 거쳐 읽으므로 아직 디스크에 쓰이지 않은 변경도 보입니다.
+    """
+    total = block_count(cur, relation)
+    end = total if count is None else min(total, start + count)
+    for first in range(start, end, batch):
+        cur.execute(RAW_PAGES_QUERY, (relation, first, min(first + batch, end) - 1))
+        for blkno, raw in cur.fetchall():
+            yield blkno, raw
+
+
+def fetch_blocks(cur, relation, blocks):
+    """지정한 블록들의 (blkno, memoryview) 목록 (blocks 순서 그대로, 인덱스 트리 탐색용)"""
+    cur.execute(RAW_BLOCKS_QUERY, (relation, list(blocks)))
+    return cur.fetchall()
+
+
+def dump_relation(cur, relation, path, batch=BATCH_PAGES):
+    """relation의 모든 페이지를 relation 파일과 같은 형식(8KB 페이지 연속)으로 저장, 페이지 수 반환"""
+    pages = 0
+    with open(path, 'wb') as f:
+        for _, raw in fetch_pages(cur, relation, batch=batch):
+            f.write(raw)
+            pages += 1
+    return pages
+
+
+def iter_file_pages(path, block_size=BLOCK_SIZE):
+    """
+    파일의 페이지를 mmap으로 읽어 (blkno, memoryview) 반환
+
+    반환한 memoryview는 mmap을 그대로 가리킵니다. 순회가 끝난 뒤에도 페이지를 쥐고 있으면
+    mmap은 그 참조가 사라질 때 닫힙니다.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return          # 빈 파일
+        view = memoryview(mapped)
+        try:
+            for blkno in range(len(mapped) // block_size):
+                yield blkno, view[blkno * block_size:(blkno + 1) * block_size]
+        finally:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                pass        # 호출자가 아직 페이지 조각을 쥐고 있음
+
+
+# 분석 --------------------------------------------------------------
+
+def analyze(pages):
+    """
+    HeapPage들을 훑어 힌트 비트 기준 요약을 반환
+
+    스냅샷 없이 헤더만 보므로 가시성 판정이 아니라 힌트 비트 기준의 추정입니다.
+    (힌트 비트가 아직 안 찍힌 튜플은 'xmax 있음(미확정)'으로 셉니다.)
+    """
+    lp = Counter()
+    counts = Counter()
+    pages_seen = new_pages = free_bytes = 0
+    xmin_range = [None, None]
+    for page in pages:
+        pages_seen += 1
+        if page.header.is_new:
+            new_pages += 1
+            continue
+        free_bytes += page.header.free_space
+        for t in page.tuples():
+            lp[LP_NAMES[t.lp_flags]] += 1
+            if not t.has_tuple:
+                continue
+            counts['tuples'] += 1
+            if t.xmin_frozen:
+                counts['frozen'] += 1
+            elif t.xmin_aborted:
+                counts['xmin_aborted'] += 1
+            else:
+                if xmin_range[0] is None or t.t_xmin < xmin_range[0]:
+                    xmin_range[0] = t.t_xmin
+                if xmin_range[1] is None or t.t_xmin > xmin_range[1]:
+                    xmin_range[1] = t.t_xmin
+            if t.xmax_valid:
+                counts['xmax_committed' if t.xmax_committed else 'xmax_pending'] += 1
+            elif t.xmax_lock_only:
+                counts['locked_only'] += 1
+            if t.hot_updated:
+                counts['hot_updated'] += 1
+            if t.heap_only:
+                counts['heap_only'] += 1
+    return {
+        'pages': pages_seen,
+        'new_pages': new_pages,
+        'line_pointers': dict(lp),
+        'tuples': counts['tuples'],
+        'frozen': counts['frozen'],
+        'xmin_aborted': counts['xmin_aborted'],
+        'xmax_committed': counts['xmax_committed'],     # 삭제/갱신이 커밋됨 (dead 후보)
+        'xmax_pending': counts['xmax_pending'],         # xmax는 있으나 힌트 없음 (진행 중이거나 미확인)
+        'locked_only': counts['locked_only'],
+        'hot_updated': counts['hot_updated'],
+        'heap_only': counts['heap_only'],
+        'free_bytes': free_bytes,
+        'xmin_min': xmin_range[0],
+        'xmin_max': xmin_range[1],
+    }
@@ -0,0 +1,117 @@
+"""
+지연 시간 히스토그램
+====================
+
+HdrHistogram과 같은 log-linear 버킷 구조의 히스토그램입니다.
+
+- 값(마이크로초)을 2의 거듭제곱 구간으로 나누고, 각 구간을 다시 SUB_BUCKETS개로 균등 분할
+- 버킷 폭은 값의 1/(SUB_BUCKETS/2) 이하라서 1µs부터 수십 초까지 상대 오차가 최대 약 3.1% (1/32)
+- 버킷 수가 값 범위에 로그로 비례하므로 수백만 건을 기록해도 메모리가 작음
+- to_dict()/from_dict()로 프로세스 간 전달, merge()로 합산
+
+사용 예:
+    hist = LatencyHistogram()
+    hist.record_ns(time.perf_counter_ns() - start)
+    hist.percentile(99.9)   # µs
+"""
+
+import math
+
+# 2의 거듭제곱 구간 하나를 나누는 버킷 수 (2^SUB_BUCKET_BITS)
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS // 2
+
+
+def bucket_index(value):
+    """정수 값 → 버킷 번호 (단조 증가)"""
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    top = value >> shift
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + (top - HALF_BUCKETS)
+
+
+def bucket_bounds(index):
+    """버킷 번호 → (최솟값, 최댓값)"""
+    if index < SUB_BUCKETS:
+        return index, index
+    shift, offset = divmod(index - SUB_BUCKETS, HALF_BUCKETS)
+    shift += 1
+    top = offset + HALF_BUCKETS
+    return top << shift, ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """마이크로초 단위 지연 시간 히스토그램"""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value_us, count=1):
+        value = max(0, int(value_us))
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def record_ns(self, value_ns):
+        self.record(value_ns // 1000)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        """
+        p 백분위 값 (µs)
+
+        HdrHistogram처럼 해당 버킷의 최댓값을 반환하되 실제 최댓값을 넘지 않습니다.
+        """
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """{'count', 'mean', 'min', 'max', 'p50', ...} (µs)"""
+        result = {'count': self.count, 'mean': self.mean, 'min': self.min or 0,
+                  'max': self.max or 0}
+        for p in percentiles:
+            result[f"p{p:g}"] = self.percentile(p)
+        return result
+
+    def to_dict(self):
+        return {'counts': self.counts, 'count': self.count, 'total': self.total,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls()
+        hist.counts = {int(k): v for k, v in data['counts'].items()}
+        hist.count = data['count']
+        hist.total = data['total']
+        hist.min = data['min']
+        hist.max = data['max']
+        return hist
@@ -0,0 +1,131 @@
+"""
+HOT UPDATE 비율과 fillfactor
+============================
+
+UPDATE는 인덱스 컬럼이 바뀌지 않고 새 튜플이 같은 페이지에 들어가면 HOT(Heap-Only Tuple)로
+처리되어 인덱스에 엔트리를 넣지 않습니다. 페이지가 가득 차 있으면 인덱스 컬럼을 건드리지 않아도
+새 튜플이 다른 페이지로 가므로 모든 인덱스에 엔트리가 추가됩니다 (쓰기 증폭, 인덱스 bloat).
+fillfactor는 INSERT가 페이지를 채우는 한도라서, 남겨 둔 공간만큼 HOT가 가능해집니다.
+
+이 모듈은
+- 테이블 복사본을 fillfactor별로 만들기 (인덱스/기본값/제약 포함)
+- 기본 UPDATE SET 절 만들기 (인덱스가 없는 컬럼만 바꿔 HOT가 가능한 UPDATE)
+- 트랜잭션 안에서 pg_stat_get_xact_tuples_(hot_)updated()로 문장별 HOT 행 수 읽기
+  (pg_stat_user_tables는 통계가 늦게 반영되므로 벤치마크 중에는 쓰지 않음)
+- 설정별 결과에서 fillfactor 추천
+을 제공합니다.
+
+사용 예:
+    copy_table(cur, 'index_mvcc_test', 'hot_tune', fillfactor=90)
+    cur.execute(f"UPDATE hot_tune SET {default_set_clause(cur, 'index_mvcc_test')} WHERE id = 1")
+    print(xact_updates(cur, 'hot_tune'))    # (1, 1)이면 HOT
+"""
+
+from psycopg2 import sql
+
+FILLFACTORS = (100, 90, 80, 70, 50)
+# 후반 HOT 비율이 최고값에서 이만큼 안이면 같은 수준으로 보고 크기로 고름
+HOT_TOLERANCE = 0.02
+NUMERIC_TYPES = ('smallint', 'integer', 'bigint', 'numeric', 'real', 'double precision')
+
+PRIMARY_KEY_QUERY = """
+    SELECT a.attname
+    FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE i.indrelid = %s::regclass AND i.indisprimary
+"""
+# 인덱스(키, INCLUDE, 식, 조건)에 쓰이지 않는 컬럼: 값이 바뀌어도 HOT 가능
+UNINDEXED_COLUMNS_QUERY = """
+    SELECT a.attname, format_type(a.atttypid, NULL)
+    FROM pg_attribute a
+    WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_index i
+          WHERE i.indrelid = a.attrelid
+            AND (a.attnum = ANY(i.indkey)
+                 OR concat_ws(' ', pg_get_expr(i.indexprs, i.indrelid), pg_get_expr(i.indpred, i.indrelid))
+                    ~ ('\\m' || a.attname || '\\M')))
+    ORDER BY a.attnum
+"""
+FILLFACTOR_QUERY = """
+    SELECT coalesce((SELECT option_value::int FROM pg_options_to_table(c.reloptions)
+                     WHERE option_name = 'fillfactor'), 100)
+    FROM pg_class c
+    WHERE c.oid = %s::regclass
+"""
+XACT_QUERY = "SELECT pg_stat_get_xact_tuples_updated(%s::regclass), pg_stat_get_xact_tuples_hot_updated(%s::regclass)"
+SIZES_QUERY = "SELECT pg_relation_size(%s::regclass), pg_indexes_size(%s::regclass)"
+
+
+def primary_key(cur, table):
+    """단일 컬럼 PK 이름 (없거나 여러 컬럼이면 None)"""
+    cur.execute(PRIMARY_KEY_QUERY, (table,))
+    rows = cur.fetchall()
+    return rows[0][0] if len(rows) == 1 else None
+
+
+def current_fillfactor(cur, table):
+    cur.execute(FILLFACTOR_QUERY, (table,))
+    return cur.fetchone()[0]
+
+
+def default_set_clause(cur, table):
+    """
+    인덱스가 없는 컬럼만 바꾸는 SET 절 (없으면 None)
+
+    숫자 컬럼은 +1, 숫자 컬럼이 없으면 첫 번째 컬럼을 자기 자신으로 (튜플 크기 유지).
+    """
+    cur.execute(UNINDEXED_COLUMNS_QUERY, (table,))
+    columns = cur.fetchall()
+    numeric = [name for name, type_name in columns if type_name in NUMERIC_TYPES]
+    if numeric:
+        parts = [sql.SQL("{c} = {c} + 1").format(c=sql.Identifier(name)) for name in numeric]
+    elif columns:
+        parts = [sql.SQL("{c} = {c}").format(c=sql.Identifier(columns[0][0]))]
+    else:
+        return None
+    return sql.SQL(', ').join(parts).as_string(cur)
+
+
+def copy_table(cur, source, target, fillfactor, autovacuum=True):
+    """source와 같은 정의/데이터의 target을 fillfactor로 새로 만들고 VACUUM ANALYZE"""
+    target_id = sql.Identifier(target)
+    options = [sql.SQL("fillfactor = {}").format(sql.Literal(fillfactor))]
+    if not autovacuum:
+        options.append(sql.SQL("autovacuum_enabled = off"))
+    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(target_id))
+    cur.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES) "
+                        "WITH ({})").format(target_id, sql.Identifier(source), sql.SQL(', ').join(options)))
+    cur.execute(sql.SQL("INSERT INTO {} SELECT * FROM {}").format(target_id, sql.Identifier(source)))
+    cur.execute(sql.SQL("VACUUM ANALYZE {}").format(target_id))
+
+
+def xact_updates(cur, table):
+    """현재 트랜잭션에서 table에 UPDATE한 (행 수, HOT 행 수) — COMMIT 전에 읽어야 함"""
+    cur.execute(XACT_QUERY, (table, table))
+    return cur.fetchone()
+
+
+def sizes(cur, table):
+    """(테이블 바이트, 인덱스 바이트 합)"""
+    cur.execute(SIZES_QUERY, (table, table))
+    return cur.fetchone()
+
+
+def hot_ratio(updated, hot):
+    return hot / updated if updated else None
+
+
+def recommend(results, tolerance=HOT_TOLERANCE):
+    """
+    설정별 결과 [{'fillfactor', 'steady_hot', 'final_bytes'}]에서 추천할 결과 하나
+
+    후반 HOT 비율이 최고값에서 tolerance 안인 설정 중 끝난 뒤 크기(테이블+인덱스)가
+    가장 작은 것, 같으면 fillfactor가 큰 것 (처음부터 비워 두는 공간이 적음).
+    """
+    measured = [r for r in results if r['steady_hot'] is not None]
+    if not measured:
+        return None
+    best = max(r['steady_hot'] for r in measured)
+    close = [r for r in measured if r['steady_hot'] >= best - tolerance]
+    return min(close, key=lambda r: (r['final_bytes'], -r['fillfactor']))
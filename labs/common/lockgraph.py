@@ -0,0 +1,261 @@
+"""
+락 대기 그래프 분석
+===================
+
+init.sql의 v_lock_waits 뷰는 pg_locks를 11개 컬럼으로 자기 조인하고
+pg_stat_activity를 두 번 조인합니다. 락이 수천 개가 되면 조인이 제곱으로 커져서
+정작 락 경합이 심할 때 가장 느립니다. 또 "누가 누구를 막는가"의 쌍만 보여줘서
+연쇄의 뿌리(root blocker)나 교착 상태는 직접 따라가야 합니다.
+
+이 모듈은 Lock을 기다리는 백엔드에 대해서만 pg_blocking_pids()를 호출해
+대기 그래프를 쿼리 한 번으로 읽고, Python에서 분석합니다.
+
+- root blocker: 다른 세션을 막고 있지만 자신은 기다리지 않는 세션
+- cycle: 서로를 기다리는 세션 묶음 (deadlock_timeout 뒤 교착 탐지기가 하나를 취소)
+- chain depth: root에서 가장 먼 대기자까지의 단계 수
+- root별 대기 시간: 그 root에 (직간접적으로) 막힌 세션들의 대기 시간 합계/최댓값
+
+pg_blocking_pids()는 락 큐에서 앞에 선 대기자도 blocker로 돌려주므로
+(soft block) 같은 행을 기다리는 세션들이 사슬 모양으로 보일 수 있습니다.
+
+사용 예:
+    graph = LockGraph.capture(cur)
+    for root in graph.roots():
+        print(root, graph.depth(root), graph.wait_seconds(root))
+    print(graph.cycles())
+
+    history = LockHistory()
+    while True:
+        history.add(LockGraph.capture(cur))     # root별 지속 시간 추적
+        time.sleep(1)
+"""
+
+import time
+from collections import defaultdict
+
+GRAPH_QUERY = """
+    SELECT a.pid,
+           CASE WHEN a.wait_event_type = 'Lock' THEN pg_blocking_pids(a.pid) END,
+           a.state,
+           a.wait_event_type,
+           a.wait_event,
+           a.usename,
+           left(a.query, 80),
+           extract(epoch FROM now() - w.waitstart),
+           extract(epoch FROM now() - a.xact_start)
+    FROM pg_stat_activity a
+    LEFT JOIN (
+        SELECT pid, min(waitstart) AS waitstart
+        FROM pg_locks
+        WHERE NOT granted
+        GROUP BY pid
+    ) w USING (pid)
+    WHERE a.backend_type = 'client backend'
+      AND a.pid <> pg_backend_pid()
+"""
+
+
+class Backend:
+    __slots__ = ('pid', 'blocked_by', 'state', 'wait_event_type', 'wait_event', 'user',
+                 'query', 'wait_seconds', 'xact_seconds')
+
+    def __init__(self, pid, blocked_by, state, wait_event_type, wait_event, user, query,
+                 wait_seconds, xact_seconds):
+        self.pid = pid
+        self.blocked_by = list(blocked_by or [])
+        self.state = state
+        self.wait_event_type = wait_event_type
+        self.wait_event = wait_event
+        self.user = user
+        self.query = ' '.join((query or '').split())
+        self.wait_seconds = float(wait_seconds or 0)
+        self.xact_seconds = float(xact_seconds or 0)
+
+    def __repr__(self):
+        return f"<Backend {self.pid} {self.state} {self.wait_event_type}:{self.wait_event}>"
+
+
+class LockGraph:
+    """pid → Backend와 대기 간선 (waiter → blocker)"""
+
+    def __init__(self, backends):
+        self.backends = {b.pid: b for b in backends}
+        self.blocks = defaultdict(set)      # blocker → 막힌 pid들
+        for b in backends:
+            for blocker in b.blocked_by:
+                self.blocks[blocker].add(b.pid)
+
+    @classmethod
+    def capture(cls, cur):
+        cur.execute(GRAPH_QUERY)
+        return cls([Backend(*row) for row in cur.fetchall()])
+
+    @property
+    def waiters(self):
+        return [b for b in self.backends.values() if b.blocked_by]
+
+    def edges(self):
+        """(막힌 pid, 막는 pid) 목록 - v_lock_waits의 (blocked_pid, blocking_pid)에 해당"""
+        return [(b.pid, blocker) for b in self.waiters for blocker in b.blocked_by]
+
+    # 분석 --------------------------------------------------------------
+
+    def roots(self):
+        """
+        다른 세션을 막지만 자신은 기다리지 않는 pid (막은 세션이 많은 순)
+
+        교착 상태처럼 모든 blocker가 서로를 기다리면 root가 없을 수 있습니다 (cycles() 참고).
+        """
+        roots = [pid for pid in self.blocks
+                 if not (self.backends.get(pid) and self.backends[pid].blocked_by)]
+        return sorted(roots, key=lambda pid: len(self.blocked_set(pid)), reverse=True)
+
+    def blocked_set(self, pid):
+        """pid에 직간접적으로 막힌 모든 pid"""
+        seen, stack = set(), [pid]
+        while stack:
+            for waiter in self.blocks.get(stack.pop(), ()):
+                if waiter not in seen and waiter != pid:
+                    seen.add(waiter)
+                    stack.append(waiter)
+        return seen
+
+    def depth(self, pid):
+        """pid에서 가장 먼 대기자까지의 단계 수 (BFS, cycle이 있어도 멈춤)"""
+        depth, frontier, seen = 0, {pid}, {pid}
+        while True:
+            frontier = {w for p in frontier for w in self.blocks.get(p, ()) if w not in seen}
+            if not frontier:
+                return depth
+            seen |= frontier
+            depth += 1
+
+    def wait_seconds(self, pid):
+        """pid에 막힌 세션들의 (대기 시간 합계, 최댓값)"""
+        waits = [self.backends[w].wait_seconds for w in self.blocked_set(pid) if w in self.backends]
+        return sum(waits), max(waits, default=0.0)
+
+    def cycles(self):
+        """서로를 기다리는 pid 묶음 목록 (Tarjan SCC, 크기 2 이상 또는 자기 자신을 기다림)"""
+        waits_for = {b.pid: b.blocked_by for b in self.backends.values()}
+        index, low, on_stack, stack, result = {}, {}, set(), [], []
+        counter = [0]
+
+        def visit(start):
+            # 재귀 대신 명시적 스택 (세션 수백 개 사슬에서도 재귀 한도에 걸리지 않도록)
+            work = [(start, iter(waits_for.get(start, ())))]
+            index[start] = low[start] = counter[0]
+            counter[0] += 1
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter[0]
+                        counter[0] += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(waits_for.get(child, ()))))
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in waits_for.get(node, ()):
+                            result.append(sorted(component))
+
+        for pid in waits_for:
+            if pid not in index:
+                visit(pid)
+        return result
+
+    def summary(self):
+        """root별 [(root pid, 막힌 세션 수, 깊이, 대기 합계 초, 최대 대기 초, 트랜잭션 경과 초, 쿼리)]"""
+        rows = []
+        for root in self.roots():
+            total, longest = self.wait_seconds(root)
+            backend = self.backends.get(root)
+            rows.append((root, len(self.blocked_set(root)), self.depth(root), total, longest,
+                         backend.xact_seconds if backend else None,
+                         backend.query if backend else ''))
+        return rows
+
+    def tree_lines(self, root, max_children=10):
+        """root 아래 대기 트리를 들여쓴 문자열 목록으로"""
+        lines = []
+
+        def describe(pid):
+            b = self.backends.get(pid)
+            if b is None:
+                return f"{pid} (다른 DB 또는 백그라운드 프로세스)"
+            wait = f" {b.wait_event}: {b.wait_seconds:.1f}s" if b.blocked_by else f" [{b.state}]"
+            return f"{pid}{wait}  {b.query[:60]}"
+
+        def walk(pid, depth, seen):
+            lines.append('  ' * depth + ('└ ' if depth else '') + describe(pid))
+            children = sorted(self.blocks.get(pid, ()))
+            for child in children[:max_children]:
+                if child in seen:
+                    lines.append('  ' * (depth + 1) + f"└ {child} (cycle)")
+                    continue
+                walk(child, depth + 1, seen | {child})
+            if len(children) > max_children:
+                lines.append('  ' * (depth + 1) + f"… 외 {len(children) - max_children}개")
+
+        walk(root, 0, {root})
+        return lines
+
+
+class LockHistory:
+    """
+    연속 샘플에서 root blocker별 경합 구간(episode)을 추적
+
+    한 root가 처음 보인 시각부터 더 이상 보이지 않을 때까지를 한 구간으로 보고,
+    그동안의 최대 막힌 세션 수/깊이/대기 시간을 기록합니다.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.active = {}        # root pid → episode dict
+        self.episodes = []      # 끝난 구간
+        self.cycles_seen = 0
+
+    def add(self, graph, now=None):
+        now = time.monotonic() if now is None else now
+        self.samples += 1
+        self.cycles_seen += len(graph.cycles())
+        current = {}
+        for root, blocked, depth, total, longest, xact, query in graph.summary():
+            episode = self.active.get(root) or {'root': root, 'started': now, 'query': query,
+                                                'max_blocked': 0, 'max_depth': 0, 'max_wait': 0.0}
+            episode['last_seen'] = now
+            episode['max_blocked'] = max(episode['max_blocked'], blocked)
+            episode['max_depth'] = max(episode['max_depth'], depth)
+            episode['max_wait'] = max(episode['max_wait'], longest)
+            current[root] = episode
+        for root, episode in self.active.items():
+            if root not in current:
+                self.episodes.append(episode)
+        self.active = current
+
+    def finish(self):
+        """진행 중인 구간도 끝난 것으로 보고 모든 구간을 오래 지속된 순으로 반환"""
+        self.episodes.extend(self.active.values())
+        self.active = {}
+        return sorted(self.episodes, key=lambda e: e['last_seen'] - e['started'], reverse=True)
+
+    @staticmethod
+    def duration(episode):
+        return episode['last_seen'] - episode['started']
@@ -0,0 +1,177 @@
+"""
+통계 뷰 샘플링과 롤링 윈도우
+============================
+
+pg_stat_database, pg_stat_user_tables, pg_statio_user_tables, pg_stat_user_indexes는
+대부분 누적 카운터입니다. 실시간으로 보려면 짧은 간격으로 읽어서
+"최근 몇 초 동안의 증가량 / 경과 시간"으로 바꿔야 합니다.
+
+- sample(cur): 네 뷰를 쿼리 한 번(왕복 한 번)으로 읽어 Sample로 반환
+- RollingWindow: 최근 seconds초의 샘플을 보관하고 그 구간의 초당 비율/히트율을 계산
+- metrics(window): 대시보드가 그리는 지표 dict
+
+통계 뷰는 트랜잭션 안에서 처음 읽은 값이 캐시되므로
+(stats_fetch_consistency = cache) autocommit 연결로 읽어야 매번 새 값이 보입니다.
+
+사용 예:
+    window = RollingWindow(5)
+    while True:
+        window.add(sample(cur))
+        print(metrics(window)['tps'])
+        time.sleep(1)
+"""
+
+from collections import deque
+
+# 테이블별 카운터 (pg_stat_user_tables + pg_statio_user_tables)
+TABLE_FIELDS = (
+    'seq_scan', 'idx_scan', 'n_tup_ins', 'n_tup_upd', 'n_tup_hot_upd', 'n_tup_del',
+    'n_live_tup', 'n_dead_tup', 'heap_blks_read', 'heap_blks_hit', 'idx_blks_read', 'idx_blks_hit',
+)
+
+DATABASE_FIELDS = (
+    'numbackends', 'xact_commit', 'xact_rollback', 'blks_read', 'blks_hit',
+    'tup_returned', 'tup_fetched', 'tup_inserted', 'tup_updated', 'tup_deleted',
+    'temp_bytes', 'deadlocks',
+)
+
+SAMPLE_QUERY = f"""
+    SELECT
+        extract(epoch FROM clock_timestamp()),
+        (SELECT json_build_array({', '.join(DATABASE_FIELDS)})
+         FROM pg_stat_database WHERE datname = current_database()),
+        (SELECT json_object_agg(t.relid::regclass::text, json_build_array(
+                    t.seq_scan, coalesce(t.idx_scan, 0), t.n_tup_ins, t.n_tup_upd,
+                    t.n_tup_hot_upd, t.n_tup_del, t.n_live_tup, t.n_dead_tup,
+                    coalesce(io.heap_blks_read, 0), coalesce(io.heap_blks_hit, 0),
+                    coalesce(io.idx_blks_read, 0), coalesce(io.idx_blks_hit, 0)))
+         FROM pg_stat_user_tables t JOIN pg_statio_user_tables io USING (relid)),
+        (SELECT json_object_agg(indexrelid::regclass::text, idx_scan)
+         FROM pg_stat_user_indexes)
+"""
+
+
+class Sample:
+    """한 시점의 누적 카운터"""
+
+    __slots__ = ('ts', 'database', 'tables', 'indexes')
+
+    def __init__(self, ts, database, tables, indexes):
+        self.ts = ts                # 서버 clock_timestamp() (초)
+        self.database = database    # 필드 → 값
+        self.tables = tables        # 테이블 → {필드: 값}
+        self.indexes = indexes      # 인덱스 → idx_scan
+
+    def table_total(self, field):
+        return sum(values[field] for values in self.tables.values())
+
+
+def sample(cur):
+    cur.execute(SAMPLE_QUERY)
+    ts, database, tables, indexes = cur.fetchone()
+    return Sample(
+        float(ts),
+        dict(zip(DATABASE_FIELDS, database or [0] * len(DATABASE_FIELDS))),
+        {name: dict(zip(TABLE_FIELDS, values)) for name, values in (tables or {}).items()},
+        dict(indexes or {}),
+    )
+
+
+class RollingWindow:
+    """최근 seconds초의 샘플 (구간 시작점 계산을 위해 경계 바깥 샘플 하나를 더 보관)"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = deque()
+
+    def add(self, s):
+        self.samples.append(s)
+        while len(self.samples) > 2 and self.samples[1].ts <= s.ts - self.seconds:
+            self.samples.popleft()
+
+    @property
+    def ready(self):
+        return len(self.samples) >= 2
+
+    @property
+    def first(self):
+        return self.samples[0]
+
+    @property
+    def last(self):
+        return self.samples[-1]
+
+    @property
+    def elapsed(self):
+        return self.last.ts - self.first.ts
+
+    def delta(self, get):
+        """get(sample)의 구간 증가량 (통계 reset으로 줄었으면 None)"""
+        d = get(self.last) - get(self.first)
+        return d if d >= 0 else None
+
+    def rate(self, get):
+        d = self.delta(get)
+        return d / self.elapsed if d is not None and self.elapsed > 0 else None
+
+    def ratio(self, get_hit, get_read):
+        """구간 히트율 % (읽은 블록이 없으면 None)"""
+        hit, read = self.delta(get_hit), self.delta(get_read)
+        if hit is None or read is None or hit + read == 0:
+            return None
+        return 100.0 * hit / (hit + read)
+
+
+def _db(field):
+    return lambda s: s.database[field]
+
+
+def _tables(field):
+    return lambda s: s.table_total(field)
+
+
+def top_index_rates(window, limit=5):
+    """구간 동안 스캔이 많았던 인덱스 [(이름, 초당 스캔 수)]"""
+    first, last = window.first.indexes, window.last.indexes
+    rates = []
+    for name, scans in last.items():
+        d = scans - first.get(name, scans)
+        if d > 0 and window.elapsed > 0:
+            rates.append((name, d / window.elapsed))
+    return sorted(rates, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def top_dead_tuples(s, limit=5):
+    """dead tuple이 많은 테이블 [(이름, n_dead_tup, dead %)]"""
+    rows = []
+    for name, values in s.tables.items():
+        dead, live = values['n_dead_tup'], values['n_live_tup']
+        if dead:
+            rows.append((name, dead, 100.0 * dead / max(dead + live, 1)))
+    return sorted(rows, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def metrics(window):
+    """롤링 윈도우 기준 지표 (아직 샘플이 하나뿐이면 None)"""
+    if not window.ready:
+        return None
+    return {
+        'ts': window.last.ts,
+        'backends': window.last.database['numbackends'],
+        'commit_s': window.rate(_db('xact_commit')),
+        'rollback_s': window.rate(_db('xact_rollback')),
+        'db_hit_pct': window.ratio(_db('blks_hit'), _db('blks_read')),
+        'heap_hit_pct': window.ratio(_tables('heap_blks_hit'), _tables('heap_blks_read')),
+        'idx_hit_pct': window.ratio(_tables('idx_blks_hit'), _tables('idx_blks_read')),
+        'returned_s': window.rate(_db('tup_returned')),
+        'fetched_s': window.rate(_db('tup_fetched')),
+        'inserted_s': window.rate(_db('tup_inserted')),
+        'updated_s': window.rate(_db('tup_updated')),
+        'deleted_s': window.rate(_db('tup_deleted')),
+        'seq_scan_s': window.rate(_tables('seq_scan')),
+        'idx_scan_s': window.rate(_tables('idx_scan')),
+        'temp_bytes_s': window.rate(_db('temp_bytes')),
+        'deadlocks': window.delta(_db('deadlocks')),
+        'top_indexes': top_index_rates(window),
+        'top_dead': top_dead_tuples(window.last),
+    }
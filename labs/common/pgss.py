@@ -0,0 +1,153 @@
+"""
+pg_stat_statements 델타 수집
+============================
+
+pg_stat_statements의 값은 서버 시작(또는 reset) 이후 누적값이라,
+한 번 조회해서는 "지난 5분 동안 갑자기 느려진 쿼리"가 보이지 않습니다.
+일정 간격으로 스냅샷을 찍고 queryid별 차이(델타)를 계산해 시계열 저장소에 넣습니다.
+
+- take_snapshot(cur): 현재 DB의 queryid별 누적값 (userid/toplevel이 다른 항목은 합침)
+- diff(prev, curr): queryid별 델타
+    * 새로 생긴 queryid: 누적값 전체가 이번 구간의 델타
+    * 값이 줄어든 queryid: 항목이 밀려났다가 다시 생긴 것 → 현재 누적값을 델타로
+    * pg_stat_statements_reset()으로 stats_reset이 바뀜: 모든 항목을 새로 생긴 것으로 취급
+    * 호출이 없던 queryid는 저장하지 않음
+- StatementsCollector: 스냅샷 → 델타 → TimeSeriesStore 반복
+
+사용 예:
+    before = take_snapshot(cur)
+    ... 워크로드 ...
+    deltas = diff(before, take_snapshot(cur))     # queryid → {'calls': ..., 'exec_ms': ...}
+
+    StatementsCollector(open_store(), interval=10).run(duration=600)
+"""
+
+import os
+import time
+
+from common import timing
+from common.db import get_connection
+from common.tsdb import TimeSeriesStore
+
+STORE_PATH = os.path.join(timing.RESULTS_DIR, 'statements.db')
+INTERVAL = 10.0          # 스냅샷 간격(초)
+COMPACT_EVERY = 360      # 스냅샷 몇 번마다 compact할지 (10초 간격이면 1시간)
+LABEL_LENGTH = 200
+
+# 델타 필드 (pg_stat_statements 컬럼 → 저장 이름)
+FIELDS = {
+    'calls': 'calls',
+    'total_exec_time': 'exec_ms',
+    'rows': 'rows',
+    'shared_blks_hit': 'blks_hit',
+    'shared_blks_read': 'blks_read',
+    'shared_blks_dirtied': 'blks_dirtied',
+    'wal_bytes': 'wal_bytes',
+}
+
+SNAPSHOT_QUERY = f"""
+    SELECT queryid,
+           {', '.join(f'sum({col})::float8' for col in FIELDS)},
+           left(min(query), {LABEL_LENGTH})
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+      AND queryid IS NOT NULL
+      AND query NOT LIKE '%pg_stat_statements%'
+    GROUP BY queryid
+"""
+
+
+class Snapshot:
+    """한 시점의 queryid → 누적값"""
+
+    def __init__(self, ts, stats_reset, totals, texts):
+        self.ts = ts
+        self.stats_reset = stats_reset
+        self.totals = totals      # queryid → {저장 이름: 누적값}
+        self.texts = texts        # queryid → 쿼리 앞부분
+
+
+def take_snapshot(cur):
+    cur.execute("SELECT stats_reset FROM pg_stat_statements_info")
+    stats_reset = cur.fetchone()[0]
+    cur.execute(SNAPSHOT_QUERY)
+    totals, texts = {}, {}
+    for row in cur.fetchall():
+        queryid, values, text = row[0], row[1:-1], row[-1]
+        totals[queryid] = dict(zip(FIELDS.values(), values))
+        texts[queryid] = ' '.join(text.split())
+    return Snapshot(time.time(), stats_reset, totals, texts)
+
+
+def diff(prev, curr):
+    """queryid → {저장 이름: 델타} (호출이 없던 queryid는 제외)"""
+    reset = prev.stats_reset != curr.stats_reset
+    deltas = {}
+    for queryid, now in curr.totals.items():
+        before = None if reset else prev.totals.get(queryid)
+        if before is None or now['calls'] < before['calls']:
+            delta = dict(now)
+        else:
+            delta = {name: now[name] - before[name] for name in now}
+        if delta['calls'] > 0:
+            deltas[queryid] = delta
+    return deltas
+
+
+def open_store(path=STORE_PATH):
+    return TimeSeriesStore(path, FIELDS.values())
+
+
+class StatementsCollector:
+    """interval초마다 스냅샷을 찍고 델타를 저장"""
+
+    def __init__(self, store, interval=INTERVAL, compact_every=COMPACT_EVERY):
+        self.store = store
+        self.interval = interval
+        self.compact_every = compact_every
+        self.previous = None
+        self.samples = 0
+
+    def collect(self, cur):
+        """스냅샷 하나를 찍고 직전 스냅샷과의 델타를 저장해 (구간 초, 델타)를 반환"""
+        snapshot = take_snapshot(cur)
+        previous, self.previous = self.previous, snapshot
+        if previous is None:
+            return 0.0, {}
+        seconds = snapshot.ts - previous.ts
+        deltas = diff(previous, snapshot)
+        self.store.append_many(snapshot.ts, [
+            (queryid, delta, snapshot.texts.get(queryid)) for queryid, delta in deltas.items()
+        ], seconds)
+        self.samples += 1
+        if self.compact_every and self.samples % self.compact_every == 0:
+            self.store.compact()
+        return seconds, deltas
+
+    def run(self, duration=None, on_sample=None):
+        """
+        duration초 동안 (None이면 Ctrl+C까지) 수집
+
+        간격이 밀리지 않도록 시작 시각 기준 tick에 맞춰 잠듭니다.
+        on_sample(seconds, deltas)가 주어지면 매 구간마다 호출합니다.
+        """
+        conn = get_connection(autocommit=True)
+        cur = conn.cursor()
+        started = time.monotonic()
+        tick = 0
+        try:
+            while duration is None or time.monotonic() - started < duration:
+                seconds, deltas = self.collect(cur)
+                if seconds and on_sample is not None:
+                    on_sample(seconds, deltas)
+                tick += 1
+                time.sleep(max(0.0, started + tick * self.interval - time.monotonic()))
+            # 마지막 구간까지 저장
+            seconds, deltas = self.collect(cur)
+            if seconds and on_sample is not None:
+                on_sample(seconds, deltas)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            cur.close()
+            conn.close()
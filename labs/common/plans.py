@@ -0,0 +1,441 @@
+"""
+실행 계획 캡처와 계획 트리
+==========================
+
+EXPLAIN (ANALYZE, BUFFERS, WAL, SETTINGS, FORMAT JSON) 결과를
+PlanNode 트리로 바꿔서, 계획을 눈이 아니라 코드로 분석할 수 있게 합니다.
+
+- PlanNode: 노드 종류, 대상 테이블/인덱스, 예상/실제 행 수, loops, 시간,
+            Buffers / WAL 카운터, 그 밖의 항목(Index Cond, Heap Fetches 등)
+- Plan:     루트 노드, Planning/Execution Time, 변경된 설정(SETTINGS)
+- 노드 시간:
+    * inclusive_ms: actual total time × loops (자식 포함)
+    * self_ms:      inclusive_ms - 자식들의 inclusive_ms (노드 자신이 쓴 시간)
+- Plan.dominant_node(): self_ms가 가장 큰 노드 (병목 후보)
+
+str(plan)은 FORMAT TEXT와 비슷한 트리를 출력하므로,
+lab에서는 기존처럼 print(get_explain_analyze(cur, query))로 보면 됩니다.
+
+사용 예:
+    plan = explain(cur, "SELECT ... FROM orders WHERE customer_id = 100")
+    plan.execution_ms
+    plan.dominant_node().label()        # 'Seq Scan on orders'
+    plan.find('Index Only Scan')[0].extra.get('Heap Fetches')
+    plan.root.buffers.hit_ratio
+
+주의: ANALYZE는 쿼리를 실제로 실행하므로 INSERT/UPDATE/DELETE는
+트랜잭션 안에서 실행 후 ROLLBACK하세요.
+"""
+
+import json
+
+# EXPLAIN JSON 키 → Buffers 속성 이름
+BUFFER_KEYS = {
+    'Shared Hit Blocks': 'shared_hit',
+    'Shared Read Blocks': 'shared_read',
+    'Shared Dirtied Blocks': 'shared_dirtied',
+    'Shared Written Blocks': 'shared_written',
+    'Local Hit Blocks': 'local_hit',
+    'Local Read Blocks': 'local_read',
+    'Local Dirtied Blocks': 'local_dirtied',
+    'Local Written Blocks': 'local_written',
+    'Temp Read Blocks': 'temp_read',
+    'Temp Written Blocks': 'temp_written',
+    'I/O Read Time': 'io_read_ms',
+    'I/O Write Time': 'io_write_ms',
+}
+
+WAL_KEYS = {
+    'WAL Records': 'records',
+    'WAL FPI': 'fpi',
+    'WAL Bytes': 'bytes',
+}
+
+# PlanNode 속성으로 따로 보관하는 키 (나머지는 extra)
+NODE_KEYS = {
+    'Node Type', 'Parent Relationship', 'Parallel Aware', 'Async Capable',
+    'Relation Name', 'Schema', 'Alias', 'Index Name', 'Scan Direction',
+    'Join Type', 'Strategy', 'Partial Mode', 'Subplan Name',
+    'Startup Cost', 'Total Cost', 'Plan Rows', 'Plan Width',
+    'Actual Startup Time', 'Actual Total Time', 'Actual Rows', 'Actual Loops',
+    'Plans', 'Output', 'Workers',
+} | set(BUFFER_KEYS) | set(WAL_KEYS)
+
+# 텍스트 출력에 표시할 세부 항목 (FORMAT TEXT 순서)
+DETAIL_KEYS = [
+    'Sort Key', 'Group Key', 'Hash Cond', 'Merge Cond', 'Join Filter', 'Index Cond',
+    'Recheck Cond', 'Filter', 'Rows Removed by Join Filter', 'Rows Removed by Filter',
+    'Rows Removed by Index Recheck', 'Heap Fetches', 'Exact Heap Blocks', 'Lossy Heap Blocks',
+    'Sort Method', 'Sort Space Used', 'Hash Buckets', 'Peak Memory Usage',
+    'Workers Planned', 'Workers Launched',
+]
+
+AGGREGATE_NAMES = {'Hashed': 'HashAggregate', 'Sorted': 'GroupAggregate',
+                   'Mixed': 'MixedAggregate'}
+JOIN_NODES = {'Nested Loop', 'Hash Join', 'Merge Join'}
+
+
+class Buffers:
+    """Buffers 카운터 (블록 수, I/O 시간 ms)"""
+
+    __slots__ = tuple(BUFFER_KEYS.values())
+
+    def __init__(self, data=None, **values):
+        data = data or {}
+        for key, attr in BUFFER_KEYS.items():
+            setattr(self, attr, values.get(attr, data.get(key, 0)) or 0)
+
+    def __add__(self, other):
+        return Buffers(**{a: getattr(self, a) + getattr(other, a) for a in self.__slots__})
+
+    def __sub__(self, other):
+        return Buffers(**{a: getattr(self, a) - getattr(other, a) for a in self.__slots__})
+
+    @property
+    def shared_total(self):
+        return self.shared_hit + self.shared_read
+
+    @property
+    def hit_ratio(self):
+        """shared buffer 적중률 (접근이 없으면 None)"""
+        return self.shared_hit / self.shared_total if self.shared_total else None
+
+    def any(self):
+        return any(getattr(self, a) for a in self.__slots__)
+
+    def to_dict(self):
+        return {a: getattr(self, a) for a in self.__slots__}
+
+    def text(self):
+        """'shared hit=10 read=2, temp written=5' 형식"""
+        parts = []
+        for scope in ('shared', 'local', 'temp'):
+            values = [(kind, getattr(self, f"{scope}_{kind}"))
+                      for kind in ('hit', 'read', 'dirtied', 'written')
+                      if hasattr(self, f"{scope}_{kind}") and getattr(self, f"{scope}_{kind}")]
+            if values:
+                parts.append(scope + ' ' + ' '.join(f"{k}={v}" for k, v in values))
+        return ', '.join(parts)
+
+    def __repr__(self):
+        return f"Buffers({self.text() or 'none'})"
+
+
+class WalUsage:
+    """WAL 사용량 (레코드 수, full page image 수, 바이트)"""
+
+    __slots__ = tuple(WAL_KEYS.values())
+
+    def __init__(self, data=None, **values):
+        data = data or {}
+        for key, attr in WAL_KEYS.items():
+            setattr(self, attr, values.get(attr, data.get(key, 0)) or 0)
+
+    def __add__(self, other):
+        return WalUsage(**{a: getattr(self, a) + getattr(other, a) for a in self.__slots__})
+
+    def any(self):
+        return any(getattr(self, a) for a in self.__slots__)
+
+    def to_dict(self):
+        return {a: getattr(self, a) for a in self.__slots__}
+
+    def __repr__(self):
+        return f"WalUsage(records={self.records}, fpi={self.fpi}, bytes={self.bytes})"
+
+
+class PlanNode:
+    """
+    실행 계획 노드 하나
+
+    실제 값(actual_*)은 ANALYZE 없이 캡처했거나 한 번도 실행되지 않은
+    노드(never executed)에서는 None입니다.
+    """
+
+    def __init__(self, data, parent=None, depth=0):
+        self.parent = parent
+        self.depth = depth
+        self.node_type = data['Node Type']
+        self.parent_relationship = data.get('Parent Relationship')
+        self.parallel_aware = data.get('Parallel Aware', False)
+        self.relation = data.get('Relation Name')
+        self.schema = data.get('Schema')
+        self.alias = data.get('Alias')
+        self.index_name = data.get('Index Name')
+        self.scan_direction = data.get('Scan Direction')
+        self.join_type = data.get('Join Type')
+        self.strategy = data.get('Strategy')
+        self.partial_mode = data.get('Partial Mode')
+        self.subplan_name = data.get('Subplan Name')
+
+        self.startup_cost = data.get('Startup Cost')
+        self.total_cost = data.get('Total Cost')
+        self.plan_rows = data.get('Plan Rows')
+        self.plan_width = data.get('Plan Width')
+
+        loops = data.get('Actual Loops')
+        executed = bool(loops)
+        self.actual_startup_ms = data.get('Actual Startup Time') if executed else None
+        self.actual_total_ms = data.get('Actual Total Time') if executed else None
+        self.actual_rows = data.get('Actual Rows') if executed else None
+        self.actual_loops = loops
+
+        self.buffers = Buffers(data)
+        self.wal = WalUsage(data)
+        self.extra = {k: v for k, v in data.items() if k not in NODE_KEYS}
+        self.children = [PlanNode(child, self, depth + 1) for child in data.get('Plans', [])]
+
+    # 시간 ------------------------------------------------------------
+
+    @property
+    def executed(self):
+        return bool(self.actual_loops)
+
+    @property
+    def inclusive_ms(self):
+        """자식을 포함한 이 노드의 전체 시간 (actual total time × loops)"""
+        if self.actual_total_ms is None:
+            return 0.0
+        return self.actual_total_ms * self.actual_loops
+
+    @property
+    def self_ms(self):
+        """
+        자식 노드 시간을 뺀 이 노드 자신의 시간
+
+        병렬 쿼리에서는 워커 시간이 loops로 평균되어 음수가 나올 수 있으므로 0으로 자릅니다.
+        """
+        return max(0.0, self.inclusive_ms - sum(c.inclusive_ms for c in self.children))
+
+    @property
+    def total_rows(self):
+        """실제로 내보낸 전체 행 수 (rows × loops)"""
+        if self.actual_rows is None:
+            return None
+        return self.actual_rows * self.actual_loops
+
+    @property
+    def self_buffers(self):
+        """자식 노드의 Buffers를 뺀 이 노드 자신의 Buffers"""
+        result = self.buffers
+        for child in self.children:
+            result = result - child.buffers
+        return result
+
+    @property
+    def row_estimate_ratio(self):
+        """실제 행 수 / 예상 행 수 (1에서 멀수록 통계가 부정확)"""
+        if self.actual_rows is None or not self.plan_rows:
+            return None
+        return self.actual_rows / self.plan_rows
+
+    # 탐색 ------------------------------------------------------------
+
+    def walk(self):
+        """이 노드부터 전위 순회"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def label(self):
+        """'Index Only Scan using idx_orders_covering on orders' 같은 노드 이름"""
+        name = self.node_type
+        if self.node_type == 'Aggregate':
+            name = AGGREGATE_NAMES.get(self.strategy, name)
+            if self.partial_mode and self.partial_mode != 'Simple':
+                name = f"{self.partial_mode} {name}"
+        if self.node_type in JOIN_NODES and self.join_type and self.join_type != 'Inner':
+            if self.node_type == 'Nested Loop':
+                name = f"{name} {self.join_type} Join"
+            else:
+                name = name.replace(' Join', f" {self.join_type} Join")
+        if self.parallel_aware:
+            name = f"Parallel {name}"
+        if self.index_name:
+            if self.node_type == 'Bitmap Index Scan':
+                name += f" on {self.index_name}"
+            else:
+                backward = " Backward" if self.scan_direction == 'Backward' else ""
+                name += f"{backward} using {self.index_name}"
+        if self.relation:
+            name += f" on {self.relation}"
+            if self.alias and self.alias != self.relation:
+                name += f" {self.alias}"
+        return name
+
+    def shape(self):
+        """
+        비용/시간을 뺀 계획 모양 (노드 종류, 테이블, 인덱스, 자식 모양)
+
+        두 계획의 shape()가 다르면 플래너가 다른 경로를 고른 것입니다.
+        """
+        return (self.label(), tuple(child.shape() for child in self.children))
+
+    # 출력 ------------------------------------------------------------
+
+    def text_lines(self, indent=0):
+        prefix = ' ' * indent + ('->  ' if self.parent is not None else '')
+        line = (f"{prefix}{self.label()}  (cost={self.startup_cost:.2f}..{self.total_cost:.2f} "
+                f"rows={self.plan_rows} width={self.plan_width})")
+        if self.executed and self.actual_total_ms is not None:
+            line += (f" (actual time={self.actual_startup_ms:.3f}..{self.actual_total_ms:.3f} "
+                     f"rows={self.actual_rows:g} loops={self.actual_loops})")
+        elif self.executed:
+            line += f" (actual rows={self.actual_rows:g} loops={self.actual_loops})"
+        elif self.actual_loops == 0:
+            line += " (never executed)"
+        lines = [line]
+
+        detail = ' ' * (indent + (6 if self.parent is not None else 2))
+        for key in DETAIL_KEYS:
+            if key in self.extra:
+                value = self.extra[key]
+                if isinstance(value, list):
+                    value = ', '.join(str(v) for v in value)
+                lines.append(f"{detail}{key}: {value}")
+        if self.buffers.any():
+            lines.append(f"{detail}Buffers: {self.buffers.text()}")
+        if self.wal.any():
+            lines.append(f"{detail}WAL: records={self.wal.records} fpi={self.wal.fpi} "
+                         f"bytes={self.wal.bytes}")
+        for child in self.children:
+            lines.extend(child.text_lines(indent + (6 if self.parent is not None else 2)))
+        return lines
+
+    def to_dict(self):
+        return {
+            'label': self.label(),
+            'node_type': self.node_type,
+            'relation': self.relation,
+            'index': self.index_name,
+            'plan_rows': self.plan_rows,
+            'actual_rows': self.actual_rows,
+            'loops': self.actual_loops,
+            'inclusive_ms': self.inclusive_ms,
+            'self_ms': self.self_ms,
+            'buffers': self.buffers.to_dict(),
+            'wal': self.wal.to_dict(),
+            'children': [child.to_dict() for child in self.children],
+        }
+
+    def __repr__(self):
+        return f"<PlanNode {self.label()} self={self.self_ms:.3f}ms>"
+
+
+class Plan:
+    """EXPLAIN 결과 전체 (루트 노드 + 계획/실행 시간 + 설정)"""
+
+    def __init__(self, data, query=None):
+        self.query = query
+        self.raw = data
+        self.root = PlanNode(data['Plan'])
+        self.planning_ms = data.get('Planning Time')
+        self.execution_ms = data.get('Execution Time')
+        self.settings = data.get('Settings', {})
+        self.planning_buffers = Buffers(data.get('Planning', {}))
+        self.triggers = data.get('Triggers', [])
+        self.jit = data.get('JIT')
+
+    @classmethod
+    def from_json(cls, value, query=None):
+        """EXPLAIN (FORMAT JSON) 결과 (문자열 또는 파싱된 목록)"""
+        if isinstance(value, str):
+            value = json.loads(value)
+        return cls(value[0], query=query)
+
+    def nodes(self):
+        return list(self.root.walk())
+
+    def find(self, node_type):
+        """node_type이 같은 노드 목록"""
+        return [node for node in self.root.walk() if node.node_type == node_type]
+
+    def dominant_node(self):
+        """self_ms가 가장 큰 노드"""
+        return max(self.root.walk(), key=lambda node: node.self_ms)
+
+    def scans(self):
+        """테이블/인덱스를 직접 읽는 노드"""
+        return [node for node in self.root.walk() if node.relation or node.index_name]
+
+    def shape(self):
+        return self.root.shape()
+
+    def totals(self):
+        """
+        계획 전체 합계
+
+        Buffers/WAL은 부모 노드가 자식 값을 포함하므로 루트 값이 곧 합계입니다.
+        """
+        return {
+            'planning_ms': self.planning_ms,
+            'execution_ms': self.execution_ms,
+            'nodes': len(self.nodes()),
+            'rows': self.root.total_rows,
+            'buffers': self.root.buffers,
+            'planning_buffers': self.planning_buffers,
+            'wal': self.root.wal,
+            'heap_fetches': sum(node.extra.get('Heap Fetches', 0) for node in self.root.walk()),
+        }
+
+    def summary(self):
+        """'실행 12.3ms (계획 0.2ms), 병목: Seq Scan on orders 11.9ms' 한 줄 요약"""
+        top = self.dominant_node()
+        text = ""
+        if self.execution_ms is not None:
+            text = f"실행 {self.execution_ms:.3f}ms (계획 {self.planning_ms:.3f}ms), "
+        text += f"병목: {top.label()} {top.self_ms:.3f}ms"
+        hit_ratio = self.root.buffers.hit_ratio
+        if hit_ratio is not None:
+            text += f", 버퍼 적중률 {hit_ratio * 100:.1f}%"
+        return text
+
+    def text(self):
+        """FORMAT TEXT와 비슷한 트리 문자열"""
+        lines = self.root.text_lines()
+        if self.settings:
+            lines.append("Settings: " + ', '.join(f"{k} = '{v}'" for k, v in self.settings.items()))
+        if self.planning_buffers.any():
+            lines.append("Planning:")
+            lines.append(f"  Buffers: {self.planning_buffers.text()}")
+        if self.planning_ms is not None:
+            lines.append(f"Planning Time: {self.planning_ms:.3f} ms")
+        if self.execution_ms is not None:
+            lines.append(f"Execution Time: {self.execution_ms:.3f} ms")
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {
+            'query': self.query,
+            'planning_ms': self.planning_ms,
+            'execution_ms': self.execution_ms,
+            'settings': self.settings,
+            'plan': self.root.to_dict(),
+        }
+
+    def __str__(self):
+        return self.text()
+
+
+def explain(cur, query, params=None, analyze=True, buffers=True, wal=True, settings=True,
+            timing=True):
+    """
+    쿼리의 실행 계획을 캡처해 Plan으로 반환
+
+    analyze=False면 쿼리를 실행하지 않고 예상 계획만 가져옵니다 (WAL 옵션도 꺼짐).
+    timing=False면 노드별 시간 측정 오버헤드를 없애고 행 수/버퍼만 기록합니다.
+    """
+    options = []
+    if analyze:
+        options.append('ANALYZE')
+        if not timing:
+            options.append('TIMING OFF')
+        if wal:
+            options.append('WAL')
+    if buffers:
+        options.append('BUFFERS')
+    if settings:
+        options.append('SETTINGS')
+    options.append('FORMAT JSON')
+    cur.execute(f"EXPLAIN ({', '.join(options)}) {query}", params)
+    return Plan.from_json(cur.fetchone()[0], query=query)
@@ -0,0 +1,300 @@
+"""
+중복/겹치는 인덱스 찾기
+=======================
+
+v_index_usage는 idx_scan만으로 USED/UNUSED를 나눕니다. 그런데 쓰이는 인덱스라도
+다른 인덱스가 같은 일을 할 수 있으면 쓰기마다 비용만 더합니다.
+이 모듈은 pg_index 정의를 읽어 같은 테이블의 인덱스 쌍을 비교합니다.
+
+- duplicate: 방식, 키, 연산자 클래스, 정렬 옵션, INCLUDE, 조건(WHERE)이 모두 같음
+- prefix:    B-tree 키가 다른 B-tree 키의 앞부분 (예: (customer_id) ⊂ (customer_id, status))
+- include:   키가 같고 INCLUDE 컬럼이 다른 인덱스에 모두 있음 (예: idx_orders_covering)
+- partial:   부분 인덱스를 조건 없는 인덱스가 대신할 수 있음
+             (키가 앞부분이거나, WHERE col = 상수의 col이 키 앞에 있음)
+
+UNIQUE/PK/제약 인덱스는 다른 인덱스로 대신할 수 없으므로 prefix/include/partial 대상에서 빼고,
+duplicate에서는 제약이 있거나 더 많이 쓰인 쪽을 남깁니다.
+
+measure_write_costs()는 트랜잭션 안에서 중복 인덱스가 있을 때와 DROP했을 때를 번갈아
+INSERT 탐침(common.advisor.measure_insert)의 시간과 WAL을 재서
+행당 쓰기 증폭을 구하고, 끝나면 ROLLBACK합니다. 그동안 테이블이 잠깁니다.
+UPDATE는 HOT가 아닐 때 INSERT와 같이 모든 인덱스에 항목을 넣으므로
+pg_stat_user_tables의 (n_tup_ins + n_tup_upd - n_tup_hot_upd) × 행당 비용으로 누적 비용을 추정합니다.
+
+사용 예:
+    indexes = load_indexes(cur)
+    for finding in find_redundant(indexes):
+        print(finding)
+"""
+
+import re
+
+import psycopg2
+from psycopg2 import sql
+
+from common import advisor, stats
+from common.db import get_connection
+from common.plans import explain
+
+INDEXES_QUERY = """
+    SELECT c.relname, t.relname, am.amname, i.indisunique, i.indisprimary, i.indisvalid, con.conname,
+           i.indnkeyatts,
+           array(SELECT pg_get_indexdef(i.indexrelid, k, true) FROM generate_series(1, i.indnatts) k),
+           i.indclass::oid[], i.indoption::int2[], i.indcollation::oid[],
+           pg_get_expr(i.indpred, i.indrelid, true),
+           pg_relation_size(i.indexrelid), coalesce(s.idx_scan, 0)
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_am am ON am.oid = c.relam
+    LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid
+    LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = i.indexrelid
+    WHERE n.nspname = %s AND (%s::text IS NULL OR t.relname = %s)
+    ORDER BY t.relname, c.relname
+"""
+# 'status = 'pending'::text' / '(status)::text = ...' 의 컬럼
+EQUALITY = re.compile(r"\(*([a-z_][a-z0-9_]*)\)*(?:::[a-z ]+?)?\s*=\s*'")
+
+KINDS = ('duplicate', 'prefix', 'include', 'partial')
+
+
+class IndexDef:
+    """pg_index 한 행"""
+
+    def __init__(self, name, table, method, unique, primary, valid, constraint, key_count, attributes,
+                 opclasses, options, collations, predicate, size_bytes, scans):
+        self.name = name
+        self.table = table
+        self.method = method
+        self.unique = unique
+        self.primary = primary
+        self.valid = valid
+        self.constraint = constraint
+        self.keys = tuple(attributes[:key_count])
+        self.include = tuple(attributes[key_count:])
+        self.opclasses = tuple(opclasses)
+        self.options = tuple(options)
+        self.collations = tuple(collations)
+        self.predicate = predicate
+        self.size_bytes = size_bytes
+        self.scans = scans
+
+    @property
+    def enforces(self):
+        """없애면 제약이 사라지는 인덱스 (UNIQUE, PK, 제약이 쓰는 인덱스)"""
+        return self.unique or self.primary or self.constraint is not None
+
+    def key_signature(self, count=None):
+        """키 앞 count개의 (컬럼/식, 연산자 클래스, 정렬 옵션, collation)"""
+        count = len(self.keys) if count is None else count
+        return tuple(zip(self.keys[:count], self.opclasses[:count], self.options[:count],
+                         self.collations[:count]))
+
+    def definition(self):
+        text = f"{self.method} ({', '.join(self.keys)})"
+        if self.include:
+            text += f" INCLUDE ({', '.join(self.include)})"
+        if self.predicate:
+            text += f" WHERE {self.predicate}"
+        return text
+
+    def __repr__(self):
+        return f"<IndexDef {self.name} ON {self.table} {self.definition()}>"
+
+
+class Finding:
+    """redundant 인덱스를 covered_by가 대신할 수 있음"""
+
+    def __init__(self, kind, redundant, covered_by, note=''):
+        self.kind = kind
+        self.redundant = redundant
+        self.covered_by = covered_by
+        self.note = note
+
+    def __repr__(self):
+        return f"<Finding {self.kind}: {self.redundant.name} → {self.covered_by.name}>"
+
+
+def load_indexes(cur, schema='public', table=None):
+    cur.execute(INDEXES_QUERY, (schema, table, table))
+    return [IndexDef(*row) for row in cur.fetchall()]
+
+
+def _keep_first(a, b):
+    """완전 중복 쌍에서 남길 쪽을 앞으로: 제약 > UNIQUE > 많이 쓰임 > 이름순"""
+    rank = lambda i: (i.constraint is None, not i.unique, -i.scans, i.name)
+    return (a, b) if rank(a) <= rank(b) else (b, a)
+
+
+def equality_columns(predicate):
+    """WHERE 조건에서 col = '상수'로 고정되는 컬럼 (AND만 있을 때)"""
+    if not predicate or re.search(r"\bOR\b", predicate):
+        return []
+    return list(dict.fromkeys(EQUALITY.findall(predicate)))
+
+
+def _covers(b, a):
+    """
+    B-tree b가 a를 대신할 수 있는 종류 (없으면 None)
+
+    a의 키가 b 키의 앞부분이고, a의 INCLUDE가 b에 모두 있고,
+    a가 부분 인덱스면 b의 조건이 같거나 b가 조건 없는 인덱스여야 합니다.
+    """
+    if a.method != 'btree' or b.method != 'btree' or a.enforces or not b.valid:
+        return None
+    columns_of_b = set(b.keys) | set(b.include)
+    if not set(a.include) <= columns_of_b:
+        return None
+
+    if a.predicate == b.predicate or (a.predicate and b.predicate is None):
+        if len(a.keys) <= len(b.keys) and a.key_signature() == b.key_signature(len(a.keys)):
+            if a.predicate != b.predicate:
+                return 'partial'
+            return 'include' if a.keys == b.keys else 'prefix'
+
+    # WHERE status = 'pending' (order_date) → (status, order_date)
+    fixed = equality_columns(a.predicate)
+    if fixed and b.predicate is None:
+        head = b.keys[:len(fixed)]
+        if set(head) == set(fixed) and b.keys[len(fixed):len(fixed) + len(a.keys)] == a.keys:
+            return 'partial'
+    return None
+
+
+def find_redundant(indexes):
+    """같은 테이블 인덱스 쌍을 비교한 Finding 목록 (인덱스 하나당 가장 강한 근거 하나)"""
+    by_table = {}
+    for index in indexes:
+        by_table.setdefault(index.table, []).append(index)
+
+    found = {}
+    for group in by_table.values():
+        for i, a in enumerate(group):
+            for b in group[i + 1:]:
+                if (a.method == b.method and a.key_signature() == b.key_signature()
+                        and a.include == b.include and a.predicate == b.predicate):
+                    keep, drop = _keep_first(a, b)
+                    note = '둘 다 제약 인덱스 (제약을 합쳐야 함)' if drop.constraint else ''
+                    found.setdefault(drop.name, Finding('duplicate', drop, keep, note))
+        # 넓은 인덱스부터 판정해야 (a) ⊂ (a, b) ⊂ (a, b, c)에서 둘 다 가장 넓은 쪽을 가리킴
+        for a in sorted(group, key=lambda i: -len(i.keys) - len(i.include)):
+            if a.name in found:
+                continue
+            for b in group:
+                if b is a or b.name in found:
+                    continue
+                kind = _covers(b, a)
+                if kind is None or kind == 'include' and a.include == b.include:
+                    continue
+                note = ''
+                if kind == 'partial' and b.size_bytes:
+                    note = f"부분 인덱스 크기 {a.size_bytes / b.size_bytes:.0%} (조건 쿼리가 매우 잦으면 남길 만함)"
+                elif kind == 'prefix':
+                    note = f"키 {len(b.keys)}개 중 앞 {len(a.keys)}개 (넓은 인덱스라 스캔이 조금 느릴 수 있음)"
+                found[a.name] = Finding(kind, a, b, note)
+                break
+    return sorted(found.values(), key=lambda f: (f.redundant.table, KINDS.index(f.kind), f.redundant.name))
+
+
+# ----------------------------------------------------------------------
+# 쓰기 비용 측정
+# ----------------------------------------------------------------------
+
+# 같은 트랜잭션에서 앞선 측정이 남긴 (되돌린) 힙/인덱스 항목 때문에 뒤 측정이 불리해지지 않도록
+# 인덱스가 있는 상태(False)와 DROP한 상태(True)를 ABBA 순서로 번갈아 잼
+PAIR_ORDER = (False, True, True, False)
+
+
+def _wal_bytes(cur, query):
+    cur.execute("SAVEPOINT wal_probe")
+    try:
+        return explain(cur, query, timing=False, settings=False).root.wal.bytes
+    finally:
+        cur.execute("ROLLBACK TO SAVEPOINT wal_probe")
+        cur.execute("RELEASE SAVEPOINT wal_probe")
+
+
+def _combine(label, parts):
+    """같은 조건의 Measurement 여러 개 → 표본을 합친 Measurement"""
+    return stats.Measurement(label, [v for m in parts for v in m.samples],
+                             [v for m in parts for v in m.rejected], warmup=sum(m.warmup for m in parts),
+                             converged=all(m.converged for m in parts))
+
+
+def measure_pair(cur, catalog, table, index, rows=advisor.PROBE_ROWS, **options):
+    """
+    index가 있을 때와 DROP했을 때의 INSERT 탐침 → (있음, 없음, 있음 WAL 바이트, 없음 WAL 바이트)
+
+    PAIR_ORDER대로 번갈아 재고 측정마다 SAVEPOINT로 되돌립니다. 측정할 수 없으면 None.
+    max_seconds는 측정 전체 시간으로 보고 PAIR_ORDER의 측정 횟수로 나눕니다.
+    """
+    query = advisor.insert_probe(cur, catalog, table, rows)
+    if query is None:
+        return None
+    if options.get('max_seconds'):
+        options = dict(options, max_seconds=options['max_seconds'] / len(PAIR_ORDER))
+    parts = {False: [], True: []}
+    wal = {}
+    for dropped in PAIR_ORDER:
+        cur.execute("SAVEPOINT drop_index")
+        try:
+            if dropped:
+                cur.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(index)))
+            measurement = advisor.measure_insert(cur, catalog, table, rows, savepoint=True, **options)
+            if measurement is None:
+                return None
+            parts[dropped].append(measurement)
+            if dropped not in wal:
+                wal[dropped] = _wal_bytes(cur, query)
+        except psycopg2.Error:
+            return None
+        finally:
+            cur.execute("ROLLBACK TO SAVEPOINT drop_index")
+            cur.execute("RELEASE SAVEPOINT drop_index")
+    label = f"INSERT {table} ×{rows}"
+    return (_combine(label, parts[False]), _combine(f"{label} (-{index})", parts[True]),
+            wal[False], wal[True])
+
+
+def measure_write_costs(findings, rows=advisor.PROBE_ROWS, on_result=None, **options):
+    """
+    Finding마다 인덱스를 DROP한 뒤 INSERT 탐침이 빨라진 만큼을 행당 쓰기 비용으로 계산
+
+    결과: [{'finding', 'base', 'without', 'comparison', 'us_per_row', 'wal_per_row', 'rows_written', 'cost_ms'}]
+    us_per_row가 None이면 측정 실패 (탐침 INSERT 실패, 제약 인덱스라 DROP 불가 등).
+    한 트랜잭션 안에서 하고 끝나면 ROLLBACK하므로 인덱스는 그대로 남습니다.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    results = []
+    try:
+        catalog = advisor.Catalog(cur)
+        writes = {}
+        for finding in findings:
+            table = finding.redundant.table
+            if table not in writes:
+                writes[table] = advisor.table_writes(cur, table)
+            pair = None
+            if not finding.redundant.enforces:
+                pair = measure_pair(cur, catalog, table, finding.redundant.name, rows, **options)
+            base, without, base_wal, wal = pair or (None, None, None, None)
+            us = (max(0.0, base.median - without.median) * 1000 / rows) if pair else None
+            result = {
+                'finding': finding,
+                'base': base,
+                'without': without,
+                'comparison': stats.compare(base, without) if pair else None,
+                'us_per_row': us,
+                'wal_per_row': (base_wal - wal) / rows if pair else None,
+                'rows_written': writes[table],
+                'cost_ms': us * writes[table] / 1000 if us is not None else None,
+            }
+            results.append(result)
+            if on_result:
+                on_result(result)
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+    return results
@@ -0,0 +1,310 @@
+"""
+빠른 데이터베이스 리셋
+======================
+
+TRUNCATE + generate_series 재생성이나 DROP/CREATE 대신, 미리 만들어 둔 스냅샷으로
+알려진 상태를 복원합니다. 두 가지 방식을 제공합니다.
+
+1. DatabaseSnapshot: 템플릿 DB 교체 (데이터 크기와 무관한 복원)
+   - 스냅샷 DB를 미리 복제해 둔 예비(spare) DB를 만들어 둠
+   - restore()는 ALTER DATABASE ... RENAME 두 번으로 예비 DB를 끼워 넣음
+   - 버려진 DB 삭제와 다음 예비 DB 복제는 백그라운드에서 진행
+
+2. TableSnapshot: COPY BINARY 파일 스냅샷 (테이블 단위 복원)
+   - capture()는 지정한 테이블을 COPY ... TO STDOUT (FORMAT binary)로 저장
+   - restore()는 한 트랜잭션 안에서 TRUNCATE 후 COPY FROM, 시퀀스 값 복구
+   - drop_extra=True면 캡처 이후에 생긴 실습용 임시 테이블(update_test 등)도 정리
+
+3. scratch_database(): 실험용 복제본 (with 블록 안에서만 풀이 복제본에 연결)
+
+사용 예:
+    from common import reset
+
+    snap = reset.create_snapshot('base')   # mvcc_lab__snap_base 생성
+    ...                                    # 시나리오 실행
+    snap.restore()                         # mvcc_lab을 base 상태로 교체
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import errors, sql
+
+from common import db
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            '.snapshots')
+
+# 템플릿 복제 전략: FILE_COPY는 WAL 없이 파일을 그대로 복사 (PG15+)
+CLONE_STRATEGY = 'FILE_COPY'
+
+# RENAME 직전에 새 세션이 끼어들면 ObjectInUse가 나므로 몇 번 재시도
+SWAP_RETRIES = 5
+
+
+def snapshot_database_name(name, database=None):
+    """스냅샷 이름 → 스냅샷 DB 이름 (예: base → mvcc_lab__snap_base)"""
+    database = database or db.DB_CONFIG['database']
+    return f"{database}__snap_{name}"
+
+
+class DatabaseSnapshot:
+    """
+    템플릿 DB 교체로 target DB를 template 상태로 되돌림
+
+    예비 DB가 준비되어 있으면 restore()는 RENAME 두 번이므로
+    테이블 크기와 상관없이 거의 일정한 시간이 걸립니다.
+    """
+
+    def __init__(self, template, target=None):
+        self.template = template
+        self.target = target or db.DB_CONFIG['database']
+        self.spare = f"{self.target}__spare"
+        self.trash = f"{self.target}__trash"
+        self._worker = None
+
+    def _clone_spare(self):
+        if not db.database_exists(self.spare):
+            db.clone_database(self.spare, self.template, strategy=CLONE_STRATEGY)
+
+    def _recycle(self):
+        """버려진 DB 삭제 + 다음 restore()를 위한 예비 DB 복제"""
+        db.drop_database(self.trash)
+        self._clone_spare()
+
+    def wait(self):
+        """백그라운드 작업(예비 DB 준비)이 끝날 때까지 대기"""
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def prepare(self):
+        """예비 DB를 미리 만들어 둠 (첫 restore()도 빠르게)"""
+        self.wait()
+        self._clone_spare()
+
+    def restore(self, background=True):
+        """
+        target을 template 상태로 교체하고 교체에 걸린 시간(초)을 반환
+
+        이 프로세스의 커넥션 풀은 닫히고, 다음 get_connection()부터
+        교체된 DB에 새로 연결합니다.
+        """
+        start = time.perf_counter()
+        self.wait()
+        self._clone_spare()
+
+        # 우리 풀이 target에 붙어 있으면 RENAME이 불가능
+        db.configure()
+
+        for attempt in range(SWAP_RETRIES):
+            db.terminate_sessions(self.target)
+            try:
+                db.drop_database(self.trash)
+                db.rename_database(self.target, self.trash)
+                break
+            except errors.ObjectInUse:
+                if attempt == SWAP_RETRIES - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+        try:
+            db.rename_database(self.spare, self.target)
+        except psycopg2.Error:
+            # target이라는 DB가 없는 상태로 남지 않도록 원래 DB를 되돌려 놓음
+            db.rename_database(self.trash, self.target)
+            raise
+        elapsed = time.perf_counter() - start
+
+        if background:
+            self._worker = threading.Thread(target=self._recycle, name='snapshot-recycle')
+            self._worker.start()
+        else:
+            self._recycle()
+        return elapsed
+
+    def close(self):
+        """백그라운드 작업을 마무리하고 예비/폐기 DB를 삭제"""
+        self.wait()
+        db.drop_database(self.trash)
+        db.drop_database(self.spare)
+
+
+def create_snapshot(name='base', database=None, replace=False, force=False):
+    """
+    현재 database 상태를 스냅샷 DB로 저장하고 DatabaseSnapshot을 반환
+
+    CREATE DATABASE ... TEMPLATE은 원본에 다른 세션이 있으면 실패합니다.
+    force=True면 원본에 접속한 다른 세션을 먼저 종료합니다.
+    """
+    database = database or db.DB_CONFIG['database']
+    template = snapshot_database_name(name, database)
+
+    snapshot = DatabaseSnapshot(template, database)
+    if replace:
+        snapshot.close()
+        db.drop_database(template)
+
+    if not db.database_exists(template):
+        db.configure()
+        if force:
+            db.terminate_sessions(database)
+        db.clone_database(template, database, strategy=CLONE_STRATEGY)
+
+    snapshot.prepare()
+    return snapshot
+
+
+def open_snapshot(name='base', database=None):
+    """이미 만들어 둔 스냅샷을 DatabaseSnapshot으로 불러옴"""
+    database = database or db.DB_CONFIG['database']
+    template = snapshot_database_name(name, database)
+    if not db.database_exists(template):
+        raise LookupError(f"스냅샷 DB가 없습니다: {template}")
+    return DatabaseSnapshot(template, database)
+
+
+def list_snapshots(database=None):
+    """database에 대해 만들어 둔 스냅샷 이름 목록"""
+    prefix = snapshot_database_name('', database)
+    return [name[len(prefix):] for name in db.list_databases(prefix)]
+
+
+def drop_snapshot(name, database=None):
+    database = database or db.DB_CONFIG['database']
+    DatabaseSnapshot(snapshot_database_name(name, database), database).close()
+    db.drop_database(snapshot_database_name(name, database))
+
+
+@contextmanager
+def scratch_database(name, source=None, keep=False, force=False):
+    """
+    source(기본: 현재 DB)를 name으로 복제하고 with 블록 안에서는 풀이 복제본에 연결
+
+    인덱스를 만들어 보거나 설정을 바꿔 보는 실험을 원본에 흔적 없이 할 때 씁니다.
+    블록이 끝나면 풀을 원래 DB로 되돌리고, keep=False면 복제본을 삭제합니다.
+    source에 다른 세션이 있으면 복제가 실패하므로 force=True면 먼저 종료합니다.
+    """
+    original = db.DB_CONFIG['database']
+    source = source or original
+    db.configure()          # 풀이 source에 잡고 있는 연결을 닫음
+    if force:
+        db.terminate_sessions(source)
+    db.drop_database(name)
+    db.clone_database(name, source, strategy=CLONE_STRATEGY)
+    db.configure(database=name)
+    try:
+        yield name
+    finally:
+        db.configure(database=original)
+        if not keep:
+            db.drop_database(name)
+
+
+# ----------------------------------------------------------------------
+# COPY BINARY 테이블 스냅샷
+# ----------------------------------------------------------------------
+
+class TableSnapshot:
+    """
+    테이블 단위 COPY BINARY 스냅샷
+
+    labs/.snapshots/<name>/ 아래에 테이블별 .bin 파일과 manifest.json을 저장합니다.
+    """
+
+    def __init__(self, name='base', directory=SNAPSHOT_DIR):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.manifest_path = os.path.join(self.path, 'manifest.json')
+
+    def _table_file(self, table):
+        return os.path.join(self.path, f"{table}.bin")
+
+    def _load_manifest(self):
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def capture(self, tables):
+        """tables의 현재 내용과 public 스키마 테이블 목록, 시퀀스 값을 저장"""
+        os.makedirs(self.path, exist_ok=True)
+        conn = db.get_connection(isolation_level='REPEATABLE READ')
+        cur = conn.cursor()
+        try:
+            # 모든 테이블을 같은 스냅샷에서 읽음
+            cur.execute("""
+                SELECT tablename FROM pg_tables
+                WHERE schemaname = 'public' ORDER BY 1
+            """)
+            all_tables = [row[0] for row in cur.fetchall()]
+
+            cur.execute("""
+                SELECT sequencename, last_value, last_value IS NOT NULL
+                FROM pg_sequences WHERE schemaname = 'public'
+            """)
+            sequences = {name: [value, called] for name, value, called in cur.fetchall()}
+
+            for table in tables:
+                with open(self._table_file(table), 'wb') as f:
+                    cur.copy_expert(
+                        sql.SQL("COPY {} TO STDOUT (FORMAT binary)").format(
+                            sql.Identifier(table)).as_string(conn), f)
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({'tables': list(tables), 'all_tables': all_tables,
+                       'sequences': sequences, 'captured_at': time.time()}, f, indent=2)
+
+    def restore(self, drop_extra=False):
+        """
+        저장한 테이블 내용을 한 트랜잭션으로 복원하고 걸린 시간(초)을 반환
+
+        drop_extra=True면 캡처 이후에 생긴 public 테이블을 모두 CASCADE로 삭제합니다.
+        다른 도구나 사용자가 만든 테이블도 지워지므로 기본값은 False입니다.
+        """
+        manifest = self._load_manifest()
+        start = time.perf_counter()
+
+        conn = db.get_connection()
+        cur = conn.cursor()
+        try:
+            if drop_extra:
+                cur.execute("SELECT tablename FROM pg_tables WHERE schemaname = 'public'")
+                extra = [row[0] for row in cur.fetchall()
+                         if row[0] not in manifest['all_tables']]
+                for table in extra:
+                    cur.execute(sql.SQL("DROP TABLE IF EXISTS {} CASCADE").format(
+                        sql.Identifier(table)))
+
+            tables = manifest['tables']
+            if tables:
+                cur.execute(sql.SQL("TRUNCATE {} CASCADE").format(
+                    sql.SQL(', ').join(sql.Identifier(t) for t in tables)))
+            for table in tables:
+                with open(self._table_file(table), 'rb') as f:
+                    cur.copy_expert(
+                        sql.SQL("COPY {} FROM STDIN (FORMAT binary)").format(
+                            sql.Identifier(table)).as_string(conn), f)
+
+            for name, (value, called) in manifest['sequences'].items():
+                if value is None:
+                    cur.execute("SELECT setval(%s::regclass, 1, false)", (name,))
+                else:
+                    cur.execute("SELECT setval(%s::regclass, %s, %s)", (name, value, called))
+            conn.commit()
+        except psycopg2.Error:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+        return time.perf_counter() - start
@@ -0,0 +1,282 @@
+"""
+asyncio 세션 엔진
+=================
+
+lab00/03/04/06의 동시성 시나리오는 세션마다 스레드를 만들고
+Barrier + time.sleep()으로 순서를 맞춥니다. 스레드 수십 개를 넘기기 어렵고
+sleep 길이에 따라 결과가 흔들립니다.
+
+이 모듈은 psycopg2 비동기 연결(async_=1)을 asyncio 이벤트 루프의
+selector에 등록해서, 스레드 하나로 수백 개 세션을 번갈아 실행합니다.
+
+- AsyncSession: 비동기 연결 하나 (항상 autocommit이므로 BEGIN/COMMIT을 직접 실행)
+- StepRunner:   단계를 정해진 순서대로 실행
+    * 같은 세션의 단계는 이전 단계가 끝난 뒤에 시작
+    * 다음 단계는 현재 단계가 끝나거나, settle초 안에 끝나지 않을 때(락 대기) 시작
+    * monitor 세션을 주면 settle 대신 pg_stat_activity로 락 대기를 확인한 즉시 다음 단계로
+    * 한 단계에 세션 여러 개를 주면 동시에 보냄
+    * wait=True인 단계는 모든 세션이 끝날 때까지 다음 단계로 넘어가지 않음
+
+사용 예:
+    async def demo():
+        t1, t2 = await open_sessions(2)
+        runner = StepRunner()
+        runner.step(t1, "BEGIN")
+        runner.step(t1, "UPDATE accounts SET balance = balance + 1 WHERE id = 1")
+        runner.step(t2, "UPDATE accounts SET balance = balance + 1 WHERE id = 1")  # 대기
+        runner.step(t1, "COMMIT")                                                  # t2 진행
+        results = await runner.run()
+        await close_sessions([t1, t2])
+
+    asyncio.run(demo())
+
+세션 수는 서버의 max_connections(docker-compose에서 300)를 넘을 수 없습니다.
+"""
+
+import asyncio
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+from common import db
+from common.waits import POLL_INTERVAL, WAIT_STATE_QUERY
+
+SETTLE_SECONDS = 0.05       # 이 시간 안에 끝나지 않은 단계는 대기 중으로 보고 다음 단계로
+STEP_TIMEOUT = 30.0         # 같은 세션의 이전 단계를 기다리는 최대 시간
+
+
+async def wait_ready(conn):
+    """
+    conn.poll()이 POLL_OK가 될 때까지 소켓 읽기/쓰기 가능 이벤트를 기다림
+
+    psycopg2 문서의 wait() 루프를 select() 대신 이벤트 루프 selector로 구현한 것입니다.
+    쿼리 오류(DeadlockDetected 등)는 poll()에서 그대로 발생합니다.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == extensions.POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise psycopg2.OperationalError(f"poll() returned {state}")
+
+        fd = conn.fileno()
+        ready = loop.create_future()
+        add(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            remove(fd)
+
+
+class AsyncSession:
+    """psycopg2 비동기 연결 하나"""
+
+    def __init__(self, name, **config):
+        self.name = name
+        self.config = dict(db.DB_CONFIG, **config)
+        self.conn = None
+        self.pid = None
+        self.rowcount = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        self.conn = psycopg2.connect(async_=1, **self.config)
+        await wait_ready(self.conn)
+        self.pid = self.conn.get_backend_pid()
+        return self
+
+    @property
+    def busy(self):
+        return self._lock.locked()
+
+    async def execute(self, query, params=None):
+        """
+        쿼리 하나를 실행하고 결과 행 목록(결과가 없으면 None)을 반환
+
+        실행 중에 태스크가 취소되면 서버에 취소 요청을 보내고 연결을 닫습니다.
+        """
+        async with self._lock:
+            cur = self.conn.cursor()
+            try:
+                cur.execute(query, params)
+                await wait_ready(self.conn)
+            except asyncio.CancelledError:
+                self.conn.cancel()
+                self.conn.close()
+                raise
+            self.rowcount = cur.rowcount
+            rows = cur.fetchall() if cur.description else None
+            cur.close()
+            return rows
+
+    async def fetchval(self, query, params=None):
+        rows = await self.execute(query, params)
+        return rows[0][0] if rows else None
+
+    async def begin(self, isolation_level=None):
+        if isolation_level:
+            await self.execute(f"BEGIN ISOLATION LEVEL {isolation_level}")
+        else:
+            await self.execute("BEGIN")
+
+    async def commit(self):
+        await self.execute("COMMIT")
+
+    async def rollback(self):
+        await self.execute("ROLLBACK")
+
+    async def close(self):
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+
+    def __repr__(self):
+        return f"<AsyncSession {self.name} pid={self.pid}>"
+
+
+async def open_sessions(count, prefix='S', **config):
+    """세션 count개를 동시에 연결 (이름: S1, S2, ...)"""
+    sessions = [AsyncSession(f"{prefix}{i + 1}", **config) for i in range(count)]
+    await asyncio.gather(*(s.connect() for s in sessions))
+    return sessions
+
+
+async def close_sessions(sessions):
+    for session in sessions:
+        await session.close()
+
+
+class StepRunner:
+    """
+    세션 동작을 추가한 순서대로 실행하는 스케줄러
+
+    run()은 단계별 결과 dict 목록을 반환합니다:
+        {'step', 'session', 'label', 'status' ('ok' | 'error'), 'rows', 'error',
+         'waited' (settle 안에 끝나지 않았는지), 'start', 'end' (run 시작 기준 초)}
+
+    monitor(AsyncSession)를 주면 끝나지 않은 단계의 세션이 모두
+    wait_event_type = 'Lock' 상태가 될 때까지 기다렸다가 다음 단계로 넘어갑니다.
+    """
+
+    def __init__(self, settle=SETTLE_SECONDS, verbose=True, monitor=None):
+        self.settle = settle
+        self.verbose = verbose
+        self.monitor = monitor
+        self.steps = []
+        self._pending = {}     # 세션 → 마지막으로 시작한 태스크
+        self._in_flight = set()    # 쿼리를 서버에 보내고 결과를 기다리는 세션
+        self._t0 = None
+
+    def step(self, sessions, query, params=None, label=None, wait=False):
+        """
+        단계를 추가하고 단계 번호(1부터)를 반환 (sessions는 세션 하나 또는 목록)
+
+        목록이면 모든 세션에 같은 쿼리를 동시에 보냅니다.
+        params가 함수면 세션마다 params(session)을 호출해 파라미터를 만듭니다.
+        wait=True면 이 단계가 모두 끝난 뒤에 다음 단계를 시작합니다.
+        """
+        if isinstance(sessions, AsyncSession):
+            sessions = [sessions]
+        self.steps.append((list(sessions), query, params, label, wait))
+        return len(self.steps)
+
+    def _log(self, text):
+        if self.verbose:
+            print(f"[{time.perf_counter() - self._t0:7.3f}s] {text}")
+
+    async def _run_one(self, number, session, query, params, label, previous):
+        result = {'step': number, 'session': session.name, 'label': label or query,
+                  'status': 'ok', 'rows': None, 'error': None, 'waited': False,
+                  'start': None, 'end': None}
+        if previous is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(previous), STEP_TIMEOUT)
+            except asyncio.TimeoutError:
+                result['status'] = 'error'
+                result['error'] = TimeoutError(
+                    f"{session.name}의 이전 단계가 {STEP_TIMEOUT:g}초 안에 끝나지 않음")
+                result['start'] = result['end'] = time.perf_counter() - self._t0
+                return result
+
+        result['start'] = time.perf_counter() - self._t0
+        self._in_flight.add(session)
+        try:
+            result['rows'] = await session.execute(query, params)
+        except psycopg2.Error as e:
+            result['status'] = 'error'
+            result['error'] = e
+        finally:
+            self._in_flight.discard(session)
+        result['end'] = time.perf_counter() - self._t0
+        return result
+
+    async def _wait_settled(self, started, sessions, previous):
+        """
+        모든 태스크가 끝나거나, 남은 세션이 모두 락 대기 상태가 될 때까지 대기
+
+        같은 세션의 이전 단계가 아직 끝나지 않아 쿼리를 보내지도 않은 단계는
+        락 대기가 될 수 없으므로 확인하지 않습니다 (그런 단계만 남으면 바로 반환).
+        """
+        session_of = dict(zip(started, sessions))
+        deadline = time.perf_counter() + STEP_TIMEOUT
+        while True:
+            done, waiting = await asyncio.wait(started, timeout=POLL_INTERVAL)
+            if not waiting or time.perf_counter() >= deadline:
+                return done, waiting
+            queued = {task for task in waiting
+                      if session_of[task] not in self._in_flight
+                      and previous[task] is not None and not previous[task].done()}
+            pids = [session_of[task].pid for task in waiting if task not in queued]
+            if not pids:
+                return done, waiting
+            rows = await self.monitor.execute(WAIT_STATE_QUERY, (pids,))
+            locked = {row[0] for row in rows if row[2] == 'Lock'}
+            if locked.issuperset(pids):
+                return done, waiting
+
+    async def run(self):
+        self._t0 = time.perf_counter()
+        tasks = []
+        for number, (sessions, query, params, label, wait) in enumerate(self.steps, 1):
+            started = []
+            previous = {}
+            for session in sessions:
+                args = params(session) if callable(params) else params
+                task = asyncio.ensure_future(self._run_one(
+                    number, session, query, args, label, self._pending.get(session)))
+                previous[task] = self._pending.get(session)
+                self._pending[session] = task
+                started.append(task)
+            tasks.extend(started)
+
+            if wait:
+                done, waiting = await asyncio.wait(started, timeout=STEP_TIMEOUT)
+            elif self.monitor is not None:
+                done, waiting = await self._wait_settled(started, sessions, previous)
+            else:
+                done, waiting = await asyncio.wait(started, timeout=self.settle)
+            who = sessions[0].name if len(sessions) == 1 else f"{len(sessions)}개 세션"
+            text = label or ' '.join(query.split())
+            if waiting:
+                self._log(f"#{number} {who}: {text} → 대기 중 ({len(waiting)}개)")
+            else:
+                errors = [t.result()['error'] for t in done if t.result()['error']]
+                status = f"오류: {str(errors[0]).splitlines()[0]}" if errors else "완료"
+                self._log(f"#{number} {who}: {text} → {status}")
+
+        results = await asyncio.gather(*tasks)
+        for task_result in results:
+            task_result['waited'] = task_result['end'] - task_result['start'] > self.settle
+        self._pending.clear()
+        self._in_flight.clear()
+        return results
+
+
+def run(coro):
+    """lab 함수(동기)에서 비동기 시나리오를 실행"""
+    return asyncio.run(coro)
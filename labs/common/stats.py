@@ -0,0 +1,326 @@
+"""
+반복 측정 통계
+==============
+
+한 번 실행한 시간은 캐시 상태, 백그라운드 작업, 타이머 오차에 따라 크게 흔들립니다.
+이 모듈은 같은 동작을 여러 번 측정해 요약하고 두 측정을 비교합니다.
+
+- median / percentile / mad: 이상값에 강한 요약 통계
+- reject_outliers: MAD 기반 modified z-score로 이상값 제외
+- bootstrap_ci / bootstrap_ratio_ci: 중앙값과 중앙값 비율의 부트스트랩 신뢰구간
+- measure / measure_query: 워밍업 후 신뢰구간이 충분히 좁아질 때까지 표본을 늘려가며 측정
+- compare: "A가 B보다 3.2배 빠름 (95% CI 2.9~3.5배)"
+
+사용 예:
+    brin = measure_query(cur, query, label="BRIN", setup="SET enable_indexscan = off")
+    btree = measure_query(cur, query, label="B-tree", setup="SET enable_bitmapscan = off")
+    print(brin.summary())
+    print(compare(brin, btree).text())
+"""
+
+import math
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from common.plans import explain
+
+BOOTSTRAP_ITERATIONS = 2000
+CONFIDENCE = 0.95
+
+# measure() 기본값
+WARMUP = 3
+MIN_SAMPLES = 10
+MAX_SAMPLES = 200
+BATCH_SAMPLES = 5
+TARGET_RELATIVE_CI = 0.05      # 중앙값 신뢰구간 반폭 / 중앙값 ≤ 5%면 멈춤
+MAX_SECONDS = 30.0             # 측정 한 건에 쓸 최대 시간
+OUTLIER_Z = 3.5                # modified z-score 기준 (Iglewicz & Hoaglin)
+
+
+def median(values):
+    return percentile(values, 50)
+
+
+def percentile(values, p):
+    """선형 보간 백분위 (numpy.percentile 기본 방식과 같음)"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * p / 100.0
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def mad(values):
+    """중앙값 절대 편차 (median absolute deviation)"""
+    center = median(values)
+    return median([abs(v - center) for v in values])
+
+
+def reject_outliers(values, threshold=OUTLIER_Z):
+    """
+    modified z-score = 0.6745 × (x - median) / MAD 가 threshold를 넘는 값을 제외
+
+    (남은 값, 제외한 값)을 반환합니다. MAD가 0이면 아무것도 제외하지 않습니다.
+    """
+    center = median(values)
+    spread = mad(values)
+    if not spread:
+        return list(values), []
+    kept, rejected = [], []
+    for value in values:
+        z = 0.6745 * (value - center) / spread
+        (rejected if abs(z) > threshold else kept).append(value)
+    return kept, rejected
+
+
+def bootstrap_ci(values, statistic=median, iterations=BOOTSTRAP_ITERATIONS,
+                 confidence=CONFIDENCE, seed=0):
+    """statistic(values)의 부트스트랩 percentile 신뢰구간 (하한, 상한)"""
+    rng = random.Random(seed)
+    estimates = [statistic(rng.choices(values, k=len(values))) for _ in range(iterations)]
+    alpha = (1 - confidence) / 2
+    return percentile(estimates, alpha * 100), percentile(estimates, (1 - alpha) * 100)
+
+
+def bootstrap_ratio_ci(baseline, current, iterations=BOOTSTRAP_ITERATIONS,
+                       confidence=CONFIDENCE, seed=0):
+    """
+    median(current) / median(baseline)과 그 부트스트랩 신뢰구간
+
+    두 표본을 각각 복원 추출해 중앙값 비율의 분포를 만들고,
+    (비율, 하한, 상한)을 반환합니다. 1보다 크면 current가 느림.
+    """
+    rng = random.Random(seed)
+    ratio = median(current) / median(baseline)
+    ratios = []
+    for _ in range(iterations):
+        a = median(rng.choices(baseline, k=len(baseline)))
+        b = median(rng.choices(current, k=len(current)))
+        if a > 0:
+            ratios.append(b / a)
+    alpha = (1 - confidence) / 2
+    return ratio, percentile(ratios, alpha * 100), percentile(ratios, (1 - alpha) * 100)
+
+
+# ----------------------------------------------------------------------
+# 측정
+# ----------------------------------------------------------------------
+
+class Measurement:
+    """반복 측정 결과 (단위: ms)"""
+
+    def __init__(self, label, samples, rejected=(), warmup=0, converged=False,
+                 confidence=CONFIDENCE, tags=None):
+        self.label = label
+        self.samples = list(samples)
+        self.rejected = list(rejected)
+        self.warmup = warmup
+        self.converged = converged
+        self.confidence = confidence
+        self.tags = dict(tags or {})     # 예: {'cache': 'cold:filler'}
+        self.ci = bootstrap_ci(self.samples, confidence=confidence)
+
+    @property
+    def n(self):
+        return len(self.samples)
+
+    @property
+    def median(self):
+        return median(self.samples)
+
+    @property
+    def mean(self):
+        return statistics.fmean(self.samples)
+
+    @property
+    def stdev(self):
+        return statistics.stdev(self.samples) if self.n > 1 else 0.0
+
+    def percentile(self, p):
+        return percentile(self.samples, p)
+
+    @property
+    def relative_ci(self):
+        """신뢰구간 반폭 / 중앙값"""
+        lo, hi = self.ci
+        return (hi - lo) / 2 / self.median if self.median else float('inf')
+
+    def summary(self):
+        """'BRIN: 3.21ms (95% CI 3.15~3.30, n=25, 이상값 2개 제외)'"""
+        lo, hi = self.ci
+        text = (f"{self.label}: {self.median:.3f}ms "
+                f"({self.confidence * 100:.0f}% CI {lo:.3f}~{hi:.3f}, n={self.n}")
+        if self.rejected:
+            text += f", 이상값 {len(self.rejected)}개 제외"
+        if not self.converged:
+            text += ", 수렴 전 종료"
+        text += ")"
+        if self.tags:
+            text += " [" + ", ".join(f"{k}={v}" for k, v in self.tags.items()) + "]"
+        return text
+
+    def to_dict(self):
+        return {
+            'label': self.label,
+            'n': self.n,
+            'median_ms': self.median,
+            'mean_ms': self.mean,
+            'stdev_ms': self.stdev,
+            'p95_ms': self.percentile(95),
+            'ci_ms': list(self.ci),
+            'rejected_ms': self.rejected,
+            'warmup': self.warmup,
+            'converged': self.converged,
+            'tags': self.tags,
+            'samples_ms': self.samples,
+        }
+
+    def __repr__(self):
+        return f"<Measurement {self.summary()}>"
+
+
+def measure(func, label="", warmup=WARMUP, min_samples=MIN_SAMPLES, max_samples=MAX_SAMPLES,
+            target=TARGET_RELATIVE_CI, max_seconds=MAX_SECONDS, outlier_z=OUTLIER_Z,
+            confidence=CONFIDENCE, prepare=None, tags=None):
+    """
+    func()를 반복 실행해 Measurement를 반환
+
+    func가 숫자를 반환하면 그 값(ms)을 표본으로 쓰고 (예: 서버 Execution Time),
+    None을 반환하면 호출 전후 perf_counter_ns 차이를 표본으로 씁니다.
+
+    min_samples개를 모은 뒤 BATCH_SAMPLES개씩 추가하면서, 이상값을 뺀 표본의
+    중앙값 신뢰구간 반폭이 target 이하가 되면 멈춥니다.
+    max_samples개 또는 max_seconds초에 도달하면 수렴하지 않아도 멈춥니다.
+
+    prepare가 주어지면 매 표본 직전에 호출합니다 (시간에 포함되지 않음).
+    예: 콜드 캐시 측정에서 매번 캐시 비우기
+    """
+    def sample():
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter_ns()
+        value = func()
+        if value is None:
+            value = (time.perf_counter_ns() - start) / 1e6
+        return value
+
+    for _ in range(warmup):
+        func()
+
+    values = []
+    started = time.monotonic()
+    converged = False
+    while True:
+        batch = min_samples if not values else BATCH_SAMPLES
+        values.extend(sample() for _ in range(batch))
+
+        kept, _ = reject_outliers(values, outlier_z)
+        lo, hi = bootstrap_ci(kept, iterations=500, confidence=confidence)
+        center = median(kept)
+        if center and (hi - lo) / 2 / center <= target:
+            converged = True
+            break
+        if len(values) >= max_samples or time.monotonic() - started >= max_seconds:
+            break
+
+    kept, rejected = reject_outliers(values, outlier_z)
+    return Measurement(label, kept, rejected, warmup=warmup, converged=converged,
+                       confidence=confidence, tags=tags)
+
+
+@contextmanager
+def _rolled_back(cur):
+    """
+    블록 안의 변경을 되돌림
+
+    autocommit 연결이면 BEGIN ... ROLLBACK, 트랜잭션 안이면 SAVEPOINT ... ROLLBACK TO
+    (표본마다 SAVEPOINT가 쌓이지 않도록 RELEASE까지 함).
+    """
+    if cur.connection.autocommit:
+        begin, end = "BEGIN", "ROLLBACK"
+    else:
+        begin, end = "SAVEPOINT stats_sample", "ROLLBACK TO SAVEPOINT stats_sample; RELEASE SAVEPOINT stats_sample"
+    cur.execute(begin)
+    try:
+        yield
+    finally:
+        cur.execute(end)
+
+
+def measure_query(cur, query, params=None, label="", mode='server', setup=None, **options):
+    """
+    쿼리 실행 시간을 반복 측정
+
+    mode='server': EXPLAIN (ANALYZE, TIMING OFF)의 Execution Time (네트워크/fetch 제외)
+                   ANALYZE는 쿼리를 실제로 실행하므로 표본마다 변경을 되돌립니다 (DML도 안전).
+    mode='client': cur.execute() + fetchall()의 경과 시간
+    setup: 측정 전에 한 번 실행할 SQL (예: "SET enable_indexscan = off")
+    나머지 옵션은 measure()로 전달합니다.
+    """
+    if setup:
+        cur.execute(setup)
+
+    if mode == 'server':
+        def func():
+            with _rolled_back(cur):
+                return explain(cur, query, params, timing=False, wal=False, settings=False).execution_ms
+    elif mode == 'client':
+        def func():
+            cur.execute(query, params)
+            if cur.description:
+                cur.fetchall()
+    else:
+        raise ValueError(f"알 수 없는 mode: {mode}")
+
+    return measure(func, label=label or ' '.join(query.split())[:40], **options)
+
+
+# ----------------------------------------------------------------------
+# 비교
+# ----------------------------------------------------------------------
+
+class Comparison:
+    """두 Measurement의 중앙값 비율 (b / a)과 신뢰구간"""
+
+    def __init__(self, a, b, confidence=CONFIDENCE):
+        self.a = a
+        self.b = b
+        self.confidence = confidence
+        self.ratio, self.lo, self.hi = bootstrap_ratio_ci(a.samples, b.samples,
+                                                          confidence=confidence)
+
+    @property
+    def significant(self):
+        """신뢰구간이 1을 포함하지 않으면 차이가 있다고 봄"""
+        return self.lo > 1 or self.hi < 1
+
+    @property
+    def faster(self):
+        return self.a if self.ratio >= 1 else self.b
+
+    def text(self):
+        """'BRIN이 B-tree보다 3.2배 빠름 (95% CI 2.9~3.5배)'"""
+        level = f"{self.confidence * 100:.0f}% CI"
+        if not self.significant:
+            return (f"{self.a.label}와 {self.b.label}의 차이는 유의하지 않음 "
+                    f"(비율 {self.ratio:.2f}, {level} {self.lo:.2f}~{self.hi:.2f})")
+        if self.ratio >= 1:
+            fast, slow, factor, lo, hi = self.a, self.b, self.ratio, self.lo, self.hi
+        else:
+            fast, slow, factor, lo, hi = self.b, self.a, 1 / self.ratio, 1 / self.hi, 1 / self.lo
+        return f"{fast.label}이(가) {slow.label}보다 {factor:.2f}배 빠름 ({level} {lo:.2f}~{hi:.2f}배)"
+
+    def to_dict(self):
+        return {'a': self.a.label, 'b': self.b.label, 'ratio': self.ratio,
+                'ci': [self.lo, self.hi], 'significant': self.significant}
+
+    def __str__(self):
+        return self.text()
+
+
+def compare(a, b, confidence=CONFIDENCE):
+    return Comparison(a, b, confidence)
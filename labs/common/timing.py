@@ -0,0 +1,219 @@
+"""
+쿼리 타이밍 측정
+================
+
+time.time() 한 번으로는 계획, 실행, 네트워크, fetch가 모두 섞입니다.
+이 모듈은 한 쿼리의 시간을 단계별로 나눠 기록합니다.
+
+클라이언트 측 (time.perf_counter_ns, 단조 증가 나노초):
+- execute: 쿼리 전송 ~ 첫 응답 (cur.execute)
+- fetch:   결과 행 가져오기 (fetchall / fetchmany)
+- render:  화면 출력 (tabulate 등)
+
+서버 측:
+- 'explain':    EXPLAIN (ANALYZE, FORMAT JSON)의 Planning Time / Execution Time
+                (쿼리를 한 번 더 실행하므로 SAVEPOINT/트랜잭션 안에서 하고 되돌림)
+- 'statements': 실행 전후 pg_stat_statements 스냅샷에서 실행한 쿼리의 queryid 항목 차이
+                (계획 시간은 pg_stat_statements.track_planning=on일 때만 기록됨)
+
+모든 측정은 JSON Lines 형식의 레코드로 TIMING_LOG에 추가됩니다.
+환경 변수 LAB_TIMING_LOG로 경로를 바꾸거나 빈 문자열로 끌 수 있습니다.
+
+사용 예:
+    timer = QueryTimer("최근 30일 주문", query)
+    with timer.phase('execute'):
+        cur.execute(query)
+    with timer.phase('fetch'):
+        rows = cur.fetchall()
+    timer.rows = len(rows)
+    timer.server = server_timing_explain(cur, query)
+    record(timer)
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results')
+TIMING_LOG = os.environ.get('LAB_TIMING_LOG', os.path.join(RESULTS_DIR, 'timings.jsonl'))
+
+PHASES = ('execute', 'fetch', 'render')
+
+_log_lock = threading.Lock()
+
+
+class QueryTimer:
+    """쿼리 하나의 단계별 시간(ns)과 서버 측 시간을 모으는 객체"""
+
+    def __init__(self, label="", query=""):
+        self.label = label
+        self.query = query
+        self.phases_ns = {}
+        self.rows = None
+        self.server = None
+        self.started_at = time.time()
+
+    @contextmanager
+    def phase(self, name):
+        """with 블록의 경과 시간을 name 단계에 누적"""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phases_ns[name] = self.phases_ns.get(name, 0) + time.perf_counter_ns() - start
+
+    def ms(self, name):
+        return self.phases_ns.get(name, 0) / 1e6
+
+    @property
+    def total_ms(self):
+        return sum(self.phases_ns.values()) / 1e6
+
+    def client_overhead_ms(self):
+        """
+        execute 단계에서 서버 계획+실행 시간을 뺀 나머지 (네트워크/드라이버 비용 추정)
+
+        서버 측 시간이 없으면 None
+        """
+        if not self.server or self.server.get('execution_ms') is None:
+            return None
+        server_ms = self.server['execution_ms'] + (self.server.get('planning_ms') or 0.0)
+        return self.ms('execute') + self.ms('fetch') - server_ms
+
+    def to_record(self):
+        return {
+            'ts': self.started_at,
+            'label': self.label,
+            'query': ' '.join(self.query.split())[:500],
+            'rows': self.rows,
+            'phases_ns': dict(self.phases_ns),
+            'client_total_ms': round(self.total_ms, 3),
+            'server': self.server,
+            'client_overhead_ms': (None if self.client_overhead_ms() is None
+                                   else round(self.client_overhead_ms(), 3)),
+        }
+
+    def summary(self):
+        """한 줄 요약 (예: '실행 1.20ms / 가져오기 0.35ms / 출력 0.80ms')"""
+        names = {'execute': '실행', 'fetch': '가져오기', 'render': '출력'}
+        parts = [f"{names.get(p, p)} {self.ms(p):.2f}ms" for p in PHASES if p in self.phases_ns]
+        return ' / '.join(parts)
+
+    def server_summary(self):
+        if not self.server:
+            return None
+        planning = self.server.get('planning_ms')
+        execution = self.server.get('execution_ms')
+        text = f"서버({self.server['source']}): "
+        text += f"계획 {planning:.2f}ms, " if planning is not None else "계획 -, "
+        text += f"실행 {execution:.2f}ms" if execution is not None else "실행 -"
+        overhead = self.client_overhead_ms()
+        if overhead is not None:
+            text += f" → 클라이언트/네트워크 {overhead:.2f}ms"
+        return text
+
+
+def record(timer, path=None):
+    """측정 결과를 JSON Lines 파일에 한 줄로 추가하고 레코드를 반환"""
+    entry = timer.to_record()
+    path = TIMING_LOG if path is None else path
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with _log_lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+    return entry
+
+
+def load_records(path=None):
+    """기록된 측정 레코드 목록"""
+    path = TIMING_LOG if path is None else path
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ----------------------------------------------------------------------
+# 서버 측 시간
+# ----------------------------------------------------------------------
+
+def _explain_rolled_back(cur, options, query, params=None):
+    """
+    EXPLAIN (options, FORMAT JSON)의 최상위 dict (EXPLAIN할 수 없는 문장이면 None)
+
+    ANALYZE는 쿼리를 실제로 실행하므로 INSERT/UPDATE/DELETE가 두 번 적용되지 않도록
+    autocommit 연결이면 BEGIN ... ROLLBACK, 트랜잭션 안이면 SAVEPOINT ... ROLLBACK TO로 감쌉니다.
+    """
+    conn = cur.connection
+    begin, end = (("BEGIN", "ROLLBACK") if conn.autocommit
+                  else ("SAVEPOINT timing_explain", "ROLLBACK TO SAVEPOINT timing_explain"))
+    cur.execute(begin)
+    try:
+        cur.execute(f"EXPLAIN ({options}, FORMAT JSON) {query}", params)
+        plan = cur.fetchone()[0]
+    except psycopg2.Error:
+        return None
+    finally:
+        cur.execute(end)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def query_id(cur, query, params=None):
+    """EXPLAIN (VERBOSE)의 Query Identifier (compute_query_id가 꺼져 있거나 EXPLAIN 불가면 None)"""
+    top = _explain_rolled_back(cur, "VERBOSE", query, params)
+    return top.get('Query Identifier') if top else None
+
+
+def server_timing_explain(cur, query, params=None):
+    """EXPLAIN (ANALYZE, FORMAT JSON)으로 서버의 계획/실행 시간(ms) 측정 (변경은 되돌림)"""
+    top = _explain_rolled_back(cur, "ANALYZE, TIMING OFF", query, params)
+    if top is None:
+        return None
+    return {
+        'source': 'explain',
+        'planning_ms': top.get('Planning Time'),
+        'execution_ms': top.get('Execution Time'),
+    }
+
+
+_STATEMENTS_SNAPSHOT = """
+    SELECT queryid, calls, total_plan_time, total_exec_time, query
+    FROM pg_stat_statements
+    WHERE userid = (SELECT oid FROM pg_roles WHERE rolname = current_user)
+      AND dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+"""
+
+
+def statements_snapshot(cur):
+    """queryid → (calls, total_plan_time, total_exec_time, query)"""
+    cur.execute(_STATEMENTS_SNAPSHOT)
+    return {row[0]: row[1:] for row in cur.fetchall()}
+
+
+def statements_delta(before, after, queryid):
+    """
+    두 스냅샷 사이에 queryid 항목이 늘어난 만큼의 차이 (query_id()로 구한 실행한 쿼리의 id)
+
+    queryid를 모르거나 그 사이에 호출되지 않았으면 None.
+    """
+    if queryid is None or queryid not in after:
+        return None
+    calls, plan_time, exec_time, _ = after[queryid]
+    prev_calls, prev_plan, prev_exec, _ = before.get(queryid, (0, 0.0, 0.0, None))
+    if calls <= prev_calls:
+        return None
+    return {
+        'source': 'statements',
+        'queryid': queryid,
+        'calls': calls - prev_calls,
+        'planning_ms': (plan_time - prev_plan) or None,
+        'execution_ms': exec_time - prev_exec,
+    }
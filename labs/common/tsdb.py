@@ -0,0 +1,211 @@
+"""
+로컬 시계열 저장소
+==================
+
+수집기가 일정 간격으로 만든 델타(구간 증가량)를 SQLite 파일 하나에 저장합니다.
+누적값이 아니라 델타를 저장하므로 값을 더하기만 하면 어떤 구간이든 합계가 나옵니다.
+
+- series: 키(예: queryid)마다 한 행, 사람이 읽을 label(예: 쿼리 앞부분)
+- points: (resolution, series, ts)마다 한 행, 필드마다 REAL 컬럼 하나 (WITHOUT ROWID)
+- 보존/다운샘플링 (compact):
+    * 원본(resolution 0)은 24시간 보존, 이후 1분 버킷으로 합침
+    * 1분 버킷은 7일 보존, 이후 1시간 버킷으로 합침
+    * 1시간 버킷은 90일 보존, 이후 삭제
+
+델타는 합쳐도 의미가 그대로라 다운샘플링은 SUM입니다.
+seconds 컬럼은 그 점이 덮는 시간(초)이고, 구간 비율(초당 호출 수 등)은
+보통 조회 구간 길이로 나눠 계산합니다 (값이 0인 구간은 저장하지 않기 때문).
+
+사용 예:
+    store = TimeSeriesStore('labs/results/statements.db', ('calls', 'exec_ms'))
+    store.append(time.time(), '12345', {'calls': 10, 'exec_ms': 3.2}, seconds=10)
+    store.compact()
+    totals = store.aggregate(since=time.time() - 3600)
+"""
+
+import os
+import sqlite3
+import time
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+# (resolution 초, 보존 기간 초) - resolution 0은 수집기가 넣은 원본
+DEFAULT_TIERS = (
+    (0, DAY),
+    (MINUTE, 7 * DAY),
+    (HOUR, 90 * DAY),
+)
+
+
+class TimeSeriesStore:
+    """필드 목록이 고정된 델타 시계열 저장소"""
+
+    def __init__(self, path, fields, tiers=DEFAULT_TIERS):
+        self.path = path
+        self.fields = tuple(fields)
+        self.tiers = tuple(tiers)
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self._create()
+        self._series = dict(self.conn.execute("SELECT key, id FROM series"))
+
+    def _create(self):
+        columns = ''.join(f", {f} REAL NOT NULL DEFAULT 0" for f in self.fields)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS series (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT UNIQUE NOT NULL,
+                    label TEXT
+                )
+            """)
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS points (
+                    resolution INTEGER NOT NULL,
+                    series_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    seconds REAL NOT NULL{columns},
+                    PRIMARY KEY (resolution, series_id, ts)
+                ) WITHOUT ROWID
+            """)
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(points)")}
+            for field in self.fields:
+                if field not in existing:
+                    self.conn.execute(f"ALTER TABLE points ADD COLUMN {field} REAL NOT NULL DEFAULT 0")
+
+    def _upsert_sql(self, select=None):
+        """같은 (resolution, series, ts)가 있으면 값을 더하는 INSERT"""
+        columns = ', '.join(('resolution', 'series_id', 'ts', 'seconds') + self.fields)
+        updates = ', '.join(f"{c} = {c} + excluded.{c}" for c in ('seconds',) + self.fields)
+        if select is None:
+            source = "VALUES (" + ', '.join('?' * (4 + len(self.fields))) + ")"
+        else:
+            # INSERT ... SELECT에 ON CONFLICT를 붙일 때는 WHERE가 있어야 파싱이 모호하지 않음
+            source = select
+        return (f"INSERT INTO points ({columns}) {source} "
+                f"ON CONFLICT (resolution, series_id, ts) DO UPDATE SET {updates}")
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+
+    def series_id(self, key, label=None):
+        key = str(key)
+        sid = self._series.get(key)
+        if sid is None:
+            cur = self.conn.execute("INSERT INTO series (key, label) VALUES (?, ?)", (key, label))
+            sid = self._series[key] = cur.lastrowid
+        elif label is not None:
+            self.conn.execute("UPDATE series SET label = ? WHERE id = ? AND label IS NOT ?",
+                              (label, sid, label))
+        return sid
+
+    def append(self, ts, key, values, seconds, label=None):
+        self.append_many(ts, [(key, values, label)], seconds)
+
+    def append_many(self, ts, rows, seconds):
+        """rows: [(key, {필드: 값}, label)] - 같은 시각 ts의 원본 점들"""
+        ts = int(ts)
+        with self.conn:
+            self.conn.executemany(self._upsert_sql(), [
+                (0, self.series_id(key, label), ts, seconds)
+                + tuple(values.get(f, 0) for f in self.fields)
+                for key, values, label in rows
+            ])
+
+    def compact(self, now=None):
+        """
+        보존 기간이 지난 점을 다음 단계 해상도로 합치고 지움
+
+        단계별로 (합친 점 수, 지운 점 수)를 반환합니다.
+        """
+        now = time.time() if now is None else now
+        report = []
+        fields = ', '.join(f"SUM({f})" for f in ('seconds',) + self.fields)
+        with self.conn:
+            for i, (resolution, retention) in enumerate(self.tiers):
+                cutoff = int(now - retention)
+                merged = 0
+                if i + 1 < len(self.tiers):
+                    coarse = self.tiers[i + 1][0]
+                    merged = self.conn.execute(self._upsert_sql(f"""
+                        SELECT {coarse}, series_id, ts - ts % {coarse}, {fields}
+                        FROM points
+                        WHERE resolution = ? AND ts < ?
+                        GROUP BY series_id, ts - ts % {coarse}
+                    """), (resolution, cutoff)).rowcount
+                deleted = self.conn.execute(
+                    "DELETE FROM points WHERE resolution = ? AND ts < ?",
+                    (resolution, cutoff)).rowcount
+                report.append((resolution, merged, deleted))
+            self.conn.execute("""
+                DELETE FROM series WHERE id NOT IN (SELECT DISTINCT series_id FROM points)
+            """)
+        self._series = dict(self.conn.execute("SELECT key, id FROM series"))
+        return report
+
+    # ------------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------------
+
+    def labels(self):
+        return dict(self.conn.execute("SELECT key, label FROM series"))
+
+    def _where(self, since, until, keys):
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("p.ts >= ?")
+            params.append(int(since))
+        if until is not None:
+            clauses.append("p.ts < ?")
+            params.append(int(until))
+        if keys is not None:
+            keys = [str(k) for k in keys]
+            clauses.append(f"s.key IN ({', '.join('?' * len(keys))})")
+            params.extend(keys)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def aggregate(self, since=None, until=None, keys=None):
+        """키 → {'seconds': ..., 필드: 합계} (모든 해상도를 합침)"""
+        where, params = self._where(since, until, keys)
+        sums = ', '.join(f"SUM(p.{f})" for f in ('seconds',) + self.fields)
+        result = {}
+        for row in self.conn.execute(f"""
+            SELECT s.key, {sums}
+            FROM points p JOIN series s ON s.id = p.series_id
+            {where}
+            GROUP BY s.key
+        """, params):
+            result[row[0]] = dict(zip(('seconds',) + self.fields, row[1:]))
+        return result
+
+    def buckets(self, key, bucket=MINUTE, since=None, until=None):
+        """
+        key 하나의 값을 bucket초 단위로 합친 [(버킷 시작 ts, {필드: 합계})]
+
+        bucket이 저장된 해상도보다 작으면 그 구간은 저장된 해상도로 나옵니다.
+        """
+        where, params = self._where(since, until, [key])
+        sums = ', '.join(f"SUM(p.{f})" for f in ('seconds',) + self.fields)
+        return [
+            (row[0], dict(zip(('seconds',) + self.fields, row[1:])))
+            for row in self.conn.execute(f"""
+                SELECT p.ts - p.ts % {int(bucket)} AS b, {sums}
+                FROM points p JOIN series s ON s.id = p.series_id
+                {where}
+                GROUP BY b
+                ORDER BY b
+            """, params)
+        ]
+
+    def stats(self):
+        """해상도 → 점 개수"""
+        return dict(self.conn.execute(
+            "SELECT resolution, COUNT(*) FROM points GROUP BY resolution ORDER BY resolution"))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,139 @@
+"""
+대기 상태 기반 단계 동기화
+==========================
+
+스레드 시나리오는 "상대 세션이 이제쯤 락을 기다리고 있겠지" 하고
+barrier.wait() 뒤에 time.sleep()을 둡니다. 느린 머신에서는 sleep이 모자라
+순서가 뒤집히고, 빠른 머신에서는 몇 초씩 그냥 기다립니다.
+
+WaitCoordinator는 모니터 연결로 pg_stat_activity와 pg_blocking_pids()를
+짧은 간격으로 조회하다가, 기대한 대기 상태가 보이는 즉시 다음 단계로 넘어갑니다.
+
+- register(name, conn): 세션 이름 ↔ backend pid 등록
+- signal(name) / wait(name): 단계 완료 신호 (Barrier 대신)
+- wait_blocked(name, by=...): name 세션이 by 세션 때문에 락을 기다릴 때까지 대기
+- 기대한 상태가 timeout초 안에 나타나지 않으면 WaitTimeout
+
+사용 예:
+    coord = WaitCoordinator()
+
+    # T1 스레드                          # T2 스레드
+    coord.register('T1', conn)          coord.register('T2', conn)
+    cur.execute("UPDATE ...")           coord.wait('T1 locked')
+    coord.signal('T1 locked')           cur.execute("UPDATE ...")   # 대기
+    coord.wait_blocked('T2', by='T1')
+    conn.commit()
+"""
+
+import threading
+import time
+
+from common.db import get_connection
+
+POLL_INTERVAL = 0.01    # pg_stat_activity 조회 간격(초)
+WAIT_TIMEOUT = 10.0     # 기대한 상태를 기다리는 최대 시간(초)
+
+WAIT_STATE_QUERY = """
+    SELECT pid, state, wait_event_type, wait_event, pg_blocking_pids(pid)
+    FROM pg_stat_activity
+    WHERE pid = ANY(%s)
+"""
+
+
+class WaitTimeout(TimeoutError):
+    """기대한 대기 상태가 timeout 안에 나타나지 않음"""
+
+
+def wait_states(cur, pids):
+    """pid → {'state', 'wait_event_type', 'wait_event', 'blocked_by'}"""
+    cur.execute(WAIT_STATE_QUERY, (list(pids),))
+    return {
+        pid: {'state': state, 'wait_event_type': event_type, 'wait_event': event,
+              'blocked_by': list(blocked_by or [])}
+        for pid, state, event_type, event, blocked_by in cur.fetchall()
+    }
+
+
+def is_lock_waiting(info, blockers=None):
+    """Lock 대기 중이고, blockers가 주어지면 그중 하나 이상에 막혀 있는지"""
+    if info is None or info['wait_event_type'] != 'Lock':
+        return False
+    return not blockers or any(pid in info['blocked_by'] for pid in blockers)
+
+
+class WaitCoordinator:
+    """스레드 시나리오에서 세션들의 단계를 대기 상태로 맞추는 조정자"""
+
+    def __init__(self, timeout=WAIT_TIMEOUT, interval=POLL_INTERVAL):
+        self.timeout = timeout
+        self.interval = interval
+        self._pids = {}
+        self._events = {}
+        self._lock = threading.Lock()
+        self._monitor_lock = threading.Lock()
+        self._monitor = None
+
+    def _event(self, name):
+        with self._lock:
+            return self._events.setdefault(name, threading.Event())
+
+    # 세션 등록 / 신호 -------------------------------------------------
+
+    def register(self, name, conn):
+        """세션 이름과 backend pid를 등록하고 pid를 반환"""
+        pid = conn.get_backend_pid()
+        self._pids[name] = pid
+        self._event(f"registered:{name}").set()
+        return pid
+
+    def pid(self, name):
+        """등록된 pid (아직 등록 전이면 등록될 때까지 대기)"""
+        if not self._event(f"registered:{name}").wait(self.timeout):
+            raise WaitTimeout(f"세션 {name}이 {self.timeout:g}초 안에 등록되지 않음")
+        return self._pids[name]
+
+    def signal(self, name):
+        self._event(name).set()
+
+    def wait(self, name):
+        if not self._event(name).wait(self.timeout):
+            raise WaitTimeout(f"'{name}' 신호가 {self.timeout:g}초 안에 오지 않음")
+
+    # 대기 상태 관찰 ---------------------------------------------------
+
+    def states(self, *names):
+        """세션 이름 → wait_states() 결과"""
+        pids = {name: self.pid(name) for name in names}
+        with self._monitor_lock:
+            if self._monitor is None:
+                self._monitor = get_connection(autocommit=True)
+            with self._monitor.cursor() as cur:
+                found = wait_states(cur, pids.values())
+        return {name: found.get(pid) for name, pid in pids.items()}
+
+    def wait_blocked(self, name, by=None, unless=None):
+        """
+        name 세션이 락을 기다릴 때까지 대기하고 그 상태 dict를 반환
+
+        by(세션 이름 또는 목록)를 주면 그 세션 때문에 막힌 경우만 인정합니다.
+        unless 신호가 먼저 오면 (예: 막히지 않고 끝난 경우) None을 반환합니다.
+        """
+        blockers = [by] if isinstance(by, str) else list(by or [])
+        blocker_pids = [self.pid(b) for b in blockers]
+        deadline = time.monotonic() + self.timeout
+        while True:
+            info = self.states(name)[name]
+            if is_lock_waiting(info, blocker_pids):
+                return info
+            if unless is not None and self._event(unless).is_set():
+                return None
+            if time.monotonic() >= deadline:
+                raise WaitTimeout(f"세션 {name}이 {self.timeout:g}초 안에 락 대기 상태가 되지 않음 "
+                                  f"(마지막 상태: {info})")
+            time.sleep(self.interval)
+
+    def close(self):
+        with self._monitor_lock:
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
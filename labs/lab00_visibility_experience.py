@@ -19,20 +19,7 @@ from tabulate import tabulate
 import time
 import threading
 
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection():
-    """새 데이터베이스 연결 생성 (항상 autocommit=False)"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = False
-    return conn
+from common.db import get_connection
 
 
 def print_snapshot(cursor, session_name):
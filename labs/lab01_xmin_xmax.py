@@ -13,24 +13,10 @@ Lab 01: xmin/xmax 기초 실습
 
 import psycopg2
 from psycopg2 import sql
-from tabulate import tabulate
 import time
 
-# 데이터베이스 연결 설정
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection(autocommit=False):
-    """새 데이터베이스 연결 생성"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = autocommit
-    return conn
+from common.db import get_connection
+from common.display import print_result
 
 
 def print_section(title):
@@ -40,19 +26,6 @@ def print_section(title):
     print('=' * 60)
 
 
-def print_result(cursor, description=""):
-    """쿼리 결과를 테이블 형식으로 출력"""
-    if description:
-        print(f"\n>> {description}")
-    rows = cursor.fetchall()
-    if rows:
-        headers = [desc[0] for desc in cursor.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-    else:
-        print("(결과 없음)")
-    return rows
-
-
 def scenario_1_basic_system_columns():
     """
     시나리오 1: 기본 시스템 컬럼 확인
@@ -12,21 +12,9 @@ Lab 02: UPDATE/DELETE 시 튜플 변화 실습
 """
 
 import psycopg2
-from tabulate import tabulate
 
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection(autocommit=False):
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = autocommit
-    return conn
+from common.db import get_connection
+from common.display import print_result
 
 
 def print_section(title):
@@ -35,18 +23,6 @@ def print_section(title):
     print('=' * 60)
 
 
-def print_result(cursor, description=""):
-    if description:
-        print(f"\n>> {description}")
-    rows = cursor.fetchall()
-    if rows:
-        headers = [desc[0] for desc in cursor.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-    else:
-        print("(결과 없음)")
-    return rows
-
-
 def scenario_1_update_creates_new_tuple():
     """
     시나리오 1: UPDATE는 새 튜플을 생성한다
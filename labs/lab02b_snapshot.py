@@ -14,23 +14,11 @@ Lab 02b: Snapshot 이해 실습
 """
 
 import psycopg2
-from tabulate import tabulate
 import threading
 import time
 
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection(autocommit=False):
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = autocommit
-    return conn
+from common.db import get_connection
+from common.display import print_result
 
 
 def print_section(title):
@@ -39,18 +27,6 @@ def print_section(title):
     print('=' * 60)
 
 
-def print_result(cursor, description=""):
-    if description:
-        print(f"\n>> {description}")
-    rows = cursor.fetchall()
-    if rows:
-        headers = [desc[0] for desc in cursor.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-    else:
-        print("(결과 없음)")
-    return rows
-
-
 def scenario_1_snapshot_structure():
     """
     시나리오 1: Snapshot 구조 이해
@@ -13,25 +13,12 @@ Lab 03: 트랜잭션 격리 수준 비교 실습
 
 import psycopg2
 from psycopg2 import extensions
-from tabulate import tabulate
 import threading
 import time
 
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection(autocommit=False, isolation_level=None):
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = autocommit
-    if isolation_level:
-        conn.set_isolation_level(isolation_level)
-    return conn
+from common import sessions
+from common.db import get_connection, run_sql
+from common.display import print_result
 
 
 def print_section(title):
@@ -40,25 +27,9 @@ def print_section(title):
     print('=' * 60)
 
 
-def print_result(cursor, description=""):
-    if description:
-        print(f"\n>> {description}")
-    rows = cursor.fetchall()
-    if rows:
-        headers = [desc[0] for desc in cursor.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-    else:
-        print("(결과 없음)")
-    return rows
-
-
 def reset_alice_balance():
     """Alice의 잔액을 1000으로 리셋"""
-    conn = get_connection(autocommit=True)
-    cur = conn.cursor()
-    cur.execute("UPDATE accounts SET balance = 1000 WHERE name = 'Alice'")
-    cur.close()
-    conn.close()
+    run_sql("UPDATE accounts SET balance = 1000 WHERE name = 'Alice'")
 
 
 def scenario_1_non_repeatable_read():
@@ -185,11 +156,7 @@ def scenario_3_phantom_read():
     print_section("시나리오 3: Phantom Read 테스트")
 
     # 초기화: 잔액 1000 이상인 계정 확인
-    conn_setup = get_connection(autocommit=True)
-    cur_setup = conn_setup.cursor()
-    cur_setup.execute("DELETE FROM accounts WHERE name = 'Rich Guy'")
-    cur_setup.close()
-    conn_setup.close()
+    run_sql("DELETE FROM accounts WHERE name = 'Rich Guy'")
 
     conn_t1 = get_connection()
     conn_t2 = get_connection(autocommit=True)
@@ -254,15 +221,11 @@ def scenario_4_write_skew():
     print_section("시나리오 4: Write Skew (의사 당직 예제)")
 
     # 초기화: 두 의사 모두 당직 중
-    conn_setup = get_connection(autocommit=True)
-    cur_setup = conn_setup.cursor()
-    cur_setup.execute("""
+    run_sql("""
         UPDATE doctors_on_call
         SET is_on_call = true
         WHERE shift_date = CURRENT_DATE
     """)
-    cur_setup.close()
-    conn_setup.close()
 
     conn_kim = get_connection()  # Dr. Kim
     conn_lee = get_connection()  # Dr. Lee
@@ -347,14 +310,10 @@ def scenario_4_write_skew():
 
     finally:
         # 원상복구
-        conn_setup = get_connection(autocommit=True)
-        cur_setup = conn_setup.cursor()
-        cur_setup.execute("""
+        run_sql("""
             UPDATE doctors_on_call SET is_on_call = true
             WHERE shift_date = CURRENT_DATE
         """)
-        cur_setup.close()
-        conn_setup.close()
 
         cur_kim.close()
         cur_lee.close()
@@ -371,14 +330,10 @@ def scenario_5_serializable_prevents_write_skew():
     print_section("시나리오 5: SERIALIZABLE로 Write Skew 방지")
 
     # 초기화
-    conn_setup = get_connection(autocommit=True)
-    cur_setup = conn_setup.cursor()
-    cur_setup.execute("""
+    run_sql("""
         UPDATE doctors_on_call SET is_on_call = true
         WHERE shift_date = CURRENT_DATE
     """)
-    cur_setup.close()
-    conn_setup.close()
 
     conn_kim = get_connection()
     conn_lee = get_connection()
@@ -451,14 +406,10 @@ def scenario_5_serializable_prevents_write_skew():
         """)
 
     finally:
-        conn_setup = get_connection(autocommit=True)
-        cur_setup = conn_setup.cursor()
-        cur_setup.execute("""
+        run_sql("""
             UPDATE doctors_on_call SET is_on_call = true
             WHERE shift_date = CURRENT_DATE
         """)
-        cur_setup.close()
-        conn_setup.close()
 
         cur_kim.close()
         cur_lee.close()
@@ -466,6 +417,69 @@ def scenario_5_serializable_prevents_write_skew():
         conn_lee.close()
 
 
+def scenario_6_snapshot_ladder(reader_count=50):
+    """
+    시나리오 6: 스냅샷 사다리 (REPEATABLE READ 세션 50개)
+    ---------------------------------------------------
+    UPDATE 사이사이에 시작한 REPEATABLE READ 트랜잭션들은
+    각자 시작 시점의 잔액을 끝까지 봅니다.
+    asyncio 세션 엔진(common.sessions)으로 순서를 정확히 맞춥니다.
+    """
+    print_section(f"시나리오 6: 스냅샷 사다리 (REPEATABLE READ 세션 {reader_count}개)")
+
+    reset_alice_balance()
+
+    print(f"""
+    R1 스냅샷 → Writer +10 → R2 스냅샷 → Writer +10 → ... → R{reader_count} 스냅샷 → Writer +10
+    마지막에 모든 R이 동시에 다시 SELECT
+    기대 결과: R_i는 1000 + 10 × (i - 1)
+    """)
+
+    select = "SELECT balance FROM accounts WHERE name = 'Alice'"
+
+    async def run_ladder():
+        writer, = await sessions.open_sessions(1, prefix='Writer')
+        readers = await sessions.open_sessions(reader_count, prefix='R')
+        try:
+            runner = sessions.StepRunner(verbose=False)
+            for reader in readers:
+                runner.step(reader, "BEGIN ISOLATION LEVEL REPEATABLE READ")
+                runner.step(reader, select)    # 첫 쿼리에서 스냅샷 고정
+                runner.step(writer, "UPDATE accounts SET balance = balance + 10 "
+                                    "WHERE name = 'Alice'")
+            final = runner.step(readers, select, wait=True)
+            runner.step(readers, "COMMIT", wait=True)
+            results = await runner.run()
+            latest = await writer.fetchval(select)
+        finally:
+            await sessions.close_sessions([writer] + readers)
+
+        seen = {r['session']: r['rows'][0][0] for r in results if r['step'] == final}
+        return [seen[reader.name] for reader in readers], latest
+
+    start = time.time()
+    balances, latest = sessions.run(run_ladder())
+    elapsed = time.time() - start
+
+    expected = [1000 + 10 * i for i in range(reader_count)]
+    sample = sorted({0, 1, 2, reader_count // 2, reader_count - 1})
+    print(f"\n현재 커밋된 잔액: {latest}")
+    for i in sample:
+        print(f"  R{i + 1:<3} 두 번째 SELECT: {balances[i]} (기대값 {expected[i]})")
+
+    matched = sum(1 for got, want in zip(balances, expected) if got == want)
+    print(f"""
+    결과 분석:
+    - 기대값과 일치한 세션: {matched}/{reader_count}
+    - 전체 실행 시간: {elapsed:.2f}초 (스레드 1개, 세션 {reader_count + 1}개)
+
+    핵심 포인트:
+    1. REPEATABLE READ는 첫 쿼리 시점의 스냅샷을 트랜잭션 끝까지 사용
+    2. 같은 순간에 SELECT해도 세션마다 다른 버전의 row를 봄
+    3. 모든 버전이 보일 수 있어야 하므로 그 사이의 dead tuple은 VACUUM이 지우지 못함
+    """)
+
+
 def main():
     print("""
     ╔═══════════════════════════════════════════════════════════╗
@@ -481,6 +495,7 @@ def main():
         scenario_3_phantom_read()
         scenario_4_write_skew()
         scenario_5_serializable_prevents_write_skew()
+        scenario_6_snapshot_ladder()
 
         print_section("Lab 03 완료!")
         print("""
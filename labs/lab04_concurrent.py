@@ -13,23 +13,12 @@ Lab 04: 동시 쓰기 시나리오 실습
 
 import psycopg2
 from psycopg2 import errors
-from tabulate import tabulate
 import threading
 import time
 
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection(autocommit=False):
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = autocommit
-    return conn
+from common import sessions
+from common.db import get_connection, run_sql
+from common.waits import WaitCoordinator, WaitTimeout
 
 
 def print_section(title):
@@ -38,24 +27,8 @@ def print_section(title):
     print('=' * 60)
 
 
-def print_result(cursor, description=""):
-    if description:
-        print(f"\n>> {description}")
-    rows = cursor.fetchall()
-    if rows:
-        headers = [desc[0] for desc in cursor.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-    else:
-        print("(결과 없음)")
-    return rows
-
-
 def reset_alice_balance(amount=1000):
-    conn = get_connection(autocommit=True)
-    cur = conn.cursor()
-    cur.execute("UPDATE accounts SET balance = %s WHERE name = 'Alice'", (amount,))
-    cur.close()
-    conn.close()
+    run_sql("UPDATE accounts SET balance = %s WHERE name = 'Alice'", (amount,))
 
 
 def scenario_1_row_level_lock():
@@ -69,23 +42,26 @@ def scenario_1_row_level_lock():
     reset_alice_balance(1000)
 
     results = {'t1': None, 't2': None, 't1_time': 0, 't2_time': 0}
-    barrier = threading.Barrier(2)
+    coord = WaitCoordinator()
 
     def transaction_1():
         conn = get_connection()
         cur = conn.cursor()
         try:
+            coord.register('T1', conn)
             cur.execute("BEGIN")
             print("[T1] BEGIN")
 
-            barrier.wait()  # T2와 동시 시작
-
             start = time.time()
             print("[T1] UPDATE accounts SET balance = balance - 100 WHERE name = 'Alice'")
             cur.execute("UPDATE accounts SET balance = balance - 100 WHERE name = 'Alice'")
             print("[T1] UPDATE 완료! (락 획득)")
+            coord.signal('T1 locked')
 
-            time.sleep(2)  # 락 유지
+            # T2가 T1의 락을 기다리는 것이 보일 때까지 락 유지
+            info = coord.wait_blocked('T2', by='T1')
+            print(f"[T1] T2 대기 확인: wait_event = {info['wait_event_type']}/{info['wait_event']}, "
+                  f"pg_blocking_pids = {info['blocked_by']}")
 
             conn.commit()
             print("[T1] COMMIT")
@@ -93,7 +69,10 @@ def scenario_1_row_level_lock():
 
             cur.execute("SELECT balance FROM accounts WHERE name = 'Alice'")
             results['t1'] = cur.fetchone()[0]
-
+        except WaitTimeout as e:
+            # 상대 세션이 기대한 상태가 되지 않음: 락을 풀어 상대도 끝나게 함
+            print(f"[T1] 대기 시간 초과: {e}")
+            conn.rollback()
         finally:
             cur.close()
             conn.close()
@@ -102,11 +81,11 @@ def scenario_1_row_level_lock():
         conn = get_connection()
         cur = conn.cursor()
         try:
+            coord.register('T2', conn)
             cur.execute("BEGIN")
             print("[T2] BEGIN")
 
-            barrier.wait()  # T1과 동시 시작
-            time.sleep(0.1)  # T1이 먼저 락 획득하도록
+            coord.wait('T1 locked')  # T1이 먼저 락 획득하도록
 
             start = time.time()
             print("[T2] UPDATE accounts SET balance = balance - 50 WHERE name = 'Alice'")
@@ -120,7 +99,10 @@ def scenario_1_row_level_lock():
 
             cur.execute("SELECT balance FROM accounts WHERE name = 'Alice'")
             results['t2'] = cur.fetchone()[0]
-
+        except WaitTimeout as e:
+            # 상대 세션이 기대한 상태가 되지 않음: 락을 풀어 상대도 끝나게 함
+            print(f"[T2] 대기 시간 초과: {e}")
+            conn.rollback()
         finally:
             cur.close()
             conn.close()
@@ -139,6 +121,7 @@ def scenario_1_row_level_lock():
     t2.start()
     t1.join()
     t2.join()
+    coord.close()
 
     print(f"""
     결과 분석:
@@ -234,28 +217,33 @@ def scenario_3_select_for_update():
     reset_alice_balance(1000)
 
     results = {'t1_balance': None, 't2_wait': 0}
-    barrier = threading.Barrier(2)
+    coord = WaitCoordinator()
 
     def transaction_1():
         conn = get_connection()
         cur = conn.cursor()
         try:
+            coord.register('T1', conn)
             cur.execute("BEGIN")
             print("[T1] BEGIN")
 
-            barrier.wait()
-
             print("[T1] SELECT balance FROM accounts WHERE name = 'Alice' FOR UPDATE")
             cur.execute("SELECT balance FROM accounts WHERE name = 'Alice' FOR UPDATE")
             balance = cur.fetchone()[0]
             print(f"[T1] 잔액: {balance} (락 획득)")
+            coord.signal('T1 locked')
 
-            time.sleep(2)  # 락 유지
+            # T2가 FOR UPDATE에서 막힐 때까지 락 유지
+            coord.wait_blocked('T2', by='T1')
+            print("[T1] T2가 락을 기다리는 중")
 
             cur.execute("UPDATE accounts SET balance = balance - 100 WHERE name = 'Alice'")
             conn.commit()
             print("[T1] UPDATE & COMMIT 완료")
-
+        except WaitTimeout as e:
+            # 상대 세션이 기대한 상태가 되지 않음: 락을 풀어 상대도 끝나게 함
+            print(f"[T1] 대기 시간 초과: {e}")
+            conn.rollback()
         finally:
             cur.close()
             conn.close()
@@ -264,11 +252,11 @@ def scenario_3_select_for_update():
         conn = get_connection()
         cur = conn.cursor()
         try:
+            coord.register('T2', conn)
             cur.execute("BEGIN")
             print("[T2] BEGIN")
 
-            barrier.wait()
-            time.sleep(0.1)  # T1이 먼저 실행되도록
+            coord.wait('T1 locked')  # T1이 먼저 실행되도록
 
             start = time.time()
             print("[T2] SELECT balance FROM accounts WHERE name = 'Alice' FOR UPDATE")
@@ -284,7 +272,10 @@ def scenario_3_select_for_update():
 
             cur.execute("SELECT balance FROM accounts WHERE name = 'Alice'")
             results['t1_balance'] = cur.fetchone()[0]
-
+        except WaitTimeout as e:
+            # 상대 세션이 기대한 상태가 되지 않음: 락을 풀어 상대도 끝나게 함
+            print(f"[T2] 대기 시간 초과: {e}")
+            conn.rollback()
         finally:
             cur.close()
             conn.close()
@@ -303,6 +294,7 @@ def scenario_3_select_for_update():
     t2.start()
     t1.join()
     t2.join()
+    coord.close()
 
     print(f"""
     결과:
@@ -320,25 +312,27 @@ def scenario_4_concurrent_inserts():
     """
     print_section("시나리오 4: 동시 INSERT와 UNIQUE 제약")
 
-    conn_setup = get_connection(autocommit=True)
-    cur_setup = conn_setup.cursor()
-    cur_setup.execute("DELETE FROM accounts WHERE name = 'Unique Test'")
-    cur_setup.close()
-    conn_setup.close()
+    run_sql("DELETE FROM accounts WHERE name = 'Unique Test'")
 
     results = {'t1': None, 't2': None}
-    barrier = threading.Barrier(2)
+    coord = WaitCoordinator()
 
     def transaction_1():
         conn = get_connection()
         cur = conn.cursor()
         try:
+            coord.register('T1', conn)
             cur.execute("BEGIN")
-            barrier.wait()
 
             print("[T1] INSERT INTO accounts (name, balance) VALUES ('Unique Test', 100)")
             cur.execute("INSERT INTO accounts (name, balance) VALUES ('Unique Test', 100)")
-            time.sleep(1)
+            coord.signal('T1 inserted')
+
+            # UNIQUE 제약이 있으면 T2가 막히고, 없으면 T2가 먼저 끝남
+            if coord.wait_blocked('T2', by='T1', unless='T2 done') is None:
+                print("[T1] T2는 기다리지 않고 INSERT 완료")
+            else:
+                print("[T1] T2가 T1의 커밋을 기다리는 중")
             conn.commit()
             print("[T1] COMMIT 성공!")
             results['t1'] = 'success'
@@ -355,13 +349,14 @@ def scenario_4_concurrent_inserts():
         conn = get_connection()
         cur = conn.cursor()
         try:
+            coord.register('T2', conn)
             cur.execute("BEGIN")
-            barrier.wait()
-            time.sleep(0.1)  # T1이 먼저
+            coord.wait('T1 inserted')  # T1이 먼저
 
             print("[T2] INSERT INTO accounts (name, balance) VALUES ('Unique Test', 200)")
             print("[T2] ... 대기 중")
             cur.execute("INSERT INTO accounts (name, balance) VALUES ('Unique Test', 200)")
+            coord.signal('T2 done')
             conn.commit()
             print("[T2] COMMIT 성공!")
             results['t2'] = 'success'
@@ -375,6 +370,7 @@ def scenario_4_concurrent_inserts():
             results['t2'] = 'error'
             conn.rollback()
         finally:
+            coord.signal('T2 done')
             cur.close()
             conn.close()
 
@@ -395,13 +391,10 @@ def scenario_4_concurrent_inserts():
     t2.start()
     t1.join()
     t2.join()
+    coord.close()
 
     # 정리
-    conn_setup = get_connection(autocommit=True)
-    cur_setup = conn_setup.cursor()
-    cur_setup.execute("DELETE FROM accounts WHERE name = 'Unique Test'")
-    cur_setup.close()
-    conn_setup.close()
+    run_sql("DELETE FROM accounts WHERE name = 'Unique Test'")
 
 
 def scenario_5_optimistic_locking():
@@ -496,11 +489,75 @@ def scenario_5_optimistic_locking():
         conn_t2.close()
 
     finally:
-        conn = get_connection(autocommit=True)
-        cur = conn.cursor()
-        cur.execute("DROP TABLE IF EXISTS products_versioned")
-        cur.close()
-        conn.close()
+        run_sql("DROP TABLE IF EXISTS products_versioned")
+
+
+def scenario_6_lock_queue_at_scale(session_count=100):
+    """
+    시나리오 6: 같은 row를 기다리는 세션 100개
+    -----------------------------------------
+    스레드 대신 asyncio 세션 엔진(common.sessions)으로
+    한 스레드에서 세션 수백 개를 정해진 순서대로 움직입니다.
+    """
+    print_section(f"시나리오 6: 같은 row를 기다리는 세션 {session_count}개")
+
+    reset_alice_balance(1000)
+
+    print(f"""
+    초기 상태: Alice 잔액 = 1000
+    Holder: UPDATE로 Alice row lock 획득 (커밋하지 않음)
+    W1~W{session_count}: 모두 같은 UPDATE balance + 1 → 락 대기열
+    Holder COMMIT 후 대기열이 하나씩 풀림
+    기대 결과: 1000 + 1 + {session_count} = {1001 + session_count}
+    """)
+
+    async def run_queue():
+        holder, observer = await sessions.open_sessions(2, prefix='H')
+        waiters = await sessions.open_sessions(session_count, prefix='W')
+        update = "UPDATE accounts SET balance = balance + 1 WHERE name = 'Alice'"
+        lock_waits = """
+            SELECT count(*) FROM pg_stat_activity
+            WHERE wait_event_type = 'Lock' AND pid = ANY(%s)
+        """
+        try:
+            runner = sessions.StepRunner(monitor=observer)
+            runner.step(holder, "BEGIN")
+            runner.step(holder, update, label="Holder: UPDATE (락 획득)")
+            runner.step(waiters, "BEGIN")
+            waiting = runner.step(waiters, update, label="W*: UPDATE (락 대기)")
+            queued = runner.step(observer, lock_waits, ([w.pid for w in waiters],),
+                                 label="Lock 대기 중인 세션 수 조회")
+            runner.step(holder, "COMMIT", label="Holder: COMMIT")
+            runner.step(waiters, "COMMIT", label="W*: COMMIT (UPDATE가 끝난 순서대로)",
+                        wait=True)
+            done = runner.step(observer, "SELECT balance FROM accounts WHERE name = 'Alice'",
+                               label="최종 잔액 조회")
+            results = await runner.run()
+        finally:
+            await sessions.close_sessions([holder, observer] + waiters)
+
+        by_step = {}
+        for r in results:
+            by_step.setdefault(r['step'], []).append(r)
+        waits = sorted(r['end'] - r['start'] for r in by_step[waiting])
+        return by_step[queued][0]['rows'][0][0], by_step[done][0]['rows'][0][0], waits
+
+    start = time.time()
+    queued, balance, waits = sessions.run(run_queue())
+    elapsed = time.time() - start
+
+    print(f"""
+    결과 분석:
+    - 락을 기다린 세션: {queued}개 (pg_stat_activity.wait_event_type = 'Lock')
+    - 최종 잔액: {balance} (기대값 {1001 + session_count})
+    - UPDATE 대기 시간: 최소 {waits[0]:.3f}초, 중앙값 {waits[len(waits) // 2]:.3f}초, 최대 {waits[-1]:.3f}초
+    - 전체 실행 시간: {elapsed:.2f}초 (스레드 1개)
+
+    핵심 포인트:
+    1. 같은 row를 기다리는 트랜잭션은 모두 대기열에 들어감
+    2. 앞 트랜잭션이 커밋하면 다음 대기자가 최신 값으로 UPDATE 재평가
+    3. 세션이 100개여도 Lost Update 없음
+    """)
 
 
 def main():
@@ -518,6 +575,7 @@ def main():
         scenario_3_select_for_update()
         scenario_4_concurrent_inserts()
         scenario_5_optimistic_locking()
+        scenario_6_lock_queue_at_scale()
 
         print_section("Lab 04 완료!")
         print("""
@@ -540,6 +598,9 @@ def main():
        - 버전 번호로 충돌 감지
        - 높은 동시성, 충돌 시 재시도
 
+    5. 락 대기열:
+       - 세션 수백 개가 같은 row를 기다려도 순서대로 처리
+
     다음 실습: lab05_vacuum.py
         """)
 
@@ -13,22 +13,11 @@ Lab 05: VACUUM과 Dead Tuple 실습
 """
 
 import psycopg2
-from tabulate import tabulate
 import time
 
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection(autocommit=False):
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = autocommit
-    return conn
+from common import heappage
+from common.db import get_connection
+from common.display import print_result
 
 
 def print_section(title):
@@ -37,18 +26,6 @@ def print_section(title):
     print('=' * 60)
 
 
-def print_result(cursor, description=""):
-    if description:
-        print(f"\n>> {description}")
-    rows = cursor.fetchall()
-    if rows:
-        headers = [desc[0] for desc in cursor.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-    else:
-        print("(결과 없음)")
-    return rows
-
-
 def scenario_1_create_dead_tuples():
     """
     시나리오 1: Dead Tuple 생성하기
@@ -122,6 +99,14 @@ def scenario_1_create_dead_tuples():
         print(f"\n페이지 0의 실제 튜플 수: {result[0]}개")
         print("(live tuple + dead tuple이 모두 물리적으로 존재)")
 
+        # 테이블 전체: raw 페이지를 한꺼번에 가져와 클라이언트에서 튜플 헤더 해석
+        summary = heappage.analyze(heappage.HeapPage(raw, blkno)
+                                   for blkno, raw in heappage.fetch_pages(cur, 'vacuum_test'))
+        print(f"전체 {summary['pages']}개 페이지: 튜플 {summary['tuples']}개 중 "
+              f"xmax 커밋됨 {summary['xmax_committed']}개, 미확정 {summary['xmax_pending']}개")
+        print("(python main.py heapscan vacuum_test 로 자세히 볼 수 있음)")
+        print("(페이지 구간별 dead 분포: python main.py bloatscan vacuum_test)")
+
         print("""
     분석:
     - n_live_tup: 현재 유효한(visible) 튜플 수
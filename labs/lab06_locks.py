@@ -14,23 +14,11 @@ Lab 06: Lock 모니터링 실습
 
 import psycopg2
 from psycopg2 import errors
-from tabulate import tabulate
 import threading
-import time
 
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection(autocommit=False):
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = autocommit
-    return conn
+from common.db import get_connection
+from common.display import print_result
+from common.waits import WaitCoordinator
 
 
 def print_section(title):
@@ -39,18 +27,6 @@ def print_section(title):
     print('=' * 60)
 
 
-def print_result(cursor, description=""):
-    if description:
-        print(f"\n>> {description}")
-    rows = cursor.fetchall()
-    if rows:
-        headers = [desc[0] for desc in cursor.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-    else:
-        print("(결과 없음)")
-    return rows
-
-
 def scenario_1_lock_types():
     """
     시나리오 1: PostgreSQL Lock 유형 이해
@@ -183,20 +159,21 @@ def scenario_3_lock_waiting():
     cur_t2 = conn_t2.cursor()
     cur_monitor = conn_monitor.cursor()
 
-    wait_event = threading.Event()
+    coord = WaitCoordinator()
+    coord.register('T1', conn_t1)
+    coord.register('T2', conn_t2)
 
     def t1_hold_lock():
         cur_t1.execute("BEGIN")
         cur_t1.execute("UPDATE accounts SET balance = balance WHERE name = 'Alice'")
-        print("[T1] Alice row 락 획득, 5초간 유지...")
-        wait_event.set()  # T2 시작 신호
-        time.sleep(5)
+        print("[T1] Alice row 락 획득, Monitor 관찰이 끝날 때까지 유지...")
+        coord.signal('T1 locked')  # T2 시작 신호
+        coord.wait('observed')
         conn_t1.commit()
         print("[T1] COMMIT 완료")
 
     def t2_wait_lock():
-        wait_event.wait()  # T1이 락 획득할 때까지 대기
-        time.sleep(0.5)
+        coord.wait('T1 locked')  # T1이 락 획득할 때까지 대기
         cur_t2.execute("BEGIN")
         print("[T2] Alice row UPDATE 시도 (락 대기 중...)")
         cur_t2.execute("UPDATE accounts SET balance = balance WHERE name = 'Alice'")
@@ -205,7 +182,7 @@ def scenario_3_lock_waiting():
 
     print("""
     시나리오:
-    T1: Alice row 락 획득 후 5초간 유지
+    T1: Alice row 락 획득 후 Monitor 관찰이 끝날 때까지 유지
     T2: 같은 row UPDATE 시도 → 대기
     Monitor: 대기 상황 관찰
     """)
@@ -216,8 +193,13 @@ def scenario_3_lock_waiting():
     t1.start()
     t2.start()
 
-    # 대기 상황이 발생할 때까지 잠시 대기
-    time.sleep(1)
+    # T2가 T1 때문에 Lock 대기 상태가 되는 즉시 관찰 시작
+    try:
+        info = coord.wait_blocked('T2', by='T1')
+        print(f"\n[Monitor] T2 대기 감지: {info['wait_event_type']}/{info['wait_event']}, "
+              f"pg_blocking_pids = {info['blocked_by']}")
+    except TimeoutError as e:
+        print(f"\n[Monitor] {e}")
 
     # 락 대기 상황 확인
     print("\n[Monitor] 락 대기 상황 조회")
@@ -241,8 +223,10 @@ def scenario_3_lock_waiting():
     """)
     print_result(cur_monitor, "활성 세션 상태")
 
+    coord.signal('observed')
     t1.join()
     t2.join()
+    coord.close()
 
     print("""
     락 대기 확인 방법:
@@ -278,7 +262,9 @@ def scenario_4_deadlock():
     cur_t2 = conn_t2.cursor()
 
     results = {'t1': None, 't2': None}
-    barrier = threading.Barrier(2)
+    coord = WaitCoordinator()
+    coord.register('T1', conn_t1)
+    coord.register('T2', conn_t2)
 
     def transaction_1():
         try:
@@ -289,9 +275,9 @@ def scenario_4_deadlock():
             print("[T1] UPDATE Alice")
             cur_t1.execute("UPDATE accounts SET balance = balance WHERE name = 'Alice'")
             print("[T1] Alice 락 획득!")
+            coord.signal('T1 locked')
 
-            barrier.wait()  # T2와 동기화
-            time.sleep(0.5)
+            coord.wait('T2 locked')  # T2가 Bob 락을 잡을 때까지
 
             # Bob 락 시도 → 대기
             print("[T1] UPDATE Bob 시도...")
@@ -318,9 +304,10 @@ def scenario_4_deadlock():
             print("[T2] UPDATE Bob")
             cur_t2.execute("UPDATE accounts SET balance = balance WHERE name = 'Bob'")
             print("[T2] Bob 락 획득!")
+            coord.signal('T2 locked')
 
-            barrier.wait()  # T1과 동기화
-            time.sleep(0.5)
+            coord.wait('T1 locked')
+            coord.wait_blocked('T1', by='T2')  # T1이 Bob 락을 기다리기 시작하면
 
             # Alice 락 시도 → 대기 (여기서 deadlock!)
             print("[T2] UPDATE Alice 시도...")
@@ -352,6 +339,7 @@ def scenario_4_deadlock():
     t2.start()
     t1.join()
     t2.join()
+    coord.close()
 
     print(f"""
     결과:
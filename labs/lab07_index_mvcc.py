@@ -17,21 +17,10 @@ MVCC 연결:
 """
 
 import psycopg2
-from tabulate import tabulate
 
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection(autocommit=False):
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = autocommit
-    return conn
+from common import btree
+from common.db import get_connection
+from common.display import print_result
 
 
 def print_section(title):
@@ -40,18 +29,6 @@ def print_section(title):
     print('=' * 60)
 
 
-def print_result(cursor, description=""):
-    if description:
-        print(f"\n>> {description}")
-    rows = cursor.fetchall()
-    if rows:
-        headers = [desc[0] for desc in cursor.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-    else:
-        print("(결과 없음)")
-    return rows
-
-
 def scenario_1_index_and_ctid():
     """
     시나리오 1: 인덱스와 ctid의 관계
@@ -295,6 +272,9 @@ def scenario_3_hot_update():
     - 기존 튜플이 새 튜플을 가리킴 (t_ctid)
     - 인덱스는 여전히 기존 위치를 가리킴
     - 기존 위치 → HOT chain 따라가기 → 최신 버전
+
+    페이지에 빈 공간이 없으면 HOT가 안 되므로 fillfactor로 공간을 남겨 둡니다.
+    지속 UPDATE 부하에서 fillfactor별 HOT 비율 비교: python main.py hottune
         """)
 
     finally:
@@ -457,6 +437,15 @@ def scenario_5_btree_structure():
         """)
         print_result(cur, "인덱스 크기 vs 테이블 row 수")
 
+        # 페이지 하나가 아니라 트리 전체: root부터 레벨 단위로 raw 페이지를 읽어 해석
+        walk = btree.walk_index('idx_mvcc_indexed', workers=1)
+        print("\n[트리 전체 (common.btree)]")
+        for level, pages, items, fanout, _, _, fill, dead in walk.level_stats():
+            fanout_text = f", fanout 평균 {fanout:.1f}" if fanout is not None else ""
+            print(f"  level {level}: 페이지 {pages}개, 항목 {items}개{fanout_text}, "
+                  f"채움 {fill:.1f}%, dead {dead}개")
+        print("  (분할 구간/중복 제거까지: python main.py btreescan idx_mvcc_indexed)")
+
         print("""
     주요 필드 설명:
     - magic: B-tree 인덱스 식별자
@@ -16,23 +16,11 @@ Lab 08: 인덱스 유형과 활용
 - orders: 10만 건 주문 데이터 (B-tree 실습)
 """
 
-import psycopg2
-from psycopg2 import sql
-from tabulate import tabulate
-import time
-
-# 데이터베이스 연결 설정
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection():
-    return psycopg2.connect(**DB_CONFIG)
+from common.db import get_connection
+from common.display import execute_and_show
+from common import gin, stats
+from common.brin import BrinIndex
+from common.plans import explain
 
 
 def print_section(title):
@@ -45,31 +33,13 @@ def print_subsection(title):
     print(f"\n--- {title} ---")
 
 
-def execute_and_show(cur, query, description=""):
-    """쿼리 실행 후 결과 출력"""
-    if description:
-        print(f"\n>> {description}")
-    print(f"SQL: {query[:100]}..." if len(query) > 100 else f"SQL: {query}")
-
-    start_time = time.time()
-    cur.execute(query)
-    elapsed = (time.time() - start_time) * 1000
-
-    if cur.description:
-        rows = cur.fetchall()
-        headers = [desc[0] for desc in cur.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-        print(f"({len(rows)}개 행, {elapsed:.2f}ms)")
-        return rows
-    else:
-        print(f"완료 ({elapsed:.2f}ms)")
-        return None
-
-
 def get_explain_analyze(cur, query):
-    """EXPLAIN ANALYZE 결과 반환"""
-    cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) {query}")
-    return '\n'.join([row[0] for row in cur.fetchall()])
+    """
+    EXPLAIN (ANALYZE, BUFFERS, WAL, SETTINGS) 결과를 Plan 트리로 반환
+
+    print()하면 FORMAT TEXT와 같은 모양으로 출력됩니다.
+    """
+    return explain(cur, query)
 
 
 # =============================================================================
@@ -125,8 +95,9 @@ def scenario_1_btree_advanced():
         """
 
         print("\n범위 쿼리 실행 계획:")
-        explain = get_explain_analyze(cur, query)
-        print(explain)
+        plan = get_explain_analyze(cur, query)
+        print(plan)
+        print(f"→ {plan.summary()}")
 
         execute_and_show(cur, query, "최근 30일 주문 집계")
 
@@ -327,6 +298,13 @@ def scenario_2_gin_jsonb():
             AND indexrelname LIKE '%jsonb%'
         """, "JSONB 인덱스 크기 비교")
 
+        # 읽기와 달리 쓰기는 키마다 엔트리가 생겨 비쌈 → fastupdate=on이면 pending list에 모아 둠
+        for name in ('idx_products_jsonb', 'idx_products_jsonb_path'):
+            pending = gin.pending(cur, name)
+            print(f"  {name}: 엔트리 {pending.entries:,}개, "
+                  f"pending list {pending.pages}페이지 / {pending.tuples}튜플")
+        print("→ fastupdate / gin_pending_list_limit별 쓰기 비용: python main.py ginbench")
+
         # 2-4: 중첩 JSON 쿼리
         print_subsection("2-4: 중첩 JSON 쿼리")
 
@@ -604,21 +582,51 @@ def scenario_4_brin():
             WHERE recorded_at BETWEEN '2024-01-01' AND '2024-01-10'
         """
 
-        # 힌트로 BRIN 사용 유도
-        cur.execute("SET enable_indexscan = off")  # B-tree 비활성화
+        # BRIN 쪽: enable_indexscan만 끄면 플래너가 B-tree로 bitmap scan을 할 수 있으므로
+        # 트랜잭션 안에서 B-tree를 DROP해 숨기고, 측정이 끝나면 ROLLBACK으로 되살림
+        cur.execute("DROP INDEX idx_sensor_recorded_btree")
         print("\n[BRIN 인덱스 사용]")
-        print(get_explain_analyze(cur, query_brin))
+        plan = get_explain_analyze(cur, query_brin)
+        print(plan)
+        if 'idx_sensor_recorded_brin' not in {node.index_name for node in plan.scans()}:
+            conn.rollback()
+            raise RuntimeError("BRIN 인덱스를 쓰는 계획이 아니라 비교할 수 없습니다")
+
+        # 한 번의 실행 시간은 캐시 상태에 따라 흔들리므로 반복 측정해서 비교
+        brin = stats.measure_query(cur, query_brin, label="BRIN")
+        conn.rollback()
 
         cur.execute("SET enable_indexscan = on")
         cur.execute("SET enable_bitmapscan = off")  # BRIN(bitmap) 비활성화
         print("\n[B-tree 인덱스 사용]")
         print(get_explain_analyze(cur, query_brin))
+        btree = stats.measure_query(cur, query_brin, label="B-tree")
+
+        print("\n[반복 측정: 워밍업 후 신뢰구간이 좁아질 때까지]")
+        print(f"  {brin.summary()}")
+        print(f"  {btree.summary()}")
+        print(f"  → {stats.compare(brin, btree)}")
 
         # 설정 복원
-        cur.execute("SET enable_bitmapscan = on")
+        cur.execute("SET enable_indexscan = on; SET enable_bitmapscan = on")
 
         execute_and_show(cur, query_brin, "쿼리 결과")
 
+        # 4-3b: BRIN 범위 요약으로 본 선택도
+        print_subsection("4-3b: BRIN 범위 요약으로 본 선택도")
+
+        summary = BrinIndex.load(cur, 'idx_sensor_recorded_brin')
+        lo, hi = summary.coerce(cur, '2024-01-01', '2024-01-10')
+        ranges, blocks, fraction = summary.blocks_for(lo, hi)
+        avg_overlap, _, max_overlap = summary.overlap()
+        print(f"  범위 {summary.range_count}개 (pages_per_range {summary.pages_per_range}), "
+              f"요약 안 된 범위 {summary.unsummarized}개")
+        print(f"  범위 간 overlap: 평균 {avg_overlap:.2f}, 최대 {max_overlap}")
+        print(f"  2024-01-01 ~ 2024-01-10 조건: 범위 {ranges}개, "
+              f"{blocks}/{summary.table_blocks} 블록 ({100 * fraction:.1f}%)을 읽음")
+        print("→ overlap이 0에 가까우면 INSERT 순서 = recorded_at 순서라 필요한 범위만 읽음")
+        print("  pages_per_range별 크기/블록/시간 비교: python main.py brinscan sweep sensor_data recorded_at")
+
         # 4-4: BRIN이 적합하지 않은 경우
         print_subsection("4-4: BRIN이 적합하지 않은 경우")
 
@@ -20,23 +20,10 @@ Lab 09: 쿼리 실행 계획과 최적화
 - index_mvcc_test: 1000건 기본 데이터
 """
 
-import psycopg2
-from psycopg2 import sql
-from tabulate import tabulate
-import time
-
-# 데이터베이스 연결 설정
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
-
-def get_connection():
-    return psycopg2.connect(**DB_CONFIG)
+from common import cache, stats
+from common.db import get_connection
+from common.display import execute_and_show
+from common.plans import explain
 
 
 def print_section(title):
@@ -49,32 +36,14 @@ def print_subsection(title):
     print(f"\n--- {title} ---")
 
 
-def execute_and_show(cur, query, description=""):
-    """쿼리 실행 후 결과 출력"""
-    if description:
-        print(f"\n>> {description}")
-    print(f"SQL: {query[:100]}..." if len(query) > 100 else f"SQL: {query}")
-
-    start_time = time.time()
-    cur.execute(query)
-    elapsed = (time.time() - start_time) * 1000
-
-    if cur.description:
-        rows = cur.fetchall()
-        headers = [desc[0] for desc in cur.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-        print(f"({len(rows)}개 행, {elapsed:.2f}ms)")
-        return rows
-    else:
-        print(f"완료 ({elapsed:.2f}ms)")
-        return None
-
-
 def get_explain_analyze(cur, query, buffers=True):
-    """EXPLAIN ANALYZE 결과 반환"""
-    options = "ANALYZE, COSTS, BUFFERS" if buffers else "ANALYZE, COSTS"
-    cur.execute(f"EXPLAIN ({options}, FORMAT TEXT) {query}")
-    return '\n'.join([row[0] for row in cur.fetchall()])
+    """
+    EXPLAIN (ANALYZE, BUFFERS, WAL, SETTINGS) 결과를 Plan 트리로 반환
+
+    print()하면 FORMAT TEXT와 같은 모양으로 출력되고,
+    plan.find('Index Only Scan'), plan.dominant_node() 등으로 노드를 분석할 수 있습니다.
+    """
+    return explain(cur, query, buffers=buffers)
 
 
 # =============================================================================
@@ -186,12 +155,29 @@ def scenario_1_explain_analyze():
         print("\n정렬이 포함된 쿼리:")
         print(get_explain_analyze(cur, query_sort))
 
+        # 1-4: 캐시 상태에 따른 차이
+        print_subsection("1-4: 콜드 캐시 vs 웜 캐시")
+
+        # 시나리오 안에서는 연결을 잡고 있으므로 서버 재시작 대신 filler로 밀어냄
+        warm = cache.measure_query(query_seq, mode='warm', label="웜 (pg_prewarm)")
+        cold = cache.measure_query(query_seq, mode='cold', method='filler',
+                                   label="콜드 (shared_buffers 비움)")
+        print(f"\n  {warm.summary()}")
+        print(f"  {cold.summary()}")
+        print(f"  → {stats.compare(warm, cold)}")
+
+        plan = get_explain_analyze(cur, query_seq)
+        buffers = plan.root.buffers
+        print(f"\n직후 다시 실행: shared hit={buffers.shared_hit} read={buffers.shared_read}")
+        print("→ 콜드 측정 직후라도 한 번 읽으면 다음 실행부터는 대부분 hit")
+
         print("""
 ★ 핵심 정리:
   1. cost는 상대적 비용, actual time은 실제 시간
   2. rows (예상) vs rows (실제) 차이가 크면 통계 갱신 필요
   3. Buffers hit이 높을수록 캐시 효율 좋음
   4. startup_cost가 높은 연산은 첫 행 반환이 느림
+  5. 벤치마크는 캐시 상태(콜드/웜)를 정하고 측정해야 비교할 수 있음
         """)
 
     finally:
@@ -437,11 +423,14 @@ idx_orders_covering: (customer_id) INCLUDE (total_amount, status)
         """
 
         print("\nIndex-Only Scan 실행 계획:")
-        explain = get_explain_analyze(cur, query_ios)
-        print(explain)
+        plan = get_explain_analyze(cur, query_ios)
+        print(plan)
 
         # Heap Fetches 분석
-        if "Heap Fetches:" in explain:
+        ios_nodes = plan.find('Index Only Scan')
+        if ios_nodes:
+            print(f"\n→ Heap Fetches: {plan.totals()['heap_fetches']} "
+                  f"(Index Only Scan 반환 행 {ios_nodes[0].total_rows})")
             print("""
 ★ Heap Fetches 해석:
   - Heap Fetches: 0  → 모든 페이지가 all-visible, 완벽한 Index-Only Scan!
@@ -465,8 +454,10 @@ idx_orders_covering: (customer_id) INCLUDE (total_amount, status)
         conn.commit()
 
         print("\n[UPDATE 직후] Index-Only Scan:")
-        explain_after = get_explain_analyze(cur, query_ios)
-        print(explain_after)
+        plan_after = get_explain_analyze(cur, query_ios)
+        print(plan_after)
+        print(f"\n→ Heap Fetches: {plan.totals()['heap_fetches']} → "
+              f"{plan_after.totals()['heap_fetches']}")
 
         print("""
 ★ UPDATE 후 변화:
@@ -16,12 +16,12 @@ Lab 10: 성능 모니터링과 튜닝
 - pgstattuple (물리적 통계)
 """
 
-import psycopg2
-from psycopg2 import sql
-from tabulate import tabulate
-import time
 import os
 
+from common.db import get_connection
+from common import display, pgss
+from tools import dashboard
+
 # matplotlib 설정
 import matplotlib
 matplotlib.use('Agg')  # GUI 없이 파일로 저장
@@ -33,24 +33,11 @@ import numpy as np
 plt.rcParams['font.family'] = 'DejaVu Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
-# 데이터베이스 연결 설정
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'mvcc_lab',
-    'user': 'study',
-    'password': 'study123'
-}
-
 # 그래프 저장 디렉토리
 GRAPH_DIR = os.path.join(os.path.dirname(__file__), 'graphs')
 os.makedirs(GRAPH_DIR, exist_ok=True)
 
 
-def get_connection():
-    return psycopg2.connect(**DB_CONFIG)
-
-
 def print_section(title):
     print(f"\n{'='*70}")
     print(f" {title}")
@@ -61,24 +48,9 @@ def print_subsection(title):
     print(f"\n--- {title} ---")
 
 
-def execute_and_show(cur, query, description=""):
-    """쿼리 실행 후 결과 출력"""
-    if description:
-        print(f"\n>> {description}")
-
-    start_time = time.time()
-    cur.execute(query)
-    elapsed = (time.time() - start_time) * 1000
-
-    if cur.description:
-        rows = cur.fetchall()
-        headers = [desc[0] for desc in cur.description]
-        print(tabulate(rows, headers=headers, tablefmt='psql'))
-        print(f"({len(rows)}개 행, {elapsed:.2f}ms)")
-        return rows
-    else:
-        print(f"완료 ({elapsed:.2f}ms)")
-        return None
+def execute_and_show(cur, query, description="", **kwargs):
+    """쿼리 실행 후 결과 출력 (SQL 문은 출력하지 않음)"""
+    return display.execute_and_show(cur, query, description, show_sql=False, **kwargs)
 
 
 def save_graph(fig, filename):
@@ -252,12 +224,38 @@ def scenario_1_query_stats():
             plt.tight_layout()
             save_graph(fig, 'query_time_distribution.png')
 
+        # 1-5: 누적값 대신 구간 델타
+        print_subsection("1-5: 스냅샷 두 개의 차이 (구간 델타)")
+
+        print("""
+누적값은 서버 시작 이후 전체 합계라서, 방금 느려진 쿼리가 과거 기록에 묻힙니다.
+스냅샷 두 개의 차이를 보면 "이 구간에 무슨 일이 있었는지"가 보입니다.
+(계속 수집하려면: python main.py statements collect -i 10)
+        """)
+
+        before = pgss.take_snapshot(cur)
+        for _ in range(20):
+            cur.execute(sample_queries[1])
+            cur.fetchall()
+        after = pgss.take_snapshot(cur)
+        deltas = pgss.diff(before, after)
+        seconds = after.ts - before.ts
+
+        rows = sorted(deltas.items(), key=lambda item: item[1]['exec_ms'], reverse=True)[:5]
+        print(f"{seconds:.2f}초 구간 델타 (exec_ms 상위):")
+        for queryid, d in rows:
+            print(f"  calls={d['calls']:.0f}  exec={d['exec_ms']:.2f}ms  "
+                  f"hit={d['blks_hit']:.0f} read={d['blks_read']:.0f}  "
+                  f"{after.texts[queryid][:50]}")
+        print("→ 누적 calls는 25회 이상이어도 이 구간의 델타는 20회")
+
         print("""
 ★ 핵심 정리:
   1. pg_stat_statements는 쿼리 성능 분석의 핵심 도구
   2. total_exec_time으로 가장 비용이 큰 쿼리 식별
   3. calls로 자주 호출되는 쿼리 식별 (캐싱 후보)
   4. cache hit rate 90% 이상이 이상적
+  5. 장애 분석은 누적값이 아니라 구간 델타로 (main.py statements)
         """)
 
     finally:
@@ -415,6 +413,10 @@ def scenario_2_index_usage():
   2. idx_scan=0인 인덱스는 삭제 후보 (충분한 관찰 후)
   3. 크기가 큰 미사용 인덱스 우선 검토
   4. PK/FK 인덱스는 특별한 경우 아니면 유지
+  5. 반대로 새 인덱스는 측정해서 결정: python main.py advisor
+     (상위 쿼리의 후보 인덱스를 복제 DB에 만들어 읽기 이득 - 쓰기 비용 계산)
+  6. idx_scan > 0이어도 다른 인덱스가 대신할 수 있으면 쓰기 비용만 추가: python main.py indexdup
+     (예: idx_orders_covering이 있으면 (customer_id) 단일 인덱스는 중복)
         """)
 
     finally:
@@ -702,11 +704,13 @@ def scenario_4_table_analysis():
 # 시나리오 5: 종합 성능 대시보드
 # =============================================================================
 
-def scenario_5_dashboard():
+def scenario_5_dashboard(live_seconds=0):
     """
     시나리오 5: 종합 성능 대시보드
 
     matplotlib로 종합 성능 지표를 시각화합니다.
+    live_seconds를 주면 그 시간 동안 1초 간격으로 지표를 다시 읽어
+    롤링 윈도우 기준 비율로 대시보드를 계속 갱신합니다 (tools/dashboard.py).
     """
     print_section("시나리오 5: 종합 성능 대시보드")
 
@@ -836,12 +840,19 @@ def scenario_5_dashboard():
         else:
             print("✓ 캐시 히트율이 양호합니다.")
 
+        if live_seconds:
+            print_subsection(f"5-1: 실시간 모드 ({live_seconds}초, 1초 간격)")
+            print("누적값 한 장이 아니라 최근 5초 롤링 윈도우의 초당 비율/히트율을 봅니다.")
+            print("(창으로 보려면: python main.py dashboard)\n")
+            dashboard.run(duration=live_seconds)
+
         print("""
 ★ 핵심 정리:
   1. 정기적인 성능 모니터링으로 문제 조기 발견
   2. 캐시 히트율 90% 이상 유지 목표
   3. Dead tuple 비율 5% 이하 유지
   4. 미사용 인덱스 정리로 쓰기 성능 개선
+  5. 추세는 누적값이 아니라 짧은 구간의 비율로 봐야 보임 (실시간 모드)
         """)
 
     finally:
@@ -868,6 +879,7 @@ def main():
   3. pgstattuple - Index Bloat 감지
   4. 테이블 크기와 구성 분석
   5. 종합 성능 대시보드 (matplotlib)
+     ('5 live': 이어서 60초 동안 실시간 갱신)
 
 그래프 저장 위치: labs/graphs/
 
@@ -889,6 +901,8 @@ def main():
             scenarios[num]()
             print("\n" + "─" * 70)
             input("다음 시나리오로 계속하려면 Enter를 누르세요...")
+    elif choice == '5 live':
+        scenario_5_dashboard(live_seconds=60)
     elif choice in scenarios:
         scenarios[choice]()
     else:
@@ -0,0 +1,27 @@
+"""
+실행 도구
+=========
+
+lab 시나리오를 넘어서는 측정/분석 도구 모음입니다.
+저장소 루트의 main.py에서 하위 명령으로 실행합니다.
+
+    python main.py <명령> [옵션]
+
+- run: 모든 lab 시나리오를 병렬 실행 (워커별 복제 DB)
+- snapshot: 템플릿 DB / COPY BINARY 스냅샷 생성과 복원
+- datagen: scale factor 기반 COPY 병렬 데이터 생성
+- workload: accounts 송금 부하와 지연 시간 히스토그램
+- bench: lab08/lab09 쿼리의 계획 모양/실행 시간 회귀 검사
+- statements: pg_stat_statements 스냅샷 델타 수집, 구간별 상위 쿼리 조회
+- dashboard: 통계 뷰를 1초 간격으로 읽어 갱신하는 실시간 대시보드 (blit)
+- waitprof: pg_stat_activity 샘플링 대기 이벤트 프로파일러 (folded stack 출력)
+- locks: pg_blocking_pids() 락 대기 그래프 감시, v_lock_waits 뷰와 조회 시간 비교
+- heapscan: raw 힙 페이지 일괄 조회와 클라이언트 디코딩 (파일 저장 후 오프라인 분석)
+- bloatscan: 병렬 페이지 스캔으로 dead tuple 히트맵, 빈 공간 히스토그램
+- btreescan: B-tree root~리프 전체 탐색 (fanout, 채움률, posting list, 분할 흔적)
+- brinscan: BRIN 범위 overlap/선택도 분석과 pages_per_range별 크기/블록/시간 비교
+- ginbench: GIN fastupdate/gin_pending_list_limit별 쓰기 처리량, pending list 크기, 지연 스파이크
+- advisor: 상위 쿼리의 후보 인덱스를 DB 복제본에서 만들어 보고 순이득으로 추천
+- indexdup: 중복/앞부분 겹침/INCLUDE/부분 인덱스 검사와 DROP 전후 INSERT 행당 쓰기 비용
+- hottune: fillfactor별 UPDATE 부하에서 HOT 비율, 테이블/인덱스 증가, 처리량 비교와 fillfactor 추천
+"""
@@ -0,0 +1,128 @@
+"""
+인덱스 추천 도구
+================
+
+common.advisor로 pg_stat_statements 상위 쿼리에서 후보 인덱스를 뽑고,
+DB 복제본(mvcc_lab_advisor)에서 후보마다 인덱스를 만들어 다시 측정해
+읽기 이득과 쓰기 비용을 비교합니다. 원본 DB에는 아무것도 만들지 않습니다.
+
+- 워크로드: pg_stat_statements의 실행 시간 합계 상위 --top개 SELECT
+  ($n으로 정규화된 쿼리는 bench 카탈로그나 --queries 파일에서 queryid가 같은 SQL로 실행)
+- 후보: Seq Scan Filter의 등호/범위 컬럼, Sort Key (기존 인덱스의 앞부분과 같으면 제외)
+- 후보마다: 크기, 생성 시간, 쿼리별 중앙값 변화(95% 신뢰구간), INSERT 행당 추가 시간
+- 순이득 = Σ 호출 수 × 줄어든 ms - 쓰인 행 수 × 행당 추가 ms (원본 DB 누적 통계 기준)
+
+복제(CREATE DATABASE ... TEMPLATE)는 원본에 다른 세션이 있으면 실패하므로
+--force로 세션을 끊거나 --template으로 스냅샷 DB(python main.py snapshot create)를 복제합니다.
+
+실행 방법:
+    python main.py advisor
+    python main.py advisor --top 20 --force
+    python main.py advisor --template mvcc_lab__snap_base --queries my_queries.sql
+"""
+
+import argparse
+import sys
+
+from tabulate import tabulate
+
+from common import advisor, db, reset
+from common.db import get_connection
+from tools.bench import CATALOGUE
+
+
+def load_queries(path):
+    """';'로 구분된 SQL 파일 → {'파일:번호': SQL}"""
+    with open(path, encoding='utf-8') as f:
+        parts = [part.strip() for part in f.read().split(';')]
+    return {f"{path}:{n}": part for n, part in enumerate((p for p in parts if p), 1)}
+
+
+def print_workload(workload, skipped):
+    print(tabulate(
+        [(stmt.label, f"{stmt.calls:,}", f"{stmt.mean_ms:.2f}", f"{stmt.total_ms:,.0f}") for stmt in workload],
+        headers=['쿼리', '호출', '평균 ms', '합계 ms'], tablefmt='psql'))
+    if skipped:
+        print(f"실행할 SQL을 찾지 못해 건너뛴 상위 쿼리 {len(skipped)}개 (--queries로 상수를 채운 SQL 제공):")
+        for text in skipped[:5]:
+            print(f"  {text[:100]}")
+
+
+def print_results(results):
+    if not results:
+        print("\n후보 인덱스가 없습니다 (Seq Scan Filter / Sort가 없거나 이미 인덱스가 있음).")
+        return
+    rows = []
+    for r in results:
+        queries = r['queries']
+        rows.append((
+            repr(r['candidate']), f"{r['size_bytes'] / 1024:,.0f}", f"{r['build_ms']:,.0f}",
+            f"{sum(q['used'] for q in queries)}/{len(queries)}", f"{r['read_gain_ms']:,.1f}",
+            '-' if r['write_us_per_row'] is None else f"{r['write_us_per_row']:.1f}",
+            f"{r['rows_written']:,}", f"{r['write_cost_ms']:,.1f}", f"{r['net_ms']:,.1f}",
+            advisor.verdict(r),
+        ))
+    print(tabulate(rows, headers=['후보', '크기 KB', '생성 ms', '사용/쿼리', '읽기 이득 ms',
+                                  '쓰기 µs/행', '쓰인 행', '쓰기 비용 ms', '순이득 ms', '판정'],
+                   tablefmt='psql'))
+    print("읽기 이득 = Σ 호출 수 × 줄어든 중앙값 (유의한 차이만), 쓰기 비용 = 쓰인 행 × 행당 추가 시간")
+    print("쓰기 µs/행이 '-'면 INSERT 탐침이 실패한 것 (UNIQUE 제약 등)")
+
+    for r in results:
+        if advisor.verdict(r) != '추천':
+            continue
+        candidate = r['candidate']
+        print(f"\n[추천] CREATE INDEX ON {candidate.table} ({', '.join(candidate.columns)});")
+        for q in r['queries']:
+            mark = '사용' if q['used'] else '미사용'
+            print(f"  {q['statement'].label} ({mark}): {q['base'].median:.2f} → {q['current'].median:.2f}ms, "
+                  f"{q['comparison'].text()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py advisor',
+                                     description='pg_stat_statements 상위 쿼리로 후보 인덱스를 복제 DB에서 측정')
+    parser.add_argument('--top', type=int, default=advisor.TOP, help=f'워크로드 쿼리 수 (기본 {advisor.TOP})')
+    parser.add_argument('--queries', help="실행할 SQL 파일 (';'로 구분, bench 카탈로그에 추가)")
+    parser.add_argument('--scratch', help='복제본 DB 이름 (기본: <DB>_advisor)')
+    parser.add_argument('--template', help='복제할 DB (기본: 현재 DB, 예: mvcc_lab__snap_base)')
+    parser.add_argument('--force', action='store_true', help='복제 전에 원본 DB의 다른 세션 종료')
+    parser.add_argument('--keep', action='store_true', help='끝난 뒤 복제본을 남김')
+    parser.add_argument('--probe-rows', type=int, default=advisor.PROBE_ROWS,
+                        help=f'쓰기 비용 탐침 INSERT 행 수 (기본 {advisor.PROBE_ROWS})')
+    parser.add_argument('--max-seconds', type=float, default=5.0, help='측정 하나의 최대 시간 (기본 5)')
+    args = parser.parse_args(argv)
+
+    known = dict(CATALOGUE)
+    if args.queries:
+        known.update(load_queries(args.queries))
+
+    database = db.DB_CONFIG['database']
+    conn = get_connection(autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            workload, skipped = advisor.load_workload(cur, known, args.top)
+    finally:
+        conn.close()
+    print(f"\n[워크로드: {database}의 pg_stat_statements 상위 {len(workload)}개]")
+    print_workload(workload, skipped)
+
+    scratch = args.scratch or f"{database}_advisor"
+    print(f"\n복제본 {scratch} 생성 (TEMPLATE {args.template or database})")
+    with reset.scratch_database(scratch, source=args.template, keep=args.keep, force=args.force):
+        source = db.connect_admin(database)
+        try:
+            with source.cursor() as source_cur:
+                results = advisor.evaluate(workload, source_cur, args.probe_rows,
+                                           on_progress=lambda message: print(f"  {message}"),
+                                           max_seconds=args.max_seconds)
+        finally:
+            source.close()
+
+    print()
+    print_results(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
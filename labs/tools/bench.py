@@ -0,0 +1,337 @@
+"""
+실행 계획 회귀 벤치마크
+=======================
+
+lab08/lab09의 쿼리를 하나의 워크로드로 보고, 쿼리마다
+워밍업 후 여러 번 EXPLAIN (ANALYZE, TIMING OFF)로 실행해 계획 모양과 실행 시간을 기록합니다.
+
+- 첫 실행(또는 --save-baseline)은 결과를 기준선(labs/results/bench/baseline.json)으로 저장
+- 이후 실행은 기준선과 비교해서
+    * plan_changed: 계획 모양(노드 종류/테이블/인덱스)이 달라짐
+    * slower:       중앙값 비율의 95% 신뢰구간 하한이 1 + threshold보다 큼
+    * faster:       신뢰구간 상한이 1 / (1 + threshold)보다 작음
+- 모든 실행은 labs/results/bench/history.jsonl에 추가
+- --cache warm/cold로 측정 전 캐시 상태를 고정 (common.cache), 기준선은 모드별로 따로 저장
+
+설정(work_mem, random_page_cost 등)이나 데이터를 바꾼 뒤 실행하면
+플래너가 다른 계획을 고르거나 느려진 쿼리를 바로 찾을 수 있습니다.
+
+실행 방법:
+    python main.py bench --save-baseline       # 기준선 저장
+    python main.py bench                       # 기준선과 비교
+    python main.py bench -k lab09 --samples 30
+    python main.py bench --cache cold --samples 5   # 매 측정 전 캐시 비우기
+    python main.py bench --list
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from tabulate import tabulate
+
+from common import cache, stats, timing
+from common.db import get_pool
+from common.plans import explain
+
+BENCH_DIR = os.path.join(timing.RESULTS_DIR, 'bench')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+HISTORY_PATH = os.path.join(BENCH_DIR, 'history.jsonl')
+
+WARMUP = 3
+SAMPLES = 15
+THRESHOLD = 0.10
+
+# 이름 → SQL (lab 시나리오에서 실행하는 쿼리)
+CATALOGUE = {
+    # lab08 시나리오 1: B-tree
+    'lab08.btree.range_30d': """
+        SELECT COUNT(*), MIN(order_date), MAX(order_date)
+        FROM orders
+        WHERE order_date BETWEEN CURRENT_DATE - 30 AND CURRENT_DATE
+    """,
+    'lab08.btree.leading_column': """
+        SELECT id, customer_id, status, order_date
+        FROM orders WHERE customer_id = 100 LIMIT 5
+    """,
+    'lab08.btree.skip_leading_column': """
+        SELECT id, customer_id, status, order_date
+        FROM orders WHERE status = 'pending' LIMIT 5
+    """,
+    'lab08.btree.order_by_desc': """
+        SELECT id, order_date, total_amount
+        FROM orders ORDER BY order_date DESC LIMIT 10
+    """,
+    # lab08 시나리오 2, 3: GIN
+    'lab08.gin.jsonb_contains': """
+        SELECT id, name, attributes->>'brand' as brand
+        FROM products_json WHERE attributes @> '{"brand": "TechCo"}' LIMIT 5
+    """,
+    'lab08.gin.jsonb_exists': """
+        SELECT id, name, attributes FROM products_json WHERE attributes ? 'specs' LIMIT 5
+    """,
+    'lab08.gin.array_contains': """
+        SELECT id, name, tags FROM products_json WHERE tags @> ARRAY['electronics'] LIMIT 5
+    """,
+    'lab08.gin.array_overlap': """
+        SELECT id, name, tags FROM products_json WHERE tags && ARRAY['gaming', 'portable'] LIMIT 5
+    """,
+    'lab08.gin.trgm_ilike': """
+        SELECT id, name FROM products_json WHERE name ILIKE '%pro%' LIMIT 5
+    """,
+    # lab08 시나리오 4: BRIN
+    'lab08.brin.time_range': """
+        SELECT COUNT(*), AVG(reading)
+        FROM sensor_data
+        WHERE recorded_at BETWEEN '2024-01-01' AND '2024-01-10'
+    """,
+    'lab08.brin.unsorted_column': """
+        SELECT COUNT(*) FROM sensor_data WHERE sensor_id = 50
+    """,
+    # lab09 시나리오 2: 스캔 방식
+    'lab09.scan.low_selectivity': """
+        SELECT * FROM orders WHERE customer_id = 100
+    """,
+    'lab09.scan.mid_selectivity': """
+        SELECT * FROM orders WHERE customer_id BETWEEN 100 AND 500
+    """,
+    'lab09.scan.high_selectivity': """
+        SELECT * FROM orders WHERE customer_id < 5000
+    """,
+    'lab09.scan.bitmap_or': """
+        SELECT COUNT(*) FROM orders WHERE customer_id = 100 OR status = 'pending'
+    """,
+    # lab09 시나리오 3: Index-Only Scan
+    'lab09.index_only.customer_range': """
+        SELECT customer_id, total_amount, status
+        FROM orders WHERE customer_id BETWEEN 100 AND 200
+    """,
+    # lab09 시나리오 4: Covering Index
+    'lab09.covering.customer_status': """
+        SELECT customer_id, order_date, total_amount
+        FROM orders WHERE customer_id = 500 AND status = 'confirmed'
+    """,
+    # lab09 시나리오 5: Partial Index
+    'lab09.partial.pending_30d': """
+        SELECT id, order_date, total_amount
+        FROM orders WHERE status = 'pending' AND order_date > CURRENT_DATE - 30
+    """,
+    'lab09.partial.confirmed_30d': """
+        SELECT id, order_date, total_amount
+        FROM orders WHERE status = 'confirmed' AND order_date > CURRENT_DATE - 30
+    """,
+}
+
+
+def measure(query, warmup=WARMUP, samples=SAMPLES, cache_mode='asis', method='filler'):
+    """
+    워밍업 후 samples번 실행해 실행 시간(ms) 목록, 마지막 계획, 캐시 태그를 반환
+
+    노드별 시간 측정 오버헤드를 없애기 위해 TIMING OFF로 실행합니다.
+    cold 모드는 표본마다 캐시를 비우므로 워밍업을 하지 않고,
+    서버를 재시작할 수도 있어서 표본마다 풀에서 연결을 새로 빌립니다.
+    """
+    def run(**options):
+        with get_pool().connection(autocommit=True) as conn, conn.cursor() as cur:
+            return explain(cur, query, timing=False, wal=False, **options)
+
+    plan = run(settings=False)
+    control = cache.CacheControl(cache.plan_relations(plan), method=method)
+    tag = control.prepare(cache_mode) if cache_mode != 'cold' else None
+    if cache_mode != 'cold':
+        for _ in range(warmup):
+            run(settings=False)
+    times = []
+    for _ in range(samples):
+        if cache_mode == 'cold':
+            tag = control.prepare('cold')
+        plan = run()
+        times.append(plan.execution_ms)
+    return times, plan, tag
+
+
+def _normalize(shape):
+    """튜플로 된 plan.shape()를 JSON에 저장한 모양(리스트)과 비교할 수 있게 변환"""
+    return json.loads(json.dumps(shape))
+
+
+def run_query(name, query, warmup=WARMUP, samples=SAMPLES, cache_mode='asis', method='filler'):
+    times, plan, tag = measure(query, warmup, samples, cache_mode, method)
+    return {
+        'name': name,
+        'ts': time.time(),
+        'cache': tag,
+        'samples_ms': times,
+        'median_ms': stats.median(times),
+        'shape': _normalize(plan.shape()),
+        'plan_text': str(plan),
+        'settings': plan.settings,
+        'buffers': plan.root.buffers.to_dict(),
+    }
+
+
+def compare(base, current, threshold=THRESHOLD):
+    """기준선 대비 상태와 (비율, 하한, 상한)을 반환"""
+    if base is None:
+        return 'new', None
+    ci = stats.bootstrap_ratio_ci(base['samples_ms'], current['samples_ms'])
+    if base['shape'] != current['shape']:
+        return 'plan_changed', ci
+    _, lo, hi = ci
+    if lo > 1 + threshold:
+        return 'slower', ci
+    if hi < 1 / (1 + threshold):
+        return 'faster', ci
+    return 'ok', ci
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+
+
+def append_history(records, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def _shape_lines(shape, depth=0):
+    label, children = shape
+    lines = ['  ' * depth + label]
+    for child in children:
+        lines.extend(_shape_lines(child, depth + 1))
+    return lines
+
+
+def print_plan_change(name, base, current):
+    print(f"\n[{name}] 계획 변경")
+    print("  기준선:")
+    for line in _shape_lines(base['shape']):
+        print(f"    {line}")
+    print("  현재:")
+    for line in _shape_lines(current['shape']):
+        print(f"    {line}")
+    changed = {k: (base['settings'].get(k), v) for k, v in current['settings'].items()
+               if base['settings'].get(k) != v}
+    changed.update({k: (v, None) for k, v in base['settings'].items()
+                    if k not in current['settings']})
+    for key, (old, new) in changed.items():
+        print(f"  설정 {key}: {old} → {new}")
+
+
+def baseline_key(name, cache_mode='asis'):
+    """캐시 모드별로 기준선을 따로 둠 (asis는 기존 키 그대로)"""
+    return name if cache_mode == 'asis' else f"{name}@{cache_mode}"
+
+
+def run_suite(names, warmup=WARMUP, samples=SAMPLES, threshold=THRESHOLD,
+              baseline_path=BASELINE_PATH, update_baseline=False, cache_mode='asis',
+              method='filler'):
+    """
+    카탈로그 쿼리를 측정해 기준선과 비교하고 (결과 목록, 비교에 쓴 기준선)을 반환
+
+    기준선에 없는 쿼리는 이번 결과가 기준선이 되고,
+    update_baseline=True면 측정한 모든 쿼리의 기준선을 교체합니다.
+    """
+    baseline = load_baseline(baseline_path)
+    results = []
+    for name in names:
+        print(f"  {name} ...", end='', flush=True)
+        current = run_query(name, CATALOGUE[name], warmup, samples, cache_mode, method)
+        current['key'] = baseline_key(name, cache_mode)
+        current['status'], current['ratio_ci'] = compare(baseline.get(current['key']), current,
+                                                         threshold)
+        results.append(current)
+        print(f" {current['median_ms']:.3f}ms ({current['status']}, cache={current['cache']})")
+
+    append_history(results)
+
+    updated = dict(baseline)
+    for r in results:
+        if update_baseline or r['key'] not in updated:
+            updated[r['key']] = {k: v for k, v in r.items() if k not in ('status', 'ratio_ci')}
+    if updated != baseline:
+        save_baseline(updated, baseline_path)
+        print(f"\n기준선 저장: {baseline_path}")
+    return results, baseline
+
+
+def print_report(results, baseline):
+    rows = []
+    for r in results:
+        base = baseline.get(r['key'])
+        ci = r['ratio_ci']
+        rows.append((
+            r['name'],
+            _shape_lines(r['shape'])[0] if r['shape'] else '',
+            f"{r['median_ms']:.3f}",
+            f"{base['median_ms']:.3f}" if base and r['status'] != 'new' else '-',
+            f"{ci[0]:.2f}x [{ci[1]:.2f}, {ci[2]:.2f}]" if ci else '-',
+            r['status'],
+        ))
+    print(tabulate(rows, headers=['쿼리', '최상위 노드', '중앙값 ms', '기준선 ms',
+                                  '비율 (95% CI)', '상태'], tablefmt='psql'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py bench',
+                                     description='lab08/lab09 쿼리의 계획/실행 시간을 기준선과 비교합니다.')
+    parser.add_argument('-k', '--filter', help='쿼리 이름에 포함될 부분 문자열')
+    parser.add_argument('--warmup', type=int, default=WARMUP, help=f'워밍업 횟수 (기본 {WARMUP})')
+    parser.add_argument('--samples', type=int, default=SAMPLES, help=f'측정 횟수 (기본 {SAMPLES})')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'느려짐/빨라짐으로 볼 최소 비율 변화 (기본 {THRESHOLD})')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='기준선 파일 경로')
+    parser.add_argument('--save-baseline', action='store_true', help='이번 결과로 기준선 교체')
+    parser.add_argument('--cache', choices=cache.MODES, default='asis',
+                        help='측정 전 캐시 상태: asis(그대로), warm(pg_prewarm), cold(매번 비움)')
+    parser.add_argument('--evict', choices=cache.EVICT_METHODS, default='filler',
+                        help='cold 모드에서 캐시를 비우는 방법 (기본 filler, restart는 서버를 재시작해 '
+                             '다른 세션이 모두 끊김)')
+    parser.add_argument('--list', action='store_true', help='카탈로그 쿼리 이름만 출력')
+    args = parser.parse_args(argv)
+
+    names = [name for name in CATALOGUE if not args.filter or args.filter in name]
+    if args.list:
+        for name in names:
+            print(name)
+        return 0
+    if not names:
+        print("실행할 쿼리가 없습니다.")
+        return 1
+
+    print(f"쿼리 {len(names)}개 측정 (워밍업 {args.warmup}회, 측정 {args.samples}회, "
+          f"캐시 {args.cache})\n")
+    results, baseline = run_suite(
+        names, warmup=args.warmup, samples=args.samples, threshold=args.threshold,
+        baseline_path=args.baseline, update_baseline=args.save_baseline,
+        cache_mode=args.cache, method=args.evict)
+
+    print()
+    print_report(results, baseline)
+    for r in results:
+        if r['status'] == 'plan_changed':
+            print_plan_change(r['name'], baseline[r['key']], r)
+
+    regressions = [r['name'] for r in results if r['status'] in ('plan_changed', 'slower')]
+    if regressions:
+        print(f"\n회귀 의심 {len(regressions)}개: {', '.join(regressions)}")
+        return 1
+    print("\n회귀 없음")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
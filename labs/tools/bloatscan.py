@@ -0,0 +1,160 @@
+"""
+dead tuple / bloat 스캐너
+=========================
+
+lab05 시나리오 1은 vacuum_test의 페이지 0만 봅니다. 이 도구는 common.bloat로
+테이블의 모든 페이지를 워커 프로세스들이 나눠 스캔하고, dead tuple과 빈 공간이
+어느 페이지 구간에 몰려 있는지 보여줍니다.
+
+- 진행률: batch가 끝날 때마다 페이지 수와 MB/s
+- 라인 포인터 분류 합계 (live / dead / redirect / unused)와 n_dead_tup 비교
+- 히트맵: 페이지 순서대로 칸을 나눠 dead 비율(또는 빈 공간 비율)을 문자 농도로 표시
+- 빈 공간 히스토그램: 페이지별 pd_upper - pd_lower 분포 (512B 구간)
+- --png: labs/graphs/bloat_<테이블>.png로 히트맵과 히스토그램 저장
+
+실행 방법:
+    python main.py bloatscan vacuum_test
+    python main.py bloatscan orders -w 8 --png
+    python main.py bloatscan orders --value free_ratio --cols 100 --rows 40
+"""
+
+import argparse
+import math
+import sys
+import time
+
+from tabulate import tabulate
+
+from common import bloat, charts, heappage
+from common.db import get_connection
+
+SHADES = ' ░▒▓█'
+COLS = 64
+ROWS = 32
+
+
+def progress(started):
+    def report(done, total):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        mb = done * heappage.BLOCK_SIZE / 1024 / 1024
+        print(f"\r  {done:,}/{total:,} 페이지 ({100 * done / max(total, 1):.0f}%, {mb / elapsed:.1f}MB/s)",
+              end='', flush=True)
+    return report
+
+
+def table_stats(relation):
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT n_live_tup, n_dead_tup, last_vacuum, last_autovacuum
+            FROM pg_stat_user_tables WHERE relid = %s::regclass
+        """, (relation,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def print_totals(result, elapsed):
+    t = result.totals()
+    lp = sum(t[name] for name in bloat.CLASSES) or 1
+    mb = t['pages'] * heappage.BLOCK_SIZE / 1024 / 1024
+    print(f"\n{result.relation}: {t['pages']:,} 페이지 ({mb:,.1f}MB), {elapsed:.2f}초")
+    print(tabulate([(name, t[name], f"{100 * t[name] / lp:.1f}") for name in bloat.CLASSES],
+                   headers=['라인 포인터', '수', '%'], tablefmt='psql'))
+    size = t['pages'] * heappage.BLOCK_SIZE or 1
+    print(f"튜플 바이트 {t['tuple_bytes'] / 1024:,.0f}KB ({100 * t['tuple_bytes'] / size:.1f}%), "
+          f"빈 공간 {t['free_bytes'] / 1024:,.0f}KB ({100 * t['free_bytes'] / size:.1f}%), "
+          f"초기화 안 된 페이지 {t['new_pages']}개")
+
+    stats = table_stats(result.relation)
+    if stats:
+        print(f"pg_stat_user_tables: n_live_tup {stats[0]:,}, n_dead_tup {stats[1]:,} "
+              f"(last_vacuum {stats[2]}, last_autovacuum {stats[3]})")
+
+
+def _shade(value):
+    """0 → '·', (0, 1] → 농도 문자, 페이지 없음 → 공백"""
+    if value is None:
+        return ' '
+    if value == 0:
+        return '·'
+    return SHADES[min(len(SHADES) - 1, math.ceil(value * (len(SHADES) - 1)))]
+
+
+def print_heatmap(result, cols=COLS, rows=ROWS, value='dead_ratio'):
+    grid, per_cell = result.heatmap(cols, rows, value)
+    title = 'dead / (live + dead)' if value == 'dead_ratio' else '빈 공간 / 페이지'
+    print(f"\n[히트맵: {title}, 한 칸 = {per_cell:,} 페이지, '{SHADES[1:]}' = 낮음→높음]")
+    for r, row in enumerate(grid):
+        line = ''.join(_shade(v) for v in row)
+        print(f"  {r * cols * per_cell:>10,} |{line}|")
+
+    hot = result.hottest_ranges(span=max(per_cell * cols // 4, 1))
+    if hot and value == 'dead_ratio':
+        print("\n[dead 비율이 높은 구간]")
+        print(tabulate([(f"{a:,}~{b:,}", dead, f"{100 * ratio:.1f}") for a, b, dead, ratio in hot],
+                       headers=['페이지', 'dead', 'dead %'], tablefmt='psql'))
+
+
+def print_histogram(result, width=50):
+    hist = result.free_space_histogram()
+    peak = max((n for _, n in hist), default=0) or 1
+    print("\n[페이지별 빈 공간 분포]")
+    for start, n in hist:
+        print(f"  {start:>5}~{start + bloat.FREE_SPACE_BIN - 1:<5}B {n:>10,} {'█' * round(width * n / peak)}")
+
+
+def save_png(result, cols=COLS, rows=ROWS, path=None):
+    plt = charts.pyplot()
+
+    grid, per_cell = result.heatmap(cols, rows)
+    data = [[float('nan') if v is None else v for v in row] for row in grid]
+    hist = result.free_space_histogram()
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5), gridspec_kw={'width_ratios': [3, 2]})
+    image = ax1.imshow(data, aspect='auto', cmap='Reds', vmin=0, vmax=1, interpolation='nearest')
+    ax1.set_title(f"{result.relation}: dead ratio ({per_cell:,} pages / cell)")
+    ax1.set_xlabel('page (within row)')
+    ax1.set_ylabel(f"row (x {cols * per_cell:,} pages)")
+    fig.colorbar(image, ax=ax1)
+
+    ax2.bar([start for start, _ in hist], [n for _, n in hist], width=bloat.FREE_SPACE_BIN * 0.9,
+            align='edge', color='steelblue')
+    ax2.set_title('Free space per page')
+    ax2.set_xlabel('bytes (pd_upper - pd_lower)')
+    ax2.set_ylabel('pages')
+
+    return charts.save(fig, f"bloat_{result.relation.replace('.', '_')}.png", path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py bloatscan',
+                                     description='테이블 전체 페이지를 병렬 스캔해 dead tuple/빈 공간 분포 표시')
+    parser.add_argument('relation', help='테이블 이름')
+    parser.add_argument('-w', '--workers', type=int, default=bloat.WORKERS,
+                        help=f'워커 프로세스 수 (기본 {bloat.WORKERS})')
+    parser.add_argument('--batch', type=int, default=bloat.BATCH_PAGES,
+                        help=f'워커 작업 하나의 페이지 수 (기본 {bloat.BATCH_PAGES})')
+    parser.add_argument('--value', choices=('dead_ratio', 'free_ratio'), default='dead_ratio',
+                        help='히트맵 값 (기본 dead_ratio)')
+    parser.add_argument('--cols', type=int, default=COLS, help=f'히트맵 열 수 (기본 {COLS})')
+    parser.add_argument('--rows', type=int, default=ROWS, help=f'히트맵 최대 행 수 (기본 {ROWS})')
+    parser.add_argument('--png', action='store_true', help='labs/graphs/bloat_<테이블>.png 저장')
+    args = parser.parse_args(argv)
+
+    print(f"{args.relation} 스캔 (워커 {args.workers}개, batch {args.batch} 페이지)")
+    started = time.perf_counter()
+    result = bloat.scan(args.relation, args.workers, args.batch, on_progress=progress(started))
+    print()
+    print_totals(result, time.perf_counter() - started)
+    print_heatmap(result, args.cols, args.rows, args.value)
+    print_histogram(result)
+    if args.png:
+        print(f"\n[Graph Saved] {save_png(result, args.cols, args.rows)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+B-tree 구조 스캐너
+==================
+
+common.btree로 인덱스 전체를 root부터 리프까지 읽어 상태를 요약합니다.
+lab07 시나리오 5처럼 페이지 하나를 보는 대신, 큰 인덱스도 몇 초 안에 전체를 봅니다.
+
+- 레벨별: 페이지 수, 항목 수, fanout (평균/최소/최대), 평균 채움률, dead 항목
+- 리프 채움률 분포 (기본 fillfactor 90이면 새로 만든 인덱스는 90% 근처에 몰림)
+- posting list 중복 제거로 아낀 바이트 (PG13+ deduplicate_items)
+- LP_DEAD 항목과 BTP_HAS_GARBAGE 페이지
+- 분할 흔적이 많은 키 구간 (반만 찬 리프, 블록 순서가 어긋난 리프)
+
+실행 방법:
+    python main.py btreescan idx_mvcc_indexed
+    python main.py btreescan idx_orders_covering -w 8
+"""
+
+import argparse
+import sys
+import time
+
+from tabulate import tabulate
+
+from common import btree
+
+
+def print_walk(walk, elapsed):
+    meta = walk.meta
+    print(f"\n{walk.index}: 전체 {walk.total_pages:,} 페이지, 탐색 {walk.walked_pages:,} 페이지, "
+          f"{elapsed:.2f}초")
+    print(f"메타: version {meta.version}, root {meta.root} (level {meta.level}), "
+          f"fastroot {meta.fastroot} (level {meta.fastlevel}), "
+          f"트리에 없는 페이지 {walk.unreachable_pages:,}개 (삭제/재사용 대기)")
+
+    print("\n[레벨별]")
+    print(tabulate(
+        [(level, pages, items, '-' if avg is None else f"{avg:.1f}", lo if lo is not None else '-',
+          hi if hi is not None else '-', f"{fill:.1f}", dead)
+         for level, pages, items, avg, lo, hi, fill, dead in walk.level_stats()],
+        headers=['레벨', '페이지', '항목', 'fanout 평균', '최소', '최대', '채움 %', 'dead'],
+        tablefmt='psql'))
+
+    hist = walk.fill_histogram()
+    peak = max((n for _, n in hist), default=0) or 1
+    print("\n[리프 채움률 분포]")
+    for start, n in hist:
+        print(f"  {start:>3}~{start + 9:>3}% {n:>10,} {'█' * round(40 * n / peak)}")
+
+    d = walk.dedup()
+    print(f"\n[중복 제거] heap TID {d['heap_tids']:,}개 / 리프 항목 {d['leaf_items']:,}개, "
+          f"posting 튜플 {d['posting_tuples']:,}개, "
+          f"절약 {d['saved_bytes'] / 1024:,.0f}KB ({d['saved_pct']:.1f}%)")
+
+    dead = walk.dead_items()
+    print(f"[dead 항목] {dead['dead_items']:,}개 (리프 {dead['pages_with_dead']:,}개, "
+          f"BTP_HAS_GARBAGE {dead['has_garbage']:,}개)")
+    if walk.link_mismatches:
+        print(f"[주의] 리프 오른쪽 링크 불일치 {walk.link_mismatches}곳 (탐색 중 분할 또는 미완료 분할)")
+
+    hot = walk.hotspots()
+    if hot:
+        print(f"\n[분할 흔적이 많은 키 구간] (리프를 키 순서로 {btree.HOTSPOT_BUCKETS}등분)")
+        print(tabulate(
+            [(f"{a:,}~{b:,}", blkno, f"{fill:.1f}", f"{half:.1f}", f"{jumps:.1f}")
+             for a, b, blkno, fill, half, jumps in hot],
+            headers=['리프 순번', '첫 blkno', '평균 채움 %', f'<{btree.HALF_FULL:.0%} 리프 %', '순서 어긋남 %'],
+            tablefmt='psql'))
+        print(f"키 확인: SELECT * FROM bt_page_items('{walk.index}', <첫 blkno>) LIMIT 5;")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py btreescan',
+                                     description='B-tree 인덱스 전체를 탐색해 레벨/채움률/중복 제거/분할 구간 요약')
+    parser.add_argument('index', help='인덱스 이름')
+    parser.add_argument('-w', '--workers', type=int, default=btree.WORKERS,
+                        help=f'워커 프로세스 수 (기본 {btree.WORKERS})')
+    parser.add_argument('--batch', type=int, default=btree.BATCH_PAGES,
+                        help=f'워커 작업 하나의 페이지 수 (기본 {btree.BATCH_PAGES})')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    walk = btree.walk_index(args.index, args.workers, args.batch,
+                            on_level=lambda level, pages: print(f"  level {level}: {pages:,} 페이지"))
+    print_walk(walk, time.perf_counter() - started)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+실시간 성능 대시보드
+====================
+
+lab10 시나리오 5의 대시보드는 한 번 조회해서 PNG 한 장을 저장합니다.
+이 도구는 통계 뷰를 interval초마다 읽어 같은 figure를 계속 갱신합니다.
+
+- 샘플링: pg_stat_database / pg_stat_user_tables / pg_statio_user_tables /
+          pg_stat_user_indexes를 쿼리 한 번으로 읽음 (common.monitor)
+- 비율/히트율: 최근 --window초 롤링 윈도우 기준 (tick 하나의 잡음을 줄임)
+- 그리기: 축/눈금/범례는 처음 한 번만 그리고, 매 tick에는 바뀐 선과 막대만
+          blit으로 다시 그림. y축 범위를 넘거나 상위 목록이 바뀔 때만 전체를 다시 그림
+- 화면이 없으면 (또는 --png) Agg로 그려서 --save-every초마다 PNG로 저장
+
+실행 방법:
+    python main.py dashboard                       # 1초 간격, 창으로 표시
+    python main.py dashboard -i 0.5 --window 10 --span 600
+    python main.py dashboard --png -d 120          # 화면 없이 2분 동안, PNG로 저장
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from common.db import get_connection
+from common import charts, monitor
+
+INTERVAL = 1.0       # 샘플 간격(초)
+WINDOW = 5.0         # 비율 계산 롤링 윈도우(초)
+SPAN = 300.0         # 차트에 보이는 시간 범위(초)
+SAVE_EVERY = 10.0    # PNG 모드 저장 간격(초)
+TOP_N = 5
+GRAPH_FILE = 'performance_dashboard_live.png'     # labs/graphs/ 아래
+
+# 패널 → [(지표 키, 범례)]
+LINE_PANELS = [
+    ('Transactions / s', [('commit_s', 'commit'), ('rollback_s', 'rollback')]),
+    ('Cache Hit % (rolling)', [('db_hit_pct', 'database'), ('heap_hit_pct', 'heap'),
+                               ('idx_hit_pct', 'index')]),
+    ('Tuples / s', [('returned_s', 'returned'), ('fetched_s', 'fetched'),
+                    ('inserted_s', 'inserted'), ('updated_s', 'updated'),
+                    ('deleted_s', 'deleted')]),
+    ('Scans / s (user tables)', [('seq_scan_s', 'seq scan'), ('idx_scan_s', 'index scan')]),
+]
+
+
+def has_display():
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')
+                or sys.platform in ('darwin', 'win32'))
+
+
+class LiveDashboard:
+    """figure 하나를 만들어 두고 tick마다 바뀐 artist만 다시 그림"""
+
+    def __init__(self, span=SPAN, interval=INTERVAL):
+        import matplotlib.pyplot as plt
+
+        self.plt = plt
+        self.span = span
+        self.history = deque(maxlen=int(span / interval) + 2)
+        self.fig = plt.figure(figsize=(16, 10))
+        self.fig.suptitle('PostgreSQL Live Dashboard', fontsize=14, fontweight='bold')
+        self.canvas = self.fig.canvas
+        self.blit = self.canvas.supports_blit and plt.get_backend().lower() != 'agg'
+        self.closed = False
+        self.canvas.mpl_connect('close_event', self._on_close)
+
+        self.lines = []      # (ax, [(키, Line2D)])
+        for i, (title, series) in enumerate(LINE_PANELS):
+            ax = self.fig.add_subplot(3, 2, i + 1)
+            ax.set_title(title, fontweight='bold')
+            ax.set_xlim(-span, 0)
+            ax.set_ylim(0, 100 if 'Hit' in title else 1)
+            ax.set_xlabel('seconds ago')
+            ax.grid(alpha=0.3)
+            artists = [(key, ax.plot([], [], label=label, animated=self.blit)[0])
+                       for key, label in series]
+            ax.legend(loc='upper left', fontsize=8)
+            self.lines.append((ax, artists))
+
+        self.bars = []       # [ax, 지표 키, 막대 길이로 쓸 값 인덱스, 막대, 현재 라벨 목록]
+        for i, (key, index, title) in enumerate([
+            ('top_indexes', 1, f'Top {TOP_N} Index Scans / s'),
+            ('top_dead', 1, f'Top {TOP_N} Dead Tuples'),
+        ]):
+            ax = self.fig.add_subplot(3, 2, 5 + i)
+            ax.set_title(title, fontweight='bold')
+            rects = ax.barh(range(TOP_N), [0] * TOP_N, color='#3498db', edgecolor='black',
+                            animated=self.blit)
+            ax.invert_yaxis()
+            ax.set_xlim(0, 1)
+            self.bars.append([ax, key, index, rects, None])
+
+        # 상태 줄은 첫 패널 안에 두어야 그 축의 배경 복원으로 함께 지워짐
+        first_ax = self.lines[0][0]
+        self.status = first_ax.text(0.99, 0.95, '', transform=first_ax.transAxes, ha='right',
+                                    va='top', fontsize=8, animated=self.blit)
+        self.lines[0][1].append(('status', self.status))
+        self.fig.tight_layout(rect=[0, 0, 1, 0.96])
+        self.backgrounds = None
+        if self.blit:
+            plt.show(block=False)
+            self._full_redraw()
+
+    def _on_close(self, event):
+        self.closed = True
+
+    # 그리기 ----------------------------------------------------------
+
+    def _animated(self):
+        for ax, artists in self.lines:
+            yield ax, [line for _, line in artists]
+        for ax, _, _, rects, _ in self.bars:
+            yield ax, list(rects)
+
+    def _full_redraw(self):
+        """축/눈금이 바뀌었을 때: 배경을 다시 그리고 저장"""
+        self.canvas.draw()
+        self.backgrounds = [self.canvas.copy_from_bbox(ax.bbox) for ax, _ in self._animated()]
+        self._blit_all()
+
+    def _blit_all(self):
+        for (ax, artists), background in zip(self._animated(), self.backgrounds):
+            self.canvas.restore_region(background)
+            for artist in artists:
+                ax.draw_artist(artist)
+            self.canvas.blit(ax.bbox)
+        self.canvas.flush_events()
+
+    def update(self, m):
+        """지표 dict 하나를 반영 (축 범위/라벨이 바뀌면 True)"""
+        self.history.append(m)
+        now = m['ts']
+        xs = [h['ts'] - now for h in self.history]
+        relayout = False
+
+        for ax, artists in self.lines:
+            top = ax.get_ylim()[1]
+            peak = 0
+            for key, line in artists:
+                if key == 'status':
+                    continue
+                ys = [h[key] if h[key] is not None else float('nan') for h in self.history]
+                line.set_data(xs, ys)
+                peak = max([peak] + [y for y in ys if y == y])
+            # 범위를 넘을 때만 넉넉히 늘림 (매 tick 축을 다시 그리지 않도록)
+            if 'Hit' not in ax.get_title() and peak > top:
+                ax.set_ylim(0, peak * 1.5)
+                relayout = True
+
+        for bar in self.bars:
+            ax, key, index, rects, names = bar
+            rows = m[key]
+            new_names = [row[0] for row in rows]
+            if new_names != names:
+                ax.set_yticks(range(len(new_names)))
+                ax.set_yticklabels([n[:30] for n in new_names], fontsize=8)
+                bar[4] = new_names
+                relayout = True
+            values = [row[index] for row in rows]
+            for i, rect in enumerate(rects):
+                rect.set_width(values[i] if i < len(values) else 0)
+            peak = max(values, default=0)
+            if peak > ax.get_xlim()[1]:
+                ax.set_xlim(0, peak * 1.5)
+                relayout = True
+
+        stamp = datetime.fromtimestamp(now).strftime('%H:%M:%S')
+        self.status.set_text(f"{stamp}  backends={m['backends']}  "
+                             f"temp={(m['temp_bytes_s'] or 0) / 1024:.0f}kB/s  "
+                             f"deadlocks={m['deadlocks'] or 0}")
+
+        if self.blit:
+            if relayout:
+                self._full_redraw()
+            else:
+                self._blit_all()
+        return relayout
+
+    def wait(self, seconds):
+        """GUI 이벤트를 처리하면서 seconds초 대기"""
+        if seconds <= 0:
+            return
+        if self.blit:
+            self.canvas.start_event_loop(seconds)
+        else:
+            time.sleep(seconds)
+
+    def save(self, path=None):
+        return charts.save(self.fig, GRAPH_FILE, path, dpi=100, close=False)
+
+    def close(self):
+        self.plt.close(self.fig)
+
+
+def format_line(m):
+    def num(value, fmt='{:.1f}'):
+        return '-' if value is None else fmt.format(value)
+    stamp = datetime.fromtimestamp(m['ts']).strftime('%H:%M:%S')
+    return (f"[{stamp}] commit/s={num(m['commit_s'])} rollback/s={num(m['rollback_s'])} "
+            f"hit%={num(m['db_hit_pct'])} heap%={num(m['heap_hit_pct'])} "
+            f"seq/s={num(m['seq_scan_s'])} idx/s={num(m['idx_scan_s'])} "
+            f"ins/s={num(m['inserted_s'])} upd/s={num(m['updated_s'])}")
+
+
+def run(interval=INTERVAL, window=WINDOW, span=SPAN, duration=None, save_every=SAVE_EVERY,
+        quiet=False):
+    """
+    대시보드 루프 (창을 닫거나 Ctrl+C, 또는 duration초가 지나면 종료)
+
+    tick은 시작 시각 기준으로 맞추고, 샘플링/그리기가 interval보다 오래 걸리면
+    밀린 tick을 건너뜁니다. 평균 처리 시간을 반환합니다.
+    """
+    dashboard = LiveDashboard(span=span, interval=interval)
+    rolling = monitor.RollingWindow(window)
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    started = time.monotonic()
+    last_save = started
+    busy, ticks, skipped = 0.0, 0, 0
+    try:
+        while not dashboard.closed and (duration is None or time.monotonic() - started < duration):
+            tick_start = time.monotonic()
+            rolling.add(monitor.sample(cur))
+            m = monitor.metrics(rolling)
+            if m is not None:
+                dashboard.update(m)
+                if not quiet:
+                    print(format_line(m))
+                if not dashboard.blit and tick_start - last_save >= save_every:
+                    dashboard.save()
+                    last_save = tick_start
+            busy += time.monotonic() - tick_start
+            ticks += 1
+
+            next_tick = started + ticks * interval
+            behind = time.monotonic() - next_tick
+            if behind > 0:
+                missed = int(behind // interval) + 1
+                skipped += missed
+                ticks += missed
+                next_tick += missed * interval
+            dashboard.wait(next_tick - time.monotonic())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cur.close()
+        conn.close()
+        if not dashboard.blit:
+            print(f"\n[Graph Saved] {dashboard.save()}")
+        dashboard.close()
+
+    average = busy / max(ticks - skipped, 1)
+    print(f"\ntick당 평균 처리 시간 {average * 1000:.1f}ms (간격 {interval:g}초, 건너뛴 tick {skipped})")
+    return average
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py dashboard',
+                                     description='통계 뷰를 주기적으로 읽어 대시보드를 실시간 갱신합니다.')
+    parser.add_argument('-i', '--interval', type=float, default=INTERVAL,
+                        help=f'샘플 간격 초 (기본 {INTERVAL:g})')
+    parser.add_argument('--window', type=float, default=WINDOW,
+                        help=f'비율/히트율 롤링 윈도우 초 (기본 {WINDOW:g})')
+    parser.add_argument('--span', type=float, default=SPAN,
+                        help=f'차트에 보이는 시간 범위 초 (기본 {SPAN:g})')
+    parser.add_argument('-d', '--duration', type=float, help='실행 시간 초 (기본: 창을 닫을 때까지)')
+    parser.add_argument('--png', action='store_true', help='창 없이 PNG로만 저장')
+    parser.add_argument('--save-every', type=float, default=SAVE_EVERY,
+                        help=f'PNG 모드 저장 간격 초 (기본 {SAVE_EVERY:g})')
+    parser.add_argument('-q', '--quiet', action='store_true', help='tick마다 한 줄 요약을 출력하지 않음')
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    if args.png or not has_display():
+        matplotlib.use('Agg')
+        print(f"PNG 모드: {args.save_every:g}초마다 {os.path.join(charts.GRAPH_DIR, GRAPH_FILE)}에 저장")
+
+    run(interval=args.interval, window=args.window, span=args.span, duration=args.duration,
+        save_every=args.save_every, quiet=args.quiet)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,462 @@
+"""
+COPY 기반 병렬 데이터 생성기
+============================
+
+init.sql의 generate_series INSERT는 크기를 바꿀 수 없습니다.
+이 도구는 scale factor에 맞춰 실습 테이블을 다시 채웁니다.
+
+- 여러 워커 프로세스가 청크 단위로 행을 만들어 COPY FROM STDIN으로 전송
+- binary(기본) 또는 csv 형식
+- seed와 청크 번호로 난수를 정하므로 워커 수와 무관하게 같은 데이터가 생성됨
+- Zipf 분포 skew (sensor_id, customer_id), 시계열 순서 흐트러뜨리기 (BRIN 실험용)
+
+scale=1은 init.sql과 같은 크기입니다.
+
+    테이블            scale=1 행 수
+    sensor_data       100,000
+    orders            100,000
+    products_json     105
+    index_mvcc_test   1,000
+
+실행 방법:
+    python main.py datagen --scale 10                        # 전체 테이블 10배
+    python main.py datagen -t sensor_data --scale 3000 -w 16  # 3억 행
+    python main.py datagen -t orders --skew 1.1 --format csv
+    python main.py datagen -t sensor_data --disorder 0.05     # 5% 행의 시간 순서를 섞음
+"""
+
+import argparse
+import csv
+import datetime
+import functools
+import io
+import json
+import struct
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+from psycopg2 import sql
+
+from common.db import get_connection
+
+CHUNK_ROWS = 100_000
+
+# PostgreSQL 바이너리 COPY 형식
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+COPY_TRAILER = struct.pack('!h', -1)
+PG_EPOCH = datetime.datetime(2000, 1, 1)
+PG_EPOCH_DATE = PG_EPOCH.date()
+TEXT_OID = 25
+
+SENSOR_BASE_TIME = datetime.datetime(2024, 1, 1)
+BRANDS = ['TechCo', 'LogiTech', 'ErgoMax', 'KeyMaster', 'ViewPro']
+CATEGORIES = ['electronics', 'furniture', 'office']
+TIERS = ['premium', 'budget', 'standard']
+STATUSES = ['pending', 'confirmed', 'shipped', 'delivered', 'cancelled']
+
+# init.sql의 고정 상품 (name, attributes, tags, description)
+FEATURED_PRODUCTS = [
+    ('Laptop Pro', {'brand': 'TechCo', 'specs': {'cpu': 'i7', 'ram': 16, 'storage': '512GB'}},
+     ['electronics', 'computer', 'portable'], 'High performance laptop for professionals'),
+    ('Wireless Mouse', {'brand': 'LogiTech', 'specs': {'dpi': 1600, 'buttons': 5}},
+     ['electronics', 'accessory', 'wireless'], 'Ergonomic wireless mouse'),
+    ('Standing Desk', {'brand': 'ErgoMax', 'specs': {'height_adjustable': True, 'width': 120}},
+     ['furniture', 'office', 'ergonomic'], 'Height adjustable standing desk'),
+    ('Mechanical Keyboard', {'brand': 'KeyMaster', 'specs': {'switches': 'blue', 'backlit': True}},
+     ['electronics', 'accessory', 'gaming'], 'Mechanical gaming keyboard with RGB'),
+    ('Monitor 27inch', {'brand': 'ViewPro', 'specs': {'resolution': '4K', 'refresh_rate': 144}},
+     ['electronics', 'display', 'gaming'], '27 inch 4K gaming monitor'),
+]
+
+
+# ----------------------------------------------------------------------
+# 바이너리 인코더: 값 → 필드 바이트 (길이 prefix 포함)
+# ----------------------------------------------------------------------
+
+_int32 = struct.Struct('!i')
+_field_int4 = struct.Struct('!ii')
+_field_int8 = struct.Struct('!iq')
+NULL_FIELD = _int32.pack(-1)
+
+
+def encode_int4(value):
+    return _field_int4.pack(4, value)
+
+
+def encode_timestamp(micros):
+    """2000-01-01 기준 마이크로초"""
+    return _field_int8.pack(8, micros)
+
+
+def encode_date(days):
+    """2000-01-01 기준 일 수"""
+    return _field_int4.pack(4, days)
+
+
+def encode_numeric_cents(cents):
+    """소수점 2자리 numeric (cents = 값 * 100)"""
+    sign = 0x4000 if cents < 0 else 0x0000
+    cents = abs(cents)
+    int_part, frac = divmod(cents, 100)
+    int_digits = []
+    while int_part:
+        int_part, digit = divmod(int_part, 10000)
+        int_digits.append(digit)
+    int_digits.reverse()
+    digits = int_digits + ([frac * 100] if frac else [])
+    if not digits:
+        weight, sign = 0, 0x0000
+    else:
+        weight = len(int_digits) - 1
+    payload = struct.pack(f'!hhhh{len(digits)}h', len(digits), weight, sign, 2, *digits)
+    return _int32.pack(len(payload)) + payload
+
+
+def encode_text(value):
+    if value is None:
+        return NULL_FIELD
+    data = value.encode('utf-8')
+    return _int32.pack(len(data)) + data
+
+
+def encode_jsonb(value):
+    data = b'\x01' + json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return _int32.pack(len(data)) + data
+
+
+def encode_text_array(values):
+    elements = b''.join(encode_text(v) for v in values)
+    header = struct.pack('!iiiii', 1, 0, TEXT_OID, len(values), 1)
+    return _int32.pack(len(header) + len(elements)) + header + elements
+
+
+BINARY_ENCODERS = {
+    'int4': encode_int4,
+    'numeric2': encode_numeric_cents,
+    'timestamp': encode_timestamp,
+    'date': encode_date,
+    'text': encode_text,
+    'jsonb': encode_jsonb,
+    'text[]': encode_text_array,
+}
+
+
+# ----------------------------------------------------------------------
+# CSV 변환: 값 → 문자열
+# ----------------------------------------------------------------------
+
+def _csv_array(values):
+    return '{' + ','.join('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"'
+                          for v in values) + '}'
+
+
+CSV_CONVERTERS = {
+    'int4': str,
+    'numeric2': lambda cents: f"{cents / 100:.2f}",
+    'timestamp': lambda micros: (PG_EPOCH + datetime.timedelta(microseconds=micros)).isoformat(' '),
+    'date': lambda days: (PG_EPOCH_DATE + datetime.timedelta(days=days)).isoformat(),
+    'text': lambda v: '' if v is None else v,
+    'jsonb': lambda v: json.dumps(v, separators=(',', ':')),
+    'text[]': _csv_array,
+}
+
+
+def encode_binary(rows, types):
+    encoders = [BINARY_ENCODERS[t] for t in types]
+    count = struct.pack('!h', len(types))
+    buf = io.BytesIO()
+    write = buf.write
+    write(COPY_SIGNATURE)
+    for row in rows:
+        write(count)
+        for encode, value in zip(encoders, row):
+            write(encode(value))
+    write(COPY_TRAILER)
+    buf.seek(0)
+    return buf
+
+
+def encode_csv(rows, types):
+    converters = [CSV_CONVERTERS[t] for t in types]
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator='\n')
+    for row in rows:
+        writer.writerow([convert(value) for convert, value in zip(converters, row)])
+    return io.BytesIO(text.getvalue().encode('utf-8'))
+
+
+# ----------------------------------------------------------------------
+# 분포
+# ----------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=4)
+def _zipf_cdf(n, skew):
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    return cdf
+
+
+def key_sampler(n, skew):
+    """
+    1..n 사이의 키를 뽑는 함수를 반환
+
+    skew=0이면 균등 분포, skew>0이면 지수 skew인 Zipf 분포 (작은 키가 자주 나옴)
+    누적 분포는 워커마다 한 번만 계산해 재사용합니다.
+    """
+    if skew <= 0:
+        return lambda rng, size: rng.integers(1, n + 1, size)
+    cdf = _zipf_cdf(n, skew)
+    return lambda rng, size: np.searchsorted(cdf, rng.random(size), side='right') + 1
+
+
+# ----------------------------------------------------------------------
+# 테이블별 행 생성기: (rng, 시작 번호, 행 수, 옵션) → 행 목록
+# ----------------------------------------------------------------------
+
+def generate_sensor_data(rng, start, count, options):
+    i = np.arange(start + 1, start + count + 1)
+    sensors = key_sampler(100, options['skew'])(rng, count)
+    cents = rng.integers(0, 100_000, count)
+
+    minutes = i.copy()
+    if options['disorder'] > 0:
+        shuffled = rng.random(count) < options['disorder']
+        minutes[shuffled] = rng.integers(1, options['rows'] + 1, int(shuffled.sum()))
+    base = int((SENSOR_BASE_TIME - PG_EPOCH).total_seconds()) * 1_000_000
+    micros = base + minutes * 60_000_000
+
+    return zip(i.tolist(), sensors.tolist(), cents.tolist(), micros.tolist())
+
+
+def generate_orders(rng, start, count, options):
+    i = np.arange(start + 1, start + count + 1)
+    customers = key_sampler(options['customers'], options['skew'])(rng, count)
+    days = options['anchor_days'] - rng.integers(0, 366, count)
+    cents = rng.integers(0, 1_000_000, count)
+    statuses = rng.integers(0, len(STATUSES), count)
+    return (
+        (row_id, customer, day, amount, STATUSES[status], None)
+        for row_id, customer, day, amount, status in zip(
+            i.tolist(), customers.tolist(), days.tolist(), cents.tolist(), statuses.tolist())
+    )
+
+
+def generate_products_json(rng, start, count, options):
+    i = np.arange(start + 1, start + count + 1)
+    brands = rng.integers(0, len(BRANDS), count)
+    prices = rng.integers(100, 1100, count)
+    in_stock = rng.random(count) > 0.3
+    categories = rng.integers(0, len(CATEGORIES), count)
+    tiers = rng.integers(0, len(TIERS), count)
+    for row_id, brand, price, stock, category, tier in zip(
+            i.tolist(), brands.tolist(), prices.tolist(), in_stock.tolist(),
+            categories.tolist(), tiers.tolist()):
+        # 앞의 5건은 lab08 예제가 검색하는 init.sql의 고정 상품
+        if row_id <= len(FEATURED_PRODUCTS):
+            yield (row_id,) + FEATURED_PRODUCTS[row_id - 1]
+            continue
+        yield (row_id, f'Product_{row_id}',
+               {'brand': BRANDS[brand], 'price': price, 'in_stock': stock},
+               [CATEGORIES[category], TIERS[tier]],
+               f'Product description {row_id}')
+
+
+def generate_index_mvcc_test(rng, start, count, options):
+    return ((i, i, i * 10, f'data_{i}') for i in range(start + 1, start + count + 1))
+
+
+# 테이블 이름 → (scale=1 행 수, 컬럼, 타입, 생성기)
+TABLES = {
+    'sensor_data': (
+        100_000,
+        ['id', 'sensor_id', 'reading', 'recorded_at'],
+        ['int4', 'int4', 'numeric2', 'timestamp'],
+        generate_sensor_data,
+    ),
+    'orders': (
+        100_000,
+        ['id', 'customer_id', 'order_date', 'total_amount', 'status', 'notes'],
+        ['int4', 'int4', 'date', 'numeric2', 'text', 'text'],
+        generate_orders,
+    ),
+    'products_json': (
+        105,
+        ['id', 'name', 'attributes', 'tags', 'description'],
+        ['int4', 'text', 'jsonb', 'text[]', 'text'],
+        generate_products_json,
+    ),
+    'index_mvcc_test': (
+        1_000,
+        ['id', 'indexed_col', 'non_indexed_col', 'data'],
+        ['int4', 'int4', 'int4', 'text'],
+        generate_index_mvcc_test,
+    ),
+}
+
+
+# ----------------------------------------------------------------------
+# 적재
+# ----------------------------------------------------------------------
+
+def _load_chunk(task):
+    """워커: 청크 하나를 생성해 COPY로 전송하고 (테이블, 행 수, 바이트 수) 반환"""
+    table, table_no, chunk_no, start, count, fmt, options = task
+    _, columns, types, generate = TABLES[table]
+
+    rng = np.random.default_rng([options['seed'], table_no, chunk_no])
+    rows = generate(rng, start, count, options)
+    buf = encode_binary(rows, types) if fmt == 'binary' else encode_csv(rows, types)
+    nbytes = buf.getbuffer().nbytes
+
+    query = sql.SQL("COPY {} ({}) FROM STDIN (FORMAT {})").format(
+        sql.Identifier(table),
+        sql.SQL(', ').join(sql.Identifier(c) for c in columns),
+        sql.SQL(fmt))
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.copy_expert(query.as_string(conn), buf)
+        conn.commit()
+    finally:
+        conn.close()
+    return table, count, nbytes
+
+
+def _secondary_indexes(cur, table):
+    """제약조건(PK/UNIQUE)이 아닌 인덱스의 (이름, 정의)"""
+    cur.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """, (table,))
+    return cur.fetchall()
+
+
+def prepare_tables(tables, defer_indexes):
+    """대상 테이블 TRUNCATE, 필요하면 보조 인덱스를 떼어내고 정의를 반환"""
+    deferred = []
+    conn = get_connection(autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY").format(
+                sql.SQL(', ').join(sql.Identifier(t) for t in tables)))
+            if defer_indexes:
+                for table in tables:
+                    for name, definition in _secondary_indexes(cur, table):
+                        cur.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(name)))
+                        deferred.append((name, definition))
+    finally:
+        conn.close()
+    return deferred
+
+
+def finish_tables(tables, deferred):
+    """떼어낸 인덱스 재생성, 시퀀스를 max(id)로 맞추고 ANALYZE"""
+    conn = get_connection(autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            for name, definition in deferred:
+                start = time.perf_counter()
+                cur.execute(definition)
+                print(f"  인덱스 재생성: {name} ({time.perf_counter() - start:.1f}초)")
+            for table in tables:
+                cur.execute(sql.SQL("""
+                    SELECT setval(pg_get_serial_sequence(%s, 'id'),
+                                  COALESCE((SELECT max(id) FROM {}), 0) + 1, false)
+                """).format(sql.Identifier(table)), (table,))
+                cur.execute(sql.SQL("VACUUM (ANALYZE) {}").format(sql.Identifier(table)))
+    finally:
+        conn.close()
+
+
+def plan_chunks(tables, scale, fmt, options, chunk_rows=CHUNK_ROWS):
+    """테이블별 행 수를 청크 작업 목록으로 나눔"""
+    tasks = []
+    for table in tables:
+        base_rows = TABLES[table][0]
+        rows = max(1, int(base_rows * scale))
+        table_options = dict(options, rows=rows)
+        table_no = list(TABLES).index(table)
+        for chunk_no, start in enumerate(range(0, rows, chunk_rows)):
+            count = min(chunk_rows, rows - start)
+            tasks.append((table, table_no, chunk_no, start, count, fmt, table_options))
+    return tasks
+
+
+def generate(tables, scale=1.0, workers=4, fmt='binary', seed=42, skew=0.0,
+             disorder=0.0, defer_indexes=True, chunk_rows=CHUNK_ROWS):
+    """tables를 scale 배 크기로 다시 채우고 테이블별 (행 수, 바이트 수)를 반환"""
+    options = {
+        'seed': seed,
+        'skew': skew,
+        'disorder': disorder,
+        'customers': max(10_000, int(10_000 * scale)),
+        'anchor_days': (datetime.date.today() - PG_EPOCH_DATE).days,
+    }
+    tasks = plan_chunks(tables, scale, fmt, options, chunk_rows)
+    total_rows = sum(task[4] for task in tasks)
+
+    deferred = prepare_tables(tables, defer_indexes)
+
+    stats = {table: [0, 0] for table in tables}
+    done = 0
+    start = time.perf_counter()
+    completed = False
+    try:
+        with Pool(processes=workers) as pool:
+            for table, count, nbytes in pool.imap_unordered(_load_chunk, tasks):
+                stats[table][0] += count
+                stats[table][1] += nbytes
+                done += count
+                elapsed = time.perf_counter() - start
+                print(f"\r  {done:,}/{total_rows:,}행 ({done / max(elapsed, 1e-9):,.0f}행/초)",
+                      end='', flush=True)
+        completed = True
+    finally:
+        print()
+        # 적재가 실패하거나 중단돼도 떼어낸 인덱스는 반드시 되살림
+        if not completed and deferred:
+            print("  적재 중단: 떼어낸 인덱스를 재생성합니다 (테이블은 일부만 채워진 상태)")
+        finish_tables(tables, deferred)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py datagen',
+                                     description='scale factor에 맞춰 실습 테이블을 COPY로 다시 채웁니다.')
+    parser.add_argument('-t', '--tables', nargs='+', choices=list(TABLES), default=list(TABLES))
+    parser.add_argument('-s', '--scale', type=float, default=1.0,
+                        help='init.sql 대비 배수 (기본 1, sensor_data 3000 = 3억 행)')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='워커 프로세스 수')
+    parser.add_argument('--format', choices=['binary', 'csv'], default='binary')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skew', type=float, default=0.0,
+                        help='sensor_id/customer_id의 Zipf 지수 (0 = 균등)')
+    parser.add_argument('--disorder', type=float, default=0.0,
+                        help='sensor_data에서 시간 순서를 섞을 행 비율 (0~1)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--keep-indexes', action='store_true',
+                        help='적재 중에도 보조 인덱스를 유지 (기본: 떼었다가 재생성)')
+    args = parser.parse_args(argv)
+
+    print(f"데이터 생성: {', '.join(args.tables)} (scale={args.scale}, "
+          f"workers={args.workers}, format={args.format}, seed={args.seed})")
+    start = time.perf_counter()
+    stats = generate(args.tables, scale=args.scale, workers=args.workers, fmt=args.format,
+                     seed=args.seed, skew=args.skew, disorder=args.disorder,
+                     defer_indexes=not args.keep_indexes, chunk_rows=args.chunk_rows)
+    elapsed = time.perf_counter() - start
+
+    for table, (rows, nbytes) in stats.items():
+        print(f"  {table:<16} {rows:>14,}행  {nbytes / 1024 / 1024:>10.1f} MB 전송")
+    print(f"완료 ({elapsed:.1f}초)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
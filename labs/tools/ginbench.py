@@ -0,0 +1,395 @@
+"""
+GIN 쓰기 비용 벤치마크
+======================
+
+products_json의 GIN 인덱스 (attributes, attributes jsonb_path_ops, tags, name gin_trgm_ops)를
+그대로 가진 벤치마크용 테이블(gin_ingest)에 JSONB/태그/이름 데이터를 대량으로 INSERT/UPDATE하면서
+fastupdate=off와 fastupdate=on(gin_pending_list_limit 여러 값)을 비교합니다.
+
+설정마다 테이블을 새로 만들고 (--base 행을 넣은 뒤 인덱스 생성, CHECKPOINT) 같은 양을 씁니다.
+autovacuum은 꺼 두므로 pending list는 쓰기 세션만 정리합니다.
+
+- 처리량: 초당 행 수, INSERT/UPDATE별 문장 지연 시간 p50/p99 (gin_ingest는 id PK로 UPDATE)
+- pending list: 샘플링마다 gin_metapage_info()로 읽은 최대 페이지/튜플 수, 정리 횟수
+- 지연 스파이크: 클라이언트의 INSERT/UPDATE 각각의 중앙값의 SPIKE_FACTOR배를 넘은 문장 (대부분 pending list 정리)
+- 쓰기 증폭: WAL 바이트/행, GIN 인덱스 크기 / 테이블 크기
+- 끝에 남은 pending list를 gin_clean_pending_list()로 정리하는 시간 (미뤄둔 비용)
+
+실행 방법:
+    python main.py ginbench
+    python main.py ginbench --rows 500000 -c 8 --limits 64 1024 4096 16384
+    python main.py ginbench --update-ratio 0.5 --png
+"""
+
+import argparse
+import bisect
+import json
+import random
+import sys
+import time
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from tabulate import tabulate
+
+from common import charts, gin
+from common.clients import run_clients, wait_for_start
+from common.db import get_connection
+from common.histogram import LatencyHistogram
+
+BENCH_TABLE = 'gin_ingest'
+SOURCE_TABLE = 'products_json'
+LIMITS_KB = (64, 1024, gin.DEFAULT_PENDING_LIST_LIMIT_KB, 16384)
+SAMPLE_INTERVAL = 0.2
+SPIKE_FACTOR = 10
+SPIKE_MIN_MS = 5.0
+
+BRANDS = ['TechCo', 'LogiTech', 'ErgoMax', 'KeyMaster', 'ViewPro']
+SPEC_KEYS = ['cpu', 'ram', 'storage', 'dpi', 'buttons', 'width', 'height', 'switches', 'backlit',
+             'resolution', 'refresh_rate', 'color', 'weight', 'warranty']
+TAGS = ['electronics', 'furniture', 'office', 'premium', 'budget', 'standard', 'wireless', 'gaming',
+        'portable', 'ergonomic', 'accessory', 'display', 'computer', 'audio', 'sale', 'new']
+NAME_WORDS = ['Laptop', 'Mouse', 'Desk', 'Keyboard', 'Monitor', 'Chair', 'Headset', 'Speaker',
+              'Webcam', 'Dock', 'Lamp', 'Tablet', 'Pro', 'Max', 'Mini', 'Ultra', 'Wireless', 'Ergo']
+
+INSERT_QUERY = sql.SQL("INSERT INTO {} (id, name, attributes, tags, description) VALUES %s").format(
+    sql.Identifier(BENCH_TABLE))
+INSERT_TEMPLATE = "(%s, %s, %s::jsonb, %s::text[], %s)"
+UPDATE_QUERY = sql.SQL("""
+    UPDATE {} SET attributes = jsonb_set(attributes, '{{price}}', to_jsonb(%s::int)),
+                  tags = array_append(tags[1:3], %s),
+                  name = %s || ' ' || id
+    WHERE id = ANY(%s)
+""").format(sql.Identifier(BENCH_TABLE))
+# init.sql의 추가 상품 100건과 같은 모양
+BASE_ROWS_QUERY = sql.SQL("""
+    INSERT INTO {} (id, name, attributes, tags, description)
+    SELECT i, 'Product_' || i,
+           jsonb_build_object(
+               'brand', (ARRAY['TechCo', 'LogiTech', 'ErgoMax', 'KeyMaster', 'ViewPro'])[floor(random()*5+1)::int],
+               'price', floor(random() * 1000 + 100)::int,
+               'in_stock', random() > 0.3),
+           ARRAY[(ARRAY['electronics', 'furniture', 'office'])[floor(random()*3+1)::int],
+                 (ARRAY['premium', 'budget', 'standard'])[floor(random()*3+1)::int]],
+           'Product description ' || i
+    FROM generate_series(1, %s) i
+""").format(sql.Identifier(BENCH_TABLE))
+
+
+def make_row(rng, row_id):
+    specs = {key: rng.randint(1, 4096) for key in rng.sample(SPEC_KEYS, rng.randint(2, 4))}
+    attributes = {'brand': rng.choice(BRANDS), 'price': rng.randint(100, 1099),
+                  'in_stock': rng.random() > 0.3, 'specs': specs}
+    name = f"{' '.join(rng.sample(NAME_WORDS, 2))} {row_id}"
+    return (row_id, name, json.dumps(attributes), rng.sample(TAGS, rng.randint(2, 5)),
+            f'Product description {row_id}')
+
+
+# ----------------------------------------------------------------------
+# 클라이언트 프로세스
+# ----------------------------------------------------------------------
+
+def _client(task):
+    """
+    start_at(time.time())부터 INSERT가 몫(quota)만큼 행을 넣을 때까지 쓰기를 반복
+
+    문장마다 autocommit. update_ratio 비율의 문장은 이미 있는 행 batch개의
+    attributes/tags/name을 바꿉니다 (모든 GIN 인덱스에 새 엔트리).
+    INSERT와 UPDATE는 지연 시간 분포가 달라서 히스토그램과 스파이크 기준을 따로 둡니다.
+    다른 클라이언트와 같은 행을 UPDATE하다 교착 등으로 실패한 문장은 세고 계속합니다.
+    """
+    client_no, config, start_at = task
+    rng = random.Random(config['seed'] * 10_007 + client_no)
+    clients = config['clients']
+    quota = config['rows'] // clients + (1 if client_no < config['rows'] % clients else 0)
+    next_id = config['base'] + 1 + client_no
+
+    hists = {'insert': LatencyHistogram(), 'update': LatencyHistogram()}
+    latencies = []          # (시작 시각, ms, 'insert' | 'update')
+    attempted = inserted = updated = failed = 0     # attempted: 실패한 INSERT 행도 포함
+
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        wait_for_start(start_at)
+
+        while attempted < quota:
+            started = time.perf_counter_ns()
+            offset = time.time() - start_at
+            if rng.random() < config['update_ratio'] and next_id > 1:
+                kind = 'update'
+                ids = sorted(rng.randint(1, next_id - 1) for _ in range(config['batch']))
+                params = (rng.randint(100, 1099), rng.choice(TAGS), ' '.join(rng.sample(NAME_WORDS, 2)), ids)
+                rows = None
+            else:
+                kind = 'insert'
+                rows = []
+                for _ in range(min(config['batch'], quota - attempted)):
+                    rows.append(make_row(rng, next_id))
+                    next_id += clients
+                attempted += len(rows)
+            try:
+                if rows is None:
+                    cur.execute(UPDATE_QUERY, params)
+                    updated += cur.rowcount
+                else:
+                    execute_values(cur, INSERT_QUERY, rows, template=INSERT_TEMPLATE, page_size=len(rows))
+                    inserted += len(rows)
+            except psycopg2.Error:
+                conn.rollback()
+                failed += 1
+                continue
+            elapsed = time.perf_counter_ns() - started
+            hists[kind].record_ns(elapsed)
+            latencies.append((offset, elapsed / 1e6, kind))
+    finally:
+        cur.close()
+        conn.close()
+
+    thresholds = {kind: max(SPIKE_FACTOR * hist.percentile(50) / 1000, SPIKE_MIN_MS)
+                  for kind, hist in hists.items()}
+    return {
+        'hists': {kind: hist.to_dict() for kind, hist in hists.items()},
+        'inserted': inserted,
+        'updated': updated,
+        'failed': failed,
+        'elapsed': time.time() - start_at,
+        'spikes': [s for s in latencies if s[1] > thresholds[s[2]]],
+    }
+
+
+# ----------------------------------------------------------------------
+# 설정 하나 실행
+# ----------------------------------------------------------------------
+
+def prepare_table(cur, base, fastupdate, limit_kb):
+    """
+    gin_ingest를 새로 만들고 products_json과 같은 GIN 인덱스를 설정에 맞춰 생성
+
+    LIKE는 PK를 복사하지 않으므로 id에 PK를 따로 만듭니다
+    (없으면 UPDATE ... WHERE id = ANY(...)가 매번 Seq Scan이라 GIN 비용이 묻힘).
+    """
+    table = sql.Identifier(BENCH_TABLE)
+    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(table))
+    cur.execute(sql.SQL("CREATE TABLE {} (LIKE {}, PRIMARY KEY (id)) WITH (autovacuum_enabled = off)").format(
+        table, sql.Identifier(SOURCE_TABLE)))
+    cur.execute(BASE_ROWS_QUERY, (base,))
+    indexes = []
+    for name, columns in gin.gin_indexes(cur, SOURCE_TABLE):
+        bench_index = f"{BENCH_TABLE}_{name}"
+        cur.execute(sql.SQL("CREATE INDEX {} ON {} USING gin {} {}").format(
+            sql.Identifier(bench_index), table, sql.SQL(columns), gin.storage_options(fastupdate, limit_kb)))
+        indexes.append((bench_index, name))
+    cur.execute(sql.SQL("VACUUM ANALYZE {}").format(table))
+    cur.execute("CHECKPOINT")
+    return indexes
+
+
+def sample_pending(cur, indexes, start_at):
+    return time.time() - start_at, [gin.pending(cur, bench_index) for bench_index, _ in indexes]
+
+
+def count_cleanups(samples, index_count):
+    """샘플 사이에 pending 페이지 수가 줄어든 횟수 (인덱스별 합)"""
+    return sum(1 for i in range(index_count)
+               for (_, a), (_, b) in zip(samples, samples[1:]) if b[i].pages < a[i].pages)
+
+
+def run_config(config, fastupdate, limit_kb):
+    """한 설정으로 쓰기를 실행하고 결과 dict 반환"""
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        indexes = prepare_table(cur, config['base'], fastupdate, limit_kb)
+        cur.execute("SELECT pg_current_wal_lsn()")
+        wal_before = cur.fetchone()[0]
+
+        start_at, clients, samples = run_clients(
+            _client, config['clients'], config, config['sample_interval'],
+            sample=lambda start_at: sample_pending(cur, indexes, start_at))
+
+        cur.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (wal_before,))
+        wal_bytes = int(cur.fetchone()[0])
+        cur.execute("SELECT pg_relation_size(%s), (SELECT sum(pg_relation_size(i)) FROM unnest(%s::regclass[]) i)",
+                    (BENCH_TABLE, [bench_index for bench_index, _ in indexes]))
+        table_bytes, index_bytes = cur.fetchone()
+        index_bytes = int(index_bytes or 0)     # GIN 인덱스만 (PK 제외)
+        samples.append(sample_pending(cur, indexes, start_at))
+        flush = [gin.clean_pending(cur, bench_index) for bench_index, _ in indexes]
+    finally:
+        cur.close()
+        conn.close()
+
+    hists = {'insert': LatencyHistogram(), 'update': LatencyHistogram()}
+    for c in clients:
+        for kind, data in c['hists'].items():
+            hists[kind].merge(LatencyHistogram.from_dict(data))
+    hist = LatencyHistogram()
+    for kind_hist in hists.values():
+        hist.merge(kind_hist)
+    inserted = sum(c['inserted'] for c in clients)
+    return {
+        'fastupdate': fastupdate,
+        'limit_kb': limit_kb if fastupdate else None,
+        'indexes': [name for _, name in indexes],
+        'elapsed': max(c['elapsed'] for c in clients),
+        'inserted': inserted,
+        'updated': sum(c['updated'] for c in clients),
+        'failed': sum(c['failed'] for c in clients),
+        'hist': hist,
+        'hists': hists,
+        'spikes': sorted((s for c in clients for s in c['spikes']), key=lambda s: s[1], reverse=True),
+        'samples': samples,
+        'cleanups': count_cleanups(samples, len(indexes)),
+        'wal_bytes': wal_bytes,
+        'table_bytes': table_bytes,
+        'index_bytes': index_bytes,
+        'flush_pages': sum(pages for pages, _ in flush),
+        'flush_ms': sum(ms for _, ms in flush),
+    }
+
+
+# ----------------------------------------------------------------------
+# 출력
+# ----------------------------------------------------------------------
+
+def config_label(result):
+    if not result['fastupdate']:
+        return 'off'
+    return f"on, {result['limit_kb']:,}kB"
+
+
+def print_results(results):
+    rows = []
+    for r in results:
+        s = r['hists']['insert'].summary((50, 99, 99.9))
+        u = r['hists']['update'].summary((50, 99))
+        spike_ms = sum(ms for _, ms, _ in r['spikes'])
+        busy_ms = r['hist'].total / 1000
+        max_pages = max((sum(p.pages for p in pend) for _, pend in r['samples']), default=0)
+        max_tuples = max((sum(p.tuples for p in pend) for _, pend in r['samples']), default=0)
+        rows.append((
+            config_label(r), f"{r['inserted'] / r['elapsed']:,.0f}",
+            f"{s['p50'] / 1000:.2f}", f"{s['p99'] / 1000:.2f}", f"{s['p99.9'] / 1000:.2f}",
+            f"{u['p50'] / 1000:.2f}", f"{u['p99'] / 1000:.2f}", f"{r['hist'].max / 1000 if r['hist'].count else 0:.1f}",
+            f"{len(r['spikes']):,} ({100 * spike_ms / busy_ms if busy_ms else 0:.0f}%)",
+            f"{max_pages:,} / {max_tuples:,}", r['cleanups'],
+            f"{r['wal_bytes'] / max(r['inserted'] + r['updated'], 1):,.0f}",
+            f"{r['index_bytes'] / max(r['table_bytes'], 1):.2f}",
+            f"{r['flush_pages']:,} / {r['flush_ms']:.0f}", r['failed'],
+        ))
+    print(tabulate(rows, headers=['fastupdate', '행/초', 'INSERT p50 ms', 'p99 ms', 'p99.9 ms',
+                                  'UPDATE p50 ms', 'p99 ms', 'max ms',
+                                  '스파이크 (시간 %)', '최대 pending 페이지/튜플', '정리 횟수',
+                                  'WAL B/행', 'GIN/테이블', '남은 정리 페이지/ms', '실패'],
+                   tablefmt='psql'))
+    print(f"\n스파이크 = 클라이언트의 같은 종류(INSERT/UPDATE) 문장 중앙값의 {SPIKE_FACTOR}배 "
+          f"(최소 {SPIKE_MIN_MS:g}ms)를 넘은 문장, 시간 % = 전체 문장 시간 중 스파이크가 차지한 비율")
+    print("실패 = 교착 등으로 되돌린 문장 수 (다른 클라이언트와 같은 행을 UPDATE)")
+    print("정리 횟수는 샘플 사이에 pending 페이지가 줄어든 횟수라 실제보다 적을 수 있습니다.")
+
+
+def print_spikes(result, limit=5):
+    """가장 느린 문장과 그 직전 샘플의 pending list 크기"""
+    if not result['spikes']:
+        return
+    times = [t for t, _ in result['samples']]
+    rows = []
+    for offset, ms, kind in result['spikes'][:limit]:
+        i = bisect.bisect_right(times, offset) - 1
+        before = sum(p.pages for p in result['samples'][i][1]) if i >= 0 else '-'
+        rows.append((f"{offset:.2f}", kind, f"{ms:.1f}", before))
+    print(f"\n[{config_label(result)}: 가장 느린 문장]")
+    print(tabulate(rows, headers=['시각(초)', '문장', 'ms', '직전 pending 페이지'], tablefmt='psql'))
+
+
+def save_png(results, path=None):
+    plt = charts.pyplot()
+
+    fig, axes = plt.subplots(len(results), 1, figsize=(12, 3 * len(results)), sharex=True, squeeze=False)
+    for ax, r in zip(axes[:, 0], results):
+        ax.plot([t for t, _ in r['samples']], [sum(p.pages for p in pend) for _, pend in r['samples']],
+                color='steelblue', label='pending pages')
+        ax.set_ylabel('pending pages')
+        ax.set_title(f"fastupdate {config_label(r)}")
+        spikes = ax.twinx()
+        spikes.scatter([s[0] for s in r['spikes']], [s[1] for s in r['spikes']],
+                       s=8, color='crimson', label='slow statements')
+        spikes.set_ylabel('ms')
+    axes[-1, 0].set_xlabel('seconds')
+
+    return charts.save(fig, 'ginbench.png', path)
+
+
+def drop_table():
+    conn = get_connection(autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(BENCH_TABLE)))
+    finally:
+        conn.close()
+
+
+def ratio(text):
+    value = float(text)
+    if not 0 <= value < 1:
+        raise argparse.ArgumentTypeError("0 이상 1 미만이어야 합니다")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py ginbench',
+                                     description='GIN fastupdate/gin_pending_list_limit별 쓰기 처리량과 지연 스파이크')
+    parser.add_argument('--rows', type=int, default=100_000, help='설정마다 INSERT할 행 수 (기본 100000)')
+    parser.add_argument('--base', type=int, default=10_000, help='인덱스를 만들기 전에 넣어 둘 행 수 (기본 10000)')
+    parser.add_argument('--batch', type=int, default=50, help='문장 하나의 행 수 (기본 50)')
+    parser.add_argument('-c', '--clients', type=int, default=4, help='클라이언트 프로세스 수 (기본 4)')
+    parser.add_argument('--update-ratio', type=ratio, default=0.2, help='UPDATE 문장 비율 (기본 0.2)')
+    parser.add_argument('--limits', type=int, nargs='+', default=list(LIMITS_KB),
+                        help=f"fastupdate=on일 때 gin_pending_list_limit kB 목록 "
+                             f"(기본 {' '.join(map(str, LIMITS_KB))})")
+    parser.add_argument('--no-off', action='store_true', help='fastupdate=off 설정은 건너뜀')
+    parser.add_argument('--sample-interval', type=float, default=SAMPLE_INTERVAL,
+                        help=f'pending list 샘플 간격 초 (기본 {SAMPLE_INTERVAL})')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--png', action='store_true', help='labs/graphs/ginbench.png 저장')
+    parser.add_argument('--keep', action='store_true', help=f'끝난 뒤 {BENCH_TABLE} 테이블을 남김')
+    args = parser.parse_args(argv)
+
+    config = {
+        'rows': args.rows,
+        'base': args.base,
+        'batch': args.batch,
+        'clients': args.clients,
+        'update_ratio': args.update_ratio,
+        'sample_interval': args.sample_interval,
+        'seed': args.seed,
+    }
+    settings = ([] if args.no_off else [(False, None)]) + [(True, limit) for limit in args.limits]
+    print(f"{SOURCE_TABLE}의 GIN 인덱스로 {BENCH_TABLE} 쓰기: 설정마다 {args.rows:,}행 INSERT "
+          f"(기존 {args.base:,}행, 문장당 {args.batch}행, UPDATE 비율 {args.update_ratio:g}, "
+          f"클라이언트 {args.clients}개)")
+
+    results = []
+    try:
+        for fastupdate, limit in settings:
+            print(f"\n=== fastupdate {'on, ' + format(limit, ',') + 'kB' if fastupdate else 'off'} ===")
+            result = run_config(config, fastupdate, limit)
+            print(f"  {result['elapsed']:.1f}초, {result['inserted']:,}행 INSERT, "
+                  f"{result['updated']:,}행 UPDATE, 인덱스 {', '.join(result['indexes'])}")
+            print_spikes(result)
+            results.append(result)
+    finally:
+        if not args.keep:
+            drop_table()
+
+    print()
+    print_results(results)
+    if args.png:
+        print(f"\n[Graph Saved] {save_png(results)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+힙 페이지 스캐너
+================
+
+common.heappage로 테이블의 raw 페이지를 여러 페이지씩 가져와 클라이언트에서 해석합니다.
+페이지마다 heap_page_items()를 호출하지 않으므로 테이블 전체를 한 번에 볼 수 있고,
+--save로 저장한 파일은 DB 없이 --file로 다시 분석할 수 있습니다.
+
+- 요약: 라인 포인터 상태별 수, frozen/커밋된 xmax/미확정 xmax, HOT, 빈 공간
+- --block N: 페이지 N의 라인 포인터별 헤더 (heap_page_items()와 같은 열)
+
+실행 방법:
+    python main.py heapscan vacuum_test
+    python main.py heapscan hot_test --block 0
+    python main.py heapscan orders --save labs/results/orders.heap
+    python main.py heapscan --file labs/results/orders.heap
+"""
+
+import argparse
+import sys
+import time
+
+from tabulate import tabulate
+
+from common import heappage
+from common.db import get_connection
+
+
+def print_summary(summary, elapsed):
+    pages = summary['pages']
+    mb = pages * heappage.BLOCK_SIZE / 1024 / 1024
+    rate = f"{pages / elapsed:,.0f} 페이지/초, {mb / elapsed:.1f}MB/s" if elapsed > 0 else '-'
+    print(f"\n페이지 {pages}개 ({mb:.1f}MB, 초기화 안 된 페이지 {summary['new_pages']}개), "
+          f"{elapsed:.2f}초 ({rate})")
+    print(tabulate(sorted(summary['line_pointers'].items()), headers=['라인 포인터', '수'], tablefmt='psql'))
+
+    tuples = summary['tuples'] or 1
+    rows = [
+        ('튜플', summary['tuples'], ''),
+        ('frozen', summary['frozen'], 'XMIN_COMMITTED | XMIN_INVALID'),
+        ('xmin 중단됨', summary['xmin_aborted'], 'XMIN_INVALID (dead)'),
+        ('xmax 커밋됨', summary['xmax_committed'], '삭제/갱신 커밋 (dead 후보)'),
+        ('xmax 미확정', summary['xmax_pending'], '힌트 비트 없음 (진행 중이거나 아직 확인 안 됨)'),
+        ('행 잠금만', summary['locked_only'], 'XMAX_LOCK_ONLY (SELECT FOR ...)'),
+        ('HOT 갱신됨', summary['hot_updated'], 'HOT 체인의 옛 버전'),
+        ('heap-only', summary['heap_only'], 'HOT 체인의 새 버전 (인덱스 항목 없음)'),
+    ]
+    print(tabulate([(name, n, f"{100 * n / tuples:.1f}", note) for name, n, note in rows],
+                   headers=['항목', '수', '%', '설명'], tablefmt='psql'))
+    print(f"빈 공간(pd_upper - pd_lower) 합계: {summary['free_bytes'] / 1024:,.0f}KB, "
+          f"xmin 범위: {summary['xmin_min']} ~ {summary['xmin_max']}")
+
+
+def print_block(page):
+    h = page.header
+    print(f"\n페이지 {page.blkno}: lsn {h.lsn}, lower {h.lower}, upper {h.upper}, special {h.special}, "
+          f"prune_xid {h.prune_xid}, 빈 공간 {h.free_space}B")
+    print(tabulate([t.row() for t in page.tuples()],
+                   headers=['lp', 'lp_off', 'lp_flags', 'lp_len', 't_xmin', 't_xmax', 't_ctid', 'flags'],
+                   tablefmt='psql'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py heapscan',
+                                     description='raw 힙 페이지를 클라이언트에서 해석해 튜플 헤더 요약')
+    parser.add_argument('relation', nargs='?', help='테이블 이름')
+    parser.add_argument('--block', type=int, help='이 페이지의 라인 포인터별 헤더 출력')
+    parser.add_argument('--batch', type=int, default=heappage.BATCH_PAGES,
+                        help=f'쿼리 한 번에 가져올 페이지 수 (기본 {heappage.BATCH_PAGES})')
+    parser.add_argument('--save', help='raw 페이지를 이 파일에 저장')
+    parser.add_argument('--file', help='DB 대신 저장한 파일(또는 relation 파일)을 분석')
+    args = parser.parse_args(argv)
+    if not args.relation and not args.file:
+        parser.error('relation 또는 --file이 필요합니다')
+
+    started = time.perf_counter()
+    if args.file:
+        pages = heappage.iter_file_pages(args.file)
+        if args.block is not None:
+            for blkno, raw in pages:
+                if blkno == args.block:
+                    print_block(heappage.HeapPage(raw, blkno))
+                    break
+            return 0
+        summary = heappage.analyze(heappage.HeapPage(raw, blkno) for blkno, raw in pages)
+        print_summary(summary, time.perf_counter() - started)
+        return 0
+
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        if args.block is not None:
+            for blkno, raw in heappage.fetch_pages(cur, args.relation, args.block, 1):
+                print_block(heappage.HeapPage(raw, blkno))
+            return 0
+        if args.save:
+            count = heappage.dump_relation(cur, args.relation, args.save, args.batch)
+            print(f"{count}개 페이지 저장: {args.save}")
+            return 0
+        summary = heappage.analyze(heappage.HeapPage(raw, blkno)
+                                   for blkno, raw in heappage.fetch_pages(cur, args.relation,
+                                                                          batch=args.batch))
+        print_summary(summary, time.perf_counter() - started)
+    finally:
+        cur.close()
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+fillfactor / HOT UPDATE 튜너
+============================
+
+lab07 시나리오 3은 HOT UPDATE 한 번을 보여줍니다. 이 도구는 테이블마다
+같은 정의/데이터의 복사본(<테이블>_ff)을 fillfactor별로 만들고, 여러 클라이언트가
+--duration초 동안 PK로 고른 행을 계속 UPDATE하면서 다음을 기록합니다.
+
+- HOT 비율: 문장마다 트랜잭션 안에서 읽은 HOT 행 수 / UPDATE 행 수 (전체, 후반 절반)
+- 테이블/인덱스 크기 변화 (--interval초마다 샘플)
+- 처리량 (행/초)과 문장 지연 시간 p50/p99
+
+끝에 후반 HOT 비율이 가장 좋은 수준인 설정 중 최종 크기가 가장 작은 fillfactor를 추천합니다.
+기본 UPDATE는 인덱스가 없는 컬럼만 바꾸며 (숫자 컬럼 +1), --set으로 바꿀 수 있습니다.
+원본 테이블은 읽기만 하고, 복사본은 끝나면 지웁니다.
+
+실행 방법:
+    python main.py hottune
+    python main.py hottune index_mvcc_test orders --duration 30 -c 8
+    python main.py hottune index_mvcc_test --set "data = data || 'x'" --fillfactors 100 90 70 --png
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from psycopg2 import errors, sql
+from tabulate import tabulate
+
+from common import charts, hot
+from common.clients import run_clients, wait_for_start
+from common.db import get_connection
+from common.histogram import LatencyHistogram
+
+COPY_SUFFIX = '_ff'
+INTERVAL = 1.0
+
+
+# ----------------------------------------------------------------------
+# 클라이언트 프로세스
+# ----------------------------------------------------------------------
+
+def _client(task):
+    """
+    start_at부터 duration초 동안 batch개 행을 UPDATE하고 커밋하기를 반복
+
+    커밋 전에 pg_stat_get_xact_tuples_hot_updated()로 그 문장의 HOT 행 수를 읽습니다.
+    키를 정렬해서 잠그므로 교착은 드물지만, 나면 되돌리고 센 뒤 계속합니다.
+    """
+    client_no, config, start_at = task
+    rng = random.Random(config['seed'] * 10_007 + client_no)
+    keys = config['keys']
+    batch = min(config['batch'], len(keys))
+
+    hist = LatencyHistogram()
+    events = []             # (시작 시각, UPDATE 행 수, HOT 행 수)
+    deadlocks = 0
+
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        wait_for_start(start_at)
+
+        deadline = start_at + config['duration']
+        while time.time() < deadline:
+            ids = sorted(rng.sample(keys, batch))
+            offset = time.time() - start_at
+            started = time.perf_counter_ns()
+            try:
+                cur.execute(config['query'], (ids,))
+                elapsed = time.perf_counter_ns() - started
+                updated, hot_rows = hot.xact_updates(cur, config['table'])
+                committing = time.perf_counter_ns()
+                conn.commit()
+                elapsed += time.perf_counter_ns() - committing
+            except errors.DeadlockDetected:
+                conn.rollback()
+                deadlocks += 1
+                continue
+            hist.record_ns(elapsed)
+            events.append((offset, updated, hot_rows))
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+    return {'hist': hist.to_dict(), 'events': events, 'deadlocks': deadlocks}
+
+
+# ----------------------------------------------------------------------
+# 설정 하나 실행
+# ----------------------------------------------------------------------
+
+def build_timeline(events, samples, duration, interval):
+    """interval초 구간마다 (끝 시각, 행/초, HOT 비율, 테이블 바이트, 인덱스 바이트)"""
+    buckets = max(1, int(round(duration / interval)))
+    updated = [0] * buckets
+    hot_rows = [0] * buckets
+    for offset, rows, hot_count in events:
+        i = min(buckets - 1, max(0, int(offset / interval)))
+        updated[i] += rows
+        hot_rows[i] += hot_count
+
+    timeline = []
+    for i in range(buckets):
+        end = (i + 1) * interval
+        size = next((s for s in reversed(samples) if s[0] <= end), samples[0])
+        timeline.append((end, updated[i] / interval, hot.hot_ratio(updated[i], hot_rows[i]), size[1], size[2]))
+    return timeline
+
+
+def run_fillfactor(config, table, fillfactor):
+    """table 복사본을 fillfactor로 만들고 UPDATE 부하를 실행한 결과 dict"""
+    copy = table + COPY_SUFFIX
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        hot.copy_table(cur, table, copy, fillfactor, autovacuum=config['autovacuum'])
+        cur.execute(sql.SQL("SELECT {} FROM {}").format(sql.Identifier(config['key']), sql.Identifier(copy)))
+        keys = [row[0] for row in cur.fetchall()]
+        initial = hot.sizes(cur, copy)
+        task_config = dict(config, table=copy, keys=keys,
+                           query=sql.SQL("UPDATE {} SET {} WHERE {} = ANY(%s)").format(
+                               sql.Identifier(copy), sql.SQL(config['set']),
+                               sql.Identifier(config['key'])).as_string(cur))
+
+        _, results, sampled = run_clients(
+            _client, config['clients'], task_config, config['interval'],
+            sample=lambda start_at: (time.time() - start_at, *hot.sizes(cur, copy)))
+        final = hot.sizes(cur, copy)
+        samples = [(0.0, *initial), *sampled, (config['duration'], *final)]
+    finally:
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(copy)))
+        cur.close()
+        conn.close()
+
+    hist = LatencyHistogram()
+    for c in results:
+        hist.merge(LatencyHistogram.from_dict(c['hist']))
+    events = sorted(e for c in results for e in c['events'])
+    half = config['duration'] / 2
+    updated = sum(rows for _, rows, _ in events)
+    hot_rows = sum(hot_count for _, _, hot_count in events)
+    steady = [(rows, hot_count) for offset, rows, hot_count in events if offset >= half]
+    return {
+        'fillfactor': fillfactor,
+        'rows': len(keys),
+        'updated': updated,
+        'overall_hot': hot.hot_ratio(updated, hot_rows),
+        'steady_hot': hot.hot_ratio(sum(r for r, _ in steady), sum(h for _, h in steady)),
+        'hist': hist,
+        'deadlocks': sum(c['deadlocks'] for c in results),
+        'initial': initial,
+        'final': final,
+        'final_bytes': final[0] + final[1],
+        'timeline': build_timeline(events, samples, config['duration'], config['interval']),
+    }
+
+
+# ----------------------------------------------------------------------
+# 출력
+# ----------------------------------------------------------------------
+
+def _pct(value):
+    return '-' if value is None else f"{value:.1%}"
+
+
+def _growth(before, after):
+    return f"{after / 1024:,.0f} (×{after / before:.2f})" if before else f"{after / 1024:,.0f}"
+
+
+def print_results(table, results, duration):
+    rows = []
+    for r in results:
+        s = r['hist'].summary((50, 99))
+        rows.append((
+            r['fillfactor'], f"{r['initial'][0] / 1024:,.0f}", _growth(r['initial'][0], r['final'][0]),
+            f"{r['initial'][1] / 1024:,.0f}", _growth(r['initial'][1], r['final'][1]),
+            f"{r['updated'] / duration:,.0f}", f"{s['p50'] / 1000:.2f}", f"{s['p99'] / 1000:.2f}",
+            _pct(r['overall_hot']), _pct(r['steady_hot']), r['deadlocks'],
+        ))
+    print(f"\n[{table}: fillfactor별 결과]")
+    print(tabulate(rows, headers=['fillfactor', '테이블 KB', '→ 최종 KB', '인덱스 KB', '→ 최종 KB',
+                                  '행/초', 'p50 ms', 'p99 ms', 'HOT 전체', 'HOT 후반', '교착'],
+                   tablefmt='psql'))
+
+
+def print_timeline(result, limit=12):
+    """구간이 많으면 고르게 limit개만"""
+    timeline = result['timeline']
+    step = max(1, len(timeline) // limit)
+    rows = [(f"{end:.0f}", f"{rate:,.0f}", _pct(ratio), f"{table_bytes / 1024:,.0f}", f"{index_bytes / 1024:,.0f}")
+            for end, rate, ratio, table_bytes, index_bytes in timeline[step - 1::step]]
+    print(f"\n[fillfactor {result['fillfactor']}: 시간별]")
+    print(tabulate(rows, headers=['초', '행/초', 'HOT', '테이블 KB', '인덱스 KB'], tablefmt='psql'))
+
+
+def print_recommendation(table, results, current):
+    best = hot.recommend(results)
+    if best is None:
+        print(f"\n{table}: UPDATE가 없어 추천할 수 없습니다.")
+        return
+    print(f"\n[{table} 추천] fillfactor = {best['fillfactor']} (현재 {current}), "
+          f"후반 HOT {_pct(best['steady_hot'])}, 최종 크기 {best['final_bytes'] / 1024:,.0f} KB")
+    if best['steady_hot'] is not None and best['steady_hot'] < 0.5:
+        print("  HOT 비율이 모든 설정에서 낮습니다: UPDATE가 인덱스 컬럼을 바꾸는지 (--set) 확인하세요.")
+    if best['fillfactor'] != current:
+        print(f"  ALTER TABLE {table} SET (fillfactor = {best['fillfactor']});")
+        print("  (새로 쓰는 페이지부터 적용되므로 기존 페이지는 VACUUM FULL 등으로 다시 써야 함)")
+    else:
+        print("  현재 설정 유지")
+
+
+def save_png(table, results, path=None):
+    plt = charts.pyplot()
+
+    fig, (ratio_ax, size_ax) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    for r in results:
+        times = [t[0] for t in r['timeline']]
+        ratio_ax.plot(times, [t[2] if t[2] is not None else float('nan') for t in r['timeline']],
+                      label=f"ff {r['fillfactor']}")
+        size_ax.plot(times, [(t[3] + t[4]) / 1024 for t in r['timeline']], label=f"ff {r['fillfactor']}")
+    ratio_ax.set_ylabel('HOT ratio')
+    ratio_ax.set_ylim(0, 1.05)
+    ratio_ax.set_title(f"{table}: HOT ratio and size by fillfactor")
+    ratio_ax.legend()
+    size_ax.set_ylabel('table + index KB')
+    size_ax.set_xlabel('seconds')
+
+    return charts.save(fig, f'hottune_{table}.png', path)
+
+
+def table_config(table, set_clause):
+    """PK와 SET 절 확인 (쓸 수 없으면 이유 문자열)"""
+    conn = get_connection(autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            key = hot.primary_key(cur, table)
+            if key is None:
+                return f"{table}: 단일 컬럼 PK가 없어 UPDATE할 행을 고를 수 없습니다."
+            set_clause = set_clause or hot.default_set_clause(cur, table)
+            if set_clause is None:
+                return f"{table}: 인덱스가 없는 컬럼이 없습니다. --set으로 SET 절을 지정하세요."
+            return {'key': key, 'set': set_clause, 'current': hot.current_fillfactor(cur, table)}
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py hottune',
+                                     description='fillfactor별 UPDATE 부하로 HOT 비율과 크기 증가를 비교해 추천')
+    parser.add_argument('tables', nargs='*', default=['index_mvcc_test'],
+                        help='테이블 (기본 index_mvcc_test, 단일 컬럼 PK 필요)')
+    parser.add_argument('--fillfactors', type=int, nargs='+', default=list(hot.FILLFACTORS),
+                        help=f"비교할 fillfactor (기본 {' '.join(map(str, hot.FILLFACTORS))})")
+    parser.add_argument('--set', help='UPDATE SET 절 (기본: 인덱스가 없는 숫자 컬럼 +1)')
+    parser.add_argument('--duration', type=float, default=20.0, help='설정마다 부하 시간 초 (기본 20)')
+    parser.add_argument('--batch', type=int, default=10, help='문장 하나가 UPDATE할 행 수 (기본 10)')
+    parser.add_argument('-c', '--clients', type=int, default=4, help='클라이언트 프로세스 수 (기본 4)')
+    parser.add_argument('--interval', type=float, default=INTERVAL,
+                        help=f'크기 샘플/시간별 구간 초 (기본 {INTERVAL:g})')
+    parser.add_argument('--no-autovacuum', action='store_true', help='복사본의 autovacuum을 끔 (pruning만)')
+    parser.add_argument('--timeline', action='store_true', help='설정마다 시간별 표 출력')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--png', action='store_true', help='labs/graphs/hottune_<테이블>.png 저장')
+    args = parser.parse_args(argv)
+
+    if any(not 10 <= ff <= 100 for ff in args.fillfactors):
+        parser.error('fillfactor는 10~100이어야 합니다')
+
+    for table in args.tables:
+        found = table_config(table, args.set)
+        if isinstance(found, str):
+            print(found)
+            continue
+        config = dict(found, duration=args.duration, batch=args.batch, clients=args.clients,
+                      interval=args.interval, autovacuum=not args.no_autovacuum, seed=args.seed)
+        print(f"\n=== {table}: UPDATE ... SET {found['set']} WHERE {found['key']} = ANY(...) "
+              f"({args.batch}행씩, 클라이언트 {args.clients}개, 설정마다 {args.duration:g}초) ===")
+
+        results = []
+        for fillfactor in sorted(set(args.fillfactors), reverse=True):
+            result = run_fillfactor(config, table, fillfactor)
+            print(f"  fillfactor {fillfactor}: {result['updated']:,}행 UPDATE, HOT {_pct(result['overall_hot'])}")
+            if args.timeline:
+                print_timeline(result)
+            results.append(result)
+
+        print_results(table, results, args.duration)
+        print("HOT 후반 = 부하 후반 절반의 HOT 비율 (초기 빈 공간이 소진된 뒤의 안정 상태)")
+        print_recommendation(table, results, found['current'])
+        if args.png:
+            print(f"\n[Graph Saved] {save_png(table, results)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+중복/겹치는 인덱스 검사
+=======================
+
+common.redundant로 pg_index 정의를 비교해 다른 인덱스가 대신할 수 있는 인덱스를 찾고,
+인덱스마다 크기, 스캔 수, 쓰기 증폭(INSERT 행당 µs, WAL B/행)을 보여줍니다.
+
+- duplicate: 정의가 완전히 같은 인덱스
+- prefix:    (a) 와 (a, b)처럼 키가 앞부분인 B-tree
+- include:   (customer_id) 와 (customer_id) INCLUDE (...)처럼 키가 같고 INCLUDE가 더 많은 인덱스
+- partial:   부분 인덱스를 조건 없는 인덱스가 대신할 수 있음
+
+쓰기 비용은 트랜잭션 안에서 인덱스를 DROP한 전후의 INSERT 탐침으로 재고 ROLLBACK합니다.
+측정하는 동안 테이블에 ACCESS EXCLUSIVE 락이 걸리므로 부하가 없을 때 실행하세요.
+(--no-measure는 정의 비교만 함)
+
+실행 방법:
+    python main.py indexdup
+    python main.py indexdup --table orders
+    python main.py indexdup --no-measure
+"""
+
+import argparse
+import sys
+
+from tabulate import tabulate
+
+from common import advisor, redundant
+from common.db import get_connection
+
+
+def _fmt(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def print_indexes(indexes):
+    print(tabulate(
+        [(i.table, i.name, i.definition(), f"{i.size_bytes / 1024:,.0f}", f"{i.scans:,}",
+          'PK' if i.primary else 'UNIQUE' if i.unique else i.constraint or '')
+         for i in indexes],
+        headers=['테이블', '인덱스', '정의', '크기 KB', 'idx_scan', '제약'], tablefmt='psql'))
+
+
+def print_findings(findings, costs):
+    if not findings:
+        print("\n다른 인덱스가 대신할 수 있는 인덱스가 없습니다.")
+        return
+    rows = []
+    for finding in findings:
+        index = finding.redundant
+        cost = costs.get(index.name, {})
+        rows.append((
+            finding.kind, index.name, finding.covered_by.name, f"{index.size_bytes / 1024:,.0f}",
+            f"{index.scans:,}", _fmt(cost.get('us_per_row'), '.1f'), _fmt(cost.get('wal_per_row'), ',.0f'),
+            _fmt(cost.get('rows_written'), ','), _fmt(cost.get('cost_ms'), ',.1f'),
+        ))
+    print(tabulate(rows, headers=['종류', '중복 인덱스', '대신할 인덱스', '크기 KB', 'idx_scan',
+                                  '쓰기 µs/행', 'WAL B/행', '쓰인 행', '쓰기 비용 ms'], tablefmt='psql'))
+    print("쓰기 µs/행, WAL B/행 = 인덱스를 DROP했을 때 INSERT 탐침이 줄어든 양 (행당)")
+    print("쓰기 비용 = (INSERT + HOT가 아닌 UPDATE 행 수) × 행당 µs, idx_scan이 있어도 대신할 인덱스가 처리 가능")
+
+    total = sum(f.redundant.size_bytes for f in findings)
+    print(f"\n정리하면 줄어드는 크기: {total / 1024 / 1024:,.1f} MB")
+    for finding in findings:
+        index = finding.redundant
+        print(f"\n[{finding.kind}] {index.name}: {index.definition()}")
+        print(f"  대신할 인덱스 {finding.covered_by.name}: {finding.covered_by.definition()}")
+        if finding.note:
+            print(f"  참고: {finding.note}")
+        comparison = costs.get(index.name, {}).get('comparison')
+        if comparison is not None:
+            print(f"  INSERT 탐침 (있음 → DROP): {comparison.text()}")
+        if index.constraint:
+            print(f"  제약 {index.constraint}이 쓰는 인덱스 → ALTER TABLE로 제약을 먼저 정리")
+        else:
+            print(f"  DROP INDEX CONCURRENTLY {index.name};")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py indexdup',
+                                     description='중복/겹치는 인덱스와 그 쓰기 비용')
+    parser.add_argument('--table', help='테이블 하나만 검사')
+    parser.add_argument('--schema', default='public', help='스키마 (기본 public)')
+    parser.add_argument('--all', action='store_true', help='검사한 인덱스 전체 목록도 출력')
+    parser.add_argument('--no-measure', action='store_true', help='쓰기 비용을 재지 않음 (락 없음)')
+    parser.add_argument('--probe-rows', type=int, default=advisor.PROBE_ROWS,
+                        help=f'탐침 INSERT 행 수 (기본 {advisor.PROBE_ROWS})')
+    parser.add_argument('--max-seconds', type=float, default=3.0, help='측정 하나의 최대 시간 (기본 3)')
+    args = parser.parse_args(argv)
+
+    conn = get_connection(autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            indexes = redundant.load_indexes(cur, args.schema, args.table)
+    finally:
+        conn.close()
+    if not indexes:
+        print("인덱스가 없습니다.")
+        return 1
+
+    if args.all:
+        print(f"\n[인덱스 {len(indexes)}개]")
+        print_indexes(indexes)
+
+    findings = redundant.find_redundant(indexes)
+    costs = {}
+    if findings and not args.no_measure:
+        print(f"\n중복 인덱스 {len(findings)}개의 쓰기 비용 측정 (DROP 후 ROLLBACK)")
+        for result in redundant.measure_write_costs(
+                findings, args.probe_rows, max_seconds=args.max_seconds,
+                on_result=lambda r: print(f"  {r['finding'].redundant.name}: "
+                                          f"{_fmt(r['us_per_row'], '.1f')} µs/행")):
+            costs[result['finding'].redundant.name] = result
+
+    print()
+    print_findings(findings, costs)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+락 대기 그래프 도구
+===================
+
+common.lockgraph로 pg_blocking_pids() 기반 대기 그래프를 읽어
+root blocker, 연쇄 깊이, 교착(cycle)을 보여줍니다.
+
+- watch: interval초마다 대기 트리를 출력하고, 끝나면 root별 경합 구간을 요약
+- bench: 세션 N개로 락을 부풀린 상태에서 v_lock_waits 뷰와 분석기의 조회 시간 비교
+    * 세션마다 공유 advisory lock을 --locks개 잡아 pg_locks 행 수를 늘림
+    * 첫 세션이 accounts 한 행을 UPDATE하고, --waiters개 세션이 같은 행을 UPDATE해서 대기
+    * 두 방법을 common.stats.measure로 반복 측정하고 신뢰구간으로 비교
+
+bench는 (세션 수 × --locks)개의 락 슬롯이 필요합니다.
+공유 락 테이블 크기는 max_locks_per_transaction × max_connections (기본 64 × 300)입니다.
+
+실행 방법:
+    python main.py locks watch                      # 1초 간격, Ctrl+C로 중단
+    python main.py locks watch -i 0.5 -d 60
+    python main.py locks bench -n 50 100 250        # 세션 수별 비교
+    python main.py locks bench -n 200 --locks 40 --waiters 100
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from tabulate import tabulate
+
+from common import sessions, stats
+from common.db import get_connection
+from common.lockgraph import LockGraph, LockHistory
+
+INTERVAL = 1.0
+SESSION_COUNTS = (50, 100, 200)
+LOCKS_PER_SESSION = 32
+WAITERS = 50
+READY_TIMEOUT = 30.0
+
+VIEW_QUERY = "SELECT * FROM v_lock_waits"
+TARGET_ROW = "UPDATE accounts SET balance = balance WHERE id = 1"
+
+
+# watch ------------------------------------------------------------------
+
+def print_graph(graph):
+    cycles = graph.cycles()
+    roots = graph.roots()
+    print(f"\n[{time.strftime('%H:%M:%S')}] 대기 {len(graph.waiters)}개, "
+          f"root {len(roots)}개, cycle {len(cycles)}개")
+    for root in roots:
+        total, longest = graph.wait_seconds(root)
+        print(f"  root {root}: 막힌 세션 {len(graph.blocked_set(root))}개, 깊이 {graph.depth(root)}, "
+              f"대기 합계 {total:.1f}s / 최대 {longest:.1f}s")
+        for line in graph.tree_lines(root):
+            print('    ' + line)
+    for cycle in cycles:
+        print(f"  ⚠ cycle: {' → '.join(map(str, cycle))} (deadlock_timeout 뒤 하나가 취소됨)")
+
+
+def watch(interval=INTERVAL, duration=None, quiet=False):
+    """interval초마다 대기 그래프를 읽고 LockHistory를 반환"""
+    history = LockHistory()
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    started = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            graph = LockGraph.capture(cur)
+            history.add(graph)
+            if graph.waiters and not quiet:
+                print_graph(graph)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cur.close()
+        conn.close()
+    return history
+
+
+def print_history(history):
+    episodes = history.finish()
+    print(f"\n표본 {history.samples}개, 경합 구간 {len(episodes)}개, cycle 관측 {history.cycles_seen}회")
+    if not episodes:
+        return
+    print(tabulate(
+        [(e['root'], f"{LockHistory.duration(e):.1f}", e['max_blocked'], e['max_depth'],
+          f"{e['max_wait']:.1f}", e['query'][:50]) for e in episodes],
+        headers=['root pid', '지속 초', '최대 막힌 수', '최대 깊이', '최대 대기 초', 'root 쿼리'],
+        tablefmt='psql'))
+
+
+# bench ------------------------------------------------------------------
+
+async def _wait_for_waiters(cur, count, timeout=READY_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+        graph = LockGraph.capture(cur)
+        if len(graph.waiters) >= count or time.monotonic() > deadline:
+            return graph
+        await asyncio.sleep(0.1)
+
+
+async def _blocked_update(session):
+    """대기 세션: 행을 얻으면 바로 롤백해서 다음 대기자가 이어받게 함"""
+    await session.execute(TARGET_ROW)
+    await session.rollback()
+
+
+def _lock_rows(cur):
+    cur.execute("SELECT count(*) FROM pg_locks")
+    return cur.fetchone()[0]
+
+
+def _measure_both(cur, options):
+    def view():
+        cur.execute(VIEW_QUERY)
+        cur.fetchall()
+
+    def graph():
+        g = LockGraph.capture(cur)
+        g.summary()
+        g.cycles()
+
+    a = stats.measure(view, label='v_lock_waits', **options)
+    b = stats.measure(graph, label='lockgraph', **options)
+    return a, b
+
+
+async def bench_once(count, locks=LOCKS_PER_SESSION, waiters=WAITERS, **options):
+    """세션 count개로 경합 상황을 만들고 두 조회 방법을 측정"""
+    waiters = min(waiters, count - 1)
+    group = await sessions.open_sessions(count, prefix='L')
+    holder, blocked = group[0], group[1:1 + waiters]
+    tasks = []
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    try:
+        await asyncio.gather(*(s.begin() for s in group))
+        await asyncio.gather(*(
+            s.execute("SELECT count(pg_advisory_xact_lock_shared(k)) FROM generate_series(1, %s) k",
+                      (locks,))
+            for s in group))
+        await holder.execute(TARGET_ROW)
+        tasks = [asyncio.create_task(_blocked_update(s)) for s in blocked]
+
+        graph = await _wait_for_waiters(cur, len(blocked))
+        lock_rows = _lock_rows(cur)
+        cur.execute(VIEW_QUERY)
+        view_rows = len(cur.fetchall())
+
+        loop = asyncio.get_running_loop()
+        a, b = await loop.run_in_executor(None, _measure_both, cur, options)
+        return {
+            'sessions': count, 'lock_rows': lock_rows, 'waiters': len(graph.waiters),
+            'view_rows': view_rows, 'edges': len(graph.edges()),
+            'roots': len(graph.roots()), 'depth': max((graph.depth(r) for r in graph.roots()), default=0),
+            'view': a, 'graph': b, 'comparison': stats.compare(b, a),
+        }
+    finally:
+        cur.close()
+        conn.close()
+        await holder.rollback()
+        if tasks:
+            # holder가 물러나면 대기자들이 차례로 행을 잡고 롤백
+            await asyncio.wait(tasks, timeout=READY_TIMEOUT)
+            for task in tasks:
+                task.cancel()
+        await asyncio.gather(*(s.rollback() for s in group[1 + len(blocked):]),
+                             return_exceptions=True)
+        await sessions.close_sessions(group)
+
+
+def bench(counts=SESSION_COUNTS, locks=LOCKS_PER_SESSION, waiters=WAITERS, **options):
+    results = []
+    for count in counts:
+        print(f"\n세션 {count}개 × advisory lock {locks}개, 대기자 {min(waiters, count - 1)}개 준비 중...")
+        result = sessions.run(bench_once(count, locks, waiters, **options))
+        print(f"  {result['view'].summary()}")
+        print(f"  {result['graph'].summary()}")
+        print(f"  → {result['comparison'].text()}")
+        results.append(result)
+
+    print()
+    print(tabulate(
+        [(r['sessions'], r['lock_rows'], r['waiters'], r['view_rows'], r['edges'], r['roots'], r['depth'],
+          f"{r['view'].median:.2f}", f"{r['graph'].median:.2f}",
+          f"{r['comparison'].ratio:.1f}x")
+         for r in results],
+        headers=['세션', 'pg_locks 행', '대기', '뷰 행', '간선', 'root', '깊이',
+                 '뷰 ms', '분석기 ms', '배율'],
+        tablefmt='psql'))
+    print("\n뷰 행 수와 간선 수가 다른 것은 정상입니다: 뷰는 같은 락을 쥔 세션만 짝짓고,")
+    print("pg_blocking_pids()는 락 큐에서 앞선 대기자(soft block)까지 blocker로 돌려줍니다.")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py locks',
+                                     description='pg_blocking_pids() 기반 락 대기 그래프 분석')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('watch', help='대기 트리를 주기적으로 출력하고 root별 경합 구간 요약')
+    p.add_argument('-i', '--interval', type=float, default=INTERVAL, help=f'샘플 간격 초 (기본 {INTERVAL:g})')
+    p.add_argument('-d', '--duration', type=float, help='수집 시간 초 (기본: Ctrl+C까지)')
+    p.add_argument('-q', '--quiet', action='store_true', help='트리 출력 없이 마지막 요약만')
+
+    p = sub.add_parser('bench', help='v_lock_waits 뷰와 분석기의 조회 시간 비교')
+    p.add_argument('-n', '--sessions', type=int, nargs='+', default=list(SESSION_COUNTS),
+                   help='세션 수 목록 (기본 50 100 200)')
+    p.add_argument('--locks', type=int, default=LOCKS_PER_SESSION,
+                   help=f'세션당 advisory lock 수 (기본 {LOCKS_PER_SESSION})')
+    p.add_argument('--waiters', type=int, default=WAITERS, help=f'같은 행을 기다리는 세션 수 (기본 {WAITERS})')
+    p.add_argument('--max-seconds', type=float, default=stats.MAX_SECONDS, help='방법별 최대 측정 시간')
+    args = parser.parse_args(argv)
+
+    if args.command == 'watch':
+        print("락 대기 그래프 감시 중 (Ctrl+C로 중단)")
+        print_history(watch(args.interval, args.duration, args.quiet))
+    else:
+        if min(args.sessions) < 2:
+            parser.error('세션은 2개 이상이어야 합니다 (holder + 대기자)')
+        bench(args.sessions, args.locks, args.waiters, max_seconds=args.max_seconds)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+병렬 시나리오 실행기
+====================
+
+labs/lab*.py의 scenario_N_* 함수를 모두 찾아 lab 단위로 프로세스 풀에서 동시에 실행합니다.
+
+같은 lab의 시나리오는 앞 시나리오가 남긴 상태에 기대므로 (예: lab05 시나리오 2~4는
+시나리오 1이 만든 dead tuple을 사용) 한 워커에서 정의 순서대로 실행하고,
+서로 다른 lab끼리만 병렬로 실행합니다.
+
+각 워커 프로세스는 시드된 템플릿 DB를 CREATE DATABASE ... TEMPLATE로 복제한
+자기만의 데이터베이스를 사용하므로, 모두 accounts를 수정하는 lab끼리도
+서로 충돌하지 않습니다. 전체 실행 시간은 가장 느린 lab에 맞춰집니다.
+
+실행 방법:
+    python main.py run                  # 전체 시나리오
+    python main.py run -k lab04         # 이름에 lab04가 포함된 시나리오만
+    python main.py run --list           # 실행 대상만 출력
+    python main.py run -w 4 -v          # 워커 4개, 시나리오 출력 모두 표시
+    python main.py run --reset          # lab마다 워커 DB를 템플릿 상태로 교체
+"""
+
+import argparse
+import builtins
+import contextlib
+import glob
+import importlib
+import inspect
+import io
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import util
+
+from tabulate import tabulate
+
+LABS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
+
+from common import db, reset
+
+SCENARIO_PATTERN = re.compile(r'^scenario_\d+')
+DEFAULT_TEMPLATE = 'mvcc_lab_template'
+
+# 워커 프로세스 전역 상태
+_worker_db = None
+_worker_snapshot = None
+_worker_dirty = False
+
+
+def group_by_lab(scenarios):
+    """[(모듈 이름, [함수 이름, ...]), ...] — lab 순서, 정의 순서 유지"""
+    labs = {}
+    for module_name, func_name in scenarios:
+        labs.setdefault(module_name, []).append(func_name)
+    return list(labs.items())
+
+
+def discover_scenarios(pattern=None):
+    """
+    (모듈 이름, 함수 이름) 목록을 lab 순서, 정의 순서대로 반환
+
+    pattern이 주어지면 'lab04_concurrent.scenario_1_row_level_lock' 형태의
+    전체 이름에 부분 문자열로 포함된 것만 남깁니다.
+    """
+    found = []
+    for path in sorted(glob.glob(os.path.join(LABS_DIR, 'lab*.py'))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module(module_name)
+        funcs = [
+            func for name, func in inspect.getmembers(module, inspect.isfunction)
+            if SCENARIO_PATTERN.match(name) and func.__module__ == module_name
+        ]
+        funcs.sort(key=lambda f: f.__code__.co_firstlineno)
+        for func in funcs:
+            full_name = f"{module_name}.{func.__name__}"
+            if pattern and pattern not in full_name:
+                continue
+            found.append((module_name, func.__name__))
+    return found
+
+
+def ensure_template(template, source=None, refresh=False):
+    """
+    시드된 템플릿 DB 준비
+
+    템플릿이 없거나 refresh=True면 source(기본: 현재 설정의 DB)를 복제해 만듭니다.
+    복제 중에는 source에 다른 세션이 없어야 합니다.
+    """
+    source = source or db.DB_CONFIG['database']
+    if refresh:
+        db.drop_database(template)
+    if not db.database_exists(template):
+        print(f"템플릿 DB 생성: {template} (TEMPLATE {source})")
+        db.clone_database(template, source, strategy=reset.CLONE_STRATEGY)
+
+
+def _non_interactive_input(prompt=""):
+    """워커에서는 Enter 대기 없이 바로 진행"""
+    if prompt:
+        print(prompt)
+    return ""
+
+
+def _init_worker(template, prefix, reset_each):
+    """워커 초기화: 템플릿을 복제한 전용 DB를 만들고 풀을 그 DB로 전환"""
+    global _worker_db, _worker_snapshot
+    _worker_db = f"{prefix}_{os.getpid()}"
+    db.clone_database(_worker_db, template, strategy=reset.CLONE_STRATEGY)
+    db.configure(database=_worker_db)
+    builtins.input = _non_interactive_input
+
+    if reset_each:
+        _worker_snapshot = reset.DatabaseSnapshot(template, _worker_db)
+        _worker_snapshot.prepare()
+        # 워커 종료 시 백그라운드 복제를 마무리하고 예비 DB 정리
+        util.Finalize(None, _worker_snapshot.close, exitpriority=10)
+
+
+def _run_lab(module_name, func_names):
+    """워커에서 lab 하나의 시나리오를 순서대로 실행하고 시나리오별 결과 목록을 반환"""
+    global _worker_dirty
+    module = importlib.import_module(module_name)
+
+    # 이전 lab이 남긴 변경을 템플릿 교체로 되돌림
+    if _worker_snapshot is not None and _worker_dirty:
+        _worker_snapshot.restore()
+    _worker_dirty = True
+
+    return [_run_scenario(module_name, getattr(module, func_name)) for func_name in func_names]
+
+
+def _run_scenario(module_name, func):
+    """시나리오 하나를 실행하고 출력/결과를 모아 반환"""
+    buffer = io.StringIO()
+    status, error = 'ok', None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(buffer):
+        try:
+            func()
+        except Exception:
+            status, error = 'failed', traceback.format_exc()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'lab': module_name,
+        'scenario': func.__name__,
+        'status': status,
+        'elapsed': elapsed,
+        'output': buffer.getvalue(),
+        'error': error,
+        'database': _worker_db,
+    }
+
+
+def run_parallel(scenarios, workers, template, prefix, verbose=False, keep=False,
+                 reset_each=False):
+    """lab별로 시나리오를 프로세스 풀에서 실행하고 결과 목록을 반환"""
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(template, prefix, reset_each)) as pool:
+            futures = {
+                pool.submit(_run_lab, module_name, func_names): (module_name, func_names)
+                for module_name, func_names in group_by_lab(scenarios)
+            }
+            for future in as_completed(futures):
+                module_name, func_names = futures[future]
+                try:
+                    lab_results = future.result()
+                except Exception as e:
+                    # 워커 초기화 실패 등 시나리오 밖의 오류
+                    lab_results = [{
+                        'lab': module_name, 'scenario': func_name, 'status': 'error',
+                        'elapsed': 0.0, 'output': '', 'error': repr(e), 'database': None,
+                    } for func_name in func_names]
+                for result in lab_results:
+                    results.append(result)
+                    mark = 'OK ' if result['status'] == 'ok' else 'ERR'
+                    print(f"[{mark}] {result['lab']}.{result['scenario']} "
+                          f"({result['elapsed']:.2f}초, {result['database']})")
+                    if verbose and result['output']:
+                        print(result['output'])
+                    if result['error']:
+                        print(result['error'])
+    finally:
+        if not keep:
+            for name in db.list_databases(prefix + '_'):
+                db.drop_database(name)
+    return results
+
+
+def print_summary(results, scenarios, wall_time):
+    order = {key: i for i, key in enumerate(scenarios)}
+    rows = [
+        (r['lab'], r['scenario'], r['status'], f"{r['elapsed']:.2f}")
+        for r in sorted(results, key=lambda r: order[(r['lab'], r['scenario'])])
+    ]
+    print(tabulate(rows, headers=['lab', 'scenario', 'status', 'sec'], tablefmt='psql'))
+
+    serial_time = sum(r['elapsed'] for r in results)
+    lab_times = {}
+    for r in results:
+        lab_times[r['lab']] = lab_times.get(r['lab'], 0.0) + r['elapsed']
+    slowest = max(lab_times.values(), default=0.0)
+    failed = sum(1 for r in results if r['status'] != 'ok')
+    print(f"\n시나리오 {len(results)}개, 실패 {failed}개")
+    print(f"순차 실행 시간 합계: {serial_time:.1f}초")
+    print(f"가장 느린 lab:        {slowest:.1f}초")
+    print(f"실제 경과 시간:       {wall_time:.1f}초")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='main.py run',
+        description='lab 시나리오를 워커별 복제 DB에서 병렬 실행합니다.')
+    parser.add_argument('-k', '--filter', help='lab.scenario 이름에 포함될 부분 문자열')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='워커 프로세스 수 (기본: min(lab 수, 8))')
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE,
+                        help=f'워커 DB의 원본이 될 템플릿 DB (기본: {DEFAULT_TEMPLATE})')
+    parser.add_argument('--refresh-template', action='store_true',
+                        help='현재 DB에서 템플릿을 다시 만듦')
+    parser.add_argument('--reset', action='store_true',
+                        help='lab 실행 전마다 워커 DB를 템플릿 상태로 교체')
+    parser.add_argument('--keep', action='store_true', help='실행 후 워커 DB를 삭제하지 않음')
+    parser.add_argument('--list', action='store_true', help='실행 대상 시나리오만 출력')
+    parser.add_argument('-v', '--verbose', action='store_true', help='시나리오 출력 표시')
+    args = parser.parse_args(argv)
+
+    scenarios = discover_scenarios(args.filter)
+    if args.list:
+        for module_name, func_name in scenarios:
+            print(f"{module_name}.{func_name}")
+        return 0
+    if not scenarios:
+        print("실행할 시나리오가 없습니다.")
+        return 1
+
+    workers = args.workers or min(len(group_by_lab(scenarios)), 8)
+    prefix = f"mvcc_lab_run{os.getpid()}"
+
+    ensure_template(args.template, refresh=args.refresh_template)
+    print(f"lab {len(group_by_lab(scenarios))}개 (시나리오 {len(scenarios)}개)를 워커 {workers}개로 실행합니다.\n")
+
+    start = time.perf_counter()
+    results = run_parallel(scenarios, workers, args.template, prefix,
+                           verbose=args.verbose, keep=args.keep, reset_each=args.reset)
+    wall_time = time.perf_counter() - start
+
+    print()
+    print_summary(results, scenarios, wall_time)
+    return 0 if all(r['status'] == 'ok' for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+스냅샷 관리 도구
+================
+
+mvcc_lab을 알려진 상태로 빠르게 되돌리기 위한 스냅샷을 만들고 복원합니다.
+
+실행 방법:
+    python main.py snapshot create base          # 현재 DB → mvcc_lab__snap_base
+    python main.py snapshot restore base         # 템플릿 교체로 복원
+    python main.py snapshot list
+    python main.py snapshot drop base
+
+    # 테이블 단위 COPY BINARY 스냅샷 (labs/.snapshots/<이름>/)
+    python main.py snapshot capture-tables base accounts vacuum_test orders
+    python main.py snapshot restore-tables base
+    python main.py snapshot restore-tables base --drop-extra   # 캡처 이후에 생긴 테이블도 삭제
+"""
+
+import argparse
+import sys
+
+from common import reset
+
+DEFAULT_TABLES = [
+    'accounts', 'vacuum_test', 'doctors_on_call',
+    'index_mvcc_test', 'products_json', 'sensor_data', 'orders',
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py snapshot',
+                                     description='데이터베이스 스냅샷 생성/복원')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('create', help='현재 DB를 템플릿 스냅샷으로 저장')
+    p.add_argument('name', nargs='?', default='base')
+    p.add_argument('--replace', action='store_true', help='같은 이름의 스냅샷을 덮어씀')
+    p.add_argument('--force', action='store_true', help='원본 DB에 접속한 세션을 종료')
+
+    p = sub.add_parser('restore', help='템플릿 교체로 DB 복원')
+    p.add_argument('name', nargs='?', default='base')
+
+    sub.add_parser('list', help='스냅샷 목록')
+
+    p = sub.add_parser('drop', help='스냅샷 삭제')
+    p.add_argument('name')
+
+    p = sub.add_parser('capture-tables', help='테이블을 COPY BINARY 파일로 저장')
+    p.add_argument('name')
+    p.add_argument('tables', nargs='*', default=DEFAULT_TABLES)
+
+    p = sub.add_parser('restore-tables', help='COPY BINARY 파일로 테이블 복원')
+    p.add_argument('name')
+    p.add_argument('--drop-extra', action='store_true',
+                   help='캡처 이후에 생긴 public 테이블을 모두 삭제 (다른 도구가 만든 테이블 포함)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'create':
+        snapshot = reset.create_snapshot(args.name, replace=args.replace, force=args.force)
+        print(f"스냅샷 생성: {snapshot.template} (예비 DB: {snapshot.spare})")
+    elif args.command == 'restore':
+        snapshot = reset.open_snapshot(args.name)
+        elapsed = snapshot.restore(background=False)
+        print(f"{snapshot.target} ← {snapshot.template} 교체 완료 ({elapsed * 1000:.1f}ms)")
+    elif args.command == 'list':
+        for name in reset.list_snapshots():
+            print(name)
+    elif args.command == 'drop':
+        reset.drop_snapshot(args.name)
+        print(f"스냅샷 삭제: {args.name}")
+    elif args.command == 'capture-tables':
+        snapshot = reset.TableSnapshot(args.name)
+        snapshot.capture(args.tables)
+        print(f"테이블 {len(args.tables)}개 저장: {snapshot.path}")
+    elif args.command == 'restore-tables':
+        snapshot = reset.TableSnapshot(args.name)
+        elapsed = snapshot.restore(drop_extra=args.drop_extra)
+        print(f"테이블 복원 완료 ({elapsed * 1000:.1f}ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
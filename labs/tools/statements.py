@@ -0,0 +1,166 @@
+"""
+pg_stat_statements 구간 통계 도구
+=================================
+
+lab10 시나리오 1은 pg_stat_statements의 누적값을 한 번 읽습니다.
+누적값으로는 "방금 전부터 느려진 쿼리"가 묻히므로, 이 도구는 일정 간격으로
+스냅샷을 찍어 queryid별 델타를 labs/results/statements.db에 쌓고 구간 단위로 보여줍니다.
+
+저장 필드: calls, exec_ms, rows, blks_hit, blks_read, blks_dirtied, wal_bytes
+보존: 원본 24시간 → 1분 버킷 7일 → 1시간 버킷 90일 (common.tsdb)
+
+실행 방법:
+    python main.py statements collect -i 10            # Ctrl+C까지 10초 간격 수집
+    python main.py statements collect -i 5 -d 600 --live
+    python main.py statements top --since 15m --by exec_ms
+    python main.py statements show <queryid> --since 6h --bucket 5m
+    python main.py statements compact
+"""
+
+import argparse
+import re
+import sys
+import time
+from datetime import datetime
+
+from tabulate import tabulate
+
+from common import pgss
+
+SORT_KEYS = ('exec_ms', 'calls', 'blks_read', 'blks_dirtied', 'wal_bytes', 'rows')
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(text):
+    """'90', '15m', '6h', '7d' → 초"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd]?)', text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"기간 형식이 잘못됨: {text} (예: 30s, 15m, 6h, 7d)")
+    return float(match.group(1)) * UNITS[match.group(2) or 's']
+
+
+def _preview(text, width=60):
+    text = text or ''
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+def _row(key, values, window, label):
+    calls = values['calls']
+    hit, read = values['blks_hit'], values['blks_read']
+    return (
+        key,
+        f"{calls:.0f}",
+        f"{calls / window:.2f}",
+        f"{values['exec_ms']:.1f}",
+        f"{values['exec_ms'] / calls:.3f}" if calls else '-',
+        f"{100 * hit / (hit + read):.1f}" if hit + read else '-',
+        f"{read:.0f}",
+        f"{values['blks_dirtied']:.0f}",
+        f"{values['wal_bytes'] / 1024:.1f}",
+        _preview(label),
+    )
+
+
+HEADERS = ['queryid', 'calls', 'calls/s', 'exec ms', 'mean ms', 'hit %', 'read',
+           'dirtied', 'WAL kB', 'query']
+
+
+def print_top(store, since, by='exec_ms', limit=10):
+    now = time.time()
+    totals = store.aggregate(since=now - since)
+    if not totals:
+        print("저장된 구간이 없습니다. 먼저 collect를 실행하세요.")
+        return
+    labels = store.labels()
+    # 수집을 시작한 지 since초가 안 됐으면 실제로 덮인 시간으로 나눔
+    window = min(since, max(values['seconds'] for values in totals.values()))
+    ranked = sorted(totals.items(), key=lambda item: item[1][by], reverse=True)[:limit]
+    print(f"최근 {window:.0f}초, {by} 기준 상위 {len(ranked)}개")
+    print(tabulate([_row(key, values, window, labels.get(key)) for key, values in ranked],
+                   headers=HEADERS, tablefmt='psql'))
+
+
+def print_series(store, key, since, bucket):
+    now = time.time()
+    points = store.buckets(key, bucket=bucket, since=now - since)
+    if not points:
+        print(f"queryid {key}의 구간이 없습니다.")
+        return
+    print(_preview(store.labels().get(key), 120))
+    rows = []
+    for ts, values in points:
+        calls = values['calls']
+        rows.append((
+            datetime.fromtimestamp(ts).strftime('%m-%d %H:%M:%S'),
+            f"{calls:.0f}",
+            f"{values['exec_ms']:.1f}",
+            f"{values['exec_ms'] / calls:.3f}" if calls else '-',
+            f"{values['blks_read']:.0f}",
+            f"{values['blks_dirtied']:.0f}",
+            f"{values['wal_bytes'] / 1024:.1f}",
+        ))
+    print(tabulate(rows, headers=['구간 시작', 'calls', 'exec ms', 'mean ms', 'read',
+                                  'dirtied', 'WAL kB'], tablefmt='psql'))
+
+
+def print_live(seconds, deltas, limit=5):
+    """수집 중 구간마다 실행 시간 상위 쿼리 한 줄씩"""
+    stamp = datetime.now().strftime('%H:%M:%S')
+    calls = sum(d['calls'] for d in deltas.values())
+    exec_ms = sum(d['exec_ms'] for d in deltas.values())
+    print(f"[{stamp}] {seconds:.1f}초: 쿼리 {len(deltas)}종, {calls / seconds:.1f} calls/s, "
+          f"실행 {exec_ms:.1f}ms")
+    top = sorted(deltas.items(), key=lambda item: item[1]['exec_ms'], reverse=True)[:limit]
+    for queryid, d in top:
+        print(f"    {queryid:>22}  {d['calls']:>7.0f} calls  {d['exec_ms']:>9.1f} ms  "
+              f"read {d['blks_read']:.0f}  WAL {d['wal_bytes'] / 1024:.1f}kB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py statements',
+                                     description='pg_stat_statements 델타 수집/조회')
+    parser.add_argument('--db', default=pgss.STORE_PATH, help='시계열 저장소 파일 경로')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('collect', help='스냅샷을 일정 간격으로 찍어 델타 저장')
+    p.add_argument('-i', '--interval', type=parse_duration, default=pgss.INTERVAL,
+                   help=f'스냅샷 간격 (기본 {pgss.INTERVAL:g}s)')
+    p.add_argument('-d', '--duration', type=parse_duration, help='수집 시간 (기본: Ctrl+C까지)')
+    p.add_argument('--live', action='store_true', help='구간마다 상위 쿼리 출력')
+
+    p = sub.add_parser('top', help='구간 합계 상위 쿼리')
+    p.add_argument('--since', type=parse_duration, default=parse_duration('15m'),
+                   help='조회 구간 (기본 15m)')
+    p.add_argument('--by', choices=SORT_KEYS, default='exec_ms')
+    p.add_argument('-n', '--limit', type=int, default=10)
+
+    p = sub.add_parser('show', help='queryid 하나의 구간별 값')
+    p.add_argument('queryid')
+    p.add_argument('--since', type=parse_duration, default=parse_duration('1h'))
+    p.add_argument('--bucket', type=parse_duration, default=parse_duration('1m'))
+
+    sub.add_parser('compact', help='보존 기간이 지난 구간을 다운샘플링/삭제')
+
+    args = parser.parse_args(argv)
+    store = pgss.open_store(args.db)
+    try:
+        if args.command == 'collect':
+            print(f"{args.interval:g}초 간격으로 수집 → {args.db} (Ctrl+C로 종료)")
+            collector = pgss.StatementsCollector(store, interval=args.interval)
+            collector.run(duration=args.duration, on_sample=print_live if args.live else None)
+            print(f"\n구간 {collector.samples}개 저장, 해상도별 점 수: {store.stats()}")
+        elif args.command == 'top':
+            print_top(store, args.since, args.by, args.limit)
+        elif args.command == 'show':
+            print_series(store, args.queryid, args.since, args.bucket)
+        elif args.command == 'compact':
+            for resolution, merged, deleted in store.compact():
+                print(f"  해상도 {resolution}s: 합친 점 {merged}, 지운 점 {deleted}")
+            print(f"해상도별 점 수: {store.stats()}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+대기 이벤트 샘플링 프로파일러
+=============================
+
+v_active_transactions는 상태와 쿼리만 보여줘서, 백엔드가 시간을 어디에 쓰는지
+(락 대기인지, I/O인지, CPU인지) 알 수 없습니다. 이 도구는 pg_stat_activity를
+짧은 간격(기본 10ms)으로 읽어 쿼리별/대기 이벤트별로 표본을 모읍니다.
+
+- 요약 표: 대기 유형별, 대기 이벤트별, 쿼리별 (표본 수, 비율, 추정 시간)
+- folded stack 파일: labs/results/waitprof_<시각>.folded
+    flamegraph.pl waitprof_*.folded > waits.svg   (또는 speedscope.app에 업로드)
+- 추정 시간 = 표본 수 × 간격, 평균 활성 세션 = 표본 수 / tick 수
+
+다른 터미널에서 부하를 돌리면서 실행하세요.
+
+실행 방법:
+    python main.py waitprof -d 30                  # 30초, 10ms 간격
+    python main.py workload -c 16 -d 30 & python main.py waitprof -d 30
+    python main.py waitprof -d 60 -i 0.005 --all-databases
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from tabulate import tabulate
+
+from common import timing
+from common.activity import WaitProfile, sample_activity
+from common.db import get_connection
+
+INTERVAL = 0.01
+DURATION = 30.0
+TOP_N = 15
+
+
+def profile(duration=DURATION, interval=INTERVAL, all_databases=False, include_idle=False):
+    """
+    duration초 동안 interval초 간격으로 표본을 모아 WaitProfile을 반환
+
+    조회가 interval보다 오래 걸리면 밀린 tick은 건너뛰고 (표본 시각이 몰리지 않도록)
+    건너뛴 수를 skipped에 기록합니다.
+    """
+    result = WaitProfile(interval)
+    conn = get_connection(autocommit=True)
+    cur = conn.cursor()
+    started = time.monotonic()
+    tick = 0
+    try:
+        while time.monotonic() - started < duration:
+            result.add(sample_activity(cur, all_databases, include_idle))
+            tick += 1
+            next_tick = started + tick * interval
+            now = time.monotonic()
+            if now > next_tick:
+                missed = int((now - next_tick) // interval) + 1
+                result.skipped += missed
+                tick += missed
+                next_tick += missed * interval
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cur.close()
+        conn.close()
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def _breakdown(waits, total):
+    return ', '.join(f"{k} {100 * n / total:.0f}%" for k, n in list(waits.items())[:3])
+
+
+def print_summary(result, top=TOP_N):
+    print(f"\n표본 {result.samples}개 / tick {result.ticks}회 "
+          f"({result.elapsed:.1f}초, 실제 간격 {result.elapsed / max(result.ticks, 1) * 1000:.1f}ms, "
+          f"건너뛴 tick {result.skipped})")
+    print(f"평균 활성 세션: {result.average_active_sessions:.2f}")
+    if not result.samples:
+        print("활성 백엔드가 없었습니다. 부하를 돌리면서 실행하세요.")
+        return
+
+    print("\n[대기 유형별]")
+    print(tabulate([(k, n, f"{pct:.1f}", f"{sec:.2f}") for k, n, pct, sec in result.by_wait_type()],
+                   headers=['대기 유형', '표본', '%', '추정 초'], tablefmt='psql'))
+
+    print("\n[대기 이벤트별]")
+    print(tabulate([(k, n, f"{pct:.1f}", f"{sec:.2f}")
+                    for k, n, pct, sec in result.by_wait_event()[:top]],
+                   headers=['대기 이벤트', '표본', '%', '추정 초'], tablefmt='psql'))
+
+    print("\n[쿼리별]")
+    print(tabulate([(label[:70], n, f"{pct:.1f}", f"{sec:.2f}", _breakdown(waits, n))
+                    for label, n, pct, sec, waits in result.by_query()[:top]],
+                   headers=['쿼리 (query_id)', '표본', '%', '추정 초', '주요 대기'], tablefmt='psql'))
+
+    verdict = result.verdict()
+    hints = {
+        'CPU': 'CPU 바운드: 실행 계획/연산량을 줄이는 쪽이 효과적',
+        'Lock': '락 바운드: 같은 행/테이블을 두고 경합 (lab04/lab06 참고)',
+        'LWLock': '내부 경량 락 경합: WAL 삽입, 버퍼 매핑 등',
+        'IO': 'I/O 바운드: 캐시 히트율, 인덱스, shared_buffers 확인',
+        'Client': '클라이언트 대기: 애플리케이션/네트워크 쪽 지연',
+        'IPC': '프로세스 간 대기: 병렬 쿼리, 동기 복제 등',
+    }
+    print(f"\n→ 가장 많은 대기 유형: {verdict} ({hints.get(verdict, '')})")
+
+
+def write_folded(result, path=None):
+    path = path or os.path.join(timing.RESULTS_DIR,
+                                f"waitprof_{time.strftime('%Y%m%d_%H%M%S')}.folded")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(result.folded()) + '\n')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py waitprof',
+                                     description='pg_stat_activity 샘플링으로 대기 이벤트 프로파일 수집')
+    parser.add_argument('-d', '--duration', type=float, default=DURATION,
+                        help=f'수집 시간 초 (기본 {DURATION:g})')
+    parser.add_argument('-i', '--interval', type=float, default=INTERVAL,
+                        help=f'샘플 간격 초 (기본 {INTERVAL:g})')
+    parser.add_argument('--all-databases', action='store_true', help='다른 DB의 백엔드도 포함')
+    parser.add_argument('--include-idle', action='store_true', help='idle 세션도 포함')
+    parser.add_argument('-n', '--top', type=int, default=TOP_N, help='표에 보여줄 행 수')
+    parser.add_argument('-o', '--output', help='folded stack 파일 경로')
+    args = parser.parse_args(argv)
+
+    print(f"{args.duration:g}초 동안 {args.interval * 1000:g}ms 간격으로 샘플링 (Ctrl+C로 중단)")
+    result = profile(args.duration, args.interval, args.all_databases, args.include_idle)
+    print_summary(result, args.top)
+    if result.samples:
+        print(f"\nfolded stack 저장: {write_folded(result, args.output)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
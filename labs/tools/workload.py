@@ -0,0 +1,420 @@
+"""
+accounts 송금 부하 생성기
+=========================
+
+lab04의 동시 쓰기 패턴을 여러 클라이언트 프로세스로 오래 돌려서
+처리량과 지연 시간 분포(p50/p99/p99.9)를 측정합니다.
+
+송금 방식 (--mix로 비율 지정):
+- update:     UPDATE 두 번 (출금 → 입금, 순서가 무작위라 데드락 가능)
+- for_update: SELECT ... ORDER BY id FOR UPDATE로 두 행을 잠근 뒤 UPDATE
+- optimistic: 읽은 행 버전이 그대로일 때만 UPDATE (lab04 update_with_version 패턴)
+              accounts에는 version 컬럼이 없으므로 xmin을 버전으로 사용
+
+데드락, 직렬화 실패, 버전 불일치는 롤백 후 재시도하며,
+지연 시간은 재시도를 포함한 송금 한 건의 전체 시간입니다.
+
+부하용 계좌(load_N)를 --accounts개 만들어 그 안에서만 송금하고 끝나면 삭제하므로
+Alice/Bob/Charlie 잔액은 바뀌지 않습니다. --accounts 0이면 기존 계좌를 그대로 씁니다.
+실행 후 잔액 합계가 변하지 않았는지(갱신 손실 없음)도 확인합니다.
+
+실행 방법:
+    python main.py workload -c 8 -d 30
+    python main.py workload -c 1 2 4 8 16 32 -d 15         # 클라이언트 수별 확장성
+    python main.py workload --mix optimistic=1 --accounts 10
+    python main.py workload --isolation "REPEATABLE READ"
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import psycopg2
+from psycopg2 import errors
+from tabulate import tabulate
+
+from common import timing
+from common.clients import start_time, wait_for_start
+from common.db import get_connection, run_sql
+from common.histogram import LatencyHistogram
+
+STRATEGIES = ('update', 'for_update', 'optimistic')
+DEFAULT_MIX = 'update=1,for_update=1,optimistic=1'
+LOAD_ACCOUNT_PREFIX = 'load_'
+LOAD_ACCOUNT_PATTERN = r'load\_%'
+LOAD_ACCOUNT_BALANCE = 100_000
+MAX_RETRIES = 20
+
+# 재시도하면 성공할 수 있는 오류
+RETRYABLE = (errors.DeadlockDetected, errors.SerializationFailure)
+
+
+class VersionConflict(Exception):
+    """optimistic 송금에서 읽은 뒤 다른 트랜잭션이 행을 바꾼 경우"""
+
+
+# ----------------------------------------------------------------------
+# 송금 트랜잭션
+# ----------------------------------------------------------------------
+
+def transfer_update(cur, src, dst, amount):
+    """잠금 없이 UPDATE 두 번"""
+    cur.execute("UPDATE accounts SET balance = balance - %s WHERE id = %s", (amount, src))
+    cur.execute("UPDATE accounts SET balance = balance + %s WHERE id = %s", (amount, dst))
+
+
+def transfer_for_update(cur, src, dst, amount):
+    """두 행을 id 순서로 잠근 뒤 읽은 잔액으로 UPDATE (Pessimistic Locking)"""
+    cur.execute("""
+        SELECT id, balance FROM accounts
+        WHERE id IN (%s, %s) ORDER BY id FOR UPDATE
+    """, (src, dst))
+    balances = dict(cur.fetchall())
+    cur.execute("UPDATE accounts SET balance = %s WHERE id = %s", (balances[src] - amount, src))
+    cur.execute("UPDATE accounts SET balance = %s WHERE id = %s", (balances[dst] + amount, dst))
+
+
+def transfer_optimistic(cur, src, dst, amount):
+    """
+    읽은 xmin이 그대로일 때만 UPDATE (Optimistic Locking)
+
+    다른 트랜잭션이 먼저 행을 바꿨다면 새 버전의 xmin이 달라서
+    UPDATE가 0행을 수정하고 VersionConflict가 발생합니다.
+    """
+    cur.execute("SELECT id, balance, xmin::text FROM accounts WHERE id IN (%s, %s)", (src, dst))
+    rows = {row[0]: row[1:] for row in cur.fetchall()}
+    for account_id, delta in ((src, -amount), (dst, amount)):
+        balance, version = rows[account_id]
+        cur.execute("""
+            UPDATE accounts SET balance = %s
+            WHERE id = %s AND xmin = %s::xid
+        """, (balance + delta, account_id, version))
+        if cur.rowcount == 0:
+            raise VersionConflict(account_id)
+
+
+TRANSFERS = {
+    'update': transfer_update,
+    'for_update': transfer_for_update,
+    'optimistic': transfer_optimistic,
+}
+
+
+# ----------------------------------------------------------------------
+# 클라이언트 프로세스
+# ----------------------------------------------------------------------
+
+class IntervalStats:
+    """한 구간 동안 송금 방식별 히스토그램과 카운터"""
+
+    def __init__(self):
+        self.hists = {name: LatencyHistogram() for name in STRATEGIES}
+        self.counts = {name: [0, 0, 0] for name in STRATEGIES}   # 커밋, 재시도, 실패
+
+    def to_message(self):
+        return ({name: h.to_dict() for name, h in self.hists.items() if h.count},
+                {name: c for name, c in self.counts.items() if any(c)})
+
+
+def _client(client_no, config, start_at, queue):
+    """
+    start_at(time.time())부터 duration초 동안 송금을 반복
+
+    interval초마다 (client_no, 구간 번호, 히스토그램, 카운터)를 queue로 보내고,
+    끝나면 (client_no, None, None, None)을 보냅니다.
+    """
+    rng = random.Random(config['seed'] * 10_007 + client_no)
+    names, weights = zip(*config['mix'].items())
+    ids = config['ids']
+    interval = config['interval']
+    deadline = start_at + config['duration']
+
+    conn = get_connection(isolation_level=config['isolation'])
+    cur = conn.cursor()
+    try:
+        wait_for_start(start_at)
+
+        interval_no = 0
+        next_flush = start_at + interval
+        stats = IntervalStats()
+        while True:
+            now = time.time()
+            if now >= next_flush or now >= deadline:
+                queue.put((client_no, interval_no) + stats.to_message())
+                stats = IntervalStats()
+                interval_no += 1
+                next_flush += interval
+                if now >= deadline:
+                    break
+
+            strategy = rng.choices(names, weights)[0]
+            src, dst = rng.sample(ids, 2)
+            amount = rng.randint(1, 100)
+            counts = stats.counts[strategy]
+
+            start = time.perf_counter_ns()
+            for _ in range(MAX_RETRIES + 1):
+                try:
+                    TRANSFERS[strategy](cur, src, dst, amount)
+                    conn.commit()
+                    counts[0] += 1
+                    break
+                except RETRYABLE + (VersionConflict,):
+                    conn.rollback()
+                    counts[1] += 1
+            else:
+                counts[2] += 1
+            stats.hists[strategy].record_ns(time.perf_counter_ns() - start)
+    finally:
+        cur.close()
+        conn.close()
+        queue.put((client_no, None, None, None))
+
+
+# ----------------------------------------------------------------------
+# 부하 실행
+# ----------------------------------------------------------------------
+
+def prepare_accounts(count):
+    """부하용 계좌를 count개로 맞추고 송금 대상 id 목록을 반환"""
+    if count <= 0:
+        return [row[0] for row in run_sql("SELECT id FROM accounts ORDER BY id")]
+
+    rows = run_sql("SELECT id FROM accounts WHERE name LIKE %s ORDER BY id",
+                   (LOAD_ACCOUNT_PATTERN,))
+    if len(rows) < count:
+        run_sql("""
+            INSERT INTO accounts (name, balance)
+            SELECT %s || n, %s FROM generate_series(%s, %s) n
+        """, (LOAD_ACCOUNT_PREFIX, LOAD_ACCOUNT_BALANCE, len(rows) + 1, count))
+        rows = run_sql("SELECT id FROM accounts WHERE name LIKE %s ORDER BY id",
+                       (LOAD_ACCOUNT_PATTERN,))
+    return [row[0] for row in rows[:count]]
+
+
+def drop_load_accounts():
+    run_sql("DELETE FROM accounts WHERE name LIKE %s", (LOAD_ACCOUNT_PATTERN,))
+
+
+def total_balance(ids):
+    return run_sql("SELECT sum(balance) FROM accounts WHERE id = ANY(%s)", (ids,))[0][0]
+
+
+def _format_ms(us):
+    return f"{us / 1000:.2f}"
+
+
+def run_workload(clients, config, show_timeline=True):
+    """
+    clients개 프로세스로 config['duration']초 동안 부하를 걸고 결과를 반환
+
+    반환값: {'clients', 'elapsed', 'strategies': {방식: (히스토그램, [커밋, 재시도, 실패])},
+             'timeline': [구간별 요약, ...]}
+    """
+    queue = multiprocessing.Queue()
+    start_at = start_time()
+    procs = [
+        multiprocessing.Process(target=_client, args=(n, config, start_at, queue), daemon=True)
+        for n in range(clients)
+    ]
+    for proc in procs:
+        proc.start()
+
+    totals = {name: (LatencyHistogram(), [0, 0, 0]) for name in STRATEGIES}
+    pending = {}       # 구간 번호 → [보고한 클라이언트 수, 히스토그램, 커밋, 재시도]
+    timeline = []
+    running = clients
+    next_interval = 0
+
+    def flush_ready(force=False):
+        # 모든 클라이언트가 보고한 구간부터 순서대로 출력
+        nonlocal next_interval
+        while next_interval in pending and (force or pending[next_interval][0] >= clients):
+            _, hist, committed, retries = pending.pop(next_interval)
+            point = {
+                't': (next_interval + 1) * config['interval'],
+                'tps': committed / config['interval'],
+                'retries': retries,
+                **hist.summary((50, 99, 99.9)),
+            }
+            timeline.append(point)
+            if show_timeline:
+                print(f"  {point['t']:>5.0f}초  {point['tps']:>9,.0f} tps  "
+                      f"p50 {_format_ms(point['p50']):>8}ms  p99 {_format_ms(point['p99']):>8}ms  "
+                      f"p99.9 {_format_ms(point['p99.9']):>8}ms  재시도 {retries:,}")
+            next_interval += 1
+
+    while running:
+        client_no, interval_no, hists, counts = queue.get()
+        if interval_no is None:
+            running -= 1
+            continue
+        slot = pending.setdefault(interval_no, [0, LatencyHistogram(), 0, 0])
+        slot[0] += 1
+        for name, data in hists.items():
+            hist = LatencyHistogram.from_dict(data)
+            slot[1].merge(hist)
+            totals[name][0].merge(hist)
+        for name, (committed, retries, failed) in counts.items():
+            slot[2] += committed
+            slot[3] += retries
+            total = totals[name][1]
+            total[0] += committed
+            total[1] += retries
+            total[2] += failed
+        flush_ready()
+    flush_ready(force=True)
+
+    for proc in procs:
+        proc.join()
+    return {
+        'clients': clients,
+        'elapsed': config['duration'],
+        'strategies': totals,
+        'timeline': timeline,
+    }
+
+
+def print_strategy_summary(result):
+    rows = []
+    for name, (hist, (committed, retries, failed)) in result['strategies'].items():
+        if not hist.count:
+            continue
+        s = hist.summary((50, 99, 99.9))
+        rows.append((name, f"{committed:,}", f"{committed / result['elapsed']:,.0f}",
+                     _format_ms(s['p50']), _format_ms(s['p99']), _format_ms(s['p99.9']),
+                     _format_ms(s['max']), f"{retries:,}", f"{failed:,}"))
+    print(tabulate(rows, headers=['방식', '커밋', 'tps', 'p50 ms', 'p99 ms', 'p99.9 ms',
+                                  'max ms', '재시도', '실패'], tablefmt='psql'))
+
+
+def print_scaling(results):
+    rows = []
+    for result in results:
+        hist = LatencyHistogram()
+        committed = retries = 0
+        for h, counts in result['strategies'].values():
+            hist.merge(h)
+            committed += counts[0]
+            retries += counts[1]
+        s = hist.summary((50, 99, 99.9))
+        attempts = committed + retries
+        rows.append((result['clients'], f"{committed / result['elapsed']:,.0f}",
+                     _format_ms(s['p50']), _format_ms(s['p99']), _format_ms(s['p99.9']),
+                     f"{retries / attempts * 100 if attempts else 0:.1f}%"))
+    print(tabulate(rows, headers=['클라이언트', 'tps', 'p50 ms', 'p99 ms', 'p99.9 ms', '재시도율'],
+                   tablefmt='psql'))
+
+
+def save_results(results, config, path=None):
+    """결과를 JSON으로 저장 (히스토그램 버킷 포함)"""
+    if path is None:
+        path = os.path.join(timing.RESULTS_DIR, f"workload_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = {
+        'config': {k: v for k, v in config.items() if k != 'ids'},
+        'accounts': len(config['ids']),
+        'runs': [
+            {
+                'clients': r['clients'],
+                'duration': r['elapsed'],
+                'timeline': r['timeline'],
+                'strategies': {
+                    name: {'committed': c[0], 'retries': c[1], 'failed': c[2],
+                           'summary': h.summary(), 'histogram': h.to_dict()}
+                    for name, (h, c) in r['strategies'].items() if h.count
+                },
+            }
+            for r in results
+        ],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def parse_mix(text):
+    """'update=2,optimistic=1' → {'update': 2.0, 'optimistic': 1.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in TRANSFERS:
+            raise argparse.ArgumentTypeError(f"알 수 없는 송금 방식: {name} ({', '.join(STRATEGIES)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("비율이 모두 0입니다")
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py workload',
+                                     description='accounts 송금 부하를 여러 프로세스로 실행합니다.')
+    parser.add_argument('-c', '--clients', type=int, nargs='+', default=[8],
+                        help='클라이언트 프로세스 수 (여러 개면 차례로 실행해 확장성 비교)')
+    parser.add_argument('-d', '--duration', type=float, default=30.0, help='단계별 실행 시간(초)')
+    parser.add_argument('-i', '--interval', type=float, default=1.0, help='타임라인 구간(초)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'송금 방식 비율 (기본: {DEFAULT_MIX})')
+    parser.add_argument('--accounts', type=int, default=100,
+                        help='부하용 계좌 수, 적을수록 경합이 심함 (0 = 기존 계좌 사용)')
+    parser.add_argument('--isolation', default='READ COMMITTED',
+                        choices=['READ COMMITTED', 'REPEATABLE READ', 'SERIALIZABLE'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep-accounts', action='store_true', help='부하용 계좌를 삭제하지 않음')
+    parser.add_argument('--output', help='결과 JSON 경로 (기본: labs/results/workload_*.json)')
+    args = parser.parse_args(argv)
+
+    ids = prepare_accounts(args.accounts)
+    if len(ids) < 2:
+        print("송금할 계좌가 2개 이상 필요합니다.")
+        return 1
+
+    config = {
+        'duration': args.duration,
+        'interval': args.interval,
+        'mix': args.mix,
+        'isolation': args.isolation,
+        'seed': args.seed,
+        'ids': ids,
+    }
+    mix_text = ', '.join(f"{k}={v:g}" for k, v in args.mix.items())
+    print(f"송금 부하: 계좌 {len(ids)}개, {mix_text}, {args.isolation}")
+
+    results = []
+    balance_before = total_balance(ids)
+    try:
+        for clients in args.clients:
+            print(f"\n=== 클라이언트 {clients}개, {args.duration:g}초 ===")
+            result = run_workload(clients, config)
+            print()
+            print_strategy_summary(result)
+            results.append(result)
+    except psycopg2.Error as e:
+        print(f"부하 실행 실패: {e}")
+        return 1
+    finally:
+        balance_after = total_balance(ids)
+        if not args.keep_accounts and args.accounts > 0:
+            drop_load_accounts()
+
+    if len(results) > 1:
+        print("\n=== 클라이언트 수별 확장성 ===")
+        print_scaling(results)
+
+    if balance_before == balance_after:
+        print(f"\n잔액 합계 유지: {balance_after:,}")
+    else:
+        print(f"\n잔액 합계 불일치: {balance_before:,} → {balance_after:,} (갱신 손실!)")
+
+    path = save_results(results, config, args.output)
+    print(f"결과 저장: {path}")
+    return 0 if balance_before == balance_after else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
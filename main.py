@@ -1,6 +1,59 @@
-def main():
-    print("Hello from postgresql-study!")
+"""
+PostgreSQL MVCC & Performance 학습 프로젝트 실행기
+
+각 lab은 `python labs/labNN_*.py`로 하나씩 실행하고,
+여러 lab에 걸친 도구는 이 파일의 하위 명령으로 실행합니다.
+
+    python main.py run [옵션]     # 모든 lab 시나리오 병렬 실행
+    python main.py <명령> -h      # 명령별 도움말
+"""
+
+import importlib
+import os
+import sys
+
+LABS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'labs')
+sys.path.insert(0, LABS_DIR)
+
+# 하위 명령 → (모듈, 설명)
+COMMANDS = {
+    'run': ('tools.runner', '모든 lab 시나리오를 워커별 복제 DB에서 병렬 실행'),
+    'snapshot': ('tools.snapshot', '템플릿/COPY 스냅샷으로 DB를 빠르게 리셋'),
+    'datagen': ('tools.datagen', 'scale factor에 맞춰 실습 테이블을 COPY로 병렬 생성'),
+    'workload': ('tools.workload', 'accounts 송금 부하 실행, 처리량과 p99 지연 시간 측정'),
+    'bench': ('tools.bench', 'lab08/lab09 쿼리의 실행 계획/시간을 기준선과 비교'),
+    'statements': ('tools.statements', 'pg_stat_statements 구간 델타 수집과 상위 쿼리 조회'),
+    'dashboard': ('tools.dashboard', '통계 뷰를 주기적으로 읽어 실시간 대시보드 갱신'),
+    'waitprof': ('tools.waitprof', 'pg_stat_activity 샘플링으로 쿼리별 대기 이벤트 프로파일'),
+    'locks': ('tools.locks', '락 대기 그래프(root blocker, 연쇄, cycle) 감시와 v_lock_waits 비교'),
+    'heapscan': ('tools.heapscan', 'raw 힙 페이지를 클라이언트에서 해석해 튜플 헤더 요약'),
+    'bloatscan': ('tools.bloatscan', '테이블 전체 페이지 병렬 스캔, dead tuple 히트맵과 빈 공간 분포'),
+    'btreescan': ('tools.btreescan', 'B-tree 전체 탐색: 레벨별 fanout, 리프 채움률, 중복 제거, 분할 구간'),
+    'brinscan': ('tools.brinscan', 'BRIN 범위 overlap/선택도 분석, pages_per_range 스윕'),
+    'ginbench': ('tools.ginbench', 'GIN fastupdate/pending list 설정별 쓰기 처리량과 지연 스파이크'),
+    'advisor': ('tools.advisor', 'pg_stat_statements 상위 쿼리로 후보 인덱스를 복제 DB에서 측정해 추천'),
+    'indexdup': ('tools.indexdup', '다른 인덱스가 대신할 수 있는 중복/겹치는 인덱스와 그 쓰기 비용'),
+    'hottune': ('tools.hottune', 'fillfactor별 지속 UPDATE 부하로 HOT 비율/크기 증가를 비교해 fillfactor 추천'),
+}
+
+
+def print_usage():
+    print("사용법: python main.py <명령> [옵션]\n")
+    print("명령:")
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<12} {description}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print_usage()
+        return 0 if not argv or argv[0] in ('-h', '--help') else 2
+
+    module_name, _ = COMMANDS[argv[0]]
+    module = importlib.import_module(module_name)
+    return module.main(argv[1:])
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -53,6 +53,7 @@ WHERE state != 'idle'
   AND pid != pg_backend_pid();
 
 -- 유용한 뷰: 락 대기 상황 확인
+-- (pg_locks 자기 조인이라 락이 많으면 느림. 연쇄/교착 분석은 python main.py locks watch)
 CREATE VIEW v_lock_waits AS
 SELECT
     blocked.pid AS blocked_pid,
@@ -90,6 +91,8 @@ ANALYZE doctors_on_call;
 CREATE EXTENSION IF NOT EXISTS pg_stat_statements;
 CREATE EXTENSION IF NOT EXISTS pgstattuple;
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS pg_prewarm;      -- 웜 캐시 측정 (common.cache)
+CREATE EXTENSION IF NOT EXISTS pg_buffercache;  -- 콜드 캐시 확인 (common.cache)
 
 -- Lab 07: 인덱스 MVCC 실습용
 CREATE TABLE index_mvcc_test (